@@ -126,30 +126,13 @@ class ChannelIntegration:
                 if channel_type:
                     channel_types.append(channel_type)
         
-        # Get messages from storage
-        messages = []
-        if channel_types:
-            for channel_type in channel_types:
-                channel_messages = self._storage.get_messages(
-                    session_id, 
-                    channel_type,
-                    limit=limit,
-                    since_sequence=since_sequence
-                )
-                messages.extend(channel_messages)
-        else:
-            messages = self._storage.get_messages(
-                session_id,
-                limit=limit,
-                since_sequence=since_sequence
-            )
-        
-        # Sort by sequence
-        messages.sort(key=lambda m: m.metadata.sequence)
-        
-        # Apply limit after combining all channels
-        if limit:
-            messages = messages[-limit:]
+        # Get messages from storage, merged across the requested channels
+        messages = self._storage.get_messages(
+            session_id,
+            limit=limit,
+            since_sequence=since_sequence,
+            channels=channel_types or None
+        )
         
         # Convert to WebSocket format
         return {
@@ -1,15 +1,87 @@
 """
 Channel Storage for managing channel message history.
+
+Each channel keeps its messages in a ring buffer (``deque(maxlen=...)``),
+so adding to a full channel drops the oldest message in O(1), alongside a
+parallel buffer of sequence numbers. Sequence numbers only grow within a
+session, so ``since_sequence`` queries bisect the sequence buffer and
+multi-channel reads merge the already ordered channels with
+``heapq.merge``: polling for k new messages costs O(k + log n) instead of
+copying and sorting the whole history. A channel that receives an
+out-of-order sequence falls back to sorting until it is cleared.
 """
 
+import heapq
 import logging
-from typing import Dict, List, Optional, Set
-from collections import defaultdict
+from bisect import bisect_right
+from collections import defaultdict, deque
+from itertools import islice
+from typing import Deque, Dict, Iterable, List, Optional, Set
 from datetime import datetime, timedelta, timezone
 
+from ai_whisperer.core.log_pipeline import SampledLogger
+
 from .types import ChannelType, ChannelMessage
 
 logger = logging.getLogger(__name__)
+# add_message runs for every streamed chunk
+_chunk_logger = SampledLogger(logger)
+
+
+def _sequence(message: ChannelMessage) -> int:
+    return message.metadata.sequence
+
+
+class ChannelBuffer:
+    """Ring buffer of one channel's messages with a sequence index."""
+
+    __slots__ = ("messages", "sequences", "ordered")
+
+    def __init__(self, max_messages: int):
+        self.messages: Deque[ChannelMessage] = deque(maxlen=max_messages)
+        self.sequences: Deque[int] = deque(maxlen=max_messages)
+        # False once a message arrives with a lower sequence than the last one
+        self.ordered = True
+
+    def append(self, message: ChannelMessage) -> None:
+        sequence = message.metadata.sequence
+        if self.sequences and sequence < self.sequences[-1]:
+            self.ordered = False
+        self.messages.append(message)
+        self.sequences.append(sequence)
+
+    def clear(self) -> None:
+        self.messages.clear()
+        self.sequences.clear()
+        self.ordered = True
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def tail(self, count: int) -> List[ChannelMessage]:
+        """The last ``count`` messages, oldest first."""
+        if count >= len(self.messages):
+            return list(self.messages)
+        tail = list(islice(reversed(self.messages), count))
+        tail.reverse()
+        return tail
+
+    def select(self, since_sequence: Optional[int] = None, limit: Optional[int] = None) -> List[ChannelMessage]:
+        """
+        Messages after ``since_sequence``, ordered by sequence, keeping the last ``limit``.
+        """
+        if not self.ordered:
+            messages = sorted(self.messages, key=_sequence)
+            if since_sequence is not None:
+                messages = [m for m in messages if m.metadata.sequence > since_sequence]
+            return messages[-limit:] if limit else messages
+
+        count = len(self.messages)
+        if since_sequence is not None:
+            count -= bisect_right(self.sequences, since_sequence)
+        if limit:
+            count = min(count, limit)
+        return self.tail(count)
 
 
 class ChannelStorage:
@@ -24,10 +96,8 @@ class ChannelStorage:
         """
         self.max_messages = max_messages_per_channel
         
-        # Storage structure: {session_id: {channel_type: [messages]}}
-        self._storage: Dict[str, Dict[ChannelType, List[ChannelMessage]]] = defaultdict(
-            lambda: defaultdict(list)
-        )
+        # Storage structure: {session_id: {channel_type: ChannelBuffer}}
+        self._storage: Dict[str, Dict[ChannelType, ChannelBuffer]] = defaultdict(dict)
         
         # Track active sessions
         self._active_sessions: Set[str] = set()
@@ -37,23 +107,23 @@ class ChannelStorage:
     
     def add_message(self, session_id: str, message: ChannelMessage) -> None:
         """Add a message to channel storage."""
-        channel_messages = self._storage[session_id][message.channel]
-        channel_messages.append(message)
-        
-        # Enforce size limit
-        if len(channel_messages) > self.max_messages:
-            # Remove oldest messages
-            channel_messages[:] = channel_messages[-self.max_messages:]
+        channels = self._storage[session_id]
+        buffer = channels.get(message.channel)
+        if buffer is None:
+            buffer = channels[message.channel] = ChannelBuffer(self.max_messages)
+        # The ring buffer drops the oldest message once the channel is full
+        buffer.append(message)
         
         self._active_sessions.add(session_id)
-        logger.debug(f"Added {message.channel.value} message to session {session_id}")
+        _chunk_logger.debug("Added %s message to session %s", message.channel.value, session_id)
     
     def get_messages(
         self, 
         session_id: str, 
         channel: Optional[ChannelType] = None,
         limit: Optional[int] = None,
-        since_sequence: Optional[int] = None
+        since_sequence: Optional[int] = None,
+        channels: Optional[Iterable[ChannelType]] = None
     ) -> List[ChannelMessage]:
         """
         Get messages from storage.
@@ -63,6 +133,7 @@ class ChannelStorage:
             channel: Specific channel to filter by (None for all)
             limit: Maximum number of messages to return
             since_sequence: Only return messages after this sequence number
+            channels: Several channels to merge (ignored if ``channel`` is given)
             
         Returns:
             List of channel messages
@@ -70,30 +141,29 @@ class ChannelStorage:
         if session_id not in self._storage:
             return []
         
-        messages = []
-        
         if channel:
-            # Get messages from specific channel
-            channel_messages = self._storage[session_id].get(channel, [])
-            messages.extend(channel_messages)
-        else:
-            # Get messages from all channels
-            for channel_type in ChannelType:
-                channel_messages = self._storage[session_id].get(channel_type, [])
-                messages.extend(channel_messages)
-        
-        # Filter by sequence number if specified
-        if since_sequence is not None:
-            messages = [m for m in messages if m.metadata.sequence > since_sequence]
-        
-        # Sort by sequence
-        messages.sort(key=lambda m: m.metadata.sequence)
-        
-        # Apply limit
-        if limit:
-            messages = messages[-limit:]
-        
-        return messages
+            channels = [channel]
+        elif channels is None:
+            channels = ChannelType
+        return self._merge(session_id, channels, limit, since_sequence)
+    
+    def _merge(
+        self,
+        session_id: str,
+        channels: Iterable[ChannelType],
+        limit: Optional[int],
+        since_sequence: Optional[int]
+    ) -> List[ChannelMessage]:
+        session = self._storage.get(session_id, {})
+        # Each channel contributes at most ``limit`` messages to the merged tail
+        runs = [session[ch].select(since_sequence, limit) for ch in channels if session.get(ch)]
+        if not runs:
+            return []
+        if len(runs) == 1:
+            return runs[0]
+        # Stable across channels: equal sequences keep channel order, as a sort of the concatenation would
+        messages = list(heapq.merge(*runs, key=_sequence))
+        return messages[-limit:] if limit else messages
     
     def get_channel_messages(
         self, 
@@ -111,23 +181,11 @@ class ChannelStorage:
         limit: Optional[int] = None
     ) -> List[ChannelMessage]:
         """Get messages that should be visible to users."""
-        messages = []
-        
-        # Always include final channel
-        messages.extend(self.get_channel_messages(session_id, ChannelType.FINAL))
-        
-        # Optionally include commentary
+        # Always include final channel, optionally commentary
+        channels = [ChannelType.FINAL]
         if include_commentary:
-            messages.extend(self.get_channel_messages(session_id, ChannelType.COMMENTARY))
-        
-        # Sort by sequence
-        messages.sort(key=lambda m: m.metadata.sequence)
-        
-        # Apply limit
-        if limit:
-            messages = messages[-limit:]
-        
-        return messages
+            channels.append(ChannelType.COMMENTARY)
+        return self._merge(session_id, channels, limit, None)
     
     def clear_session(self, session_id: str) -> None:
         """Clear all messages for a session."""
@@ -151,8 +209,8 @@ class ChannelStorage:
         
         stats = {}
         for channel in ChannelType:
-            messages = self._storage[session_id].get(channel, [])
-            stats[f"{channel.value}_count"] = len(messages)
+            buffer = self._storage[session_id].get(channel)
+            stats[f"{channel.value}_count"] = len(buffer) if buffer else 0
         
         return stats
     
@@ -174,9 +232,9 @@ class ChannelStorage:
             # Get latest message time
             latest_time = None
             for channel in ChannelType:
-                messages = self._storage[session_id].get(channel, [])
-                if messages:
-                    channel_latest = messages[-1].metadata.timestamp
+                buffer = self._storage[session_id].get(channel)
+                if buffer:
+                    channel_latest = buffer.messages[-1].metadata.timestamp
                     if latest_time is None or channel_latest > latest_time:
                         latest_time = channel_latest
             
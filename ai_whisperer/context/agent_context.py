@@ -2,6 +2,8 @@ from ai_whisperer.context.provider import ContextProvider
 import json
 import logging
 
+from ai_whisperer.utils import json_codec
+
 logger = logging.getLogger(__name__)
 
 SERIALIZATION_VERSION = "1.0"
@@ -30,7 +32,7 @@ class AgentContext(ContextProvider):
             raise ValueError(f"Message must be a string or dict, got {type(message)}")
         
         self._messages.append(message)
-        logger.info(f"🔍 CONTEXT TRACE [{self.agent_id}]: Total stored messages now: {len(self._messages)}")
+        logger.debug("🔍 CONTEXT TRACE [%s]: Total stored messages now: %d", self.agent_id, len(self._messages))
 
     def retrieve_messages(self):
         """Retrieve all messages including the system prompt as the first message."""
@@ -39,13 +41,16 @@ class AgentContext(ContextProvider):
         # Include system prompt as first message if available
         system_prompt = self.get_system_prompt()
         
-        # ENHANCED LOGGING
-        logger.info(f"🔍 CONTEXT TRACE [{self.agent_id}]: Retrieving messages")
-        logger.info(f"🔍 CONTEXT TRACE [{self.agent_id}]: System prompt exists: {system_prompt is not None}")
-        if system_prompt:
-            logger.info(f"🔍 CONTEXT TRACE [{self.agent_id}]: System prompt type: {type(system_prompt)}")
-            logger.info(f"🔍 CONTEXT TRACE [{self.agent_id}]: System prompt length: {len(str(system_prompt))}")
-            logger.info(f"🔍 CONTEXT TRACE [{self.agent_id}]: System prompt preview: {str(system_prompt)[:100]}...")
+        # ENHANCED LOGGING (called for every AI round, so only built when debugging)
+        trace = logger.isEnabledFor(logging.DEBUG)
+        if trace:
+            logger.debug("🔍 CONTEXT TRACE [%s]: Retrieving messages", self.agent_id)
+            logger.debug("🔍 CONTEXT TRACE [%s]: System prompt exists: %s", self.agent_id, system_prompt is not None)
+            if system_prompt:
+                prompt_text = str(system_prompt)
+                logger.debug("🔍 CONTEXT TRACE [%s]: System prompt type: %s", self.agent_id, type(system_prompt))
+                logger.debug("🔍 CONTEXT TRACE [%s]: System prompt length: %d", self.agent_id, len(prompt_text))
+                logger.debug("🔍 CONTEXT TRACE [%s]: System prompt preview: %s...", self.agent_id, prompt_text[:100])
         
         if system_prompt:
             # Ensure system prompt is always returned as a dict
@@ -67,10 +72,11 @@ class AgentContext(ContextProvider):
         messages.extend(self._messages)
         
         # ENHANCED LOGGING
-        logger.info(f"🔍 CONTEXT TRACE [{self.agent_id}]: Total messages: {len(messages)}")
-        logger.info(f"🔍 CONTEXT TRACE [{self.agent_id}]: Stored messages: {len(self._messages)}")
-        if messages:
-            logger.info(f"🔍 CONTEXT TRACE [{self.agent_id}]: First message role: {messages[0].get('role', 'unknown')}")
+        if trace:
+            logger.debug("🔍 CONTEXT TRACE [%s]: Total messages: %d", self.agent_id, len(messages))
+            logger.debug("🔍 CONTEXT TRACE [%s]: Stored messages: %d", self.agent_id, len(self._messages))
+            if messages:
+                logger.debug("🔍 CONTEXT TRACE [%s]: First message role: %s", self.agent_id, messages[0].get('role', 'unknown'))
         
         return messages
 
@@ -126,14 +132,14 @@ class AgentContext(ContextProvider):
             "version": self._version,
             "context": self._context
         }
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(data, f)
+        with open(file_path, "wb") as f:
+            f.write(json_codec.dumpb(data))
 
     @classmethod
     def load_from_file(cls, file_path):
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            with open(file_path, "rb") as f:
+                data = json_codec.loads(f.read())
             if "context" not in data or "version" not in data:
                 raise ValueError("Missing required fields in context file")
             obj = cls.from_dict(data["context"], version=data["version"])
@@ -6,6 +6,7 @@ from typing import Dict, List, Optional, Tuple
 import re
 
 from ai_whisperer.context.context_item import ContextItem
+from ai_whisperer.utils.file_cache import get_file_cache
 from ai_whisperer.utils.path import PathManager
 
 logger = logging.getLogger(__name__)
@@ -63,35 +64,29 @@ class AgentContextManager:
             if not self.path_manager.is_path_within_workspace(str(file_path_obj)):
                 raise ValueError(f"File is outside workspace: {file_path}")
             
-            # Get file stats
-            stat = file_path_obj.stat()
-            file_size = stat.st_size
-            file_mtime = datetime.fromtimestamp(stat.st_mtime)
-            
-            # Read file content
+            # Read file content (shared cache, revalidated against the file's mtime and size)
             try:
-                with open(file_path_obj, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-                    total_lines = len(lines)
-                    
-                    # Apply line range if specified
-                    if line_range:
-                        start_line, end_line = line_range
-                        # Validate line numbers
-                        if start_line < 1 or start_line > total_lines:
-                            raise ValueError(f"Invalid start line: {start_line}")
-                        if end_line < start_line:
-                            raise ValueError(f"End line must be >= start line")
-                        
-                        # Extract lines (convert to 0-based)
-                        selected_lines = lines[start_line-1:end_line]
-                        content = ''.join(selected_lines)
-                    else:
-                        content = ''.join(lines)
-                        
+                cached = get_file_cache().get(file_path_obj)
             except UnicodeDecodeError:
                 raise ValueError(f"Cannot read binary file: {file_path}")
             
+            file_size = cached.size
+            file_mtime = datetime.fromtimestamp(cached.mtime)
+            total_lines = cached.line_count
+            
+            # Apply line range if specified
+            if line_range:
+                start_line, end_line = line_range
+                # Validate line numbers
+                if start_line < 1 or start_line > total_lines:
+                    raise ValueError(f"Invalid start line: {start_line}")
+                if end_line < start_line:
+                    raise ValueError(f"End line must be >= start line")
+                
+                content = cached.slice(start_line, end_line)
+            else:
+                content = cached.text
+            
             # Detect language from extension
             language_map = {
                 '.py': 'python',
@@ -204,6 +199,35 @@ class AgentContextManager:
         
         return items
     
+    async def aprocess_message_references(self, agent_id: str, message: str) -> List[ContextItem]:
+        """Async version of process_message_references.
+        
+        The referenced files are read concurrently, off the event loop,
+        before the context items are built from the cache.
+        
+        Args:
+            agent_id: Agent identifier
+            message: User message with potential @ references
+            
+        Returns:
+            List of created ContextItems
+        """
+        references = self.parse_file_references(message)
+        if not references:
+            return []
+        
+        paths = []
+        for file_path, _ in references:
+            try:
+                resolved = Path(self.path_manager.resolve_path(file_path))
+                if self.path_manager.is_path_within_workspace(str(resolved)):
+                    paths.append(resolved)
+            except Exception:
+                pass  # Reported by add_file_reference below
+        await get_file_cache().aget_many(paths)
+        
+        return self.process_message_references(agent_id, message)
+    
     def get_agent_context(self, agent_id: str) -> List[ContextItem]:
         """Get all context items for an agent.
         
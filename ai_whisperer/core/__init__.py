@@ -5,4 +5,5 @@ This package contains fundamental components:
 - config: Configuration management
 - exceptions: Exception hierarchy
 - logging: Logging setup and utilities
+- log_pipeline: Non-blocking queued logging, rate limiting and JSON output
 """
@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
 """Custom exception types for the AI Whisperer application."""
-import requests  # Import requests to potentially include response info in errors
-import jsonschema  # Import jsonschema for validation error handling
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    # Imported lazily: both are slow to import and only needed once an error is built
+    import requests
 
 
 class AIWhispererError(Exception):
@@ -32,7 +35,7 @@ class OpenRouterAIServiceError(AIWhispererError):
         response: The requests.Response object, if available.
     """
 
-    def __init__(self, message: str, status_code: int | None = None, response: requests.Response | None = None):
+    def __init__(self, message: str, status_code: int | None = None, response: "requests.Response | None" = None):
         super().__init__(message)
         self.status_code = status_code
         self.response = response  # Store the response for potential debugging
@@ -94,6 +97,8 @@ class YAMLValidationError(AIWhispererError):
     """Custom exception for YAML validation errors."""
 
     def __init__(self, validation_errors: list):
+        import jsonschema
+
         # Ensure validation_errors is a list of ValidationError objects
         if not isinstance(validation_errors, list) or not all(
             isinstance(err, jsonschema.exceptions.ValidationError) for err in validation_errors
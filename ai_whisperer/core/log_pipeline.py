@@ -0,0 +1,339 @@
+"""
+Non-blocking logging pipeline.
+
+With the handlers attached directly to the root logger, every log call
+formats its record and writes it to the console and up to three files on
+the calling thread, so logging on the streaming path stalls the event
+loop behind disk I/O. This module moves that work to a background thread
+and keeps hot-path logging cheap:
+
+- The root logger gets a single NonBlockingQueueHandler that hands records
+  to a bounded queue without formatting them. A QueueListener thread runs
+  the real handlers (files, console). When the queue is full, records are
+  dropped and counted rather than blocking the caller.
+- RateLimitFilter caps chatty call sites configured by logger name. It
+  limits each call site (logger and line) to a token bucket, and the next
+  record that passes reports how many similar records were suppressed.
+- SampledLogger wraps a logger for per-token call sites. Its token bucket
+  is checked before a LogRecord is built, so a suppressed call costs a
+  fraction of a microsecond.
+- JSONFormatter writes one JSON object per line, including the structured
+  fields passed through ``extra`` (LogMessage.to_dict()).
+
+Environment:
+    AIWHISPERER_LOG_ASYNC=0     Attach handlers synchronously, as before
+    AIWHISPERER_LOG_FORMAT=json Write log files as JSON lines
+
+Key Components:
+- start_log_pipeline / stop_log_pipeline: Run handlers on a listener thread
+- NonBlockingQueueHandler: Bounded, non-blocking queue handler
+- RateLimitFilter: Per-call-site rate limiting configured by logger name
+- SampledLogger: Rate-limited logger for per-token hot paths
+- JSONFormatter: Structured JSON-lines output
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, List, Optional
+
+from ai_whisperer.utils import json_codec
+
+LOG_ASYNC_ENV = "AIWHISPERER_LOG_ASYNC"
+LOG_FORMAT_ENV = "AIWHISPERER_LOG_FORMAT"
+
+DEFAULT_QUEUE_SIZE = 100_000
+
+_monotonic = time.monotonic
+
+# Per-call-site limits (records per second) for loggers known to log per request or per chunk
+DEFAULT_RATE_LIMITS: Dict[str, float] = {
+    "ai_whisperer.context.agent_context": 20.0,
+}
+
+# Attributes every LogRecord has; anything else on a record came from ``extra``
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class _TokenBucket:
+    """Allows ``rate`` events per second with bursts of up to ``burst``."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated", "next_token", "suppressed")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = _monotonic()
+        self.next_token = 0.0
+        self.suppressed = 0
+
+    def take(self) -> bool:
+        if self.tokens < 1.0:
+            # Hot path while limited: one clock read and a comparison
+            now = _monotonic()
+            if now < self.next_token:
+                self.suppressed += 1
+                return False
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1.0:
+                self.next_token = now + (1.0 - self.tokens) / self.rate
+                self.suppressed += 1
+                return False
+        self.tokens -= 1.0
+        return True
+
+    def drain_suppressed(self) -> int:
+        count = self.suppressed
+        self.suppressed = 0
+        return count
+
+
+class JSONFormatter(logging.Formatter):
+    """Formats records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data: Dict[str, Any] = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.process,
+            "thread": record.threadName,
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                data[key] = value
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exception"] = record.exc_text
+        if record.stack_info:
+            data["stack"] = self.formatStack(record.stack_info)
+        return json_codec.dumps(data, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Queue handler that never blocks and leaves formatting to the listener.
+
+    The stdlib QueueHandler formats every record on the calling thread;
+    this one only resolves ``%`` arguments and exception tracebacks, which
+    cannot safely cross threads, and drops records when the queue is full.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Rate limits records per call site for the configured loggers.
+
+    Args:
+        limits: Logger name prefix -> records per second allowed from each
+            call site under that logger
+        burst: Bucket size, as a multiple of the rate
+    """
+
+    def __init__(self, limits: Dict[str, float], burst: float = 2.0):
+        super().__init__()
+        self.limits = dict(limits)
+        self.burst = burst
+        self._buckets: Dict[tuple, _TokenBucket] = {}
+        self._rate_cache: Dict[str, Optional[float]] = {}
+        self._lock = threading.Lock()
+
+    def _rate_for(self, name: str) -> Optional[float]:
+        try:
+            return self._rate_cache[name]
+        except KeyError:
+            rate = None
+            matched = ""
+            for prefix, limit in self.limits.items():
+                if (name == prefix or name.startswith(prefix + ".")) and len(prefix) > len(matched):
+                    rate, matched = limit, prefix
+            self._rate_cache[name] = rate
+            return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self._rate_for(record.name)
+        if rate is None:
+            return True
+        key = (record.name, record.pathname, record.lineno)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = _TokenBucket(rate, max(1.0, rate * self.burst))
+            if not bucket.take():
+                return False
+            suppressed = bucket.drain_suppressed()
+        if suppressed:
+            record.suppressed = suppressed
+            record.msg = f"{record.getMessage()} ({suppressed} similar messages suppressed)"
+            record.args = None
+        return True
+
+    @property
+    def suppressed(self) -> int:
+        """Records currently being held back across all call sites."""
+        return sum(bucket.suppressed for bucket in self._buckets.values())
+
+
+class SampledLogger:
+    """
+    Rate-limited view of a logger for call sites that run per chunk or token.
+
+    The check happens before a LogRecord is created, so suppressed calls
+    cost almost nothing. Use lazy ``%`` arguments rather than f-strings at
+    these call sites so suppressed calls do not pay for formatting either.
+
+    Args:
+        logger: Logger to emit through
+        rate: Records per second allowed
+        burst: Records allowed at once before the rate applies
+    """
+
+    def __init__(self, logger: logging.Logger, rate: float = 10.0, burst: float = 20.0):
+        self.logger = logger
+        self._bucket = _TokenBucket(rate, burst)
+
+    # The level methods inline the limited-bucket check: it is the path taken per token
+
+    def _log(self, level: int, msg: str, args: tuple, kwargs: Dict[str, Any]) -> None:
+        suppressed = self._bucket.drain_suppressed()
+        if suppressed:
+            msg = f"{msg} ({suppressed} similar messages suppressed)"
+            kwargs["extra"] = {**kwargs.get("extra", {}), "suppressed": suppressed}
+        kwargs.setdefault("stacklevel", 3)
+        self.logger.log(level, msg, *args, **kwargs)
+
+    def debug(self, msg: str, *args, **kwargs) -> None:
+        bucket = self._bucket
+        if bucket.tokens < 1.0 and _monotonic() < bucket.next_token:
+            bucket.suppressed += 1
+        elif self.logger.isEnabledFor(logging.DEBUG) and bucket.take():
+            self._log(logging.DEBUG, msg, args, kwargs)
+
+    def info(self, msg: str, *args, **kwargs) -> None:
+        bucket = self._bucket
+        if bucket.tokens < 1.0 and _monotonic() < bucket.next_token:
+            bucket.suppressed += 1
+        elif self.logger.isEnabledFor(logging.INFO) and bucket.take():
+            self._log(logging.INFO, msg, args, kwargs)
+
+    def warning(self, msg: str, *args, **kwargs) -> None:
+        bucket = self._bucket
+        if bucket.tokens < 1.0 and _monotonic() < bucket.next_token:
+            bucket.suppressed += 1
+        elif self.logger.isEnabledFor(logging.WARNING) and bucket.take():
+            self._log(logging.WARNING, msg, args, kwargs)
+
+    @property
+    def suppressed(self) -> int:
+        return self._bucket.suppressed
+
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[NonBlockingQueueHandler] = None
+_rate_filter: Optional[RateLimitFilter] = None
+_pipeline_lock = threading.Lock()
+
+
+def async_logging_enabled() -> bool:
+    """Whether setup_basic_logging should use the queue pipeline (AIWHISPERER_LOG_ASYNC)."""
+    return os.environ.get(LOG_ASYNC_ENV, "1").strip().lower() not in ("", "0", "false", "no")
+
+
+def json_logging_enabled() -> bool:
+    """Whether log files should be written as JSON lines (AIWHISPERER_LOG_FORMAT)."""
+    return os.environ.get(LOG_FORMAT_ENV, "").strip().lower() == "json"
+
+
+def start_log_pipeline(handlers: List[logging.Handler], max_queue: int = DEFAULT_QUEUE_SIZE,
+                       rate_limits: Optional[Dict[str, float]] = None) -> NonBlockingQueueHandler:
+    """
+    Run handlers on a background listener thread.
+
+    Any pipeline already running is stopped (and flushed) first.
+
+    Args:
+        handlers: Handlers that do the actual formatting and I/O
+        max_queue: Records buffered before new ones are dropped
+        rate_limits: Per-call-site limits by logger name (defaults to DEFAULT_RATE_LIMITS)
+
+    Returns:
+        The handler to attach to the root logger in place of ``handlers``
+    """
+    global _listener, _queue_handler, _rate_filter
+
+    stop_log_pipeline()
+    with _pipeline_lock:
+        log_queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        handler = NonBlockingQueueHandler(log_queue)
+        limits = DEFAULT_RATE_LIMITS if rate_limits is None else rate_limits
+        if limits:
+            _rate_filter = RateLimitFilter(limits)
+            handler.addFilter(_rate_filter)
+        else:
+            _rate_filter = None
+
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        _queue_handler = handler
+        return handler
+
+
+def stop_log_pipeline() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener, _queue_handler
+    with _pipeline_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            try:
+                handler.flush()
+            except Exception:
+                pass
+        _listener = None
+        _queue_handler = None
+
+
+def get_log_pipeline_stats() -> Dict[str, Any]:
+    """Queue depth, dropped and rate-limited record counts."""
+    handler = _queue_handler
+    return {
+        "running": _listener is not None,
+        "queued": handler.queue.qsize() if handler else 0,
+        "dropped": handler.dropped if handler else 0,
+        "rate_limited": _rate_filter.suppressed if _rate_filter else 0,
+    }
+
+
+atexit.register(stop_log_pipeline)
@@ -7,6 +7,14 @@ import yaml
 import os
 import sys
 
+from ai_whisperer.core.log_pipeline import (
+    JSONFormatter,
+    async_logging_enabled,
+    json_logging_enabled,
+    start_log_pipeline,
+    stop_log_pipeline,
+)
+
 class LogLevel(Enum):
     DEBUG = "DEBUG"  # Detailed information, typically of interest only when diagnosing problems.
     INFO = "INFO"  # Confirmation that things are working as expected.
@@ -152,8 +160,10 @@ def setup_basic_logging(port=None):
 
         # Console handler (for server)
         console_handler = logging.StreamHandler()
-        formatter = logging.Formatter(log_format)
-        console_handler.setFormatter(formatter)
+        console_handler.setFormatter(logging.Formatter(log_format))
+
+        # Log files are plain text unless AIWHISPERER_LOG_FORMAT=json
+        formatter = JSONFormatter() if json_logging_enabled() else logging.Formatter(log_format)
 
         # Main server log file (only logs from 'aiwhisperer.server')
         log_dir = "logs"
@@ -190,10 +200,16 @@ def setup_basic_logging(port=None):
         debug_file_handler.setLevel(logging.DEBUG)
         debug_file_handler.setFormatter(formatter)
 
-        # Attach handlers to the root logger
+        # Attach handlers to the root logger. By default they run on a listener thread
+        # behind a queue, so log calls never wait on file or console I/O.
+        handlers = [console_handler, debug_file_handler, server_file_handler, test_file_handler]
         root_logger = logging.getLogger()
         root_logger.setLevel(logging.DEBUG)
-        root_logger.handlers = [console_handler, debug_file_handler, server_file_handler, test_file_handler]
+        if async_logging_enabled():
+            root_logger.handlers = [start_log_pipeline(handlers)]
+        else:
+            stop_log_pipeline()
+            root_logger.handlers = handlers
 
         # Add a log message to confirm logging setup and file paths
         batch_mode_info = f" (batch mode port {batch_port})" if batch_port else ""
@@ -3,6 +3,7 @@ ai_whisperer.extensions.agents - Agent-specific extensions
 
 This extension provides specialized agent features:
 - Task decomposition
+- Plan execution
 - Communication protocols
 - Continuation strategies
 - Prompt optimization
@@ -0,0 +1,352 @@
+"""
+Module: ai_whisperer/extensions/agents/plan_executor.py
+Purpose: Concurrent execution of decomposed plans
+
+TaskDecomposer orders a plan's tasks, but running them one at a time
+leaves independent tasks waiting on each other. PlanExecutor runs a
+decomposed plan as a dependency graph: every task whose dependencies have
+completed is ready, and ready tasks run concurrently on the available
+agents, up to a worker limit. When more tasks are ready than there are
+agents, the one heading the longest remaining chain of work (the critical
+path, weighted by estimated complexity) goes first.
+
+A failed task blocks everything that depends on it, directly or not,
+while independent branches carry on (or everything stops, with
+fail_fast). Cancelling the execution cancels the running tasks and
+returns them to pending; a task that finished before its cancellation
+took effect keeps its outcome.
+
+Progress is checkpointed to disk after every task, with the tasks
+themselves, so an interrupted plan can be resumed with
+PlanExecutor.load_checkpoint() and execute(): completed tasks are not run
+again.
+
+Key Components:
+- PlanExecutor: Runs a decomposed plan's task graph concurrently
+- PlanExecutionResult: Outcome of every task in the plan
+- remaining_path_lengths(): Longest remaining chain from each task
+- critical_path(): The longest chain through a dependency graph
+
+Usage:
+    executor = PlanExecutor(run_task, agents=["claude_code", "roocode"], checkpoint_path=path)
+    result = await executor.execute(decomposer.decompose_plan(plan))
+
+Related:
+- See task_decomposer.py for how plans become DecomposedTasks
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Union
+
+from ai_whisperer.extensions.agents.decomposed_task import DecomposedTask, TaskStatus
+from ai_whisperer.utils.state_journal import StateJournal
+from .agent_e_exceptions import DependencyCycleError, TaskDecompositionError
+
+logger = logging.getLogger(__name__)
+
+# Runs one task on the named agent; returns a result dict ({"success": False, ...} for a failure) or raises
+TaskRunner = Callable[[DecomposedTask, str], Awaitable[Any]]
+
+COMPLEXITY_WEIGHTS = {
+    "trivial": 1.0,
+    "simple": 2.0,
+    "moderate": 3.0,
+    "complex": 5.0,
+    "very_complex": 8.0,
+}
+
+DEFAULT_MAX_WORKERS = 4
+
+
+def _topological_order(dependencies: Dict[str, List[str]]) -> List[str]:
+    """Task IDs with every task after its dependencies."""
+    dependents = defaultdict(list)
+    in_degree = {task_id: 0 for task_id in dependencies}
+    for task_id, deps in dependencies.items():
+        for dep in deps:
+            if dep not in in_degree:
+                raise TaskDecompositionError(f"Missing dependency: {dep}")
+            dependents[dep].append(task_id)
+            in_degree[task_id] += 1
+
+    queue = deque(task_id for task_id, degree in in_degree.items() if degree == 0)
+    order = []
+    while queue:
+        task_id = queue.popleft()
+        order.append(task_id)
+        for dependent in dependents[task_id]:
+            in_degree[dependent] -= 1
+            if in_degree[dependent] == 0:
+                queue.append(dependent)
+
+    if len(order) != len(in_degree):
+        remaining = [task_id for task_id in in_degree if task_id not in set(order)]
+        raise DependencyCycleError(f"Circular dependency detected involving tasks: {remaining}")
+    return order
+
+
+def remaining_path_lengths(dependencies: Dict[str, List[str]],
+                           weights: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """
+    Length of the longest chain of work from each task to the end of the plan.
+
+    Args:
+        dependencies: Task ID -> IDs of the tasks it depends on
+        weights: Task ID -> cost (default 1 each)
+
+    Returns:
+        Task ID -> its own weight plus the longest remaining chain after it
+
+    Raises:
+        DependencyCycleError: If the dependencies contain a cycle
+        TaskDecompositionError: If a dependency is not in the graph
+    """
+    weights = weights or {}
+    dependents = defaultdict(list)
+    for task_id, deps in dependencies.items():
+        for dep in deps:
+            dependents[dep].append(task_id)
+
+    lengths: Dict[str, float] = {}
+    for task_id in reversed(_topological_order(dependencies)):
+        after = max((lengths[d] for d in dependents[task_id]), default=0.0)
+        lengths[task_id] = weights.get(task_id, 1.0) + after
+    return lengths
+
+
+def critical_path(dependencies: Dict[str, List[str]], weights: Optional[Dict[str, float]] = None) -> List[str]:
+    """The longest chain of dependent tasks, first task first."""
+    lengths = remaining_path_lengths(dependencies, weights)
+    if not lengths:
+        return []
+    dependents = defaultdict(list)
+    for task_id, deps in dependencies.items():
+        for dep in deps:
+            dependents[dep].append(task_id)
+
+    path = [max((t for t in dependencies if not dependencies[t]), key=lambda t: lengths[t])]
+    while dependents[path[-1]]:
+        path.append(max(dependents[path[-1]], key=lambda t: lengths[t]))
+    return path
+
+
+@dataclass
+class PlanExecutionResult:
+    """Outcome of executing a plan."""
+    completed: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)  # task ID -> error
+    blocked: Dict[str, str] = field(default_factory=dict)  # task ID -> failed task it depends on
+    pending: List[str] = field(default_factory=list)  # Not run (fail_fast)
+    results: Dict[str, Any] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    @property
+    def success(self) -> bool:
+        return not (self.failed or self.blocked or self.pending)
+
+
+class PlanExecutor:
+    """
+    Runs a decomposed plan's tasks concurrently, critical path first.
+
+    Args:
+        runner: Coroutine function that runs one task on an agent
+        agents: Agents to run tasks on; each runs one task at a time
+            (defaults to ``max_workers`` anonymous workers)
+        max_workers: Tasks allowed to run at once
+        checkpoint_path: File to checkpoint progress to (None for no checkpoints)
+        fail_fast: Stop starting tasks and cancel running ones after the first failure
+    """
+
+    def __init__(self, runner: TaskRunner, agents: Optional[Sequence[str]] = None,
+                 max_workers: Optional[int] = None, checkpoint_path: Optional[Union[str, Path]] = None,
+                 fail_fast: bool = False):
+        self.runner = runner
+        if agents is None:
+            agents = [f"worker-{i + 1}" for i in range(max_workers or DEFAULT_MAX_WORKERS)]
+        if not agents:
+            raise ValueError("PlanExecutor needs at least one agent")
+        self.agents = list(agents)
+        self.max_workers = min(max_workers or len(self.agents), len(self.agents))
+        self.fail_fast = fail_fast
+        self._journal = StateJournal(checkpoint_path) if checkpoint_path else None
+
+    @staticmethod
+    def load_checkpoint(checkpoint_path: Union[str, Path]) -> Optional[List[DecomposedTask]]:
+        """The tasks saved in a checkpoint, with their progress, or None if there is none."""
+        state = StateJournal(checkpoint_path).load()
+        if not state:
+            return None
+        return [DecomposedTask.from_dict(data) for data in state.get("tasks", [])]
+
+    def _checkpoint(self, tasks: List[DecomposedTask]) -> None:
+        if self._journal is None:
+            return
+        try:
+            self._journal.save({"tasks": [task.to_dict() for task in tasks]})
+        except OSError as e:
+            logger.error(f"Failed to checkpoint plan progress to {self._journal.path}: {e}")
+
+    def _close_checkpoint(self) -> None:
+        # Leave the checkpoint as a single plain JSON file between runs
+        if self._journal is None:
+            return
+        try:
+            self._journal.close()
+        except OSError as e:
+            logger.error(f"Failed to compact plan checkpoint {self._journal.path}: {e}")
+
+    async def execute(self, tasks: List[DecomposedTask]) -> PlanExecutionResult:
+        """
+        Run every task that has not completed yet, respecting dependencies.
+
+        Tasks left failed or blocked by an earlier run are retried; tasks
+        that were running when it was interrupted start again.
+
+        Returns:
+            Completed, failed, blocked and unrun tasks
+
+        Raises:
+            DependencyCycleError: If the tasks' dependencies contain a cycle
+            TaskDecompositionError: If a task depends on a task not in the plan
+        """
+        started = time.monotonic()
+        task_map = {task.task_id: task for task in tasks}
+        dependencies = {task.task_id: list(task.get_dependencies()) for task in tasks}
+        weights = {task.task_id: COMPLEXITY_WEIGHTS.get(task.estimated_complexity, 1.0) for task in tasks}
+        ranks = remaining_path_lengths(dependencies, weights)
+        order = {task_id: i for i, task_id in enumerate(_topological_order(dependencies))}
+
+        dependents = defaultdict(list)
+        for task_id, deps in dependencies.items():
+            for dep in deps:
+                dependents[dep].append(task_id)
+
+        result = PlanExecutionResult()
+        waiting_on: Dict[str, int] = {}
+        ready: List = []
+        for task in tasks:
+            if task.status == TaskStatus.COMPLETED.value:
+                result.completed.append(task.task_id)
+                continue
+            # Resuming: whatever did not complete runs again
+            task.status = TaskStatus.PENDING.value
+            waiting_on[task.task_id] = sum(
+                1 for dep in dependencies[task.task_id] if task_map[dep].status != TaskStatus.COMPLETED.value
+            )
+            if waiting_on[task.task_id] == 0:
+                heapq.heappush(ready, (-ranks[task.task_id], order[task.task_id], task.task_id))
+
+        free_agents = deque(self.agents)
+        running: Dict[asyncio.Task, tuple] = {}
+        stopping = False
+        if result.completed:
+            logger.info(f"Resuming plan: {len(result.completed)}/{len(tasks)} tasks already completed")
+
+        def block_dependents(failed_id: str) -> None:
+            pending = list(dependents[failed_id])
+            while pending:
+                task_id = pending.pop()
+                if task_id in result.blocked:
+                    continue
+                result.blocked[task_id] = failed_id
+                task_map[task_id].update_status(TaskStatus.BLOCKED.value)
+                pending.extend(dependents[task_id])
+
+        try:
+            while ready or running:
+                while ready and free_agents and len(running) < self.max_workers and not stopping:
+                    _, _, task_id = heapq.heappop(ready)
+                    agent = free_agents.popleft()
+                    task = task_map[task_id]
+                    task.update_status(TaskStatus.IN_PROGRESS.value)
+                    logger.debug(f"Starting task '{task.title}' on {agent} (critical path {ranks[task_id]:g})")
+                    running[asyncio.ensure_future(self.runner(task, agent))] = (task_id, agent)
+                if not running:
+                    break
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    if future not in running:
+                        continue  # Recorded when fail_fast cancelled the others
+                    task_id, agent = running.pop(future)
+                    free_agents.append(agent)
+                    if self._record(task_map[task_id], agent, future, result):
+                        for dependent in dependents[task_id]:
+                            waiting_on[dependent] -= 1
+                            if waiting_on[dependent] == 0 and dependent not in result.blocked:
+                                heapq.heappush(ready, (-ranks[dependent], order[dependent], dependent))
+                    else:
+                        block_dependents(task_id)
+                        if self.fail_fast and not stopping:
+                            stopping = True
+                            for failed_id in await self._cancel(running, task_map, result):
+                                block_dependents(failed_id)
+                            running.clear()
+                self._checkpoint(tasks)
+        except asyncio.CancelledError:
+            for failed_id in await self._cancel(running, task_map, result):
+                block_dependents(failed_id)
+            self._checkpoint(tasks)
+            raise
+        finally:
+            self._close_checkpoint()
+
+        result.pending = [task.task_id for task in tasks if task.status == TaskStatus.PENDING.value]
+        result.elapsed = time.monotonic() - started
+        logger.info(
+            f"Plan finished in {result.elapsed:.1f}s: {len(result.completed)} completed, {len(result.failed)} failed, "
+            f"{len(result.blocked)} blocked, {len(result.pending)} not run"
+        )
+        return result
+
+    def _record(self, task: DecomposedTask, agent: str, future: asyncio.Future,
+                result: PlanExecutionResult) -> bool:
+        """Record a finished task's outcome; returns whether it succeeded."""
+        try:
+            outcome = future.result()
+        except Exception as e:
+            logger.error(f"Task '{task.title}' failed on {agent}: {e}")
+            task.record_execution_result(agent, False, [], False, notes=str(e))
+            result.failed[task.task_id] = str(e)
+            return False
+
+        details = outcome if isinstance(outcome, dict) else {}
+        success = bool(details.get("success", True))
+        task.record_execution_result(
+            agent, success, details.get("files_changed", []), details.get("tests_passed", success),
+            notes=details.get("notes", ""),
+        )
+        result.results[task.task_id] = outcome
+        if success:
+            result.completed.append(task.task_id)
+        else:
+            result.failed[task.task_id] = details.get("error") or details.get("notes") or "Task reported failure"
+        return success
+
+    async def _cancel(self, running: Dict[asyncio.Task, tuple], task_map: Dict[str, DecomposedTask],
+                      result: PlanExecutionResult) -> List[str]:
+        """
+        Cancel running tasks: those cancelled return to pending, those that finished first are recorded.
+
+        Returns:
+            IDs of the tasks that finished with a failure, whose dependents are now blocked
+        """
+        for future in running:
+            future.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+        failed = []
+        for future, (task_id, agent) in running.items():
+            task = task_map[task_id]
+            if not future.cancelled():
+                if not self._record(task, agent, future, result):
+                    failed.append(task_id)
+            elif task.status == TaskStatus.IN_PROGRESS.value:
+                task.update_status(TaskStatus.PENDING.value)
+        return failed
@@ -6,6 +6,7 @@ This extension provides conversation replay capabilities:
 - WebSocket-based server communication
 - Line-by-line message replay
 - Real-time agent interaction
+- Concurrent A/B prompt evaluation (evaluation module)
 """
 
 from .conversation_client import ConversationReplayClient
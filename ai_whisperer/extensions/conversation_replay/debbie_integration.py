@@ -22,13 +22,14 @@ class DebbieDebugger:
     Coordinates monitoring, intervention, and logging systems.
     """
     
-    def __init__(self, session_manager=None, config: Optional[Dict[str, Any]] = None):
+    def __init__(self, session_manager=None, config: Optional[Dict[str, Any]] = None, event_bus=None):
         """
         Initialize Debbie's debugging system.
         
         Args:
             session_manager: The session manager to monitor
             config: Configuration dictionary
+            event_bus: SessionEventBus the monitor follows sessions through (polls them when None)
         """
         self.session_manager = session_manager
         self.config = config or {}
@@ -43,7 +44,8 @@ class DebbieDebugger:
         # Initialize systems
         self.monitor = DebbieMonitor(
             session_manager=session_manager,
-            intervention_callback=self._handle_intervention_request
+            intervention_callback=self._handle_intervention_request,
+            event_bus=event_bus
         )
         
         self.orchestrator = InterventionOrchestrator(
@@ -0,0 +1,441 @@
+"""
+Concurrent A/B evaluation engine for conversation replay.
+
+Runs a variant x scenario x repetition matrix through the conversation
+replay client with a bounded number of runs in flight, appends each run
+to a JSONL results file as soon as it finishes (so an interrupted
+evaluation resumes where it stopped), and summarises latency and token
+distributions per variant with confidence intervals.
+
+Key Components:
+- Variant: A prompt or config under test
+- EvaluationTask: One (variant, scenario, repetition) cell of the matrix
+- ResultStore: Append-only JSONL store of completed runs
+- EvaluationEngine: Bounded-concurrency runner with resume support
+- ReplayScenarioRunner: Replays a scenario against its own server instance
+- summarize_results: p50/p95 and confidence intervals per variant
+
+Each replay run starts a dedicated server. Variants that differ only by
+prompt are expressed as a ``prompt_settings.overrides`` entry in a
+generated config file, so runs never modify shared prompt files and can
+safely run side by side.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Two-sided 95% Student t critical values by degrees of freedom
+_T_CRITICAL_95 = {
+    1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306,
+    9: 2.262, 10: 2.228, 12: 2.179, 15: 2.131, 20: 2.086, 25: 2.060, 30: 2.042,
+    40: 2.021, 60: 2.000, 120: 1.980,
+}
+_Z_95 = 1.96
+
+
+@dataclass
+class Variant:
+    """A prompt or configuration under test."""
+    name: str
+    prompt_path: Optional[str] = None
+    config_path: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class EvaluationTask:
+    """One cell of the evaluation matrix."""
+    variant: str
+    scenario: str
+    repetition: int
+
+    @property
+    def key(self) -> str:
+        return f"{self.variant}|{self.scenario}|{self.repetition}"
+
+
+def build_matrix(variants: Iterable[str], scenarios: Iterable[str], repetitions: int) -> List[EvaluationTask]:
+    """
+    Build the evaluation matrix.
+
+    Repetitions are the outer loop, so a partially completed run still has
+    a balanced sample of every variant and scenario.
+    """
+    variants = list(variants)
+    scenarios = list(scenarios)
+    return [
+        EvaluationTask(variant, scenario, rep)
+        for rep in range(repetitions)
+        for scenario in scenarios
+        for variant in variants
+    ]
+
+
+class ResultStore:
+    """Append-only JSONL store of completed runs."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def load(self) -> List[Dict[str, Any]]:
+        """Load all stored records, skipping a truncated trailing line."""
+        if not self.path.exists():
+            return []
+        records = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping unreadable result line in {self.path}")
+        return records
+
+    def completed_keys(self, include_failures: bool = False) -> set:
+        """Keys of runs that need not be repeated on resume."""
+        return {
+            record["key"] for record in self.load()
+            if "key" in record and (include_failures or record.get("success"))
+        }
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Append one record and flush it to disk."""
+        line = json.dumps(record, separators=(',', ':'), default=str)
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+                f.flush()
+
+
+TaskRunner = Callable[[EvaluationTask], Awaitable[Dict[str, Any]]]
+
+
+class EvaluationEngine:
+    """Runs evaluation tasks concurrently under a fixed limit."""
+
+    def __init__(self, runner: TaskRunner, store: ResultStore, concurrency: int = 4,
+                 retry_failed: bool = True):
+        """
+        Initialize the engine.
+
+        Args:
+            runner: Coroutine function that executes one task and returns its measurements
+            store: Where completed runs are persisted
+            concurrency: Maximum number of runs in flight
+            retry_failed: Re-run tasks whose stored record failed when resuming
+        """
+        self.runner = runner
+        self.store = store
+        self.concurrency = max(1, concurrency)
+        self.retry_failed = retry_failed
+
+    async def run(self, tasks: Sequence[EvaluationTask],
+                  on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+        """
+        Run every task that has no stored result yet.
+
+        Args:
+            tasks: The evaluation matrix
+            on_result: Optional callback invoked with each new record
+
+        Returns:
+            All records for the given tasks, including ones from earlier runs
+        """
+        done = self.store.completed_keys(include_failures=not self.retry_failed)
+        pending = [task for task in tasks if task.key not in done]
+        if len(pending) < len(tasks):
+            logger.info(f"Resuming evaluation: {len(tasks) - len(pending)} of {len(tasks)} runs already stored")
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run_one(task: EvaluationTask):
+            async with semaphore:
+                record = await self._execute(task)
+            self.store.append(record)
+            if on_result:
+                on_result(record)
+
+        await asyncio.gather(*(run_one(task) for task in pending))
+
+        wanted = {task.key for task in tasks}
+        latest: Dict[str, Dict[str, Any]] = {}
+        for record in self.store.load():
+            if record.get("key") in wanted:
+                latest[record["key"]] = record
+        return list(latest.values())
+
+    async def _execute(self, task: EvaluationTask) -> Dict[str, Any]:
+        started = time.perf_counter()
+        record: Dict[str, Any] = {
+            **asdict(task),
+            "key": task.key,
+            "started_at": datetime.now().isoformat(),
+        }
+        try:
+            measurements = await self.runner(task)
+            record.update(measurements or {})
+            record.setdefault("success", True)
+        except Exception as e:
+            logger.warning(f"Evaluation run {task.key} failed: {e}")
+            record["success"] = False
+            record["error"] = str(e)
+        record["duration"] = time.perf_counter() - started
+        return record
+
+
+# -- statistics -------------------------------------------------------------
+
+def percentile(values: Sequence[float], pct: float) -> Optional[float]:
+    """Percentile with linear interpolation between closest ranks."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return float(ordered[0])
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    if low == high:
+        return float(ordered[low])
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _t_critical(df: int) -> float:
+    if df <= 0:
+        return float('inf')
+    for bound in sorted(_T_CRITICAL_95):
+        if df <= bound:
+            return _T_CRITICAL_95[bound]
+    return _Z_95
+
+
+def mean_confidence_interval(values: Sequence[float]) -> Dict[str, Optional[float]]:
+    """Mean with a 95% Student t confidence interval."""
+    n = len(values)
+    if n == 0:
+        return {"mean": None, "ci_low": None, "ci_high": None}
+    mean = sum(values) / n
+    if n == 1:
+        return {"mean": mean, "ci_low": None, "ci_high": None}
+    variance = sum((v - mean) ** 2 for v in values) / (n - 1)
+    margin = _t_critical(n - 1) * math.sqrt(variance / n)
+    return {"mean": mean, "ci_low": mean - margin, "ci_high": mean + margin}
+
+
+def proportion_confidence_interval(successes: int, total: int) -> Dict[str, Optional[float]]:
+    """Proportion with a 95% Wilson score interval."""
+    if total == 0:
+        return {"rate": None, "ci_low": None, "ci_high": None}
+    p = successes / total
+    z2 = _Z_95 ** 2
+    denominator = 1 + z2 / total
+    centre = (p + z2 / (2 * total)) / denominator
+    margin = _Z_95 * math.sqrt(p * (1 - p) / total + z2 / (4 * total * total)) / denominator
+    return {"rate": p, "ci_low": max(0.0, centre - margin), "ci_high": min(1.0, centre + margin)}
+
+
+def describe(values: Sequence[float]) -> Dict[str, Any]:
+    """Distribution summary: count, p50, p95 and mean with its confidence interval."""
+    return {
+        "count": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        **mean_confidence_interval(values),
+    }
+
+
+def summarize_results(records: Iterable[Dict[str, Any]],
+                      flag_metrics: Sequence[str] = ()) -> Dict[str, Any]:
+    """
+    Summarise runs per variant.
+
+    Args:
+        records: Run records from the evaluation engine
+        flag_metrics: Boolean per-message metrics to report as rates
+
+    Returns:
+        Dict keyed by variant with success rate, latency, time-to-first-
+        response and token distributions, and flag rates
+    """
+    by_variant: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        by_variant.setdefault(record.get("variant", "unknown"), []).append(record)
+
+    summary = {}
+    for variant, runs in sorted(by_variant.items()):
+        successful = [r for r in runs if r.get("success")]
+        latencies = [lat for r in successful for lat in r.get("latencies", [])]
+        first_responses = [t for r in successful for t in r.get("first_response_times", []) if t is not None]
+        tokens = [r["total_tokens"] for r in successful if r.get("total_tokens") is not None]
+        costs = [r["cost"] for r in successful if r.get("cost") is not None]
+
+        flags = {}
+        for name in flag_metrics:
+            values = [bool(m.get(name)) for r in successful for m in r.get("metrics", []) if name in m]
+            flags[name] = proportion_confidence_interval(sum(values), len(values))
+
+        summary[variant] = {
+            "runs": len(runs),
+            "success": proportion_confidence_interval(len(successful), len(runs)),
+            "latency": describe(latencies),
+            "first_response": describe(first_responses),
+            "tokens": describe(tokens),
+            "cost": describe(costs),
+            "flags": flags,
+        }
+    return summary
+
+
+# -- conversation replay runner ----------------------------------------------
+
+def write_variant_config(base_config_path: Path, variant: Variant, output_dir: Path,
+                         prompt_key: str = "agents.alice_assistant") -> Path:
+    """
+    Write a config file that points the server at a variant's prompt.
+
+    Args:
+        base_config_path: Config the variant is derived from
+        variant: The variant (its prompt_path becomes a prompt override)
+        output_dir: Directory for generated config files
+        prompt_key: ``category.name`` of the prompt being replaced
+
+    Returns:
+        Path of the config file to start the server with
+    """
+    if variant.config_path:
+        return Path(variant.config_path)
+    if not variant.prompt_path:
+        return Path(base_config_path)
+
+    import yaml
+
+    with open(base_config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f) or {}
+    overrides = config.setdefault("prompt_settings", {}).setdefault("overrides", {})
+    overrides[prompt_key] = str(Path(variant.prompt_path).resolve())
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    config_path = output_dir / f"variant_{variant.name}.yaml"
+    with open(config_path, 'w', encoding='utf-8') as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+    return config_path
+
+
+class ReplayScenarioRunner:
+    """
+    Replays a scenario file against a dedicated server for one variant.
+
+    Measures per-message latency (request to JSON-RPC response), time to the
+    first channel message, and session token usage via ``usage.stats``.
+    """
+
+    def __init__(self, variants: Dict[str, Variant], scenario_dir: Path, base_config_path: Path,
+                 work_dir: Path, analyzer: Optional[Callable[[str, List[Dict[str, Any]]], Dict[str, Any]]] = None,
+                 request_timeout: float = 180.0):
+        """
+        Initialize the runner.
+
+        Args:
+            variants: Variants by name
+            scenario_dir: Directory holding conversation files
+            base_config_path: Server config the variants are derived from
+            work_dir: Directory for generated variant configs
+            analyzer: Optional function scoring (response, channel_messages)
+            request_timeout: Seconds to wait for each JSON-RPC response
+        """
+        self.variants = variants
+        self.scenario_dir = Path(scenario_dir)
+        self.request_timeout = request_timeout
+        self.analyzer = analyzer
+        self.config_paths = {
+            name: write_variant_config(Path(base_config_path), variant, Path(work_dir))
+            for name, variant in variants.items()
+        }
+
+    async def __call__(self, task: EvaluationTask) -> Dict[str, Any]:
+        from .conversation_processor import ConversationProcessor
+        from .server_manager import ServerManager
+        from .websocket_client import WebSocketClient
+
+        processor = ConversationProcessor(str(self.scenario_dir / task.scenario))
+        processor.load_conversation()
+
+        manager = ServerManager(config_path=str(self.config_paths[task.variant]))
+        await asyncio.to_thread(manager.start_server)
+        client = WebSocketClient(f"ws://127.0.0.1:{manager.port}/ws", timeout=self.request_timeout)
+        channel_messages: List[Dict[str, Any]] = []
+        first_message_at: List[float] = []
+
+        async def on_notification(notification):
+            if notification.get("method") == "ChannelMessageNotification":
+                if not first_message_at:
+                    first_message_at.append(time.perf_counter())
+                channel_messages.append(notification.get("params", {}))
+
+        client.set_notification_handler(on_notification)
+        try:
+            await client.connect()
+            request_id = 1
+            start = await client.send_request(
+                "startSession",
+                {"userId": f"ab_{task.variant}_{task.repetition}", "sessionParams": {"language": "en"}},
+                request_id,
+            )
+            session_id = start.get("sessionId")
+            if not session_id:
+                raise RuntimeError("Failed to get session ID")
+
+            latencies, first_response_times, metrics, responses = [], [], [], []
+            while True:
+                message = processor.get_next_message()
+                if message is None:
+                    break
+                request_id += 1
+                channel_messages.clear()
+                first_message_at.clear()
+                sent_at = time.perf_counter()
+                result = await client.send_request(
+                    "sendUserMessage", {"sessionId": session_id, "message": message}, request_id
+                )
+                latencies.append(time.perf_counter() - sent_at)
+                first_response_times.append(first_message_at[0] - sent_at if first_message_at else None)
+                if channel_messages:
+                    response = "\n".join(
+                        f"[{m.get('channel', '')}]\n{m.get('content', '')}" for m in channel_messages
+                    )
+                else:
+                    response = result.get("ai_response", "") if isinstance(result, dict) else ""
+                responses.append(response)
+                if self.analyzer:
+                    metrics.append(self.analyzer(response, list(channel_messages)))
+
+            request_id += 1
+            usage = await client.send_request("usage.stats", {"sessionId": session_id}, request_id)
+            totals = usage.get("totals", {}) if isinstance(usage, dict) else {}
+            return {
+                "success": True,
+                "latencies": latencies,
+                "first_response_times": first_response_times,
+                "prompt_tokens": totals.get("prompt_tokens"),
+                "completion_tokens": totals.get("completion_tokens"),
+                "total_tokens": totals.get("total_tokens"),
+                "cost": totals.get("cost"),
+                "responses": responses,
+                "metrics": metrics,
+            }
+        finally:
+            await client.close()
+            await asyncio.to_thread(manager.stop_server)
@@ -1,9 +1,14 @@
 """
 Real-time monitoring system for Debbie the Debugger.
 Monitors AI sessions for anomalies, stalls, and performance issues.
+
+With an event bus (interactive_server.session_events), DebbieMonitor follows
+the events sessions publish: each event updates its session's metrics and
+re-checks that session, and a stall is caught by a per-session idle
+deadline. Without one, each session is polled on a timer.
 """
 
-from typing import Any, Callable, Dict, List, Optional, Set
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 import asyncio
 import logging
@@ -34,6 +39,15 @@ class MonitoringEvent(Enum):
     ANOMALY_DETECTED = "anomaly_detected"
     INTERVENTION_TRIGGERED = "intervention_triggered"
 
+# Session event bus event types (by value) and the monitoring events they raise
+SESSION_EVENT_MAP = {
+    "message_start": [MonitoringEvent.MESSAGE_SENT],
+    "message_complete": [MonitoringEvent.MESSAGE_RECEIVED],
+    # Tool calls are published once the agent has run them
+    "tool_call": [MonitoringEvent.TOOL_EXECUTION_START, MonitoringEvent.TOOL_EXECUTION_END],
+    "error": [MonitoringEvent.ERROR_DETECTED],
+}
+
 @dataclass
 class MonitoringMetrics:
     """Performance and health metrics for a session"""
@@ -222,16 +236,19 @@ class AnomalyDetector:
 class DebbieMonitor:
     """Main monitoring system for Debbie"""
     
-    def __init__(self, session_manager=None, intervention_callback: Optional[Callable] = None):
+    def __init__(self, session_manager=None, intervention_callback: Optional[Callable] = None,
+                 event_bus=None):
         """
         Initialize monitor.
         
         Args:
             session_manager: The session manager to monitor
             intervention_callback: Callback for triggering interventions
+            event_bus: SessionEventBus to follow sessions through instead of polling them
         """
         self.session_manager = session_manager
         self.intervention_callback = intervention_callback
+        self.event_bus = event_bus
         
         # Components
         self.anomaly_detector = AnomalyDetector()
@@ -249,12 +266,19 @@ class DebbieMonitor:
         self.monitoring_tasks: Dict[str, asyncio.Task] = {}
         self.is_monitoring = True
         
+        # Event bus state
+        self._subscription = None
+        self._event_task: Optional[asyncio.Task] = None
+        self._stall_timers = None
+        self._last_alerts: Dict[Tuple[str, str], float] = {}
+        
         # Configuration
         self.config = {
             'check_interval_seconds': 5,
             'stall_threshold_seconds': 30,
             'auto_intervention': True,
             'max_interventions_per_session': 10,
+            'event_queue_size': 1000,
         }
         
         # Register default handlers
@@ -282,9 +306,13 @@ class DebbieMonitor:
         # Initialize metrics
         self.monitored_sessions[session_id] = MonitoringMetrics(session_id=session_id)
         
-        # Start monitoring task
-        task = asyncio.create_task(self._monitor_session(session_id))
-        self.monitoring_tasks[session_id] = task
+        # Follow the session's events, or poll it
+        if self.event_bus is not None:
+            self._start_event_consumer()
+            self._stall_timers.touch(session_id)
+        else:
+            task = asyncio.create_task(self._monitor_session(session_id))
+            self.monitoring_tasks[session_id] = task
         
         # Emit event
         await self._emit_event(MonitoringEvent.SESSION_START, {
@@ -303,6 +331,9 @@ class DebbieMonitor:
         if session_id in self.monitoring_tasks:
             self.monitoring_tasks[session_id].cancel()
             del self.monitoring_tasks[session_id]
+        if self._stall_timers is not None:
+            self._stall_timers.remove(session_id)
+        self._last_alerts = {key: at for key, at in self._last_alerts.items() if key[0] != session_id}
         
         # Emit event
         await self._emit_event(MonitoringEvent.SESSION_END, {
@@ -350,6 +381,93 @@ class DebbieMonitor:
                 logger.error(f"Error monitoring session {session_id}: {e}")
                 await asyncio.sleep(self.config['check_interval_seconds'])
     
+    def _start_event_consumer(self):
+        """Subscribe to the event bus and start consuming it, if not already"""
+        if self._event_task is not None and not self._event_task.done():
+            return
+        from interactive_server.session_events import DeadlineTimers
+        
+        if self._subscription is None:
+            self._subscription = self.event_bus.subscribe(
+                "debbie_monitor", maxsize=self.config['event_queue_size'])
+        # Just past the threshold, so the stall check sees the full idle time
+        self._stall_timers = DeadlineTimers(self.config['stall_threshold_seconds'] + 0.1, self._on_session_idle)
+        self._event_task = asyncio.create_task(self._consume_events(self._subscription))
+    
+    async def _consume_events(self, subscription):
+        """Follow monitored sessions through the event bus"""
+        async for event in subscription:
+            try:
+                await self._handle_session_event(event)
+            except Exception as e:
+                logger.error(f"Error handling {event.type.value} event for session {event.session_id}: {e}")
+    
+    async def _handle_session_event(self, event):
+        """Update a monitored session from one bus event and check it for anomalies"""
+        session_id = event.session_id
+        metrics = self.monitored_sessions.get(session_id)
+        if metrics is None:
+            return
+        
+        event_type = event.type.value
+        if event_type == "session_ended":
+            await self.stop_monitoring(session_id)
+            return
+        
+        metrics.last_activity = datetime.now()
+        self._stall_timers.touch(session_id)
+        monitoring_events = SESSION_EVENT_MAP.get(event_type)
+        if not monitoring_events:
+            return  # Stream chunks and the like only count as activity
+        
+        data = {**event.data, 'session_id': session_id}
+        level = LogLevel.ERROR if event_type == "error" else LogLevel.INFO
+        tool_name = data.get('tool_name')
+        for monitoring_event in monitoring_events:
+            await self._emit_event(monitoring_event, data)
+            # Recorded for the anomaly checks that read recent events (e.g. tool loops)
+            self.log_aggregator.add_log({
+                'source': LogSource.DEBBIE.value,
+                'level': level.value,
+                'component': ComponentType.MONITOR.value,
+                'action': monitoring_event.value,
+                'event_summary': str(data.get('error') or tool_name or monitoring_event.value),
+                'session_id': session_id,
+                'details': {'tool_name': tool_name} if tool_name else {}
+            })
+        
+        await self._check_session(session_id)
+    
+    async def _on_session_idle(self, session_id: str, idle_seconds: float):
+        """Deadline callback: a monitored session has had no activity for the stall threshold"""
+        metrics = self.monitored_sessions.get(session_id)
+        if metrics is None or not self.is_monitoring:
+            return
+        
+        inspection = await self._inspect_session(session_id)
+        self._update_metrics_from_inspection(metrics, inspection)
+        await self._emit_event(MonitoringEvent.AGENT_STALL_DETECTED, {
+            'session_id': session_id,
+            'duration_seconds': idle_seconds
+        })
+        await self._check_session(session_id)
+    
+    async def _check_session(self, session_id: str):
+        """Check one session for anomalies, alerting on each kind at most once per check interval"""
+        metrics = self.monitored_sessions.get(session_id)
+        if metrics is None:
+            return
+        
+        recent_events = self.log_aggregator.get_logs(session_id=session_id, limit=100)
+        now = asyncio.get_running_loop().time()
+        for alert in self.anomaly_detector.analyze(metrics, recent_events):
+            key = (session_id, alert.alert_type)
+            last = self._last_alerts.get(key)
+            if last is not None and now - last < self.config['check_interval_seconds']:
+                continue
+            self._last_alerts[key] = now
+            await self._process_alert(alert)
+    
     async def _inspect_session(self, session_id: str) -> Dict[str, Any]:
         """Inspect session state"""
         try:
@@ -550,6 +668,16 @@ class DebbieMonitor:
         if self.monitoring_tasks:
             await asyncio.gather(*self.monitoring_tasks.values(), return_exceptions=True)
         
+        # Stop following the event bus
+        if self._subscription is not None:
+            self._subscription.close()
+            self._subscription = None
+        if self._event_task is not None:
+            await asyncio.gather(self._event_task, return_exceptions=True)
+            self._event_task = None
+        if self._stall_timers is not None:
+            self._stall_timers.clear()
+        
         self.monitoring_tasks.clear()
         self.monitored_sessions.clear()
         
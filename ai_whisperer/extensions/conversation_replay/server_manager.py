@@ -8,8 +8,9 @@ import subprocess
 import time
 import socket
 class ServerManager:
-    def __init__(self, port=None):
+    def __init__(self, port=None, config_path="config/main.yaml"):
         self.port = port
+        self.config_path = config_path
         self.process = None
 
     def start_server(self, max_retries=5):
@@ -58,14 +59,14 @@ class ServerManager:
         env = os.environ.copy()
         env['AIWHISPERER_REPLAY_PORT'] = str(self.port)
         # Set config path for interactive server
-        env['AIWHISPERER_CONFIG'] = 'config/main.yaml'
+        env['AIWHISPERER_CONFIG'] = str(self.config_path)
         
         server_cmd = [
             sys.executable,
             "-m", "interactive_server.main",
             f"--host=127.0.0.1",
             f"--port={self.port}",
-            f"--config=config/main.yaml"
+            f"--config={self.config_path}"
         ]
         
         print(f"   🔧 Command: {' '.join(server_cmd)}")
@@ -5,4 +5,5 @@ This extension provides inter-agent communication:
 - Mailbox system
 - Message tools
 - Notifications
+- Storage backends (in memory or SQLite)
 """
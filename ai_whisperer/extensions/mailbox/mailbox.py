@@ -9,6 +9,9 @@ Key Components:
 - MessagePriority: Message priority levels.
 - MessageStatus: Message delivery status.
 - Mail: A mail message in the system.
+- MailboxSystem.subscribe(): Per-recipient asyncio wakeups for new mail.
+- MailboxSystem.check_mail_async(): check_mail() that keeps store I/O off the event loop.
+- MailboxSystem.apply_retention(): Archive and delete old mail.
 - get_mailbox(): Get the global mailbox system instance.
 - reset_mailbox(): Reset the mailbox system (mainly for testing).
 
@@ -20,6 +23,10 @@ Dependencies:
 - dataclasses
 - uuid
 
+Storage:
+    Mail is kept by a MailStore (see storage.py): in memory by default, or
+    in SQLite when AIWHISPERER_MAILBOX_DB is set.
+
 Related:
 - See docs/agent-e-consolidated-implementation.md
 - See docs/archive/refactor_tracking/REFACTOR_CODE_MAP_SUMMARY.md
@@ -27,8 +34,9 @@ Related:
 
 """
 
-from typing import Any, Dict, List, Optional, Set
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple
 
+import asyncio
 import uuid
 import logging
 from datetime import datetime, timezone
@@ -36,6 +44,9 @@ from dataclasses import dataclass, field
 from enum import Enum
 from collections import defaultdict
 
+if TYPE_CHECKING:
+    from .storage import MailStore, RetentionPolicy
+
 logger = logging.getLogger(__name__)
 
 class MessagePriority(Enum):
@@ -100,16 +111,21 @@ class Mail:
 class MailboxSystem:
     """Centralized mailbox system for all agents and users."""
     
-    def __init__(self):
-        """Initialize the mailbox system."""
-        # Each agent/user has their own inbox
-        self._inboxes: Dict[str, List[Mail]] = defaultdict(list)
-        # Track unread counts for efficiency
-        self._unread_counts: Dict[str, int] = defaultdict(int)
-        # Message archive for history
-        self._archive: List[Mail] = []
+    def __init__(self, store: Optional["MailStore"] = None):
+        """Initialize the mailbox system.
+        
+        Args:
+            store: Where to keep mail (defaults to an InMemoryMailStore)
+        """
+        if store is None:
+            from .storage import InMemoryMailStore
+            store = InMemoryMailStore()
+        # Each agent/user has their own inbox in the store
+        self._store = store
         # Notification callbacks
         self._notification_handlers: Dict[str, Any] = {}
+        # asyncio events set on new mail, with the loop each one belongs to
+        self._mail_waiters: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = defaultdict(list)
         
         # Agent alias mapping - maps various names to canonical agent names
         self._agent_aliases = {
@@ -225,21 +241,8 @@ class MailboxSystem:
         # Update the mail object with canonical name
         mail.to_agent = recipient if recipient != "user" else ""
         
-        # Check inbox state before adding
-        inbox_size_before = len(self._inboxes[recipient])
-        logger.info(f"[MAILBOX] Recipient '{recipient}' inbox size before send: {inbox_size_before}")
-        
         # Add to recipient's inbox
-        self._inboxes[recipient].append(mail)
-        
-        # Check inbox state after adding
-        inbox_size_after = len(self._inboxes[recipient])
-        logger.info(f"[MAILBOX] Recipient '{recipient}' inbox size after send: {inbox_size_after}")
-        
-        # Update unread count
-        if mail.status == MessageStatus.UNREAD:
-            self._unread_counts[recipient] += 1
-            logger.info(f"[MAILBOX] Updated unread count for '{recipient}': {self._unread_counts[recipient]}")
+        self._store.add(recipient, mail)
         
         # Log the message
         logger.info(f"[MAILBOX] Mail sent successfully from {mail.from_agent or 'user'} to {recipient}: {mail.subject}")
@@ -250,6 +253,8 @@ class MailboxSystem:
             handler = self._notification_handlers[recipient]
             handler(mail)
         
+        self._notify_waiters(recipient)
+        
         return mail.message_id
     
     def check_mail(self, agent_name: str = "") -> List[Mail]:
@@ -274,11 +279,8 @@ class MailboxSystem:
             logger.error(f"[MAILBOX] Failed to check mail: {e}")
             raise
             
-        inbox = self._inboxes[recipient]
-        logger.info(f"[MAILBOX] Inbox for '{recipient}' has {len(inbox)} total messages")
-        
-        # Get unread messages
-        unread = [mail for mail in inbox if mail.status == MessageStatus.UNREAD]
+        # Get unread messages and mark them as read
+        unread = self._store.take_unread(recipient)
         logger.info(f"[MAILBOX] Found {len(unread)} unread messages for '{recipient}'")
         
         # Log details of unread messages
@@ -286,17 +288,14 @@ class MailboxSystem:
             logger.info(f"[MAILBOX] Unread message {idx}: id={mail.message_id}, from={mail.from_agent}, subject='{mail.subject}'")
             logger.debug(f"[MAILBOX] Unread message {idx} body: '{mail.body}'")
         
-        # Mark as read
-        for mail in unread:
-            mail.status = MessageStatus.READ
-            logger.debug(f"[MAILBOX] Marked message {mail.message_id} as READ")
-        
-        # Update unread count
-        self._unread_counts[recipient] = 0
-        logger.info(f"[MAILBOX] Reset unread count for '{recipient}' to 0")
-        
         return unread
     
+    async def check_mail_async(self, agent_name: str = "") -> List[Mail]:
+        """check_mail() for the event loop; a blocking store is queried from a thread."""
+        if self._store.blocking:
+            return await asyncio.to_thread(self.check_mail, agent_name)
+        return self.check_mail(agent_name)
+    
     def get_all_mail(self, agent_name: str = "", 
                      include_read: bool = True,
                      include_archived: bool = False) -> List[Mail]:
@@ -311,17 +310,14 @@ class MailboxSystem:
             List of mail messages
         """
         recipient = self._resolve_agent_name(agent_name or "user")
-        inbox = self._inboxes[recipient]
         
-        result = []
-        for mail in inbox:
-            if mail.status == MessageStatus.ARCHIVED and not include_archived:
-                continue
-            if mail.status == MessageStatus.READ and not include_read:
-                continue
-            result.append(mail)
+        statuses = set(MessageStatus)
+        if not include_archived:
+            statuses.discard(MessageStatus.ARCHIVED)
+        if not include_read:
+            statuses.discard(MessageStatus.READ)
         
-        return result
+        return self._store.list_mail(recipient, statuses)
     
     def has_unread_mail(self, agent_name: str = "") -> bool:
         """Check if agent/user has unread mail.
@@ -333,7 +329,13 @@ class MailboxSystem:
             True if there are unread messages
         """
         recipient = self._resolve_agent_name(agent_name or "user")
-        return self._unread_counts[recipient] > 0
+        return self._store.unread_count(recipient) > 0
+    
+    async def has_unread_mail_async(self, agent_name: str = "") -> bool:
+        """has_unread_mail() for the event loop; a blocking store is queried from a thread."""
+        if self._store.blocking:
+            return await asyncio.to_thread(self.has_unread_mail, agent_name)
+        return self.has_unread_mail(agent_name)
     
     def get_unread_count(self, agent_name: str = "") -> int:
         """Get count of unread messages.
@@ -345,7 +347,7 @@ class MailboxSystem:
             Number of unread messages
         """
         recipient = self._resolve_agent_name(agent_name or "user")
-        return self._unread_counts[recipient]
+        return self._store.unread_count(recipient)
     
     def reply_to_mail(self, original_message_id: str, reply: Mail) -> str:
         """Reply to a mail message.
@@ -360,12 +362,8 @@ class MailboxSystem:
         # Set reply_to field
         reply.reply_to = original_message_id
         
-        # Find original message to update status
-        for inbox in self._inboxes.values():
-            for mail in inbox:
-                if mail.message_id == original_message_id:
-                    mail.status = MessageStatus.REPLIED
-                    break
+        # Update the original message's status
+        self._store.set_status(original_message_id, MessageStatus.REPLIED)
         
         # Send the reply
         return self.send_mail(reply)
@@ -379,13 +377,7 @@ class MailboxSystem:
         Returns:
             True if message was archived
         """
-        for inbox in self._inboxes.values():
-            for mail in inbox:
-                if mail.message_id == message_id:
-                    mail.status = MessageStatus.ARCHIVED
-                    self._archive.append(mail)
-                    return True
-        return False
+        return self._store.set_status(message_id, MessageStatus.ARCHIVED)
     
     def register_notification_handler(self, agent_name: str, handler):
         """Register a notification handler for new mail.
@@ -397,6 +389,76 @@ class MailboxSystem:
         recipient = self._resolve_agent_name(agent_name or "user")
         self._notification_handlers[recipient] = handler
     
+    def subscribe(self, agent_name: str = "", event: Optional[asyncio.Event] = None) -> asyncio.Event:
+        """Get an asyncio event that is set whenever mail arrives for an agent/user.
+        
+        Must be called from the event loop that will await the event; mail
+        sent from other threads sets it through that loop. The event is set
+        straight away if there is already unread mail. Waiters clear it
+        before checking mail.
+        
+        Args:
+            agent_name: Name of agent (empty for user)
+            event: Existing event to set (e.g. one shared with other wakeup sources)
+            
+        Returns:
+            The event to await
+            
+        Raises:
+            ValueError: If agent name cannot be resolved
+        """
+        recipient = self._resolve_agent_name(agent_name or "user")
+        event = event or asyncio.Event()
+        self._mail_waiters[recipient].append((asyncio.get_running_loop(), event))
+        if self._store.unread_count(recipient) > 0:
+            event.set()
+        return event
+    
+    def unsubscribe(self, agent_name: str, event: asyncio.Event) -> None:
+        """Stop setting an event returned by subscribe()."""
+        try:
+            recipient = self._resolve_agent_name(agent_name or "user")
+        except ValueError:
+            return
+        self._mail_waiters[recipient] = [
+            (loop, waiter) for loop, waiter in self._mail_waiters[recipient] if waiter is not event
+        ]
+    
+    def _notify_waiters(self, recipient: str) -> None:
+        waiters = self._mail_waiters.get(recipient)
+        if not waiters:
+            return
+        try:
+            current_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            current_loop = None
+        for loop, event in list(waiters):
+            if loop.is_closed():
+                waiters.remove((loop, event))
+            elif loop is current_loop:
+                event.set()
+            else:
+                loop.call_soon_threadsafe(event.set)
+    
+    async def wait_for_mail(self, agent_name: str = "", timeout: Optional[float] = None) -> bool:
+        """Wait until an agent/user has unread mail.
+        
+        Args:
+            agent_name: Name of agent (empty for user)
+            timeout: Seconds to wait, or None to wait indefinitely
+            
+        Returns:
+            True if there is unread mail, False on timeout
+        """
+        event = self.subscribe(agent_name)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.unsubscribe(agent_name, event)
+    
     def get_conversation_thread(self, message_id: str) -> List[Mail]:
         """Get all messages in a conversation thread.
         
@@ -406,34 +468,31 @@ class MailboxSystem:
         Returns:
             List of messages in chronological order
         """
-        thread = []
-        visited = set()
+        return self._store.thread(message_id)
+    
+    def apply_retention(self, policy: "RetentionPolicy", now: Optional[datetime] = None) -> Dict[str, int]:
+        """Archive and delete old mail according to a retention policy.
         
-        def find_thread_messages(msg_id: str):
-            if msg_id in visited:
-                return
-            visited.add(msg_id)
+        Args:
+            policy: When to archive read mail and delete old mail
+            now: Current time (defaults to now, in UTC)
             
-            # Find the message
-            for inbox in self._inboxes.values():
-                for mail in inbox:
-                    if mail.message_id == msg_id:
-                        thread.append(mail)
-                        # Follow reply chain
-                        if mail.reply_to:
-                            find_thread_messages(mail.reply_to)
-                        # Find replies to this message
-                        for other_mail in inbox:
-                            if other_mail.reply_to == msg_id:
-                                find_thread_messages(other_mail.message_id)
-                        break
-        
-        find_thread_messages(message_id)
-        
-        # Sort by timestamp
-        thread.sort(key=lambda m: m.timestamp)
-        
-        return thread
+        Returns:
+            Number of messages archived and deleted
+        """
+        now = now or datetime.now(timezone.utc)
+        result = {"archived": 0, "deleted": 0}
+        if policy.archive_read_after is not None:
+            result["archived"] = self._store.archive_read_before(now - policy.archive_read_after)
+        if policy.delete_after is not None:
+            result["deleted"] = self._store.delete_before(now - policy.delete_after)
+        if result["archived"] or result["deleted"]:
+            logger.info(f"[MAILBOX] Retention archived {result['archived']} and deleted {result['deleted']} messages")
+        return result
+    
+    def close(self):
+        """Close the underlying store."""
+        self._store.close()
 
 # Global mailbox instance
 _mailbox_system = None
@@ -442,10 +501,14 @@ def get_mailbox() -> MailboxSystem:
     """Get the global mailbox system instance."""
     global _mailbox_system
     if _mailbox_system is None:
-        _mailbox_system = MailboxSystem()
+        from .storage import create_mail_store
+        _mailbox_system = MailboxSystem(create_mail_store())
     return _mailbox_system
 
 def reset_mailbox():
     """Reset the mailbox system (mainly for testing)."""
     global _mailbox_system
-    _mailbox_system = MailboxSystem()
+    if _mailbox_system is not None:
+        _mailbox_system.close()
+    from .storage import create_mail_store
+    _mailbox_system = MailboxSystem(create_mail_store())
@@ -0,0 +1,552 @@
+"""
+Storage backends for the mailbox system.
+
+MailboxSystem keeps mail in a MailStore. The default InMemoryMailStore
+keeps each inbox in a list, as before, plus a per-recipient list of unread
+messages and a reply index, so checking mail and following a thread no
+longer scan every inbox. SQLiteMailStore keeps mail in a local SQLite
+database (WAL mode) so it survives restarts; inbox, unread, priority and
+reply lookups are served by indexes and threads are read with a single
+recursive query. Sending only queues the message: a background thread
+inserts whatever is queued in one transaction, so senders (often on the
+event loop) do not wait for a commit, and every read first writes anything
+still queued so it sees the mail sent before it. Reads still query the
+database, so the store is marked ``blocking`` and MailboxSystem's async
+methods run them in a thread.
+
+Set AIWHISPERER_MAILBOX_DB to a database path to use the SQLite store for
+the global mailbox; unset or empty keeps mail in memory.
+
+Key Components:
+- MailStore: Interface implemented by the backends
+- InMemoryMailStore: Default in-process store
+- SQLiteMailStore: Durable, indexed store
+- RetentionPolicy: When read mail is archived and old mail deleted
+- RetentionScheduler: Applies a policy at startup and periodically
+- create_mail_store(): Store selected by AIWHISPERER_MAILBOX_DB
+- create_retention_scheduler(): Scheduler from the ``mailbox.retention`` config
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Union
+
+from ai_whisperer.utils import json_codec
+
+from .mailbox import Mail, MailboxSystem, MessagePriority, MessageStatus, get_mailbox
+
+logger = logging.getLogger(__name__)
+
+MAILBOX_DB_ENV = "AIWHISPERER_MAILBOX_DB"
+DEFAULT_RETENTION_INTERVAL = 3600.0
+
+
+def _epoch(timestamp: datetime) -> float:
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+@dataclass
+class RetentionPolicy:
+    """
+    Retention rules for mail that has been dealt with. Unread mail is never touched.
+
+    Args:
+        archive_read_after: Archive read and replied mail older than this
+        delete_after: Delete read, replied and archived mail older than this
+    """
+    archive_read_after: Optional[timedelta] = None
+    delete_after: Optional[timedelta] = None
+
+
+class MailStore(ABC):
+    """Where a MailboxSystem keeps its mail. Recipients are canonical names."""
+
+    # True if calls wait on I/O, so async callers should make them from a thread
+    blocking = False
+
+    @abstractmethod
+    def add(self, recipient: str, mail: Mail) -> None:
+        """Add mail to a recipient's inbox."""
+
+    @abstractmethod
+    def take_unread(self, recipient: str) -> List[Mail]:
+        """Unread mail for a recipient, oldest first, marked as read."""
+
+    @abstractmethod
+    def unread_count(self, recipient: str) -> int:
+        """Number of unread messages for a recipient."""
+
+    @abstractmethod
+    def list_mail(self, recipient: str, statuses: Optional[Set[MessageStatus]] = None) -> List[Mail]:
+        """A recipient's mail, oldest first, optionally only with the given statuses."""
+
+    @abstractmethod
+    def get(self, message_id: str) -> Optional[Mail]:
+        """A message by ID."""
+
+    @abstractmethod
+    def set_status(self, message_id: str, status: MessageStatus) -> bool:
+        """Change a message's status; returns False if there is no such message."""
+
+    @abstractmethod
+    def thread(self, message_id: str) -> List[Mail]:
+        """Every message linked to ``message_id`` through reply_to, in either direction."""
+
+    @abstractmethod
+    def archive_read_before(self, cutoff: datetime) -> int:
+        """Archive read and replied mail sent before ``cutoff``; returns the number archived."""
+
+    @abstractmethod
+    def delete_before(self, cutoff: datetime) -> int:
+        """Delete read, replied and archived mail sent before ``cutoff``; returns the number deleted."""
+
+    def close(self) -> None:
+        """Release any resources held by the store."""
+
+
+class InMemoryMailStore(MailStore):
+    """Keeps mail in process memory; the default store."""
+
+    def __init__(self):
+        # Each agent/user has their own inbox
+        self._inboxes: Dict[str, List[Mail]] = defaultdict(list)
+        # Unread mail per recipient, so checking mail does not scan the inbox
+        self._unread: Dict[str, List[Mail]] = defaultdict(list)
+        self._by_id: Dict[str, Mail] = {}
+        self._replies: Dict[str, List[str]] = defaultdict(list)
+
+    def add(self, recipient: str, mail: Mail) -> None:
+        self._inboxes[recipient].append(mail)
+        self._by_id.setdefault(mail.message_id, mail)
+        if mail.reply_to:
+            self._replies[mail.reply_to].append(mail.message_id)
+        if mail.status == MessageStatus.UNREAD:
+            self._unread[recipient].append(mail)
+
+    def take_unread(self, recipient: str) -> List[Mail]:
+        pending = self._unread.pop(recipient, [])
+        # Mail replied to or archived since it arrived is no longer unread
+        unread = [mail for mail in pending if mail.status == MessageStatus.UNREAD]
+        for mail in unread:
+            mail.status = MessageStatus.READ
+        return unread
+
+    def unread_count(self, recipient: str) -> int:
+        pending = self._unread.get(recipient)
+        if not pending:
+            return 0
+        return sum(1 for mail in pending if mail.status == MessageStatus.UNREAD)
+
+    def list_mail(self, recipient: str, statuses: Optional[Set[MessageStatus]] = None) -> List[Mail]:
+        inbox = self._inboxes.get(recipient, [])
+        if statuses is None:
+            return list(inbox)
+        return [mail for mail in inbox if mail.status in statuses]
+
+    def get(self, message_id: str) -> Optional[Mail]:
+        return self._by_id.get(message_id)
+
+    def set_status(self, message_id: str, status: MessageStatus) -> bool:
+        mail = self._by_id.get(message_id)
+        if mail is None:
+            return False
+        mail.status = status
+        return True
+
+    def thread(self, message_id: str) -> List[Mail]:
+        if message_id not in self._by_id:
+            return []
+        seen = {message_id}
+        pending = [message_id]
+        while pending:
+            mail = self._by_id[pending.pop()]
+            linked = list(self._replies.get(mail.message_id, ()))
+            if mail.reply_to:
+                linked.append(mail.reply_to)
+            for other in linked:
+                if other not in seen and other in self._by_id:
+                    seen.add(other)
+                    pending.append(other)
+        thread = [self._by_id[mid] for mid in seen]
+        thread.sort(key=lambda m: _epoch(m.timestamp))
+        return thread
+
+    def archive_read_before(self, cutoff: datetime) -> int:
+        count = 0
+        before = _epoch(cutoff)
+        for inbox in self._inboxes.values():
+            for mail in inbox:
+                if mail.status in (MessageStatus.READ, MessageStatus.REPLIED) and _epoch(mail.timestamp) < before:
+                    mail.status = MessageStatus.ARCHIVED
+                    count += 1
+        return count
+
+    def delete_before(self, cutoff: datetime) -> int:
+        before = _epoch(cutoff)
+        deleted: Set[str] = set()
+        count = 0
+        for recipient, inbox in self._inboxes.items():
+            kept = []
+            for mail in inbox:
+                if mail.status != MessageStatus.UNREAD and _epoch(mail.timestamp) < before:
+                    deleted.add(mail.message_id)
+                    count += 1
+                else:
+                    kept.append(mail)
+            inbox[:] = kept
+        for message_id in deleted:
+            self._by_id.pop(message_id, None)
+            self._replies.pop(message_id, None)
+        for reply_to, replies in list(self._replies.items()):
+            replies[:] = [mid for mid in replies if mid not in deleted]
+            if not replies:
+                del self._replies[reply_to]
+        return count
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS mail (
+    id INTEGER PRIMARY KEY,
+    message_id TEXT NOT NULL,
+    recipient TEXT NOT NULL,
+    from_agent TEXT NOT NULL,
+    to_agent TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    sent_at REAL NOT NULL,
+    status TEXT NOT NULL,
+    reply_to TEXT,
+    metadata TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_mail_message_id ON mail(message_id);
+CREATE INDEX IF NOT EXISTS idx_mail_inbox ON mail(recipient, status, id);
+CREATE INDEX IF NOT EXISTS idx_mail_priority ON mail(recipient, priority);
+CREATE INDEX IF NOT EXISTS idx_mail_reply_to ON mail(reply_to) WHERE reply_to IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_mail_sent_at ON mail(status, sent_at);
+"""
+
+_COLUMNS = "message_id, from_agent, to_agent, subject, body, priority, timestamp, status, reply_to, metadata"
+
+# Messages reachable from the start through reply_to links, in either direction
+_THREAD_QUERY = f"""
+WITH RECURSIVE thread(message_id) AS (
+    SELECT message_id FROM mail WHERE message_id = :start
+    UNION
+    SELECT mail.reply_to FROM mail JOIN thread ON mail.message_id = thread.message_id
+        WHERE mail.reply_to IS NOT NULL
+    UNION
+    SELECT mail.message_id FROM mail JOIN thread ON mail.reply_to = thread.message_id
+)
+SELECT {_COLUMNS} FROM mail
+WHERE id IN (SELECT MIN(id) FROM mail WHERE message_id IN thread GROUP BY message_id)
+ORDER BY sent_at, id
+"""
+
+_SETTLED = (MessageStatus.READ.value, MessageStatus.REPLIED.value)
+_DELETABLE = (MessageStatus.READ.value, MessageStatus.REPLIED.value, MessageStatus.ARCHIVED.value)
+
+
+class SQLiteMailStore(MailStore):
+    """
+    Keeps mail in a local SQLite database so it survives restarts.
+
+    Args:
+        path: Database file (created if missing); ``":memory:"`` for a private in-memory database
+        window: Seconds the writer thread collects sends for before inserting them
+        retry_delay: Seconds the writer thread waits before retrying a failed insert
+    """
+
+    blocking = True
+
+    def __init__(self, path: Union[str, Path], window: float = 0.05, retry_delay: float = 1.0):
+        self.path = str(path)
+        self.window = window
+        self.retry_delay = retry_delay
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        # Guards the connection; _cond guards the queue of rows not inserted yet
+        self._lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._queued: List[tuple] = []
+        self._closing = False
+        self._writer: Optional[threading.Thread] = None
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+
+    @staticmethod
+    def _to_mail(row) -> Mail:
+        message_id, from_agent, to_agent, subject, body, priority, timestamp, status, reply_to, metadata = row
+        return Mail(
+            message_id=message_id,
+            from_agent=from_agent,
+            to_agent=to_agent,
+            subject=subject,
+            body=body,
+            priority=MessagePriority(priority),
+            timestamp=datetime.fromisoformat(timestamp),
+            status=MessageStatus(status),
+            reply_to=reply_to,
+            metadata=json_codec.loads(metadata),
+        )
+
+    def _row(self, recipient: str, mail: Mail) -> tuple:
+        return (
+            mail.message_id, recipient, mail.from_agent, mail.to_agent, mail.subject, mail.body,
+            mail.priority.value, mail.timestamp.isoformat(), _epoch(mail.timestamp), mail.status.value,
+            mail.reply_to, json_codec.dumps(mail.metadata, default=str),
+        )
+
+    def add(self, recipient: str, mail: Mail) -> None:
+        self.add_many(recipient, [mail])
+
+    def add_many(self, recipient: str, mails: Iterable[Mail]) -> None:
+        """Queue several messages for an inbox; the writer thread inserts them in one transaction."""
+        rows = [self._row(recipient, mail) for mail in mails]
+        with self._cond:
+            if self._closing:
+                raise sqlite3.ProgrammingError("Cannot add mail to a closed store")
+            if not self._queued:
+                self._cond.notify()
+            self._queued.extend(rows)
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name="mail-writer", daemon=True)
+                self._writer.start()
+
+    def _write_queued(self) -> None:
+        """Insert every queued row in one transaction; the caller holds ``self._lock``."""
+        with self._cond:
+            rows, self._queued = self._queued, []
+        if not rows:
+            return
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany(
+                "INSERT INTO mail (message_id, recipient, from_agent, to_agent, subject, body, priority,"
+                " timestamp, sent_at, status, reply_to, metadata) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            # Keep the batch, ahead of anything queued since, for the next attempt
+            with self._cond:
+                self._queued[:0] = rows
+            raise
+
+    def flush(self) -> None:
+        """Insert any queued mail now; raises sqlite3.Error if it cannot be stored."""
+        with self._lock:
+            self._write_queued()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queued and not self._closing:
+                    self._cond.wait()
+                # Collect sends for a window; a read in the meantime writes them itself
+                deadline = time.monotonic() + self.window
+                while not self._closing and (remaining := deadline - time.monotonic()) > 0:
+                    self._cond.wait(remaining)
+                if self._closing:
+                    return
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                logger.error(f"Could not store queued mail in {self.path}, retrying: {e}")
+                with self._cond:
+                    self._cond.wait(self.retry_delay)
+
+    def take_unread(self, recipient: str) -> List[Mail]:
+        unread = MessageStatus.UNREAD.value
+        with self._lock:
+            self._write_queued()
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    f"SELECT id, {_COLUMNS} FROM mail WHERE recipient = ? AND status = ? ORDER BY id",
+                    (recipient, unread),
+                ).fetchall()
+                if rows:
+                    self._conn.execute(
+                        "UPDATE mail SET status = ? WHERE recipient = ? AND status = ? AND id <= ?",
+                        (MessageStatus.READ.value, recipient, unread, rows[-1][0]),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        mails = [self._to_mail(row[1:]) for row in rows]
+        for mail in mails:
+            mail.status = MessageStatus.READ
+        return mails
+
+    def unread_count(self, recipient: str) -> int:
+        with self._lock:
+            self._write_queued()
+            (count,) = self._conn.execute(
+                "SELECT COUNT(*) FROM mail WHERE recipient = ? AND status = ?",
+                (recipient, MessageStatus.UNREAD.value),
+            ).fetchone()
+        return count
+
+    def list_mail(self, recipient: str, statuses: Optional[Set[MessageStatus]] = None) -> List[Mail]:
+        query = f"SELECT {_COLUMNS} FROM mail WHERE recipient = ?"
+        params: list = [recipient]
+        if statuses is not None:
+            if not statuses:
+                return []
+            query += f" AND status IN ({', '.join('?' * len(statuses))})"
+            params.extend(status.value for status in statuses)
+        with self._lock:
+            self._write_queued()
+            rows = self._conn.execute(query + " ORDER BY id", params).fetchall()
+        return [self._to_mail(row) for row in rows]
+
+    def get(self, message_id: str) -> Optional[Mail]:
+        with self._lock:
+            self._write_queued()
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM mail WHERE message_id = ? ORDER BY id LIMIT 1", (message_id,)
+            ).fetchone()
+        return self._to_mail(row) if row else None
+
+    def set_status(self, message_id: str, status: MessageStatus) -> bool:
+        with self._lock:
+            self._write_queued()
+            cursor = self._conn.execute("UPDATE mail SET status = ? WHERE message_id = ?", (status.value, message_id))
+        return cursor.rowcount > 0
+
+    def thread(self, message_id: str) -> List[Mail]:
+        with self._lock:
+            self._write_queued()
+            rows = self._conn.execute(_THREAD_QUERY, {"start": message_id}).fetchall()
+        return [self._to_mail(row) for row in rows]
+
+    def archive_read_before(self, cutoff: datetime) -> int:
+        with self._lock:
+            self._write_queued()
+            cursor = self._conn.execute(
+                f"UPDATE mail SET status = ? WHERE status IN ({', '.join('?' * len(_SETTLED))}) AND sent_at < ?",
+                (MessageStatus.ARCHIVED.value, *_SETTLED, _epoch(cutoff)),
+            )
+        return cursor.rowcount
+
+    def delete_before(self, cutoff: datetime) -> int:
+        with self._lock:
+            self._write_queued()
+            cursor = self._conn.execute(
+                f"DELETE FROM mail WHERE status IN ({', '.join('?' * len(_DELETABLE))}) AND sent_at < ?",
+                (*_DELETABLE, _epoch(cutoff)),
+            )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        """Stop the writer thread, insert anything still queued and close the database."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        if self._writer is not None:
+            self._writer.join()
+        with self._lock:
+            try:
+                self._write_queued()
+            except sqlite3.Error as e:
+                logger.error(f"Lost {len(self._queued)} queued messages closing {self.path}: {e}")
+            self._conn.close()
+
+
+def create_mail_store() -> MailStore:
+    """The store for the global mailbox: SQLite if AIWHISPERER_MAILBOX_DB is set, else in memory."""
+    path = os.environ.get(MAILBOX_DB_ENV, "").strip()
+    if not path:
+        return InMemoryMailStore()
+    try:
+        return SQLiteMailStore(path)
+    except sqlite3.Error as e:
+        logger.error(f"Could not open mailbox database {path}, keeping mail in memory: {e}")
+        return InMemoryMailStore()
+
+
+class RetentionScheduler:
+    """
+    Applies a retention policy to a mailbox when started and then every ``interval`` seconds.
+
+    Args:
+        policy: When to archive read mail and delete old mail
+        interval: Seconds between retention runs
+        mailbox: Mailbox to apply it to (the global mailbox when None)
+    """
+
+    def __init__(self, policy: RetentionPolicy, interval: float = DEFAULT_RETENTION_INTERVAL,
+                 mailbox: Optional[MailboxSystem] = None):
+        self.policy = policy
+        self.interval = interval
+        self._mailbox = mailbox
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+
+    def run_once(self) -> Dict[str, int]:
+        """Apply the policy now; errors are logged, not raised."""
+        mailbox = self._mailbox or get_mailbox()
+        self.runs += 1
+        try:
+            return mailbox.apply_retention(self.policy)
+        except Exception as e:
+            logger.error(f"Mailbox retention failed: {e}")
+            return {"archived": 0, "deleted": 0}
+
+    async def _run(self) -> None:
+        while True:
+            self.run_once()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Run retention now and then periodically on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic retention runs."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+def create_retention_scheduler(config: Optional[dict],
+                               mailbox: Optional[MailboxSystem] = None) -> Optional[RetentionScheduler]:
+    """
+    Build the mailbox retention scheduler from the ``mailbox.retention`` config section.
+
+    Returns:
+        The scheduler, or None if neither archiving nor deletion is configured
+    """
+    settings = ((config or {}).get("mailbox") or {}).get("retention") or {}
+    archive_days = settings.get("archive_read_after_days")
+    delete_days = settings.get("delete_after_days")
+    if archive_days is None and delete_days is None:
+        return None
+    policy = RetentionPolicy(
+        archive_read_after=timedelta(days=float(archive_days)) if archive_days is not None else None,
+        delete_after=timedelta(days=float(delete_days)) if delete_days is not None else None,
+    )
+    return RetentionScheduler(policy, float(settings.get("interval", DEFAULT_RETENTION_INTERVAL)), mailbox)
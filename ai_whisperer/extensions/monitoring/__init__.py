@@ -3,6 +3,6 @@ ai_whisperer.extensions.monitoring - Monitoring and debugging extension
 
 This extension provides enhanced monitoring:
 - Debbie debugger logger
-- Log aggregation
-- Pattern detection
+- Log aggregation (bounded, indexed log store with an on-disk archive)
+- Pattern detection (incremental sliding windows with MinHash near-duplicate search)
 """
@@ -8,6 +8,7 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 from ai_whisperer.core.logging import EnhancedLogMessage, LogLevel, LogSource, ComponentType
+from ai_whisperer.extensions.monitoring.pattern_stream import PatternStream, jaccard, word_shingles
 
 logger = logging.getLogger(__name__)
 
@@ -58,11 +59,31 @@ class Insight:
         }
 
 class PatternDetector:
-    """Detects patterns in log streams"""
-    
+    """
+    Detects patterns in log streams.
+
+    Rules read incremental windows over the recent events (see
+    PatternStream) rather than rescanning them, so analyzing an event costs
+    the same however long the windows are.
+    """
+
+    # Recent events each rule looks at
+    STALL_WINDOW = 10
+    TOOL_LOOP_WINDOW = 20
+    ERROR_WINDOW = 50
+    PERFORMANCE_WINDOW = 100
+    ERROR_SIMILARITY = 0.7
+
     def __init__(self):
         self.pattern_history = []
         self.detection_rules = self._initialize_rules()
+        self.stream = PatternStream(
+            stall_window=self.STALL_WINDOW,
+            tool_window=self.TOOL_LOOP_WINDOW,
+            error_window=self.ERROR_WINDOW,
+            performance_window=self.PERFORMANCE_WINDOW,
+            similarity_threshold=self.ERROR_SIMILARITY,
+        )
         
     def _initialize_rules(self) -> Dict[PatternType, Callable]:
         """Initialize pattern detection rules"""
@@ -88,6 +109,11 @@ class PatternDetector:
                 logger.debug(f"Error detecting {pattern_type}: {e}")
         
         return patterns
+
+    def _windows(self, recent_events: List[Dict[str, Any]]) -> PatternStream:
+        """The incremental windows, caught up with ``recent_events``"""
+        self.stream.sync(recent_events)
+        return self.stream
     
     def _detect_continuation_stall(self, event: Dict[str, Any], 
                                   recent_events: List[Dict[str, Any]]) -> Optional[DetectedPattern]:
@@ -96,16 +122,15 @@ class PatternDetector:
         if event.get('action') == 'session_inspected':
             details = event.get('details', {})
             if details.get('stall_detected') and details.get('stall_duration', 0) > 30:
-                # Check if previous event was tool execution
-                tool_events = [e for e in recent_events[-10:] 
-                             if e.get('component') == 'TOOL' or 'tool' in e.get('action', '')]
+                # Check if a recent event was tool execution
+                tool_event = self._windows(recent_events).last_tool_event()
                 
-                if tool_events:
+                if tool_event:
                     return DetectedPattern(
                         pattern_type=PatternType.CONTINUATION_STALL,
                         confidence=0.92,
                         description=f"Agent stalled for {details['stall_duration']:.1f}s after tool execution",
-                        evidence=[event, tool_events[-1]] if tool_events else [event]
+                        evidence=[event, tool_event]
                     )
         return None
     
@@ -116,17 +141,15 @@ class PatternDetector:
             tool_name = event.get('details', {}).get('tool_name')
             if tool_name:
                 # Count recent calls to same tool
-                recent_same_tool = [
-                    e for e in recent_events[-20:] 
-                    if e.get('details', {}).get('tool_name') == tool_name
-                ]
+                tools = self._windows(recent_events).tools
+                call_count = tools.count(tool_name)
                 
-                if len(recent_same_tool) > 5:
+                if call_count > 5:
                     return DetectedPattern(
                         pattern_type=PatternType.TOOL_LOOP,
                         confidence=0.85,
-                        description=f"Tool '{tool_name}' called {len(recent_same_tool)} times recently",
-                        evidence=recent_same_tool[-5:]
+                        description=f"Tool '{tool_name}' called {call_count} times recently",
+                        evidence=tools.newest(tool_name, 5)
                     )
         return None
     
@@ -136,19 +159,15 @@ class PatternDetector:
         if event.get('level') in ['ERROR', 'CRITICAL']:
             error_msg = event.get('event_summary', '')
             
-            # Look for similar errors
-            similar_errors = [
-                e for e in recent_events[-50:]
-                if e.get('level') in ['ERROR', 'CRITICAL'] and 
-                self._similarity_score(error_msg, e.get('event_summary', '')) > 0.7
-            ]
+            # Look for similar errors; only the newest three are needed
+            similar_errors = self._windows(recent_events).similar_errors(event, limit=3)
             
             if len(similar_errors) > 2:
                 return DetectedPattern(
                     pattern_type=PatternType.ERROR_PATTERN,
                     confidence=0.8,
                     description=f"Recurring error: {error_msg[:100]}",
-                    evidence=similar_errors[-3:]
+                    evidence=similar_errors
                 )
         return None
     
@@ -160,12 +179,10 @@ class PatternDetector:
             action = event.get('action', '')
             
             # Find similar actions
-            similar_actions = [
-                e for e in recent_events[-100:]
-                if e.get('action') == action and 'duration_ms' in e
-            ]
+            durations = self._windows(recent_events).durations
+            similar_actions = durations.oldest(action, 5)
             
-            if len(similar_actions) > 5:
+            if durations.count(action) > 5:
                 avg_duration = sum(e['duration_ms'] for e in similar_actions[:5]) / 5
                 if duration > avg_duration * 1.5:  # 50% slower
                     return DetectedPattern(
@@ -206,16 +223,7 @@ class PatternDetector:
     def _similarity_score(self, text1: str, text2: str) -> float:
         """Calculate similarity between two strings (0.0 to 1.0)"""
         # Simple word-based similarity
-        words1 = set(text1.lower().split())
-        words2 = set(text2.lower().split())
-        
-        if not words1 or not words2:
-            return 0.0
-        
-        intersection = words1.intersection(words2)
-        union = words1.union(words2)
-        
-        return len(intersection) / len(union)
+        return jaccard(word_shingles(text1), word_shingles(text2))
 
 class InsightGenerator:
     """Generates actionable insights from detected patterns"""
@@ -357,7 +365,8 @@ class DebbieCommentary:
         # Add to recent events
         self.recent_events.append(event)
         if len(self.recent_events) > self.max_recent:
-            self.recent_events = self.recent_events[-self.max_recent:]
+            # Trim in place: the pattern detector follows this list as a stream
+            del self.recent_events[:-self.max_recent]
         
         # Detect patterns
         patterns = self.pattern_detector.analyze(event, self.recent_events)
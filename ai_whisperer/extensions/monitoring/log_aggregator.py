@@ -1,25 +1,41 @@
 """
 Log aggregator for multi-source log management and correlation.
+
+Logs are kept in a bounded LogStore (see log_store.py) indexed by session,
+source, time and keyword, so queries do not scan every entry. With an
+archive (see log_segments.py), every log is also written to segment files
+on disk, and queries that memory cannot fill continue into the archive.
 """
 
-import time
 from datetime import datetime, timedelta
-from collections import defaultdict, deque
+from collections import deque
 from dataclasses import dataclass, field
 import threading
 import uuid
 
 from ai_whisperer.core.logging import EnhancedLogMessage, LogSource
-from typing import Any, Dict, List, Optional, Tuple, Union
+from ai_whisperer.extensions.monitoring.log_segments import SegmentedLogStore, log_archive_dir
+from ai_whisperer.extensions.monitoring.log_store import (
+    SESSION,
+    SOURCE,
+    LogEntry,
+    LogStore,
+    indexed_values,
+    parse_timestamp,
+)
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+
+# Queued logs that wake the indexer before its next pass
+INDEX_BATCH_SIZE = 1024
 
-# Type alias for log entries
-LogEntry = Dict[str, Any]
+# Archive blocks a query reads at most, newest first
+ARCHIVE_SCAN_BLOCKS = 64
 
 @dataclass
 class CorrelationGroup:
     """Group of correlated log entries"""
     correlation_id: str
-    entries: List[LogEntry] = field(default_factory=list)
+    entries: Deque[LogEntry] = field(default_factory=deque)
     created_at: datetime = field(default_factory=datetime.now)
     updated_at: datetime = field(default_factory=datetime.now)
     
@@ -38,11 +54,13 @@ class Timeline:
     session_id: str
     start_time: datetime
     end_time: datetime
-    events: List[LogEntry] = field(default_factory=list)
+    events: Deque[LogEntry] = field(default_factory=deque)  # The latest events
+    event_count: int = 0
     
     def add_event(self, event: LogEntry):
         """Add event to timeline"""
         self.events.append(event)
+        self.event_count += 1
         # Update time bounds
         event_time = self._parse_timestamp(event.get('timestamp'))
         if event_time:
@@ -71,14 +89,15 @@ class Timeline:
             'start_time': self.start_time.isoformat(),
             'end_time': self.end_time.isoformat(),
             'duration_seconds': self.get_duration().total_seconds(),
-            'event_count': len(self.events)
+            'event_count': self.event_count
         }
 
 class TimelineBuilder:
     """Builds timelines from log events"""
     
-    def __init__(self):
+    def __init__(self, max_events: Optional[int] = None):
         self.timelines: Dict[str, Timeline] = {}
+        self.max_events = max_events
         
     def add_event(self, log_entry: LogEntry):
         """Add event to appropriate timeline"""
@@ -89,7 +108,8 @@ class TimelineBuilder:
             self.timelines[session_id] = Timeline(
                 session_id=session_id,
                 start_time=now,
-                end_time=now
+                end_time=now,
+                events=deque(maxlen=self.max_events)
             )
         
         self.timelines[session_id].add_event(log_entry)
@@ -103,75 +123,131 @@ class TimelineBuilder:
         return list(self.timelines.values())
 
 class LogAggregator:
-    """Aggregates logs from multiple sources with correlation"""
+    """
+    Aggregates logs from multiple sources with correlation.
+
+    add_log() only queues an entry, so callers on any thread never wait for
+    indexing; an indexer thread moves queued entries into a LogStore (and
+    the correlation groups and timelines) in batches, and every query first
+    indexes whatever is still queued, so it sees every log added before it.
+    """
     
-    def __init__(self, correlation_timeout: int = 300, buffer_size: int = 10000):
+    def __init__(self, correlation_timeout: int = 300, buffer_size: int = 10000,
+                 per_key_limit: Optional[int] = None, index_interval: float = 0.05,
+                 archive: Optional[SegmentedLogStore] = None,
+                 archive_scan_blocks: int = ARCHIVE_SCAN_BLOCKS):
         """
         Initialize aggregator.
         
         Args:
             correlation_timeout: Seconds before correlation groups expire
             buffer_size: Maximum number of logs to keep in memory
+            per_key_limit: Maximum logs kept per session, source, correlation
+                group and timeline (defaults to buffer_size)
+            index_interval: Seconds between indexer passes over queued logs
+            archive: On-disk store to write every log to (defaults to one in
+                AIWHISPERER_LOG_ARCHIVE_DIR, if set)
+            archive_scan_blocks: Archive blocks a query reads at most
         """
         self.correlation_timeout = correlation_timeout
         self.buffer_size = buffer_size
+        self.per_key_limit = per_key_limit or buffer_size
+        self.index_interval = index_interval
         
         # Storage
-        self.logs: deque = deque(maxlen=buffer_size)
+        self.store = LogStore(buffer_size, self.per_key_limit)
+        if archive is None and log_archive_dir() is not None:
+            archive = SegmentedLogStore(log_archive_dir())
+        self.archive = archive
+        self.archive_scan_blocks = archive_scan_blocks
         self.correlation_map: Dict[str, CorrelationGroup] = {}
-        self.session_logs: Dict[str, List[LogEntry]] = defaultdict(list)
-        self.source_logs: Dict[LogSource, List[LogEntry]] = defaultdict(list)
         
         # Timeline builder
-        self.timeline_builder = TimelineBuilder()
+        self.timeline_builder = TimelineBuilder(self.per_key_limit)
+        
+        # Ingestion: deque.append is atomic, so producers never take the lock
+        self._queue: deque = deque()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
         
-        # Thread safety
+        # Thread safety (indexing and queries)
         self.lock = threading.RLock()
         
-        # Cleanup thread
+        self.running = True
+        # Indexer and cleanup threads
+        self.indexer_thread = threading.Thread(target=self._index_loop, daemon=True)
+        self.indexer_thread.start()
         self.cleanup_thread = threading.Thread(target=self._cleanup_loop, daemon=True)
         self.cleanup_thread.start()
-        self.running = True
     
-    def add_log(self, log_entry: Union[EnhancedLogMessage, Dict[str, Any]]):
-        """Add log maintaining correlations"""
+    @property
+    def logs(self) -> List[LogEntry]:
+        """All logs in memory, oldest first."""
         with self.lock:
-            # Convert to dict if needed
-            if isinstance(log_entry, EnhancedLogMessage):
-                log_dict = log_entry.to_dict()
-            else:
-                log_dict = log_entry
+            self._drain()
+            return self.store.latest()
+    
+    def add_log(self, log_entry: Union[EnhancedLogMessage, Dict[str, Any]]):
+        """Queue a log for indexing; correlations are maintained by the indexer"""
+        # Convert to dict if needed
+        if isinstance(log_entry, EnhancedLogMessage):
+            log_dict = log_entry.to_dict()
+        else:
+            log_dict = log_entry
+        
+        # Add unique ID if not present
+        if 'event_id' not in log_dict:
+            log_dict['event_id'] = str(uuid.uuid4())
+        
+        self._queue.append(log_dict)
+        if len(self._queue) >= INDEX_BATCH_SIZE:
+            self._wake.set()
+    
+    def _drain(self):
+        """Index every queued log (caller holds the lock)."""
+        queue = self._queue
+        if not queue:
+            return
+        while queue:
+            log_dict = queue.popleft()
             
-            # Add unique ID if not present
-            if 'event_id' not in log_dict:
-                log_dict['event_id'] = str(uuid.uuid4())
+            # Normalise the source to its value, which is what queries filter on
+            source = log_dict.get('source')
+            if isinstance(source, LogSource):
+                log_dict['source'] = source.value
             
-            # Add to main buffer
-            self.logs.append(log_dict)
+            self.store.add(log_dict)
             
             # Group by correlation ID
             correlation_id = log_dict.get('correlation_id')
             if correlation_id:
                 if correlation_id not in self.correlation_map:
-                    self.correlation_map[correlation_id] = CorrelationGroup(correlation_id)
+                    self.correlation_map[correlation_id] = CorrelationGroup(
+                        correlation_id, entries=deque(maxlen=self.per_key_limit)
+                    )
                 self.correlation_map[correlation_id].add_entry(log_dict)
             
-            # Group by session
-            session_id = log_dict.get('session_id')
-            if session_id:
-                self.session_logs[session_id].append(log_dict)
-            
-            # Group by source
-            source = log_dict.get('source')
-            if source:
-                try:
-                    source_enum = LogSource(source) if isinstance(source, str) else source
-                    self.source_logs[source_enum].append(log_dict)
-                except:
-                    pass
-            
             # Add to timeline
             self.timeline_builder.add_event(log_dict)
+            
+            if self.archive is not None:
+                self.archive.append(log_dict)
+        
+        if self.archive is not None:
+            self.archive.flush()
+    
+    def flush(self):
+        """Index every queued log now."""
+        with self.lock:
+            self._drain()
+    
+    def _index_loop(self):
+        """Index queued logs in batches"""
+        while not self._stop.is_set():
+            self._wake.wait(self.index_interval)
+            self._wake.clear()
+            if self._queue:
+                self.flush()
     
     def get_logs(self, session_id: Optional[str] = None,
                  time_range: Optional[Tuple[datetime, datetime]] = None,
@@ -189,38 +265,79 @@ class LogAggregator:
         Returns:
             Filtered log entries
         """
+        source_values = [s.value if isinstance(s, LogSource) else s for s in sources] if sources else None
+        if not (session_id or time_range or sources):
+            with self.lock:
+                self._drain()
+                logs = self.store.latest(limit)
+            return self._with_archive(logs, limit)
+        
         with self.lock:
-            # Start with all logs or session-specific logs
+            self._drain()
+            store = self.store
+            
+            # Start from the narrowest index and filter by the others
             if session_id:
-                logs = self.session_logs.get(session_id, [])
+                seqs = store.key_seqs(SESSION, session_id)
+                if sources:
+                    seqs = [seq for seq in seqs if store.get(seq).get('source') in source_values]
+            elif sources:
+                seqs = store.merged_key_seqs(SOURCE, source_values)
             else:
-                logs = list(self.logs)
+                seqs = None
             
-            # Filter by time range
             if time_range:
                 start_time, end_time = time_range
-                logs = [
-                    log for log in logs
-                    if self._is_in_time_range(log, start_time, end_time)
-                ]
-            
-            # Filter by sources
-            if sources:
-                source_values = [s.value for s in sources]
-                logs = [
-                    log for log in logs
-                    if log.get('source') in source_values
-                ]
+                in_range = store.time_seqs(parse_timestamp(start_time), parse_timestamp(end_time))
+                if seqs is None:
+                    seqs = in_range
+                else:
+                    in_range = set(in_range)
+                    seqs = [seq for seq in seqs if seq in in_range]
             
             # Apply limit
-            if len(logs) > limit:
-                logs = logs[-limit:]
-            
+            if len(seqs) > limit:
+                seqs = seqs[-limit:]
+            logs = store.entries(seqs)
+        
+        def matches(log: LogEntry) -> bool:
+            return ((not session_id or log.get('session_id') == session_id)
+                    and (not source_values or log.get('source') in source_values))
+        
+        start, end = (parse_timestamp(t) for t in time_range) if time_range else (None, None)
+        return self._with_archive(logs, limit, matches, start, end)
+    
+    def _with_archive(self, logs: List[LogEntry], limit: int, predicate=None,
+                      start: Optional[float] = None, end: Optional[float] = None) -> List[LogEntry]:
+        """
+        Fill up to ``limit`` logs with older matches from the archive.
+        
+        Called without the lock held: the archive is read outside it, newest
+        block first and at most ``archive_scan_blocks`` blocks.
+        """
+        if self.archive is None or len(logs) >= limit:
             return logs
+        
+        # Logs timestamped before the earliest one in memory have all been evicted,
+        # so only the archived logs sharing that timestamp can still be in memory
+        with self.lock:
+            cutoff = self.store.oldest_time()
+            at_cutoff = set()
+            if cutoff is not None:
+                at_cutoff = {log.get('event_id') for log in self.store.entries(self.store.time_seqs(cutoff, cutoff))}
+        if cutoff is not None:
+            end = cutoff if end is None else min(end, cutoff)
+        
+        def archived(log: LogEntry) -> bool:
+            return (predicate is None or predicate(log)) and log.get('event_id') not in at_cutoff
+        
+        older = self.archive.query(archived, start, end, limit - len(logs), self.archive_scan_blocks)
+        return older + logs
     
     def get_correlated_logs(self, correlation_id: str) -> List[LogEntry]:
         """Get all logs related to a correlation ID"""
         with self.lock:
+            self._drain()
             group = self.correlation_map.get(correlation_id)
             if group:
                 return group.get_timeline()
@@ -229,6 +346,7 @@ class LogAggregator:
     def get_session_timeline(self, session_id: str) -> Optional[Timeline]:
         """Get complete timeline for a session"""
         with self.lock:
+            self._drain()
             return self.timeline_builder.build_for_session(session_id)
     
     def search_logs(self, query: str, fields: Optional[List[str]] = None,
@@ -236,102 +354,102 @@ class LogAggregator:
         """
         Search logs for a query string.
         
+        A log matches when the query appears (case-insensitively) within one
+        of its string values, or within one of ``fields`` when given. Without
+        ``fields`` the keyword index picks the candidates to check, so
+        timestamps and event ids, which are not indexed, are not searched;
+        use get_logs() with a time range for those. With ``fields``, which
+        may hold numbers or nested details, and for queries without words,
+        the logs are scanned instead, newest first.
+        
         Args:
             query: Search query
             fields: Fields to search in (searches all if None)
             limit: Maximum results
             
         Returns:
-            Matching log entries
+            The newest matching log entries, oldest first
         """
+        query_lower = query.lower()
+        
+        def matches(log: LogEntry) -> bool:
+            return self._matches_query(log, query_lower, fields)
+        
         with self.lock:
+            self._drain()
+            candidates = None if fields else self.store.substring_seqs(query_lower)
+            if candidates is not None:
+                results = []
+                for log in map(self.store.get, candidates):
+                    if matches(log):
+                        results.append(log)
+                        if len(results) >= limit:
+                            break
+            else:
+                # Scanned after releasing the lock
+                snapshot = self.store.latest()
+        
+        if candidates is None:
             results = []
-            query_lower = query.lower()
-            
-            for log in self.logs:
-                if self._matches_query(log, query_lower, fields):
+            for log in reversed(snapshot):
+                if matches(log):
                     results.append(log)
                     if len(results) >= limit:
                         break
-            
-            return results
+        results.reverse()
+        return self._with_archive(results, limit, matches)
     
     def get_statistics(self) -> Dict[str, Any]:
         """Get aggregator statistics"""
         with self.lock:
+            self._drain()
+            store = self.store
             source_counts = {
-                source.value: len(logs) 
-                for source, logs in self.source_logs.items()
+                source: store.key_count(SOURCE, source)
+                for source in store.keys(SOURCE)
             }
             
             return {
-                'total_logs': len(self.logs),
-                'session_count': len(self.session_logs),
+                'total_logs': len(store),
+                'session_count': len(store.keys(SESSION)),
                 'correlation_groups': len(self.correlation_map),
                 'source_counts': source_counts,
                 'timeline_count': len(self.timeline_builder.timelines),
-                'buffer_usage': f"{len(self.logs)}/{self.buffer_size}"
+                'buffer_usage': f"{len(store)}/{self.buffer_size}",
+                'indexed_terms': store.get_stats()['terms'],
+                'archive': self.archive.get_stats() if self.archive is not None else None,
             }
     
     def clear_session(self, session_id: str):
-        """Clear logs for a specific session"""
+        """Clear logs for a specific session from memory (the archive keeps them)"""
         with self.lock:
-            # Remove from session logs
-            if session_id in self.session_logs:
-                del self.session_logs[session_id]
-            
-            # Remove from main buffer
-            self.logs = deque(
-                (log for log in self.logs if log.get('session_id') != session_id),
-                maxlen=self.buffer_size
-            )
+            self._drain()
+            self.store.remove(self.store.key_seqs(SESSION, session_id))
             
             # Clean up correlations
             for corr_id in list(self.correlation_map.keys()):
                 group = self.correlation_map[corr_id]
-                group.entries = [
-                    e for e in group.entries 
-                    if e.get('session_id') != session_id
-                ]
+                group.entries = deque(
+                    (e for e in group.entries if e.get('session_id') != session_id),
+                    maxlen=group.entries.maxlen if isinstance(group.entries, deque) else None
+                )
                 if not group.entries:
                     del self.correlation_map[corr_id]
     
     def shutdown(self):
         """Shutdown aggregator"""
         self.running = False
+        self._stop.set()
+        self._wake.set()
+        self.flush()
+        if self.archive is not None:
+            self.archive.close()
     
     def _cleanup_loop(self):
         """Background cleanup of expired correlations"""
-        while self.running:
-            time.sleep(60)  # Run every minute
+        while not self._stop.wait(60):  # Run every minute
             self._cleanup_expired_correlations()
     
-    def _cleanup_expired_correlations(self):
-        """Remove expired correlation groups"""
-        with self.lock:
-            now = datetime.now()
-            expired = []
-            
-            for corr_id, group in self.correlation_map.items():
-                age = (now - group.updated_at).total_seconds()
-                if age > self.correlation_timeout:
-                    expired.append(corr_id)
-            
-            for corr_id in expired:
-                del self.correlation_map[corr_id]
-    
-    def _is_in_time_range(self, log: LogEntry, start: datetime, end: datetime) -> bool:
-        """Check if log is in time range"""
-        timestamp_str = log.get('timestamp')
-        if not timestamp_str:
-            return False
-        
-        try:
-            timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-            return start <= timestamp <= end
-        except:
-            return False
-    
     def _matches_query(self, log: LogEntry, query: str, fields: Optional[List[str]]) -> bool:
         """Check if log matches search query"""
         if fields:
@@ -341,9 +459,9 @@ class LogAggregator:
                 if value and query in str(value).lower():
                     return True
         else:
-            # Search all string values
-            for value in log.values():
-                if isinstance(value, str) and query in value.lower():
+            # Search the indexed string values
+            for value in indexed_values(log):
+                if query in value.lower():
                     return True
         
         return False
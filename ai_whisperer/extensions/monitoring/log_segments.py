@@ -0,0 +1,417 @@
+"""
+Segmented on-disk log store behind LogAggregator.
+
+The aggregator's LogStore only holds recent logs in memory, and they are
+gone after a restart. SegmentedLogStore appends every log to local
+newline-delimited JSON files so older logs can still be queried:
+
+- Logs go to the active segment, ``segment-<start ms>.jsonl``. A new
+  segment starts once the active one is ``segment_seconds`` old or
+  ``segment_max_bytes`` long.
+- Each segment is divided into blocks of ``block_records`` records, and a
+  sparse index keeps, for every block, the earliest and latest timestamp
+  and the block's byte offset. Time-range queries only read the blocks
+  that overlap the range.
+- Closed segments are compressed in the background to
+  ``segment-<start ms>.jsonl.gz``, one gzip member per block, so the index
+  offsets still point at independently readable blocks. The index is saved
+  beside the segment as ``<segment>.idx``.
+- Retention deletes the oldest closed segments once they total more than
+  ``max_bytes`` or were last written more than ``max_age`` seconds ago.
+
+On startup, existing segments are reopened from their index files; a
+segment left uncompressed by a crash is re-indexed and closed.
+
+Key Components:
+- SegmentedLogStore: Append, query and retention over segment files
+- log_archive_dir(): Archive directory from AIWHISPERER_LOG_ARCHIVE_DIR
+"""
+
+import gzip
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+from ai_whisperer.extensions.monitoring.log_store import LogEntry, parse_timestamp
+from ai_whisperer.utils import json_codec
+
+logger = logging.getLogger(__name__)
+
+LOG_ARCHIVE_ENV = "AIWHISPERER_LOG_ARCHIVE_DIR"
+
+SEGMENT_PREFIX = "segment-"
+PLAIN_SUFFIX = ".jsonl"
+COMPRESSED_SUFFIX = ".jsonl.gz"
+INDEX_SUFFIX = ".idx"
+
+
+def log_archive_dir() -> Optional[Path]:
+    """Directory to archive aggregated logs in (AIWHISPERER_LOG_ARCHIVE_DIR); None when unset or empty."""
+    value = os.environ.get(LOG_ARCHIVE_ENV)
+    return Path(value) if value else None
+
+
+@dataclass
+class _Segment:
+    """One segment file and its sparse index."""
+    path: Path
+    start: float  # Wall-clock time the segment was opened
+    last_write: float = 0.0  # Wall-clock time of the latest append
+    compressed: bool = False
+    records: int = 0
+    size: int = 0  # Bytes on disk
+    min_ts: Optional[float] = None
+    max_ts: Optional[float] = None
+    blocks: List[List[float]] = field(default_factory=list)  # [min_ts, max_ts, offset, records]
+
+    @property
+    def index_path(self) -> Path:
+        return self.path.with_name(self.path.name + INDEX_SUFFIX)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"start": self.start, "last_write": self.last_write, "compressed": self.compressed,
+                "records": self.records, "size": self.size, "min_ts": self.min_ts, "max_ts": self.max_ts,
+                "blocks": self.blocks}
+
+    def note(self, timestamp: float, offset: int, block_records: int) -> None:
+        """Index a record written at ``offset``."""
+        if not self.blocks or self.blocks[-1][3] >= block_records:
+            self.blocks.append([timestamp, timestamp, offset, 0])
+        block = self.blocks[-1]
+        block[0] = min(block[0], timestamp)
+        block[1] = max(block[1], timestamp)
+        block[3] += 1
+        self.records += 1
+        self.min_ts = timestamp if self.min_ts is None else min(self.min_ts, timestamp)
+        self.max_ts = timestamp if self.max_ts is None else max(self.max_ts, timestamp)
+
+    def overlaps(self, start: Optional[float], end: Optional[float]) -> bool:
+        if self.min_ts is None:
+            return False
+        return (start is None or self.max_ts >= start) and (end is None or self.min_ts <= end)
+
+
+class SegmentedLogStore:
+    """
+    Time-segmented, compressed, size- and age-limited log files.
+
+    Args:
+        directory: Directory for segment files (created if missing)
+        segment_seconds: Start a new segment after this many seconds
+        segment_max_bytes: Start a new segment once the active one is this long
+        block_records: Records per indexed (and separately compressed) block
+        max_bytes: Delete the oldest closed segments beyond this total size
+        max_age: Delete closed segments last written longer ago than this (seconds)
+        compress: Compress closed segments
+        clock: Wall-clock time source (for testing)
+    """
+
+    def __init__(self, directory: Union[str, Path], segment_seconds: float = 3600.0,
+                 segment_max_bytes: int = 16 * 1024 * 1024, block_records: int = 256,
+                 max_bytes: int = 512 * 1024 * 1024, max_age: float = 7 * 24 * 3600.0,
+                 compress: bool = True, clock: Callable[[], float] = time.time):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_seconds = segment_seconds
+        self.segment_max_bytes = segment_max_bytes
+        self.block_records = block_records
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compress = compress
+        self.clock = clock
+
+        self._lock = threading.RLock()
+        self._closed: List[_Segment] = []
+        self._active: Optional[_Segment] = None
+        self._file = None
+        self._compressing: List[threading.Thread] = []
+        self._load()
+
+    # --- Startup ---
+
+    def _load(self) -> None:
+        for path in sorted(self.directory.glob(f"{SEGMENT_PREFIX}*")):
+            if path.name.endswith(".tmp"):
+                path.unlink(missing_ok=True)  # Interrupted compression or index write
+                continue
+            if not path.name.endswith((PLAIN_SUFFIX, COMPRESSED_SUFFIX)):
+                continue
+            compressed = path.name.endswith(COMPRESSED_SUFFIX)
+            if not compressed and path.with_name(path.name[:-len(PLAIN_SUFFIX)] + COMPRESSED_SUFFIX).exists():
+                path.unlink()  # Interrupted after compressing; the .gz is complete
+                continue
+            segment = self._read_index(path) if compressed else self._reindex(path)
+            if segment is not None and segment.records:
+                self._closed.append(segment)
+        self._closed.sort(key=lambda s: s.start)
+        for segment in [s for s in self._closed if not s.compressed]:
+            self._close_segment(segment, background=False)
+        self._enforce_retention()
+
+    def _read_index(self, path: Path) -> Optional[_Segment]:
+        index_path = path.with_name(path.name + INDEX_SUFFIX)
+        try:
+            data = json_codec.loads(index_path.read_bytes())
+            return _Segment(path=path, start=data["start"], last_write=data.get("last_write", data["start"]),
+                            compressed=data["compressed"], records=data["records"],
+                            size=path.stat().st_size, min_ts=data["min_ts"], max_ts=data["max_ts"],
+                            blocks=data["blocks"])
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring log segment {path} with unreadable index: {e}")
+            return None
+
+    def _reindex(self, path: Path) -> _Segment:
+        """Rebuild the index of an uncompressed segment by reading it."""
+        segment = _Segment(path=path, start=self._start_of(path), last_write=path.stat().st_mtime)
+        offset = 0
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Torn final write
+                try:
+                    entry = json_codec.loads(line)
+                except ValueError:
+                    offset += len(line)
+                    continue
+                segment.note(self._timestamp(entry, segment.start), offset, self.block_records)
+                offset += len(line)
+        if offset != path.stat().st_size:
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+        segment.size = offset
+        return segment
+
+    @staticmethod
+    def _start_of(path: Path) -> float:
+        try:
+            return int(path.name[len(SEGMENT_PREFIX):].split(".")[0]) / 1000
+        except ValueError:
+            return path.stat().st_mtime
+
+    # --- Writing ---
+
+    @staticmethod
+    def _timestamp(entry: LogEntry, default: float) -> float:
+        timestamp = parse_timestamp(entry.get("timestamp"))
+        return default if timestamp is None else timestamp
+
+    def append(self, entry: LogEntry) -> None:
+        """Write one log to the active segment."""
+        line = json_codec.dumpb(entry, default=str) + b"\n"
+        with self._lock:
+            now = self.clock()
+            segment = self._active
+            if segment is None or now - segment.start >= self.segment_seconds \
+                    or segment.size + len(line) > self.segment_max_bytes and segment.records:
+                segment = self._roll(now)
+            self._file.write(line)
+            segment.note(self._timestamp(entry, now), segment.size, self.block_records)
+            segment.size += len(line)
+            segment.last_write = now
+
+    def append_many(self, entries: List[LogEntry]) -> None:
+        for entry in entries:
+            self.append(entry)
+        self.flush()
+
+    def flush(self) -> None:
+        """Push buffered writes to the active segment file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def _roll(self, now: float) -> _Segment:
+        """Close the active segment and open a new one."""
+        if self._active is not None:
+            self._file.close()
+            self._file = None
+            closed, self._active = self._active, None
+            if closed.records:
+                self._closed.append(closed)
+                self._close_segment(closed, background=True)
+            else:
+                closed.path.unlink(missing_ok=True)
+        start_ms = int(now * 1000)
+        path = self.directory / f"{SEGMENT_PREFIX}{start_ms:015d}{PLAIN_SUFFIX}"
+        while path.exists():
+            start_ms += 1
+            path = self.directory / f"{SEGMENT_PREFIX}{start_ms:015d}{PLAIN_SUFFIX}"
+        self._active = _Segment(path=path, start=start_ms / 1000)
+        self._file = open(path, "ab")
+        return self._active
+
+    def _close_segment(self, segment: _Segment, background: bool) -> None:
+        if not self.compress:
+            # Uncompressed segments are re-indexed from the file when reopened
+            self._enforce_retention()
+            return
+        if background:
+            thread = threading.Thread(target=self._compress, args=(segment,), daemon=True)
+            self._compressing = [t for t in self._compressing if t.is_alive()] + [thread]
+            thread.start()
+        else:
+            self._compress(segment)
+
+    def _compress(self, segment: _Segment) -> None:
+        """Rewrite a closed segment as one gzip member per block and swap it in."""
+        plain = segment.path
+        target = plain.with_name(plain.name[:-len(PLAIN_SUFFIX)] + COMPRESSED_SUFFIX)
+        temp = target.with_name(target.name + ".tmp")
+        try:
+            blocks = []
+            with open(plain, "rb") as src, open(temp, "wb") as dst:
+                for i, (min_ts, max_ts, offset, records) in enumerate(segment.blocks):
+                    end = segment.blocks[i + 1][2] if i + 1 < len(segment.blocks) else segment.size
+                    src.seek(offset)
+                    blocks.append([min_ts, max_ts, dst.tell(), records])
+                    dst.write(gzip.compress(src.read(end - offset)))
+                size = dst.tell()
+            compressed = _Segment(path=target, start=segment.start, last_write=segment.last_write,
+                                  compressed=True, records=segment.records,
+                                  size=size, min_ts=segment.min_ts, max_ts=segment.max_ts, blocks=blocks)
+            self._write_index(compressed)
+            os.replace(temp, target)
+        except OSError as e:
+            logger.error(f"Failed to compress log segment {plain}: {e}")
+            temp.unlink(missing_ok=True)
+            return
+        with self._lock:
+            if segment not in self._closed:
+                # Deleted by retention while compressing
+                target.unlink(missing_ok=True)
+                compressed.index_path.unlink(missing_ok=True)
+                return
+            self._closed = [compressed if s is segment else s for s in self._closed]
+            plain.unlink(missing_ok=True)
+        self._enforce_retention()
+
+    def _write_index(self, segment: _Segment) -> None:
+        temp = segment.index_path.with_name(segment.index_path.name + ".tmp")
+        temp.write_bytes(json_codec.dumpb(segment.to_dict()))
+        os.replace(temp, segment.index_path)
+
+    # --- Retention ---
+
+    def _enforce_retention(self) -> int:
+        """Delete closed segments beyond the size and age limits; returns how many."""
+        with self._lock:
+            cutoff = self.clock() - self.max_age
+            total = sum(s.size for s in self._closed)
+            expired = []
+            for segment in self._closed:  # Oldest first
+                if total > self.max_bytes or segment.last_write < cutoff:
+                    expired.append(segment)
+                    total -= segment.size
+            for segment in expired:
+                self._closed.remove(segment)
+                segment.path.unlink(missing_ok=True)
+                segment.index_path.unlink(missing_ok=True)
+                logger.info(f"Deleted log segment {segment.path.name} (retention)")
+            return len(expired)
+
+    def enforce_retention(self) -> int:
+        """Apply the size and age limits now."""
+        return self._enforce_retention()
+
+    # --- Queries ---
+
+    def _read_block(self, segment: _Segment, index: int) -> List[bytes]:
+        offset = segment.blocks[index][2]
+        end = segment.blocks[index + 1][2] if index + 1 < len(segment.blocks) else segment.size
+        with open(segment.path, "rb") as f:
+            f.seek(offset)
+            data = f.read(end - offset)
+        if segment.compressed:
+            data = gzip.decompress(data)
+        return data.splitlines()
+
+    def iter_entries(self, start: Optional[float] = None, end: Optional[float] = None,
+                     newest_first: bool = False, max_blocks: Optional[int] = None) -> Iterator[LogEntry]:
+        """
+        Archived logs timestamped within [start, end] (epoch seconds).
+
+        Only blocks whose time span overlaps the range are read, and at most
+        ``max_blocks`` of them when given. Logs come out in write order, or
+        reversed with ``newest_first``.
+        """
+        with self._lock:
+            self.flush()
+            segments = list(self._closed) + ([self._active] if self._active and self._active.records else [])
+            # Snapshot the active segment's index: it grows while we read
+            snapshots = [(s, [list(b) for b in s.blocks], s.size) for s in segments]
+        if newest_first:
+            snapshots.reverse()
+        for segment, blocks, size in snapshots:
+            if not segment.overlaps(start, end):
+                continue
+            view = _Segment(path=segment.path, start=segment.start, compressed=segment.compressed,
+                            records=segment.records, size=size, blocks=blocks)
+            order = range(len(blocks) - 1, -1, -1) if newest_first else range(len(blocks))
+            for i in order:
+                min_ts, max_ts = blocks[i][0], blocks[i][1]
+                if (start is not None and max_ts < start) or (end is not None and min_ts > end):
+                    continue
+                if max_blocks is not None:
+                    if max_blocks <= 0:
+                        return
+                    max_blocks -= 1
+                try:
+                    lines = self._read_block(view, i)
+                except (OSError, EOFError, gzip.BadGzipFile) as e:
+                    # Deleted by retention or swapped by compression mid-query
+                    logger.debug(f"Skipping unreadable block of {segment.path.name}: {e}")
+                    continue
+                entries = (json_codec.loads(line) for line in (reversed(lines) if newest_first else lines) if line)
+                for entry in entries:
+                    timestamp = self._timestamp(entry, min_ts)
+                    if (start is None or timestamp >= start) and (end is None or timestamp <= end):
+                        yield entry
+
+    def query(self, predicate: Optional[Callable[[LogEntry], bool]] = None, start: Optional[float] = None,
+              end: Optional[float] = None, limit: int = 1000,
+              max_blocks: Optional[int] = None) -> List[LogEntry]:
+        """
+        The newest ``limit`` archived logs in [start, end] matching ``predicate``, oldest first.
+
+        Blocks are read newest first, and no more than ``max_blocks`` of them
+        when given, so a rare match cannot make a query read the whole archive.
+        """
+        results = []
+        for entry in self.iter_entries(start, end, newest_first=True, max_blocks=max_blocks):
+            if predicate is None or predicate(entry):
+                results.append(entry)
+                if len(results) >= limit:
+                    break
+        return results[::-1]
+
+    def wait_for_compression(self, timeout: Optional[float] = None) -> None:
+        """Wait for background compression of closed segments (for shutdown and tests)."""
+        for thread in list(self._compressing):
+            thread.join(timeout)
+
+    def close(self) -> None:
+        """Flush the active segment and finish compressing closed ones."""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                self._file.close()
+                self._file = None
+            active, self._active = self._active, None
+            if active is not None and active.records:
+                # Compressed when reopened
+                self._closed.append(active)
+        self.wait_for_compression()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            segments = list(self._closed) + ([self._active] if self._active else [])
+            return {
+                "segments": len(segments),
+                "records": sum(s.records for s in segments),
+                "bytes": sum(s.size for s in segments),
+                "compressed_segments": sum(1 for s in segments if s.compressed),
+            }
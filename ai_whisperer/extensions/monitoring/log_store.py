@@ -0,0 +1,328 @@
+"""
+Bounded, indexed in-memory store for aggregated log entries.
+
+LogAggregator used to keep every entry in per-session and per-source lists
+that were never trimmed, and answered time-range and keyword queries by
+scanning every entry. LogStore keeps at most ``max_entries`` entries,
+numbered by a sequence that increases with each add, and maintains three
+indexes over them:
+
+- per-key rings: the latest ``per_key_limit`` sequence numbers for each
+  session and each source
+- a time index: parallel sorted lists of timestamps and sequence numbers,
+  queried with bisect
+- an inverted term index: for each lower-cased word, the sequence numbers
+  of the entries containing it, in order; substring searches look their
+  words up in its vocabulary to find candidates
+
+Evicted entries are not removed from the indexes one by one; queries skip
+sequence numbers that are no longer stored, and the indexes are pruned in
+bulk once enough entries have been evicted, keeping eviction O(1).
+
+LogStore is not thread-safe; LogAggregator serialises access to it.
+
+Key Components:
+- LogStore: Bounded entry store with key, time and term indexes
+- tokenize(): Words of a text, as indexed and searched
+- indexed_values(): String fields indexed for an entry
+- entry_terms(): Words indexed for an entry
+- parse_timestamp(): Epoch seconds of an ISO timestamp, as indexed
+"""
+
+import heapq
+import re
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, deque
+from datetime import datetime
+from itertools import islice
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional
+
+LogEntry = Dict[str, Any]
+
+# Per-key index kinds and the entry field each is keyed by
+SESSION = "session_id"
+SOURCE = "source"
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Unique per entry: indexing them only grows the vocabulary
+_UNINDEXED_FIELDS = frozenset({"event_id", "timestamp"})
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased words of ``text``."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def indexed_values(entry: LogEntry) -> Iterator[str]:
+    """String fields of an entry that are indexed (and searched)."""
+    return (value for field_name, value in entry.items()
+            if isinstance(value, str) and field_name not in _UNINDEXED_FIELDS)
+
+
+def entry_terms(entry: LogEntry) -> set:
+    """Words indexed for an entry: those of its string fields."""
+    terms = set()
+    for value in indexed_values(entry):
+        terms.update(_TOKEN_RE.findall(value.lower()))
+    return terms
+
+
+def parse_timestamp(value: Any) -> Optional[float]:
+    """Epoch seconds of an ISO-8601 timestamp (or datetime), or None if it is not one."""
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+class LogStore:
+    """
+    Keeps the latest ``max_entries`` log entries with key, time and term indexes.
+
+    Args:
+        max_entries: Entries kept before the oldest are evicted
+        per_key_limit: Entries kept per session and per source (defaults to ``max_entries``)
+    """
+
+    def __init__(self, max_entries: int = 10000, per_key_limit: Optional[int] = None):
+        self.max_entries = max_entries
+        self.per_key_limit = per_key_limit or max_entries
+        self._entries: Dict[int, LogEntry] = {}
+        self._next_seq = 0
+        self._first_seq = 0  # Every entry below this has been evicted
+        self._keys: Dict[str, Dict[Any, Deque[int]]] = {SESSION: {}, SOURCE: {}}
+        self._times: List[float] = []
+        self._time_seqs: List[int] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        self._evicted_since_prune = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # --- Ingestion ---
+
+    def add(self, entry: LogEntry) -> int:
+        """Store an entry and index it; returns its sequence number."""
+        seq = self._next_seq
+        self._next_seq += 1
+        self._entries[seq] = entry
+
+        for kind, keyed in self._keys.items():
+            key = entry.get(kind)
+            if key:
+                ring = keyed.get(key)
+                if ring is None:
+                    ring = keyed[key] = deque(maxlen=self.per_key_limit)
+                ring.append(seq)
+
+        timestamp = parse_timestamp(entry.get('timestamp'))
+        if timestamp is not None:
+            if not self._times or timestamp >= self._times[-1]:
+                self._times.append(timestamp)
+                self._time_seqs.append(seq)
+            else:
+                # Out of order: keep the index sorted by time
+                index = bisect_right(self._times, timestamp)
+                self._times.insert(index, timestamp)
+                self._time_seqs.insert(index, seq)
+
+        postings = self._postings
+        for term in entry_terms(entry):
+            postings[term].append(seq)
+
+        while len(self._entries) > self.max_entries:
+            self._evict_oldest()
+        return seq
+
+    def _evict_oldest(self) -> None:
+        # Sequence numbers removed by remove() leave gaps; skipping them is O(1) each
+        while self._entries.pop(self._first_seq, None) is None:
+            self._first_seq += 1
+        self._first_seq += 1
+        self._evicted_since_prune += 1
+        if self._evicted_since_prune >= self.max_entries:
+            self._prune()
+
+    def remove(self, seqs: Iterable[int]) -> int:
+        """Drop entries by sequence number; returns how many were stored."""
+        removed = 0
+        for seq in seqs:
+            if self._entries.pop(seq, None) is not None:
+                removed += 1
+        self._evicted_since_prune += removed
+        return removed
+
+    def _prune(self) -> None:
+        """Drop evicted sequence numbers from every index."""
+        entries, first = self._entries, self._first_seq
+        for keyed in self._keys.values():
+            for key in list(keyed):
+                ring = keyed[key]
+                while ring and ring[0] not in entries:
+                    ring.popleft()
+                if not ring:
+                    del keyed[key]
+
+        live = [(t, s) for t, s in zip(self._times, self._time_seqs) if s in entries]
+        self._times = [t for t, _ in live]
+        self._time_seqs = [s for _, s in live]
+
+        for term in list(self._postings):
+            postings = self._postings[term]
+            del postings[:bisect_left(postings, first)]
+            if not postings:
+                del self._postings[term]
+        self._evicted_since_prune = 0
+
+    # --- Queries ---
+
+    def get(self, seq: int) -> Optional[LogEntry]:
+        return self._entries.get(seq)
+
+    def _live(self, seqs: Iterable[int]) -> Iterator[int]:
+        entries = self._entries
+        return (seq for seq in seqs if seq in entries)
+
+    def latest(self, limit: Optional[int] = None) -> List[LogEntry]:
+        """The newest ``limit`` entries (all when None), oldest first."""
+        newest = islice(reversed(self._entries.values()), limit)
+        return list(newest)[::-1]
+
+    def iter_entries(self) -> Iterator[LogEntry]:
+        """Every stored entry, oldest first."""
+        return iter(self._entries.values())
+
+    def keys(self, kind: str) -> List[Any]:
+        """Sessions or sources with stored entries."""
+        return [key for key, ring in self._keys[kind].items() if any(True for _ in self._live(ring))]
+
+    def key_seqs(self, kind: str, key: Any) -> List[int]:
+        """Sequence numbers of the stored entries for one session or source, oldest first."""
+        ring = self._keys[kind].get(key)
+        return list(self._live(ring)) if ring else []
+
+    def key_count(self, kind: str, key: Any) -> int:
+        return len(self.key_seqs(kind, key))
+
+    def merged_key_seqs(self, kind: str, keys: Iterable[Any]) -> List[int]:
+        """Sequence numbers for several sessions or sources, oldest first."""
+        return list(heapq.merge(*(self.key_seqs(kind, key) for key in keys)))
+
+    def time_seqs(self, start: Optional[float] = None, end: Optional[float] = None) -> List[int]:
+        """Sequence numbers of entries timestamped within [start, end], in time order."""
+        lo = 0 if start is None else bisect_left(self._times, start)
+        hi = len(self._times) if end is None else bisect_right(self._times, end)
+        return list(self._live(self._time_seqs[lo:hi]))
+
+    def oldest_time(self) -> Optional[float]:
+        """Earliest timestamp among the stored entries, or None if none is timestamped."""
+        entries = self._entries
+        for timestamp, seq in zip(self._times, self._time_seqs):
+            if seq in entries:
+                return timestamp
+        return None
+
+    def term_seqs(self, terms: List[str], limit: Optional[int] = None) -> List[int]:
+        """
+        Newest entries containing every one of ``terms`` as a word.
+
+        Returns:
+            Up to ``limit`` sequence numbers, newest first
+        """
+        if not terms:
+            return []
+        postings = []
+        for term in set(terms):
+            found = self._postings.get(term)
+            if not found:
+                return []
+            postings.append(found)
+        # Walk the rarest term's postings and look the rest up by bisect
+        postings.sort(key=len)
+        rarest, others = postings[0], postings[1:]
+        matches = []
+        for seq in reversed(rarest):
+            if seq < self._first_seq:
+                break
+            if seq not in self._entries:
+                continue
+            if all(_contains(other, seq) for other in others):
+                matches.append(seq)
+                if limit is not None and len(matches) >= limit:
+                    break
+        return matches
+
+    def substring_seqs(self, text: str) -> Optional[Iterator[int]]:
+        """
+        Entries whose indexed string fields may contain ``text``, newest first.
+
+        A word of ``text`` with a non-word character on both sides must be a
+        whole word of the entry; the first word may end a longer word and
+        the last may start one. Each word is looked up in the vocabulary
+        accordingly, so every entry that contains ``text`` is a candidate,
+        but candidates still have to be checked against ``text``.
+
+        Args:
+            text: Lower-cased search text
+
+        Returns:
+            Candidate sequence numbers, or None if ``text`` has no words to look up
+        """
+        words = list(_TOKEN_RE.finditer(text))
+        if not words:
+            return None
+        groups = []
+        for i, match in enumerate(words):
+            word = match.group()
+            open_start = i == 0 and match.start() == 0
+            open_end = i == len(words) - 1 and match.end() == len(text)
+            if open_start and open_end:
+                terms = [term for term in self._postings if word in term]
+            elif open_start:
+                terms = [term for term in self._postings if term.endswith(word)]
+            elif open_end:
+                terms = [term for term in self._postings if term.startswith(word)]
+            else:
+                terms = [word] if self._postings.get(word) else []
+            if not terms:
+                return iter(())
+            groups.append([self._postings[term] for term in terms])
+        # Walk the group with the fewest postings and look the rest up by bisect
+        groups.sort(key=lambda postings: sum(map(len, postings)))
+        return self._substring_matches(groups[0], groups[1:])
+
+    def _substring_matches(self, walked: List[List[int]], others: List[List[List[int]]]) -> Iterator[int]:
+        previous = None
+        for seq in heapq.merge(*(reversed(postings) for postings in walked), reverse=True):
+            if seq < self._first_seq:
+                return
+            if seq == previous or seq not in self._entries:
+                continue
+            previous = seq
+            if all(any(_contains(postings, seq) for postings in group) for group in others):
+                yield seq
+
+    def entries(self, seqs: Iterable[int]) -> List[LogEntry]:
+        entries = self._entries
+        return [entries[seq] for seq in seqs if seq in entries]
+
+    def clear(self) -> None:
+        self.__init__(self.max_entries, self.per_key_limit)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "terms": len(self._postings),
+            "timestamped": len(self._times),
+        }
+
+
+def _contains(sorted_seqs: List[int], seq: int) -> bool:
+    index = bisect_left(sorted_seqs, seq)
+    return index < len(sorted_seqs) and sorted_seqs[index] == seq
@@ -0,0 +1,340 @@
+"""
+Incremental sliding-window state for Debbie's pattern detection.
+
+Debbie's PatternDetector used to rescan its recent events for every new
+event: counting calls to the same tool, collecting earlier durations of the
+same action, and comparing the new error's words against every recent
+error's words. PatternStream keeps that state up to date as events arrive
+instead, so the work per event no longer grows with the window sizes:
+
+- SlidingKeyCounter: the entries for each key (tool name, action) within
+  the last ``window`` events, expired from the front as events arrive
+- NearDuplicateWindow: the recent texts within the last ``window`` events,
+  each indexed by the bands of a MinHash sketch of its word shingles
+  (locality-sensitive hashing). A query only looks at texts sharing a
+  band with it, newest first, and confirms each with an exact Jaccard
+  comparison, so it never reports a false match and rarely examines a
+  dissimilar text. A pair with similarity
+  ``s`` is missed with probability ``(1 - s**rows) ** bands``; with the
+  defaults that is below 1 in 40,000 for ``s`` above 0.7.
+
+Key Components:
+- PatternStream: Incremental windows over an append-only event stream
+- NearDuplicateWindow: LSH-indexed window of recent texts
+- SlidingKeyCounter: Per-key entries within a sliding window
+- MinHasher: MinHash sketches of word shingle sets
+- word_shingles(), jaccard(): Word sets and their exact similarity
+"""
+
+import random
+import zlib
+from collections import deque
+from itertools import islice
+from typing import Any, Deque, Dict, FrozenSet, Hashable, List, Optional, Sequence, Tuple
+
+_MERSENNE_PRIME = (1 << 61) - 1
+
+ERROR_LEVELS = ('ERROR', 'CRITICAL')
+
+
+def word_shingles(text: str) -> FrozenSet[str]:
+    """Lower-cased, whitespace-separated words of ``text``."""
+    return frozenset(text.lower().split())
+
+
+def jaccard(words1: FrozenSet[str], words2: FrozenSet[str]) -> float:
+    """Jaccard similarity of two word sets; 0.0 if either is empty."""
+    if not words1 or not words2:
+        return 0.0
+    intersection = len(words1 & words2)
+    return intersection / (len(words1) + len(words2) - intersection)
+
+
+class MinHasher:
+    """
+    Computes MinHash sketches of word sets.
+
+    Each word's hash values are computed once and cached, since log
+    messages keep reusing the same vocabulary; a sketch is then the
+    column-wise minimum of its words' cached values.
+
+    Args:
+        num_perm: Number of hash functions, i.e. values per sketch
+        seed: Seed for the hash functions; sketches are comparable only with the same seed
+        cache_size: Words whose hash values are kept
+    """
+
+    def __init__(self, num_perm: int = 32, seed: int = 1, cache_size: int = 65536):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.cache_size = cache_size
+        self._perms = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+                       for _ in range(num_perm)]
+        self._word_hashes: Dict[str, Tuple[int, ...]] = {}
+
+    def _hashes(self, word: str) -> Tuple[int, ...]:
+        hashes = self._word_hashes.get(word)
+        if hashes is None:
+            h = zlib.crc32(word.encode())
+            hashes = tuple((a * h + b) % _MERSENNE_PRIME for a, b in self._perms)
+            if len(self._word_hashes) >= self.cache_size:
+                self._word_hashes.clear()
+            self._word_hashes[word] = hashes
+        return hashes
+
+    def sketch(self, words: FrozenSet[str]) -> Tuple[int, ...]:
+        """MinHash sketch of a non-empty word set."""
+        return tuple(map(min, zip(*map(self._hashes, words))))
+
+    @staticmethod
+    def estimate(sketch1: Tuple[int, ...], sketch2: Tuple[int, ...]) -> float:
+        """Estimated Jaccard similarity of the sets behind two sketches."""
+        return sum(1 for x, y in zip(sketch1, sketch2) if x == y) / len(sketch1)
+
+
+class SlidingKeyCounter:
+    """
+    Entries per key among the last ``window`` positions of a stream.
+
+    Positions are the sequence numbers given to ``add()``, which must not
+    decrease; ``advance()`` expires entries that fall out of the window.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self._order: Deque[Tuple[int, Hashable]] = deque()
+        self._by_key: Dict[Hashable, Deque[Tuple[int, Any]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def add(self, seq: int, key: Hashable, item: Any) -> None:
+        entries = self._by_key.get(key)
+        if entries is None:
+            entries = self._by_key[key] = deque()
+        entries.append((seq, item))
+        self._order.append((seq, key))
+
+    def advance(self, seq: int) -> None:
+        """Expire entries outside the window that ends at position ``seq``."""
+        oldest_kept = seq - self.window
+        order = self._order
+        while order and order[0][0] <= oldest_kept:
+            _, key = order.popleft()
+            entries = self._by_key[key]
+            entries.popleft()
+            if not entries:
+                del self._by_key[key]
+
+    def count(self, key: Hashable) -> int:
+        entries = self._by_key.get(key)
+        return len(entries) if entries else 0
+
+    def oldest(self, key: Hashable, n: int) -> List[Any]:
+        """The ``n`` oldest items for ``key`` in the window, oldest first."""
+        entries = self._by_key.get(key) or ()
+        return [item for _, item in islice(entries, n)]
+
+    def newest(self, key: Hashable, n: int) -> List[Any]:
+        """The ``n`` newest items for ``key`` in the window, oldest first."""
+        entries = self._by_key.get(key) or ()
+        return [item for _, item in islice(reversed(entries), n)][::-1]
+
+
+class NearDuplicateWindow:
+    """
+    Recent texts among the last ``window`` positions, searchable by word similarity.
+
+    Args:
+        window: Positions a text stays searchable for
+        threshold: Jaccard similarity a match must exceed
+        bands: LSH bands per sketch
+        rows: Sketch values per band
+        seed: MinHash seed
+    """
+
+    def __init__(self, window: int, threshold: float = 0.7, bands: int = 16, rows: int = 2, seed: int = 1):
+        self.window = window
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        self.hasher = MinHasher(bands * rows, seed)
+        self._order: Deque[Tuple[int, List[Hashable]]] = deque()
+        self._items: Dict[int, Tuple[FrozenSet[str], Any]] = {}
+        self._buckets: Dict[Hashable, Deque[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def band_keys(self, words: FrozenSet[str]) -> List[Hashable]:
+        """LSH bucket keys of a non-empty word set."""
+        sketch = self.hasher.sketch(words)
+        rows = self.rows
+        return [(band, sketch[band * rows:(band + 1) * rows]) for band in range(self.bands)]
+
+    def add(self, seq: int, words: FrozenSet[str], item: Any, keys: Optional[List[Hashable]] = None) -> None:
+        """Index ``item`` under its word set; empty sets are never similar, so are skipped."""
+        if not words:
+            return
+        keys = keys or self.band_keys(words)
+        buckets = self._buckets
+        for key in keys:
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = deque()
+            bucket.append(seq)
+        self._items[seq] = (words, item)
+        self._order.append((seq, keys))
+
+    def advance(self, seq: int) -> None:
+        """Expire texts outside the window that ends at position ``seq``."""
+        oldest_kept = seq - self.window
+        order, buckets = self._order, self._buckets
+        while order and order[0][0] <= oldest_kept:
+            expired, keys = order.popleft()
+            del self._items[expired]
+            for key in keys:
+                bucket = buckets[key]
+                bucket.popleft()
+                if not bucket:
+                    del buckets[key]
+
+    def similar(self, words: FrozenSet[str], limit: Optional[int] = None,
+                keys: Optional[List[Hashable]] = None) -> List[Any]:
+        """
+        Items whose word sets are more similar to ``words`` than the threshold.
+
+        Returns:
+            Up to ``limit`` of the newest matches, oldest first
+        """
+        if not words:
+            return []
+        keys = keys or self.band_keys(words)
+        buckets = [bucket for bucket in map(self._buckets.get, keys) if bucket]
+        matches, items = [], self._items
+        # Candidates share at least one band; confirm them newest first
+        for seq in sorted(set().union(*buckets), reverse=True):
+            other, item = items[seq]
+            if jaccard(words, other) > self.threshold:
+                matches.append(item)
+                if limit is not None and len(matches) >= limit:
+                    break
+        return matches[::-1]
+
+
+class PatternStream:
+    """
+    Incremental windows over a stream of log events, for pattern detection.
+
+    Events are added once each, in order. ``sync()`` catches up with a list
+    of recent events that is only ever appended to (and trimmed from the
+    front), such as DebbieCommentary's; given any other list it rebuilds
+    its windows from that list's tail.
+
+    Args:
+        stall_window: Events searched for the tool call before a stall
+        tool_window: Events in which repeated calls to one tool are counted
+        error_window: Events in which similar errors are looked for
+        performance_window: Events in which earlier durations of an action are kept
+        similarity_threshold: Word similarity above which two errors match
+    """
+
+    def __init__(self, stall_window: int = 10, tool_window: int = 20, error_window: int = 50,
+                 performance_window: int = 100, similarity_threshold: float = 0.7):
+        self.stall_window = stall_window
+        self.horizon = max(stall_window, tool_window, error_window, performance_window)
+        self.tools = SlidingKeyCounter(tool_window)
+        self.errors = NearDuplicateWindow(error_window, similarity_threshold)
+        self.durations = SlidingKeyCounter(performance_window)
+        self.seq = 0
+        self._last_tool: Optional[Tuple[int, Dict[str, Any]]] = None
+        self._last: Optional[Dict[str, Any]] = None
+        self._previous: Optional[Dict[str, Any]] = None
+        self._last_error: Optional[Tuple[FrozenSet[str], List[Hashable]]] = None
+        self.stats = {"events": 0, "resyncs": 0}
+
+    def reset(self) -> None:
+        self.tools = SlidingKeyCounter(self.tools.window)
+        self.errors = NearDuplicateWindow(self.errors.window, self.errors.threshold)
+        self.durations = SlidingKeyCounter(self.durations.window)
+        self.seq = 0
+        self._last_tool = self._last = self._previous = self._last_error = None
+
+    def add(self, event: Dict[str, Any]) -> None:
+        """Add the next event of the stream to every window."""
+        seq = self.seq = self.seq + 1
+        self.tools.advance(seq)
+        self.errors.advance(seq)
+        self.durations.advance(seq)
+
+        action = event.get('action')
+        if event.get('component') == 'TOOL' or (isinstance(action, str) and 'tool' in action):
+            self._last_tool = (seq, event)
+
+        details = event.get('details')
+        tool_name = details.get('tool_name') if isinstance(details, dict) else None
+        if tool_name is not None and isinstance(tool_name, Hashable):
+            self.tools.add(seq, tool_name, event)
+
+        self._last_error = None
+        if event.get('level') in ERROR_LEVELS:
+            summary = event.get('event_summary', '')
+            words = word_shingles(summary) if isinstance(summary, str) else frozenset()
+            if words:
+                keys = self.errors.band_keys(words)
+                self.errors.add(seq, words, event, keys)
+                self._last_error = (words, keys)
+
+        if 'duration_ms' in event and isinstance(action, Hashable):
+            self.durations.add(seq, action, event)
+
+        self._previous, self._last = self._last, event
+        self.stats["events"] += 1
+
+    def sync(self, recent_events: Sequence[Dict[str, Any]]) -> None:
+        """Catch up with ``recent_events``, whose last event is the newest in the stream."""
+        count = len(recent_events)
+        if count and recent_events[-1] is self._last and (
+                count == 1 or self._previous is None or recent_events[-2] is self._previous):
+            return
+
+        start = None
+        if self._last is not None:
+            # Find the newest event already added; everything after it is new
+            for index in range(count - 1, max(count - 1 - self.horizon, -1), -1):
+                if recent_events[index] is self._last and (
+                        index == 0 or self._previous is None or recent_events[index - 1] is self._previous):
+                    start = index + 1
+                    break
+        if start is None:
+            if self.seq:
+                self.stats["resyncs"] += 1
+            self.reset()
+            start = max(0, count - self.horizon)
+        for index in range(start, count):
+            self.add(recent_events[index])
+
+    # --- Queries over the windows ending at the newest event ---
+
+    def last_tool_event(self) -> Optional[Dict[str, Any]]:
+        """The newest tool event within the stall window, if any."""
+        if self._last_tool is not None and self._last_tool[0] > self.seq - self.stall_window:
+            return self._last_tool[1]
+        return None
+
+    def similar_errors(self, event: Dict[str, Any], limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Errors in the error window whose summaries match ``event``'s, oldest first."""
+        if event is self._last and self._last_error is not None:
+            words, keys = self._last_error
+        else:
+            summary = event.get('event_summary', '')
+            words, keys = word_shingles(summary), None
+        return self.errors.similar(words, limit, keys)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "tool_entries": len(self.tools),
+            "error_entries": len(self.errors),
+            "duration_entries": len(self.durations),
+        }
@@ -7,6 +7,8 @@ Capabilities:
 - parallel_tools: Can execute tools in parallel
 - max_tools_per_turn: Maximum number of tools that can be called at once
 - structured_output: Supports JSON Schema validated responses
+- cache_control: Accepts explicit cache_control breakpoints for prompt-prefix caching
+  (models without the key rely on provider-side automatic caching, if any)
 - quirks: Model-specific limitations or behaviors
 
 Known Quirks:
@@ -80,6 +82,7 @@ MODEL_CAPABILITIES: Dict[str, Dict[str, Any]] = {
         "parallel_tools": True,
         "max_tools_per_turn": 10,
         "structured_output": True,  # Supports via OpenRouter despite reporting otherwise
+        "cache_control": True,  # Accepts prompt-prefix cache breakpoints
         "quirks": {"structured_output_hidden": True}
     },
     "anthropic/claude-3-sonnet": {
@@ -87,13 +90,14 @@ MODEL_CAPABILITIES: Dict[str, Dict[str, Any]] = {
         "parallel_tools": False,
         "max_tools_per_turn": 1,
         "structured_output": True,  # Testing shows it does support structured output via OpenRouter
-        "quirks": {}
+        "quirks": {}  # No prompt caching on Claude 3 Sonnet, so no cache_control
     },
     "anthropic/claude-3-5-sonnet": {
         "multi_tool": True,
         "parallel_tools": True,
         "max_tools_per_turn": 10,
         "structured_output": True,  # Testing shows it does support structured output via OpenRouter
+        "cache_control": True,  # Accepts prompt-prefix cache breakpoints
         "quirks": {}
     },
     "anthropic/claude-3-5-sonnet-latest": {
@@ -101,6 +105,7 @@ MODEL_CAPABILITIES: Dict[str, Dict[str, Any]] = {
         "parallel_tools": True,
         "max_tools_per_turn": 10,
         "structured_output": True,  # Supports via OpenRouter despite reporting otherwise
+        "cache_control": True,  # Accepts prompt-prefix cache breakpoints
         "quirks": {"structured_output_hidden": True}
     },
     "anthropic/claude-3-haiku": {
@@ -108,6 +113,7 @@ MODEL_CAPABILITIES: Dict[str, Dict[str, Any]] = {
         "parallel_tools": False,
         "max_tools_per_turn": 1,
         "structured_output": False,
+        "cache_control": True,  # Accepts prompt-prefix cache breakpoints
         "quirks": {}
     },
     "anthropic/claude-3-5-haiku": {
@@ -115,6 +121,7 @@ MODEL_CAPABILITIES: Dict[str, Dict[str, Any]] = {
         "parallel_tools": True,
         "max_tools_per_turn": 10,
         "structured_output": True,  # Supports via OpenRouter despite reporting otherwise
+        "cache_control": True,  # Accepts prompt-prefix cache breakpoints
         "quirks": {"structured_output_hidden": True}
     },
     "anthropic/claude-3-5-haiku-latest": {
@@ -122,6 +129,7 @@ MODEL_CAPABILITIES: Dict[str, Dict[str, Any]] = {
         "parallel_tools": True,
         "max_tools_per_turn": 10,
         "structured_output": True,  # Supports via OpenRouter despite reporting otherwise
+        "cache_control": True,  # Accepts prompt-prefix cache breakpoints
         "quirks": {"structured_output_hidden": True}
     },
     "anthropic/claude-3.5-sonnet": {
@@ -129,6 +137,7 @@ MODEL_CAPABILITIES: Dict[str, Dict[str, Any]] = {
         "parallel_tools": False,
         "max_tools_per_turn": 1,
         "structured_output": True,  # Supports via OpenRouter despite reporting otherwise
+        "cache_control": True,  # Accepts prompt-prefix cache breakpoints
         "quirks": {"structured_output_hidden": True}
     },
     "anthropic/claude-sonnet-4": {
@@ -136,6 +145,7 @@ MODEL_CAPABILITIES: Dict[str, Dict[str, Any]] = {
         "parallel_tools": True,
         "max_tools_per_turn": 10,
         "structured_output": True,  # Supports via OpenRouter despite reporting otherwise
+        "cache_control": True,  # Accepts prompt-prefix cache breakpoints
         "quirks": {"structured_output_hidden": True}
     },
     "anthropic/claude-4-opus": {
@@ -143,6 +153,7 @@ MODEL_CAPABILITIES: Dict[str, Dict[str, Any]] = {
         "parallel_tools": True,
         "max_tools_per_turn": 10,
         "structured_output": True,  # Supports via OpenRouter despite reporting otherwise
+        "cache_control": True,  # Accepts prompt-prefix cache breakpoints
         "quirks": {"structured_output_hidden": True}
     },
     "anthropic/claude-2.1": {
@@ -157,6 +168,7 @@ MODEL_CAPABILITIES: Dict[str, Dict[str, Any]] = {
         "parallel_tools": False,
         "max_tools_per_turn": 1,
         "structured_output": True,  # Supports via OpenRouter despite reporting otherwise
+        "cache_control": True,  # Accepts prompt-prefix cache breakpoints
         "quirks": {"structured_output_hidden": True}
     },
     
@@ -310,29 +322,19 @@ def get_model_capabilities(model_name: str) -> Dict[str, Any]:
     """
     Get capabilities for a specific model.
     
+    Lookups are served by the model registry: exact matches come from a
+    precomputed map, otherwise the longest configured prefix wins
+    (e.g., "openai/gpt-4o-mini-2024-07-18" matches "openai/gpt-4o-mini").
+    Unknown models get the default capabilities, with a warning logged once.
+    
     Args:
         model_name: The model identifier (e.g., "openai/gpt-4")
         
     Returns:
         Dictionary of model capabilities
     """
-    # Try exact match first
-    if model_name in MODEL_CAPABILITIES:
-        return MODEL_CAPABILITIES[model_name]
-    
-    # Try prefix match (e.g., "openai/gpt-4-0613" matches "openai/gpt-4")
-    for model_prefix, capabilities in MODEL_CAPABILITIES.items():
-        if model_prefix != "default" and model_name.startswith(model_prefix):
-            return capabilities
-    
-    # Log warning when using default capabilities
-    logger.warning(
-        f"Model '{model_name}' not found in MODEL_CAPABILITIES configuration. "
-        f"Using default single-tool capabilities. Consider adding this model to the configuration."
-    )
-    
-    # Return default capabilities
-    return MODEL_CAPABILITIES["default"]
+    from ai_whisperer.services.ai.model_registry import get_model_registry
+    return get_model_registry().get_capabilities(model_name)
 
 def supports_multi_tool(model_name: str) -> bool:
     """
@@ -360,6 +362,19 @@ def supports_structured_output(model_name: str) -> bool:
     capabilities = get_model_capabilities(model_name)
     return capabilities.get("structured_output", False)
 
+def supports_cache_control(model_name: str) -> bool:
+    """
+    Check if a model accepts explicit cache_control breakpoints.
+    
+    Args:
+        model_name: The model identifier
+        
+    Returns:
+        True if the payload should carry cache_control breakpoints
+    """
+    capabilities = get_model_capabilities(model_name)
+    return capabilities.get("cache_control", False)
+
 def has_quirk(model_name: str, quirk_name: str) -> bool:
     """
     Check if a model has a specific quirk.
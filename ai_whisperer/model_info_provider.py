@@ -12,6 +12,7 @@ from ai_whisperer.services.execution.ai_config import AIConfig
 
 from ai_whisperer.core.exceptions import ConfigError, OpenRouterAIServiceError, ProcessingError
 from ai_whisperer.services.ai.openrouter import OpenRouterAIService
+from ai_whisperer.services.ai.model_registry import DEFAULT_CATALOG_TTL_SECONDS, get_default_catalog_path
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +44,9 @@ class ModelInfoProvider:
             max_tokens=config["openrouter"].get("params", {}).get("max_tokens", None),
             site_url=config["openrouter"].get("site_url", "http://AIWhisperer:8000"),
             app_name=config["openrouter"].get("app_name", "AI Whisperer"),
+            # Share the on-disk /models cache with the model registry
+            models_cache_path=config["openrouter"].get("models_cache_path", get_default_catalog_path()),
+            models_cache_ttl=config["openrouter"].get("models_cache_ttl", DEFAULT_CATALOG_TTL_SECONDS),
         )
 
         # Initialize the OpenRouterAIService client
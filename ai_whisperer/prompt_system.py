@@ -1,6 +1,6 @@
 
 from pathlib import Path
-from typing import Optional, List, Tuple, Dict
+from typing import Optional, List, Tuple, Dict, Iterable, Set
 from ai_whisperer.core.exceptions import PromptNotFoundError
 from ai_whisperer.utils.path import PathManager
 import logging
@@ -289,13 +289,23 @@ class PromptSystem:
             raise
 
     def get_formatted_prompt(self, category: str, name: str, include_tools: bool = False, 
-                           include_shared: bool = True, model_name: Optional[str] = None, **kwargs) -> str:
+                           include_shared: bool = True, model_name: Optional[str] = None,
+                           features: Optional[Iterable[str]] = None,
+                           debug_options: Optional[Iterable[str]] = None, **kwargs) -> str:
         """
         Retrieves the processed and formatted content of a prompt, 
         including shared components and optionally tool instructions.
         Handles parameter injection if templating is supported.
         Raises PromptNotFoundError.
+        
+        ``features`` and ``debug_options`` are enabled for this prompt only,
+        on top of the ones enabled on the PromptSystem, so agents can get
+        their own shared components without changing them for everyone.
         """
+        enabled_features = self._enabled_features | {f for f in (features or ()) if f in self._shared_components}
+        active_debug_options = self._debug_options | set(debug_options or ())
+        if active_debug_options and 'debug_options' in self._shared_components:
+            enabled_features.add('debug_options')
         logger.info(f"get_formatted_prompt called: category={category}, name={name}, include_tools={include_tools}, include_shared={include_shared}")
         prompt = self.get_prompt(category, name)
         logger.info(f"Resolved prompt path: {prompt.path}")
@@ -305,12 +315,12 @@ class PromptSystem:
         
         # Add shared components if requested (default: True)
         if include_shared:
-            logger.info(f"Including shared components. Enabled features: {self._enabled_features}")
+            logger.info(f"Including shared components. Enabled features: {enabled_features}")
             logger.info(f"Available shared components: {list(self._shared_components.keys())}")
-            logger.info(f"Active debug options: {self._debug_options}")
+            logger.info(f"Active debug options: {active_debug_options}")
             
             # Check if model supports structured output for channel system
-            if 'channel_system' in self._enabled_features and model_name:
+            if 'channel_system' in enabled_features and model_name:
                 from ai_whisperer.model_capabilities import supports_structured_output
                 
                 # Use structured output if model supports it
@@ -330,14 +340,14 @@ class PromptSystem:
                     content_parts.append(f"\n\n## CHANNEL SYSTEM INSTRUCTIONS\n{self._shared_components['channel_system']}")
             else:
                 # Add other enabled shared components
-                for feature in sorted(self._enabled_features):  # Sort for consistent ordering
+                for feature in sorted(enabled_features):  # Sort for consistent ordering
                     if feature in self._shared_components:
                         logger.info(f"Adding shared component: {feature}")
                         component_content = self._shared_components[feature]
                         
                         # Customize debug_options content based on active debug options
-                        if feature == 'debug_options' and self._debug_options:
-                            component_content = self._customize_debug_content(component_content)
+                        if feature == 'debug_options' and active_debug_options:
+                            component_content = self._customize_debug_content(component_content, active_debug_options)
                         
                         content_parts.append(f"\n\n## {feature.upper().replace('_', ' ')} INSTRUCTIONS\n{component_content}")
         
@@ -397,8 +407,9 @@ class PromptSystem:
 
         return available
     
-    def _customize_debug_content(self, content: str) -> str:
+    def _customize_debug_content(self, content: str, debug_options: Optional[Set[str]] = None) -> str:
         """Customize debug_options content based on active debug options"""
+        debug_options = self._debug_options if debug_options is None else debug_options
         lines = content.split('\n')
         active_sections = []
         current_section = []
@@ -408,7 +419,7 @@ class PromptSystem:
             # Check if this is a section header
             if line.startswith('### '):
                 # Save previous section if it was active
-                if current_section and section_name and self._should_include_debug_section(section_name):
+                if current_section and section_name and self._should_include_debug_section(section_name, debug_options):
                     active_sections.extend(current_section)
                 
                 # Start new section
@@ -418,7 +429,7 @@ class PromptSystem:
                 current_section.append(line)
         
         # Don't forget the last section
-        if current_section and section_name and self._should_include_debug_section(section_name):
+        if current_section and section_name and self._should_include_debug_section(section_name, debug_options):
             active_sections.extend(current_section)
         
         # Always include the header and general sections
@@ -428,7 +439,7 @@ class PromptSystem:
                 result.append(line)
             elif line.startswith('**DEBUG MODE ACTIVE**'):
                 result.append(line)
-                result.append(f"**Active options**: {', '.join(sorted(self._debug_options))}")
+                result.append(f"**Active options**: {', '.join(sorted(debug_options))}")
                 break
         
         # Add only the active sections
@@ -437,8 +448,9 @@ class PromptSystem:
         
         return '\n'.join(result)
     
-    def _should_include_debug_section(self, section_name: str) -> bool:
+    def _should_include_debug_section(self, section_name: str, debug_options: Optional[Set[str]] = None) -> bool:
         """Check if a debug section should be included based on active options"""
+        debug_options = self._debug_options if debug_options is None else debug_options
         section_map = {
             'Single Tool Execution Mode': 'single_tool',
             'Explicit Continuation Signals': 'explicit_continuation',
@@ -449,5 +461,5 @@ class PromptSystem:
         }
         
         required_option = section_map.get(section_name)
-        return required_option in self._debug_options if required_option else False
+        return required_option in debug_options if required_option else False
     
\ No newline at end of file
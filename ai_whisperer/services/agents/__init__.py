@@ -7,4 +7,5 @@ This package contains the agent infrastructure:
 - registry: Agent registry
 - config: Agent configuration
 - handlers: Specific agent implementations
+- fair_scheduler: Fair sharing of concurrent agent turns
 """
@@ -32,16 +32,18 @@ class AILoopManager:
     with potentially different AI models and configurations.
     """
     
-    def __init__(self, default_config: Optional[Dict[str, Any]] = None):
+    def __init__(self, default_config: Optional[Dict[str, Any]] = None, session_id: Optional[str] = None):
         """
         Initialize the AI Loop Manager.
         
         Args:
             default_config: Default configuration for AI loops when agent
                           doesn't specify custom settings
+            session_id: Optional session the loops belong to (used for usage accounting)
         """
         self._ai_loops: Dict[str, AILoopEntry] = {}
         self._default_config = default_config or {}
+        self._session_id = session_id
         logger.info("AILoopManager initialized")
     
     def get_or_create_ai_loop(
@@ -91,6 +93,8 @@ class AILoopManager:
             'agent_id': agent_id,
             'agent_name': agent_config.name if agent_config else agent_id
         }
+        if self._session_id:
+            agent_context['session_id'] = self._session_id
         
         # Create AI loop
         ai_loop = AILoopFactory.create_ai_loop(loop_config, agent_context)
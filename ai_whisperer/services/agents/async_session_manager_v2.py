@@ -1,5 +1,16 @@
 """
 Refactored Async Agent Session Manager aligned with current architecture.
+
+Agent processors are event driven: each session has a wakeup event that
+is set by new mail (through MailboxSystem.subscribe), wake, sleep and stop
+requests, and by a timer at the end of a timed sleep. An idle agent waits
+for a queued task or its wakeup event, and a sleeping agent waits only for
+its wakeup event, so mail is picked up as soon as it is sent and idle
+agents do not wake up at all.
+
+Tasks run when the shared FairScheduler grants the agent a turn, which
+caps concurrent agent turns and shares them fairly by task priority. Each
+agent's own queue hands out its most urgent task first.
 """
 
 import asyncio
@@ -18,7 +29,9 @@ from ai_whisperer.context.agent_context import AgentContext
 from ai_whisperer.prompt_system import PromptSystem, PromptConfiguration
 from ai_whisperer.tools.tool_registry import get_tool_registry
 from ai_whisperer.utils.path import PathManager
-from ai_whisperer.services.agents.state_persistence import StatePersistenceManager
+from ai_whisperer.services.agents.state_persistence import StatePersistenceManager, state_write_behind_window
+from ai_whisperer.utils.write_behind import WriteBehindError
+from ai_whisperer.services.agents.fair_scheduler import TaskQueue, get_agent_scheduler, task_priority
 
 logger = logging.getLogger(__name__)
 
@@ -40,11 +53,13 @@ class AsyncAgentSession:
     ai_loop: StatelessAILoop
     context: AgentContext
     state: AgentState = AgentState.IDLE
-    task_queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=100))
+    task_queue: TaskQueue = field(default_factory=lambda: TaskQueue(maxsize=100))
     current_task: Optional[Dict[str, Any]] = None
     wake_events: Set[str] = field(default_factory=set)
     sleep_until: Optional[datetime] = None
     background_task: Optional[asyncio.Task] = None
+    wakeup: asyncio.Event = field(default_factory=asyncio.Event)
+    wake_timer: Optional[asyncio.TimerHandle] = None
     created_at: datetime = field(default_factory=datetime.now)
     last_active: datetime = field(default_factory=datetime.now)
     error_count: int = 0
@@ -54,6 +69,9 @@ class AsyncAgentSession:
 class AsyncAgentSessionManager:
     """Manages multiple agent sessions running independently - Refactored version."""
     
+    # Seconds an agent waits before checking its mail again after a failed check
+    mail_retry_delay = 1.0
+    
     def __init__(self, config: Dict[str, Any], notification_callback=None):
         self.config = config
         self.sessions: Dict[str, AsyncAgentSession] = {}
@@ -64,6 +82,9 @@ class AsyncAgentSessionManager:
         # Notification callback for WebSocket events
         self._notification_callback = notification_callback
         
+        # Turns are shared with every other async agent in the process
+        self.scheduler = get_agent_scheduler()
+        
         # Initialize core components matching StatelessSessionManager pattern
         self._init_core_components()
         
@@ -86,7 +107,8 @@ class AsyncAgentSessionManager:
         
         # State persistence manager
         state_dir = self.path_manager.output_path / 'state'
-        self.state_manager = StatePersistenceManager(state_dir)
+        # Saves are written behind by a background thread (AIWHISPERER_STATE_WRITE_BEHIND_MS)
+        self.state_manager = StatePersistenceManager(state_dir, write_behind=state_write_behind_window())
         
         logger.info("Initialized async agent session manager with current architecture and state persistence")
         
@@ -118,6 +140,12 @@ class AsyncAgentSessionManager:
         # Wait for tasks to complete
         await asyncio.gather(*self._background_tasks, return_exceptions=True)
         
+        # Write out any saves still queued
+        try:
+            await asyncio.to_thread(self.state_manager.close)
+        except WriteBehindError as e:
+            logger.error(f"Failed to persist agent state on shutdown: {e}")
+        
         logger.info("Async agent session manager stopped")
         
     async def create_agent_session(self, agent_id: str, auto_start: bool = True) -> AsyncAgentSession:
@@ -224,6 +252,7 @@ class AsyncAgentSessionManager:
     async def _agent_processor(self, session: AsyncAgentSession):
         """Background processor for an agent - aligned with current patterns."""
         logger.info(f"Starting processor for agent {session.agent_id}")
+        mailbox = self._subscribe_to_mail(session)
         
         try:
             while session.state != AgentState.STOPPED:
@@ -236,27 +265,24 @@ class AsyncAgentSessionManager:
                     
                 # Process tasks when idle
                 if session.state == AgentState.IDLE:
-                    # Try to get a task
-                    try:
-                        task = await asyncio.wait_for(
-                            session.task_queue.get(),
-                            timeout=5.0  # Check mail every 5 seconds if no tasks
-                        )
+                    task = await self._next_task(session)
+                    if task is None:
+                        continue
                         
-                        # Process the task
+                    # Process the task once the scheduler gives this agent a turn
+                    session.state = AgentState.WAITING
+                    session.current_task = task
+                    
+                    async with self.scheduler.slot(session.agent_id, task_priority(task)):
                         session.state = AgentState.ACTIVE
-                        session.current_task = task
-                        
                         await self._process_task(session, task)
-                        
-                        session.current_task = None
-                        session.state = AgentState.IDLE
-                        
-                    except asyncio.TimeoutError:
-                        # No tasks, check mail
-                        await self._check_mail_async(session)
-                        
-                await asyncio.sleep(0.1)  # Prevent tight loop
+                    
+                    session.current_task = None
+                    session.state = AgentState.IDLE
+                else:
+                    # Restored mid-task or waiting: nothing to do until something changes
+                    session.wakeup.clear()
+                    await session.wakeup.wait()
                 
         except Exception as e:
             logger.error(f"Fatal error in agent {session.agent_id} processor: {e}")
@@ -267,9 +293,62 @@ class AsyncAgentSessionManager:
                 "error_count": session.error_count
             })
         finally:
+            if mailbox:
+                mailbox.unsubscribe(session.agent_id, session.wakeup)
+            self._cancel_wake_timer(session)
             session.state = AgentState.STOPPED
             logger.info(f"Processor stopped for agent {session.agent_id}")
             
+    def _subscribe_to_mail(self, session: AsyncAgentSession):
+        """Have new mail for the agent set its wakeup event."""
+        mailbox = get_mailbox()
+        try:
+            mailbox.subscribe(session.agent_id, session.wakeup)
+        except ValueError:
+            logger.debug(f"Agent {session.agent_id} has no mailbox; it will only wake for tasks")
+            return None
+        return mailbox
+        
+    async def _has_unread_mail(self, session: AsyncAgentSession) -> bool:
+        try:
+            return await get_mailbox().has_unread_mail_async(session.agent_id)
+        except ValueError:
+            return False
+            
+    async def _next_task(self, session: AsyncAgentSession) -> Optional[Dict[str, Any]]:
+        """Wait for a queued task; returns None when woken for anything else."""
+        if not session.task_queue.empty():
+            return session.task_queue.get_nowait()
+            
+        # Clear before checking, so mail that arrives after the check still wakes us
+        session.wakeup.clear()
+        if await self._has_unread_mail(session):
+            if await self._check_mail_async(session):
+                return None
+            # The mail is still unread; retrying at once would spin the event loop
+            return await self._wait_for_task(session, timeout=self.mail_retry_delay)
+            
+        return await self._wait_for_task(session, wakeup=session.wakeup)
+        
+    async def _wait_for_task(self, session: AsyncAgentSession, wakeup: Optional[asyncio.Event] = None,
+                             timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Wait for a queued task until the wakeup event is set or the timeout passes."""
+        get_task = asyncio.ensure_future(session.task_queue.get())
+        waits = {get_task}
+        if wakeup is not None:
+            waits.add(asyncio.ensure_future(wakeup.wait()))
+        try:
+            await asyncio.wait(waits, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiting in waits - {get_task}:
+                waiting.cancel()
+            if not get_task.done():
+                # Cancelling a pending get leaves any item in the queue
+                get_task.cancel()
+        if get_task.done() and not get_task.cancelled():
+            return get_task.result()
+        return None
+        
     async def _process_task(self, session: AsyncAgentSession, task: Dict[str, Any]):
         """Process a task using the agent's AI loop."""
         logger.info(f"Agent {session.agent_id} processing task: {task.get('type', 'user')}")
@@ -361,11 +440,11 @@ class AsyncAgentSessionManager:
                 "error": str(e)
             })
             
-    async def _check_mail_async(self, session: AsyncAgentSession):
-        """Check mailbox without blocking."""
+    async def _check_mail_async(self, session: AsyncAgentSession) -> bool:
+        """Check mailbox without blocking; returns False if the mail could not be read."""
         try:
             mailbox = get_mailbox()
-            messages = mailbox.check_mail(session.agent_id)
+            messages = await mailbox.check_mail_async(session.agent_id)
             
             if messages:
                 logger.info(f"Agent {session.agent_id} has {len(messages)} new messages")
@@ -391,7 +470,7 @@ class AsyncAgentSessionManager:
                 await session.task_queue.put({
                     "prompt": f"Process this mail:\nFrom: {message.from_agent}\nSubject: {message.subject}\n\n{message.body}",
                     "context": {
-                        "mail_id": message.id,
+                        "mail_id": message.message_id,
                         "from_agent": message.from_agent,
                         "priority": message.priority.value,
                         "subject": message.subject
@@ -401,11 +480,14 @@ class AsyncAgentSessionManager:
                 
         except Exception as e:
             logger.error(f"Error checking mail for agent {session.agent_id}: {e}")
+            return False
+        return True
             
     async def _handle_sleep_state(self, session: AsyncAgentSession):
-        """Handle agent sleep state with optimized monitoring."""
+        """Wait while an agent sleeps, until mail, a wake request or its sleep timer."""
         # Check if it's time to wake up
         if session.sleep_until and datetime.now() >= session.sleep_until:
+            self._cancel_wake_timer(session)
             session.state = AgentState.IDLE
             session.sleep_until = None
             logger.info(f"Agent {session.agent_id} woke up (scheduled)")
@@ -414,22 +496,31 @@ class AsyncAgentSessionManager:
                 "agent_id": session.agent_id,
                 "reason": "scheduled"
             })
-        else:
-            # Still sleeping - check mail less frequently and sleep longer
-            # Check mail every 10 seconds when sleeping (vs 5 seconds when active)
-            await self._check_mail_async(session)
-            
-            # Sleep for longer periods when sleeping to reduce CPU usage
-            # Calculate sleep time based on remaining sleep duration
-            if session.sleep_until:
-                time_remaining = (session.sleep_until - datetime.now()).total_seconds()
-                # Sleep for up to 5 seconds, but not longer than remaining time
-                sleep_duration = min(5.0, max(1.0, time_remaining))
-            else:
-                # Indefinite sleep - check every 5 seconds
-                sleep_duration = 5.0
-                
-            await asyncio.sleep(sleep_duration)
+            return
+            
+        # Still sleeping - mail may wake the agent depending on its wake events
+        session.wakeup.clear()
+        self._arm_wake_timer(session)
+        if await self._has_unread_mail(session):
+            if not await self._check_mail_async(session):
+                # The mail is still unread; retrying at once would spin the event loop
+                await asyncio.sleep(self.mail_retry_delay)
+            return
+            
+        await session.wakeup.wait()
+        
+    def _arm_wake_timer(self, session: AsyncAgentSession):
+        """Set the agent's wakeup event when its timed sleep ends."""
+        self._cancel_wake_timer(session)
+        if session.sleep_until:
+            delay = max(0.0, (session.sleep_until - datetime.now()).total_seconds())
+            # Timers share the event loop's scheduler; nothing runs until one is due
+            session.wake_timer = asyncio.get_running_loop().call_later(delay, session.wakeup.set)
+            
+    def _cancel_wake_timer(self, session: AsyncAgentSession):
+        if session.wake_timer:
+            session.wake_timer.cancel()
+            session.wake_timer = None
             
     async def sleep_agent(self, agent_id: str, duration_seconds: Optional[int] = None,
                          wake_events: Optional[Set[str]] = None):
@@ -446,6 +537,9 @@ class AsyncAgentSessionManager:
         if wake_events:
             session.wake_events = wake_events
             
+        # Let the processor pick up the new state (and sleep timer) straight away
+        session.wakeup.set()
+            
         logger.info(f"Agent {agent_id} sleeping until {session.sleep_until}")
         
         await self._emit_event("agent_sleeping", {
@@ -464,6 +558,8 @@ class AsyncAgentSessionManager:
             session.state = AgentState.IDLE
             session.sleep_until = None
             session.wake_events.clear()
+            self._cancel_wake_timer(session)
+            session.wakeup.set()
             
             logger.info(f"Agent {agent_id} woke up: {reason}")
             
@@ -480,6 +576,7 @@ class AsyncAgentSessionManager:
             
         # Set state to stopped
         session.state = AgentState.STOPPED
+        session.wakeup.set()
         
         # Cancel background task
         if session.background_task:
@@ -494,8 +591,9 @@ class AsyncAgentSessionManager:
             # AI loop cleanup if needed
             pass
             
-        # Remove from sessions
+        # Remove from sessions and drop its scheduler queue and statistics
         del self.sessions[agent_id]
+        self.scheduler.forget(agent_id)
         
         logger.info(f"Stopped agent {agent_id}")
         
@@ -540,7 +638,8 @@ class AsyncAgentSessionManager:
                 "sleep_until": session.sleep_until.isoformat() if session.sleep_until else None,
                 "wake_events": list(session.wake_events),
                 "error_count": session.error_count,
-                "last_active": session.last_active.isoformat()
+                "last_active": session.last_active.isoformat(),
+                "scheduler": self.scheduler.get_agent_stats(agent_id)
             }
             for agent_id, session in self.sessions.items()
         }
@@ -617,16 +716,7 @@ class AsyncAgentSessionManager:
     def _session_to_state_dict(self, session: AsyncAgentSession) -> Dict[str, Any]:
         """Convert AsyncAgentSession to serializable dictionary."""
         # Extract task queue items (convert to list for serialization)
-        pending_tasks = []
-        try:
-            # Get tasks from queue without blocking
-            while not session.task_queue.empty():
-                task = session.task_queue.get_nowait()
-                pending_tasks.append(task)
-                # Put it back in the queue
-                session.task_queue.put_nowait(task)
-        except asyncio.QueueEmpty:
-            pass
+        pending_tasks = session.task_queue.pending()
         
         return {
             "agent_id": session.agent_id,
@@ -0,0 +1,303 @@
+"""
+Fair scheduling of async agents' LLM work.
+
+Every async agent runs its AI loop whenever it has a task, so without a
+scheduler a busy agent can take the whole API budget while the others
+wait. FairScheduler caps how many agent turns run at once across all
+agents and hands out free slots by deficit round robin (DRR): agents with
+queued work take turns, and on each turn an agent earns a quantum of
+credit scaled by the priority of its most urgent request, so an agent
+with HIGH priority mail gets more turns than one with LOW priority
+background work, but no agent is starved. Within an agent, requests run
+most urgent first, then in arrival order, and an agent's own TaskQueue
+hands out its tasks in the same order. A stopped agent's queue and
+statistics are dropped with ``forget()``.
+
+Queue wait and run time are tracked per agent.
+
+AIWHISPERER_AGENT_CONCURRENCY sets the cap; an empty value or 0 removes
+it (requests are still tracked but never wait).
+
+Key Components:
+- FairScheduler: Global concurrency cap with per-agent DRR queues
+- TaskQueue: asyncio queue of agent tasks, most urgent first
+- PRIORITY_WEIGHTS: Quantum multiplier for each MessagePriority
+- get_agent_scheduler / reset_agent_scheduler: Process-wide instance
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Union
+
+from ai_whisperer.extensions.mailbox.mailbox import MessagePriority
+
+logger = logging.getLogger(__name__)
+
+AGENT_CONCURRENCY_ENV = "AIWHISPERER_AGENT_CONCURRENCY"
+
+DEFAULT_MAX_CONCURRENT = 4
+
+PRIORITY_WEIGHTS: Dict[MessagePriority, float] = {
+    MessagePriority.LOW: 1.0,
+    MessagePriority.NORMAL: 2.0,
+    MessagePriority.HIGH: 4.0,
+    MessagePriority.URGENT: 8.0,
+}
+
+# Heap order within an agent's queue: most urgent first
+_RANK = {MessagePriority.URGENT: 0, MessagePriority.HIGH: 1, MessagePriority.NORMAL: 2, MessagePriority.LOW: 3}
+
+
+def agent_concurrency() -> int:
+    """Concurrent agent turns allowed (AIWHISPERER_AGENT_CONCURRENCY); 0 means no cap."""
+    value = os.environ.get(AGENT_CONCURRENCY_ENV)
+    if value is None:
+        return DEFAULT_MAX_CONCURRENT
+    try:
+        return max(0, int(value or 0))
+    except ValueError:
+        logger.warning(f"Ignoring invalid {AGENT_CONCURRENCY_ENV}={value!r}")
+        return DEFAULT_MAX_CONCURRENT
+
+
+def as_priority(value: Union[MessagePriority, str, None]) -> MessagePriority:
+    """A MessagePriority from a priority or its value, defaulting to NORMAL."""
+    if isinstance(value, MessagePriority):
+        return value
+    try:
+        return MessagePriority(value)
+    except ValueError:
+        return MessagePriority.NORMAL
+
+
+def task_priority(task: Dict[str, Any]) -> MessagePriority:
+    """The priority of an agent task, from its context."""
+    return as_priority((task.get("context") or {}).get("priority"))
+
+
+class TaskQueue(asyncio.Queue):
+    """
+    An agent's task queue: tasks come out most urgent first (by the
+    priority in their context), then in the order they were put.
+    """
+
+    def _init(self, maxsize: int) -> None:
+        self._queue: List = []  # heap of (rank, seq, task)
+        self._seq = itertools.count()
+
+    def _put(self, task: Dict[str, Any]) -> None:
+        heapq.heappush(self._queue, (_RANK[task_priority(task)], next(self._seq), task))
+
+    def _get(self) -> Dict[str, Any]:
+        return heapq.heappop(self._queue)[2]
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """Queued tasks in the order they will be handed out, without removing them."""
+        return [task for _, _, task in sorted(self._queue, key=lambda item: item[:2])]
+
+
+@dataclass
+class _Request:
+    future: asyncio.Future
+    priority: MessagePriority
+    cost: float
+
+
+@dataclass(eq=False)
+class _AgentFlow:
+    """One agent's queue, DRR credit and timings."""
+    agent_id: str
+    queue: List = field(default_factory=list)  # heap of (rank, seq, _Request)
+    active: bool = False  # In the round-robin list
+    deficit: float = 0.0
+    credited: bool = False  # Whether this turn's quantum has been added
+    running: int = 0
+    granted: int = 0
+    completed: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    total_run: float = 0.0
+
+    def head(self) -> Optional[_Request]:
+        # Drop requests whose caller gave up waiting
+        while self.queue and self.queue[0][2].future.done():
+            heapq.heappop(self.queue)
+        return self.queue[0][2] if self.queue else None
+
+
+class FairScheduler:
+    """
+    Global cap on concurrent agent turns, shared fairly between agents.
+
+    Args:
+        max_concurrent: Turns allowed to run at once; 0 for no cap
+        quantum: Credit an agent earns per round, before priority weighting
+    """
+
+    def __init__(self, max_concurrent: int = DEFAULT_MAX_CONCURRENT, quantum: float = 1.0):
+        self.max_concurrent = max_concurrent
+        self.quantum = quantum
+        self._flows: Dict[str, _AgentFlow] = {}
+        self._active: Deque[_AgentFlow] = deque()
+        self._running = 0
+        self._seq = itertools.count()
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    def queued(self, agent_id: Optional[str] = None) -> int:
+        """Requests waiting for a slot, for one agent or all."""
+        if agent_id is None:
+            flows = self._flows.values()
+        else:
+            flows = [self._flows[agent_id]] if agent_id in self._flows else []
+        return sum(1 for flow in flows for _, _, request in flow.queue if not request.future.done())
+
+    def _flow(self, agent_id: str) -> _AgentFlow:
+        flow = self._flows.get(agent_id)
+        if flow is None:
+            flow = self._flows[agent_id] = _AgentFlow(agent_id)
+        return flow
+
+    @asynccontextmanager
+    async def slot(self, agent_id: str, priority: Union[MessagePriority, str, None] = None,
+                   cost: float = 1.0) -> AsyncIterator[None]:
+        """
+        Run a block of agent work once the scheduler grants it a slot.
+
+        Args:
+            agent_id: Agent (or session) the work belongs to
+            priority: MessagePriority or its value; defaults to NORMAL
+            cost: Relative size of the work, e.g. 1 per LLM turn
+        """
+        flow = self._flow(agent_id)
+        enqueued_at = time.monotonic()
+        await self._acquire(flow, as_priority(priority), cost)
+        started = time.monotonic()
+        wait = started - enqueued_at
+        flow.granted += 1
+        flow.total_wait += wait
+        flow.max_wait = max(flow.max_wait, wait)
+        try:
+            yield
+        finally:
+            flow.total_run += time.monotonic() - started
+            flow.completed += 1
+            self._release(flow)
+
+    async def _acquire(self, flow: _AgentFlow, priority: MessagePriority, cost: float) -> None:
+        if not self.max_concurrent:
+            flow.running += 1
+            self._running += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(flow.queue, (_RANK[priority], next(self._seq), _Request(future, priority, cost)))
+        if not flow.active:
+            flow.active = True
+            self._active.append(flow)
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as the caller was cancelled: hand the slot on
+                self._release(flow)
+            else:
+                future.cancel()
+            raise
+
+    def _release(self, flow: _AgentFlow) -> None:
+        flow.running -= 1
+        self._running -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Grant free slots to queued requests by deficit round robin."""
+        while self._active and (not self.max_concurrent or self._running < self.max_concurrent):
+            flow = self._active[0]
+            request = flow.head()
+            if request is None:
+                # Nothing left to run: an idle agent does not bank credit
+                self._active.popleft()
+                flow.active = False
+                flow.deficit = 0.0
+                flow.credited = False
+                continue
+            if not flow.credited:
+                flow.deficit += self.quantum * PRIORITY_WEIGHTS[request.priority]
+                flow.credited = True
+            if flow.deficit >= request.cost:
+                heapq.heappop(flow.queue)
+                flow.deficit -= request.cost
+                flow.running += 1
+                self._running += 1
+                request.future.set_result(None)
+            else:
+                # Out of credit for this round: next agent's turn
+                flow.credited = False
+                self._active.rotate(-1)
+
+    def forget(self, agent_id: str) -> None:
+        """
+        Drop a stopped agent's queue and statistics.
+
+        Requests still waiting are cancelled; a turn still running releases
+        its slot as usual when it ends.
+        """
+        flow = self._flows.pop(agent_id, None)
+        if flow is None:
+            return
+        for _, _, request in flow.queue:
+            request.future.cancel()
+        flow.queue.clear()
+        self._dispatch()
+
+    def get_agent_stats(self, agent_id: str) -> Dict[str, Any]:
+        """Queue wait and run time for one agent."""
+        flow = self._flows.get(agent_id)
+        if flow is None:
+            return {"queued": 0, "running": 0, "granted": 0, "completed": 0,
+                    "avg_wait": 0.0, "max_wait": 0.0, "avg_run": 0.0}
+        return {
+            "queued": self.queued(agent_id),
+            "running": flow.running,
+            "granted": flow.granted,
+            "completed": flow.completed,
+            "avg_wait": flow.total_wait / flow.granted if flow.granted else 0.0,
+            "max_wait": flow.max_wait,
+            "avg_run": flow.total_run / flow.completed if flow.completed else 0.0,
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "running": self._running,
+            "queued": self.queued(),
+            "agents": {agent_id: self.get_agent_stats(agent_id) for agent_id in self._flows},
+        }
+
+
+_agent_scheduler: Optional[FairScheduler] = None
+
+
+def get_agent_scheduler() -> FairScheduler:
+    """Get the scheduler shared by all async agents (capped by AIWHISPERER_AGENT_CONCURRENCY)."""
+    global _agent_scheduler
+    if _agent_scheduler is None:
+        _agent_scheduler = FairScheduler(agent_concurrency())
+    return _agent_scheduler
+
+
+def reset_agent_scheduler() -> None:
+    """Drop the shared scheduler (for testing)."""
+    global _agent_scheduler
+    _agent_scheduler = None
@@ -10,6 +10,9 @@ Key Components:
 - StateSerializer: Handles serialization/deserialization with validation
 - StateValidator: Validates state integrity and consistency
 - File-based JSON storage with atomic operations
+- Journaled saves: repeated saves append only the changed fields
+- Optional write-behind: saves are queued, coalesced per file and written
+  in batches by a background thread (see utils/write_behind.py)
 - Comprehensive error handling and recovery
 
 Architecture:
@@ -27,14 +30,38 @@ Usage:
 import json
 import logging
 import asyncio
+import os
 import threading
 from pathlib import Path
 from typing import Dict, Any, List, Optional, Protocol
 from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from abc import ABC, abstractmethod
 
+from ai_whisperer.core.log_pipeline import SampledLogger
+from ai_whisperer.utils import json_codec
+from ai_whisperer.utils.state_journal import JOURNAL_SUFFIX, StateJournal
+from ai_whisperer.utils.write_behind import WriteBehindWriter
+
 logger = logging.getLogger(__name__)
+# Saves run per agent status change; keep their debug lines off the hot path
+_save_logger = SampledLogger(logger)
+
+STATE_WRITE_BEHIND_ENV = "AIWHISPERER_STATE_WRITE_BEHIND_MS"
+
+DEFAULT_WRITE_BEHIND_WINDOW = 0.05
+
+
+def state_write_behind_window() -> float:
+    """Write-behind batch window in seconds (AIWHISPERER_STATE_WRITE_BEHIND_MS); 0 saves synchronously."""
+    value = os.environ.get(STATE_WRITE_BEHIND_ENV)
+    if value is None:
+        return DEFAULT_WRITE_BEHIND_WINDOW
+    try:
+        return max(0.0, float(value or 0) / 1000)
+    except ValueError:
+        logger.warning(f"Ignoring invalid {STATE_WRITE_BEHIND_ENV}={value!r}")
+        return DEFAULT_WRITE_BEHIND_WINDOW
 
 
 # === REFACTOR PHASE: Clean Architecture Components ===
@@ -56,11 +83,11 @@ class JSONStateSerializer:
     
     def serialize(self, data: Dict[str, Any]) -> str:
         """Serialize state data to JSON string."""
-        return json.dumps(data, indent=2, ensure_ascii=False, default=str)
+        return json_codec.dumps(data, default=str)
     
     def deserialize(self, data: str) -> Dict[str, Any]:
         """Deserialize JSON string to state dictionary."""
-        return json.loads(data)
+        return json_codec.loads(data)
 
 
 class StateValidator:
@@ -137,7 +164,9 @@ class StateMetadata:
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for persistence."""
-        return asdict(self)
+        # Built directly: asdict() deep-copies and runs on every save
+        return {"saved_at": self.saved_at, "session_id": self.session_id,
+                "version": self.version, "checksum": self.checksum}
 
 
 class StatePersistenceManager:
@@ -157,7 +186,9 @@ class StatePersistenceManager:
     def __init__(self, 
                  state_dir: Path, 
                  serializer: Optional[StateSerializer] = None,
-                 validator: Optional[StateValidator] = None):
+                 validator: Optional[StateValidator] = None,
+                 journal: bool = True,
+                 write_behind: float = 0.0):
         """
         Initialize state persistence manager.
         
@@ -165,12 +196,19 @@ class StatePersistenceManager:
             state_dir: Root directory for state files
             serializer: Custom serializer (defaults to JSON)
             validator: Custom validator (defaults to StateValidator)
+            journal: Append changes to a journal beside each state file instead
+                of rewriting it (JSON serializer only)
+            write_behind: Seconds to batch saves for before a background thread
+                writes them; 0 writes each save before returning
         """
         self.state_dir = Path(state_dir)
         self.serializer = serializer or JSONStateSerializer()
         self.validator = validator or StateValidator()
+        self.journal = journal and type(self.serializer) is JSONStateSerializer
+        self._journals: Dict[str, StateJournal] = {}
         self._file_locks = {}  # Per-file locks for thread safety
         self._lock_mutex = threading.Lock()  # Protects the locks dict
+        self._writer = WriteBehindWriter(self._write_payload, write_behind) if write_behind > 0 else None
         
         self._ensure_directories()
         logger.info(f"StatePersistenceManager initialized with state_dir: {self.state_dir}")
@@ -217,40 +255,80 @@ class StatePersistenceManager:
         
         return clean_state
     
+    def _get_journal(self, file_path: Path) -> StateJournal:
+        """Get or create the journal for a state file."""
+        with self._lock_mutex:
+            journal = self._journals.get(str(file_path))
+            if journal is None:
+                journal = self._journals[str(file_path)] = StateJournal(file_path)
+            return journal
+    
     def _write_state_file(self, file_path: Path, state_data: Dict[str, Any]) -> bool:
+        """
+        Write state data to file, or queue it for the write-behind writer.
+        
+        With write-behind the state is serialized here, on the caller's thread,
+        so the caller may keep mutating it; True then means the save was queued,
+        and a failed write is raised by flush().
+        """
+        if self._writer is not None:
+            self._writer.submit(file_path, self.serializer.serialize(state_data))
+            return True
+        return self._write_now(file_path, state_data)
+    
+    def _write_now(self, file_path: Path, state_data: Dict[str, Any]) -> bool:
         """Write state data to file with atomic operation."""
         try:
             file_lock = self._get_file_lock(file_path)
             
             with file_lock:
+                if self.journal:
+                    self._get_journal(file_path).save(state_data)
+                    return True
+                
                 # Serialize data
                 serialized_data = self.serializer.serialize(state_data)
-                
-                # Atomic write: write to temp file then rename
-                temp_file = file_path.with_suffix('.tmp')
-                
-                with open(temp_file, 'w', encoding='utf-8') as f:
-                    f.write(serialized_data)
-                    f.flush()  # Ensure data is written to disk
-                
-                # Atomic rename
-                temp_file.rename(file_path)
+                self._replace_file(file_path, serialized_data)
                 
             return True
             
         except Exception as e:
             logger.error(f"Failed to write state file {file_path}: {e}")
+            return False
+    
+    def _write_payload(self, file_path: Path, serialized_data: str) -> None:
+        """Write a state serialized at submit time; called by the write-behind thread, raises on failure."""
+        with self._get_file_lock(file_path):
+            if self.journal:
+                self._get_journal(file_path).save(self.serializer.deserialize(serialized_data))
+            else:
+                self._replace_file(file_path, serialized_data)
+    
+    def _replace_file(self, file_path: Path, serialized_data: str) -> None:
+        """Atomically replace a state file: write to a temp file then rename."""
+        temp_file = file_path.with_suffix('.tmp')
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                f.write(serialized_data)
+                f.flush()  # Ensure data is written to disk
+            
+            # Atomic rename
+            temp_file.rename(file_path)
+        except Exception:
             # Clean up temp file if it exists
-            temp_file = file_path.with_suffix('.tmp')
             if temp_file.exists():
                 try:
                     temp_file.unlink()
                 except Exception:
                     pass
-            return False
+            raise
     
     def _read_state_file(self, file_path: Path) -> Optional[Dict[str, Any]]:
         """Read state data from file with validation."""
+        if self._writer is not None:
+            pending = self._writer.pending(file_path)
+            if pending is not None:
+                return self.serializer.deserialize(pending)
         try:
             if not file_path.exists():
                 return None
@@ -258,6 +336,9 @@ class StatePersistenceManager:
             file_lock = self._get_file_lock(file_path)
             
             with file_lock:
+                if self.journal:
+                    return self._get_journal(file_path).load()
+                
                 with open(file_path, 'r', encoding='utf-8') as f:
                     content = f.read()
                 
@@ -301,7 +382,7 @@ class StatePersistenceManager:
             success = self._write_state_file(state_file, state_with_metadata)
             
             if success:
-                logger.debug(f"Saved agent state for session {session_id}")
+                _save_logger.debug("Saved agent state for session %s", session_id)
             
             return success
             
@@ -355,10 +436,12 @@ class StatePersistenceManager:
             if not agents_dir.exists():
                 return []
             
-            session_ids = []
+            session_ids = set()
             for state_file in agents_dir.glob('*.json'):
                 session_id = state_file.stem  # filename without extension
-                session_ids.append(session_id)
+                session_ids.add(session_id)
+            if self._writer is not None:
+                session_ids.update(path.stem for path in self._writer.pending_paths() if path.parent == agents_dir)
             
             logger.debug(f"Found {len(session_ids)} persisted agents")
             return sorted(session_ids)
@@ -395,7 +478,7 @@ class StatePersistenceManager:
             success = self._write_state_file(task_file, task_with_metadata)
             
             if success:
-                logger.debug(f"Saved task queue state for agent {agent_id}")
+                _save_logger.debug("Saved task queue state for agent %s", agent_id)
             
             return success
             
@@ -460,7 +543,7 @@ class StatePersistenceManager:
             success = self._write_state_file(sleep_file, sleep_with_metadata)
             
             if success:
-                logger.debug(f"Saved sleep state for agent {agent_id}")
+                _save_logger.debug("Saved sleep state for agent %s", agent_id)
             
             return success
             
@@ -512,6 +595,9 @@ class StatePersistenceManager:
         Returns:
             True if saved successfully, False otherwise
         """
+        if self._writer is not None:
+            # Only queues the save; a failed write is raised by flush()
+            return self.save_agent_state(session_id, state_data)
         # Run in thread pool to avoid blocking event loop
         loop = asyncio.get_event_loop()
         return await loop.run_in_executor(None, self.save_agent_state, session_id, state_data)
@@ -530,6 +616,40 @@ class StatePersistenceManager:
         loop = asyncio.get_event_loop()
         return await loop.run_in_executor(None, self.load_agent_state, session_id)
     
+    # === WRITE-BEHIND ===
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Write all queued saves now (no-op without write-behind).
+        
+        Returns:
+            True if nothing is left queued
+            
+        Raises:
+            WriteBehindError: If queued saves failed to write since the last flush
+        """
+        return self._writer.flush(timeout) if self._writer is not None else True
+    
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """
+        Flush queued saves, stop the write-behind thread and fold each state
+        file's journal into it, leaving plain JSON files; raises like flush().
+        """
+        done = self._writer.close(timeout) if self._writer is not None else True
+        with self._lock_mutex:
+            journals = list(self._journals.items())
+        for path, journal in journals:
+            with self._get_file_lock(Path(path)):
+                try:
+                    journal.close()
+                except OSError as e:
+                    logger.error(f"Failed to compact state file {path}: {e}")
+        return done
+    
+    def get_write_stats(self) -> Dict[str, Any]:
+        """Write-behind counters: saves submitted, coalesced, written and pending."""
+        return self._writer.get_stats() if self._writer is not None else {"window": 0.0}
+    
     # === CLEANUP METHODS ===
     
     def cleanup_old_states(self, max_age_hours: int = 24) -> int:
@@ -553,9 +673,16 @@ class StatePersistenceManager:
                 
                 for state_file in dir_path.glob('*.json'):
                     try:
-                        # Check file modification time
-                        file_mtime = datetime.fromtimestamp(state_file.stat().st_mtime)
+                        # Check file modification time; journaled saves only touch the journal
+                        journal_file = state_file.with_name(state_file.name + JOURNAL_SUFFIX)
+                        mtime = state_file.stat().st_mtime
+                        if journal_file.exists():
+                            mtime = max(mtime, journal_file.stat().st_mtime)
+                        file_mtime = datetime.fromtimestamp(mtime)
                         if file_mtime < cutoff_time:
+                            with self._lock_mutex:
+                                self._journals.pop(str(state_file), None)
+                            journal_file.unlink(missing_ok=True)
                             state_file.unlink()
                             cleanup_count += 1
                             logger.debug(f"Cleaned up old state file: {state_file}")
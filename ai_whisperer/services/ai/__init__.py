@@ -4,5 +4,6 @@ ai_whisperer.services.ai - AI service integration
 This package contains AI service implementations:
 - base: Base AI service interface
 - openrouter: OpenRouter API integration
+- model_registry: Cached model catalog and capability lookup
 - tool_calling: Tool calling functionality
 """
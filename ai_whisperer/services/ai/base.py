@@ -3,11 +3,13 @@ from typing import Any, Dict, List, Optional, AsyncIterator
 
 class AIStreamChunk:
     def __init__(self, delta_content: Optional[str] = None, delta_tool_call_part: Optional[Any] = None, 
-                 finish_reason: Optional[str] = None, delta_reasoning: Optional[str] = None):
+                 finish_reason: Optional[str] = None, delta_reasoning: Optional[str] = None,
+                 usage: Optional[Dict[str, Any]] = None):
         self.delta_content = delta_content
         self.delta_tool_call_part = delta_tool_call_part
         self.finish_reason = finish_reason
         self.delta_reasoning = delta_reasoning  # New field for reasoning tokens
+        self.usage = usage  # Provider token/cost accounting, sent with the final chunk
         # May need chunk index or ID if multiple tool calls can be streamed interleaved.
     
     def __eq__(self, other):
@@ -16,7 +18,8 @@ class AIStreamChunk:
         return (self.delta_content == other.delta_content and 
                 self.delta_reasoning == other.delta_reasoning and
                 self.delta_tool_call_part == other.delta_tool_call_part and
-                self.finish_reason == other.finish_reason)
+                self.finish_reason == other.finish_reason and
+                self.usage == other.usage)
 
     def __repr__(self):
         parts = []
@@ -28,6 +31,8 @@ class AIStreamChunk:
             parts.append("tool_call=...")
         if self.finish_reason:
             parts.append(f"finish={self.finish_reason!r}")
+        if self.usage:
+            parts.append(f"usage={self.usage!r}")
         return f"AIStreamChunk({', '.join(parts)})"
 
 class AIService(ABC):
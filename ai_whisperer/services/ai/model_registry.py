@@ -0,0 +1,397 @@
+"""
+Model registry for AIWhisperer.
+
+Combines the static capability table in ``ai_whisperer.model_capabilities``
+with the OpenRouter ``/models`` catalog (pricing, context length, supported
+parameters) and answers lookups in constant time.
+
+Key Components:
+- ModelCatalogCache: TTL cache of the ``/models`` payload, optionally on disk
+- ModelRegistry: Merged capability/catalog index with longest-prefix lookup
+- load_tested_capabilities: Reader for the capability tester's output file
+- get_model_registry: Process-wide registry instance
+
+Lookups go through a precomputed exact map first. Misses fall back to a
+prefix trie, so ``openai/gpt-4o-mini-2024-07-18`` resolves to the most
+specific configured entry (``openai/gpt-4o-mini``) rather than the first
+entry that happens to be a prefix (``openai/gpt-4``). Resolved misses are
+memoised, so repeated lookups for the same model never walk the trie again
+and the "unknown model" warning is logged once per model.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Default on-disk location of the cached /models payload
+DEFAULT_CATALOG_PATH = Path.home() / ".aiwhisperer" / "cache" / "openrouter_models.json"
+
+# Environment override for the catalog location (set to an empty string to disable)
+CATALOG_PATH_ENV = "AIWHISPERER_MODEL_CATALOG"
+
+# Capability file written by ai_whisperer.tools.model_capability_tester
+DEFAULT_TESTED_CAPABILITIES_PATH = Path.home() / ".aiwhisperer" / "cache" / "tested_model_capabilities.json"
+
+# Environment override for the tested capabilities file (set to an empty string to disable)
+TESTED_CAPABILITIES_PATH_ENV = "AIWHISPERER_TESTED_CAPABILITIES"
+
+# How long a fetched catalog stays fresh
+DEFAULT_CATALOG_TTL_SECONDS = 6 * 60 * 60
+
+# Upper bound on memoised prefix/default resolutions
+MAX_RESOLVED_ENTRIES = 4096
+
+# Catalog fields merged into capability entries
+CATALOG_FIELDS = ("context_length", "pricing", "supported_parameters", "top_provider")
+
+
+def get_default_catalog_path() -> Optional[Path]:
+    """Return the catalog path, honouring the environment override."""
+    override = os.getenv(CATALOG_PATH_ENV)
+    if override is None:
+        return DEFAULT_CATALOG_PATH
+    return Path(override) if override else None
+
+
+def get_tested_capabilities_path() -> Optional[Path]:
+    """Return the tested capabilities path, honouring the environment override."""
+    override = os.getenv(TESTED_CAPABILITIES_PATH_ENV)
+    if override is None:
+        return DEFAULT_TESTED_CAPABILITIES_PATH
+    return Path(override) if override else None
+
+
+def load_tested_capabilities(path: Optional[Path]) -> Dict[str, Dict[str, Any]]:
+    """
+    Load a capability file produced by the model capability tester.
+
+    Args:
+        path: Path to the file (a missing or unreadable file is ignored)
+
+    Returns:
+        Dict mapping model ids to capability dictionaries
+    """
+    if not path or not Path(path).exists():
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        capabilities = data.get('model_capabilities', {})
+    except (OSError, ValueError, AttributeError) as e:
+        logger.warning(f"Ignoring unreadable capability file {path}: {e}")
+        return {}
+    return {
+        model_id: caps for model_id, caps in capabilities.items()
+        if isinstance(caps, dict) and model_id != "default"
+    }
+
+
+class ModelCatalogCache:
+    """
+    TTL cache for the OpenRouter ``/models`` payload.
+
+    Without a path the cache lives only in memory for the owning object.
+    With a path the payload is also written to disk (atomically, via a
+    temporary file) so other processes and later runs can reuse it.
+    """
+
+    def __init__(self, path: Optional[Path] = None, ttl_seconds: float = DEFAULT_CATALOG_TTL_SECONDS):
+        self.path = Path(path) if path else None
+        self.ttl_seconds = ttl_seconds
+        self._models: Optional[List[Dict[str, Any]]] = None
+        self._fetched_at: float = 0.0
+        self._lock = threading.Lock()
+
+    def is_fresh(self) -> bool:
+        """Check whether the in-memory copy is within its TTL."""
+        return self._models is not None and (time.time() - self._fetched_at) < self.ttl_seconds
+
+    def get(self, allow_stale: bool = False) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get cached models.
+
+        Args:
+            allow_stale: Return an expired payload instead of None
+
+        Returns:
+            List of model dictionaries, or None if nothing usable is cached
+        """
+        with self._lock:
+            if self._models is None:
+                self._load_from_disk()
+            if self._models is None:
+                return None
+            if allow_stale or self.is_fresh():
+                return self._models
+            return None
+
+    def store(self, models: List[Dict[str, Any]]) -> None:
+        """Store a freshly fetched payload in memory and on disk."""
+        with self._lock:
+            self._models = models
+            self._fetched_at = time.time()
+            self._write_to_disk()
+
+    def invalidate(self) -> None:
+        """Forget the in-memory payload (the disk copy is left in place)."""
+        with self._lock:
+            self._models = None
+            self._fetched_at = 0.0
+
+    def _load_from_disk(self) -> None:
+        if not self.path or not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            self._models = cached.get('data', [])
+            self._fetched_at = float(cached.get('fetched_at', 0.0))
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable model catalog cache {self.path}: {e}")
+            self._models = None
+            self._fetched_at = 0.0
+
+    def _write_to_disk(self) -> None:
+        if not self.path:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_suffix('.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'fetched_at': self._fetched_at, 'data': self._models}, f, separators=(',', ':'))
+            temp_path.replace(self.path)
+        except OSError as e:
+            logger.warning(f"Failed to write model catalog cache {self.path}: {e}")
+
+
+class _PrefixTrie:
+    """Character trie mapping model-id prefixes to values."""
+
+    _VALUE = object()
+
+    def __init__(self):
+        self._root: Dict[Any, Any] = {}
+
+    def insert(self, key: str, value: Any) -> None:
+        node = self._root
+        for ch in key:
+            node = node.setdefault(ch, {})
+        node[self._VALUE] = value
+
+    def longest_prefix(self, text: str) -> Optional[Tuple[str, Any]]:
+        """Return ``(prefix, value)`` for the longest stored prefix of text."""
+        node = self._root
+        best: Optional[Tuple[str, Any]] = None
+        for i, ch in enumerate(text):
+            node = node.get(ch)
+            if node is None:
+                break
+            if self._VALUE in node:
+                best = (text[:i + 1], node[self._VALUE])
+        return best
+
+
+class ModelRegistry:
+    """
+    Merged index of static model capabilities and the OpenRouter catalog.
+
+    Indexes are rebuilt off to the side and swapped in as a whole, so
+    lookups never take a lock.
+    """
+
+    def __init__(
+        self,
+        capabilities: Optional[Dict[str, Dict[str, Any]]] = None,
+        catalog: Optional[List[Dict[str, Any]]] = None,
+    ):
+        """
+        Initialize the registry.
+
+        Args:
+            capabilities: Static capability table (defaults to MODEL_CAPABILITIES)
+            catalog: Optional /models payload to merge in
+        """
+        if capabilities is None:
+            from ai_whisperer.model_capabilities import MODEL_CAPABILITIES
+            capabilities = MODEL_CAPABILITIES
+
+        self._static: Dict[str, Dict[str, Any]] = dict(capabilities)
+        self._default: Dict[str, Any] = self._static.get("default", {
+            "multi_tool": False,
+            "parallel_tools": False,
+            "max_tools_per_turn": 1,
+            "structured_output": False,
+            "quirks": {},
+        })
+        self._catalog: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._rebuild(catalog or [])
+
+    # -- index maintenance -------------------------------------------------
+
+    def _rebuild(self, catalog: List[Dict[str, Any]]) -> None:
+        """Rebuild the exact map and trie, then swap them in."""
+        catalog_index = {
+            model["id"]: model for model in catalog
+            if isinstance(model, dict) and model.get("id")
+        }
+
+        trie = _PrefixTrie()
+        exact: Dict[str, Dict[str, Any]] = {}
+        for model_id, caps in self._static.items():
+            if model_id == "default":
+                continue
+            trie.insert(model_id, caps)
+            exact[model_id] = self._merge(caps, catalog_index.get(model_id))
+
+        # Catalog models without a static entry inherit from their longest
+        # configured prefix; only their catalog metadata is new.
+        for model_id, info in catalog_index.items():
+            if model_id in exact:
+                continue
+            match = trie.longest_prefix(model_id)
+            if match is not None:
+                exact[model_id] = self._merge(match[1], info)
+
+        self._catalog = catalog_index
+        self._trie = trie
+        self._exact = exact
+        self._resolved: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def _merge(capabilities: Dict[str, Any], info: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if not info:
+            return capabilities
+        merged = dict(capabilities)
+        for field_name in CATALOG_FIELDS:
+            if field_name in info:
+                merged[field_name] = info[field_name]
+        return merged
+
+    def load_catalog(self, models: List[Dict[str, Any]]) -> None:
+        """Merge a /models payload into the registry."""
+        with self._lock:
+            self._rebuild(models)
+        logger.debug(f"Model registry loaded {len(self._catalog)} catalog entries")
+
+    def register(self, model_id: str, capabilities: Dict[str, Any]) -> None:
+        """Add or replace the static capabilities for a model."""
+        with self._lock:
+            self._static[model_id] = capabilities
+            if model_id == "default":
+                self._default = capabilities
+            self._rebuild(list(self._catalog.values()))
+
+    # -- lookups -----------------------------------------------------------
+
+    def get_capabilities(self, model_name: str) -> Dict[str, Any]:
+        """
+        Get capabilities for a model.
+
+        Args:
+            model_name: The model identifier (e.g., "openai/gpt-4o-mini-2024-07-18")
+
+        Returns:
+            Capability dictionary, merged with catalog metadata when available
+        """
+        caps = self._exact.get(model_name)
+        if caps is not None:
+            return caps
+        caps = self._resolved.get(model_name)
+        if caps is not None:
+            return caps
+        return self._resolve(model_name)
+
+    def _resolve(self, model_name: str) -> Dict[str, Any]:
+        match = self._trie.longest_prefix(model_name) if model_name else None
+        if match is not None:
+            caps = match[1]
+        else:
+            logger.warning(
+                f"Model '{model_name}' not found in MODEL_CAPABILITIES configuration. "
+                f"Using default single-tool capabilities. Consider adding this model to the configuration."
+            )
+            caps = self._merge(self._default, self._catalog.get(model_name))
+
+        resolved = self._resolved
+        if len(resolved) >= MAX_RESOLVED_ENTRIES:
+            resolved.clear()
+        resolved[model_name] = caps
+        return caps
+
+    def is_known(self, model_name: str) -> bool:
+        """Check whether a model has a static entry or a configured prefix."""
+        return model_name in self._exact or self._trie.longest_prefix(model_name) is not None
+
+    def get_model_info(self, model_name: str) -> Optional[Dict[str, Any]]:
+        """Get the raw catalog entry for a model, if the catalog has one."""
+        return self._catalog.get(model_name)
+
+    def get_pricing(self, model_name: str) -> Optional[Dict[str, float]]:
+        """
+        Get per-token pricing for a model.
+
+        Returns:
+            Dict with float ``prompt``, ``completion`` and (when published)
+            ``input_cache_read`` prices in USD per token, or None if the
+            catalog has no pricing for the model
+        """
+        info = self._catalog.get(model_name)
+        if not info or not isinstance(info.get("pricing"), dict):
+            return None
+        pricing = {}
+        for key, value in info["pricing"].items():
+            try:
+                pricing[key] = float(value)
+            except (TypeError, ValueError):
+                continue
+        return pricing
+
+    def list_model_ids(self) -> List[str]:
+        """List every model id with a static or catalog entry."""
+        return sorted(set(self._exact) | set(self._catalog))
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """
+    Get the process-wide model registry.
+
+    On first use the registry merges the static capability table with the
+    capability tester's output file and the on-disk catalog cache (if they
+    exist). Entries in the static table win over tested ones, so manual
+    overrides are preserved. It never touches the network; callers that
+    fetch a fresh catalog push it in via ``load_catalog``.
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                from ai_whisperer.model_capabilities import MODEL_CAPABILITIES
+
+                capabilities = {
+                    **load_tested_capabilities(get_tested_capabilities_path()),
+                    **MODEL_CAPABILITIES,
+                }
+                catalog = None
+                path = get_default_catalog_path()
+                if path is not None:
+                    catalog = ModelCatalogCache(path).get(allow_stale=True)
+                _registry = ModelRegistry(capabilities=capabilities, catalog=catalog)
+    return _registry
+
+
+def reset_model_registry() -> None:
+    """Drop the process-wide registry (used by tests and after config reloads)."""
+    global _registry
+    with _registry_lock:
+        _registry = None
@@ -7,6 +7,12 @@ import os
 from typing import Any, Dict, List, Optional, AsyncIterator
 from ai_whisperer.services.ai.base import AIService, AIStreamChunk
 from ai_whisperer.services.execution.ai_config import AIConfig
+from ai_whisperer.model_capabilities import supports_cache_control
+from ai_whisperer.services.ai.model_registry import (
+    ModelCatalogCache,
+    DEFAULT_CATALOG_TTL_SECONDS,
+    get_model_registry,
+)
 from ai_whisperer.core.exceptions import ( 
     OpenRouterAIServiceError,
     OpenRouterAuthError,
@@ -20,6 +26,16 @@ logger = logging.getLogger(__name__)
 API_URL = "https://openrouter.ai/api/v1/chat/completions"
 MODELS_API_URL = "https://openrouter.ai/api/v1/models"
 
+# Providers ignore cache breakpoints on prefixes shorter than ~1024 tokens
+CACHE_MIN_PREFIX_CHARS = 4096
+
+# Anthropic accepts at most four cache_control breakpoints per request
+MAX_CACHE_BREAKPOINTS = 4
+
+# Trailing conversation messages that get a breakpoint, so the next turn
+# reads the history prefix written by this one
+CACHE_HISTORY_BREAKPOINTS = 2
+
 class OpenRouterAIService(AIService):
     """
     OpenRouter API wrapper that passes messages directly to the API.
@@ -46,9 +62,25 @@ class OpenRouterAIService(AIService):
         
         # Reasoning token configuration
         self.max_reasoning_tokens = getattr(config, "max_reasoning_tokens", None)
+        
+        # Model catalog cache (in-memory unless a cache path is configured)
+        self._model_catalog = ModelCatalogCache(
+            path=getattr(config, "models_cache_path", None),
+            ttl_seconds=getattr(config, "models_cache_ttl", DEFAULT_CATALOG_TTL_SECONDS),
+        )
 
-    def list_models(self) -> List[Dict[str, Any]]:
-        """Get available models from OpenRouter."""
+    def list_models(self, force_refresh: bool = False) -> List[Dict[str, Any]]:
+        """
+        Get available models from OpenRouter.
+        
+        The payload is cached for ``models_cache_ttl`` seconds; pass
+        force_refresh=True to bypass the cache.
+        """
+        if not force_refresh:
+            cached = self._model_catalog.get()
+            if cached is not None:
+                return cached
+        
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
@@ -58,9 +90,14 @@ class OpenRouterAIService(AIService):
             response = requests.get(MODELS_API_URL, headers=headers, timeout=30)
             response.raise_for_status()
             data = response.json()
-            return data.get("data", [])
+            models = data.get("data", [])
         except requests.exceptions.RequestException as e:
             raise OpenRouterConnectionError(f"Failed to fetch models: {e}") from e
+        
+        self._model_catalog.store(models)
+        if models:
+            get_model_registry().load_catalog(models)
+        return models
 
     def call_chat_completion(
         self,
@@ -119,11 +156,14 @@ class OpenRouterAIService(AIService):
         params = kwargs
         payload = self._build_payload(messages, None, params, tools, response_format)
         payload["stream"] = True
+        # Ask for token/cost accounting in the final chunk
+        payload["usage"] = {"include": True}
         
         # Stream using the internal method
         async for chunk_data in self._stream_internal(payload):
             # Convert to AIStreamChunk
             choices = chunk_data.get("choices", [])
+            usage = chunk_data.get("usage")
             if choices:
                 choice = choices[0]
                 delta = choice.get("delta", {})
@@ -133,13 +173,22 @@ class OpenRouterAIService(AIService):
                     delta_content=delta.get("content"),
                     delta_tool_call_part=delta.get("tool_calls"),
                     finish_reason=finish_reason,
-                    delta_reasoning=delta.get("reasoning")
+                    delta_reasoning=delta.get("reasoning"),
+                    usage=usage
                 )
+            elif usage:
+                # OpenRouter sends token/cost accounting in a final chunk with no choices
+                yield AIStreamChunk(usage=usage)
 
     async def _stream_internal(self, payload: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
         """Internal streaming implementation."""
         import asyncio
         
+        # Set when the consumer stops early (e.g. the request was cancelled) so the
+        # reader thread stops and the HTTP connection is released
+        stream_cancelled = threading.Event()
+        active_response = {}
+        
         def sync_stream():
             headers = {
                 "Authorization": f"Bearer {self.api_key}",
@@ -169,13 +218,14 @@ class OpenRouterAIService(AIService):
             
             try:
                 response = requests.post(API_URL, headers=headers, json=payload, stream=True, timeout=60)
+                active_response["response"] = response
                 
                 if response.status_code >= 400:
                     self._handle_error_response(response)
                 
                 # Process SSE stream
                 for line in response.iter_lines():
-                    if self.shutdown_event and self.shutdown_event.is_set():
+                    if stream_cancelled.is_set() or (self.shutdown_event and self.shutdown_event.is_set()):
                         break
                         
                     if line:
@@ -208,13 +258,23 @@ class OpenRouterAIService(AIService):
         
         threading.Thread(target=run_sync, daemon=True).start()
         
-        while True:
-            item = await queue.get()
-            if item is StopAsyncIteration:
-                break
-            if isinstance(item, Exception):
-                raise item
-            yield item
+        completed = False
+        try:
+            while True:
+                item = await queue.get()
+                if item is StopAsyncIteration:
+                    completed = True
+                    break
+                if isinstance(item, Exception):
+                    completed = True
+                    raise item
+                yield item
+        finally:
+            if not completed:
+                stream_cancelled.set()
+                response = active_response.get("response")
+                if response is not None:
+                    response.close()
 
     def _build_payload(
         self,
@@ -252,7 +312,12 @@ class OpenRouterAIService(AIService):
         
         # Add tools and response format
         if tools:
-            payload["tools"] = tools
+            payload["tools"] = self._stable_tool_order(tools)
+        
+        # Mark the stable prefix (tools, system prompt, older history) for
+        # provider-side prompt caching
+        if model_name and supports_cache_control(model_name):
+            payload["messages"] = self._add_cache_breakpoints(messages, payload.get("tools"))
         if response_format:
             # OpenRouter handles the translation to provider-specific formats
             payload["response_format"] = response_format
@@ -263,6 +328,77 @@ class OpenRouterAIService(AIService):
             
         return payload
 
+    @staticmethod
+    def _stable_tool_order(tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Order tool definitions by name.
+        
+        Tool lists are assembled from sets and lazily loaded registries, so
+        their order can drift between turns; any drift invalidates the
+        provider's cached prompt prefix.
+        """
+        def tool_name(tool):
+            if isinstance(tool, dict):
+                return str(tool.get("function", {}).get("name", ""))
+            return ""
+        return sorted(tools, key=tool_name)
+
+    @staticmethod
+    def _add_cache_breakpoints(
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Return a copy of messages with cache_control breakpoints.
+        
+        A breakpoint goes on the first system message (caching tools and the
+        system prompt) and on the last few conversation messages (caching
+        the history). Messages are never mutated; context providers store
+        them and must see the original content.
+        
+        Args:
+            messages: Messages in the order they will be sent
+            tools: Tool definitions sent with the request
+            
+        Returns:
+            The messages with breakpoints, or the original list when the
+            prefix is too short to be cached
+        """
+        system_index = next(
+            (i for i, msg in enumerate(messages) if msg.get("role") == "system"), None
+        )
+        prefix_chars = len(json.dumps(tools, separators=(",", ":"))) if tools else 0
+        if system_index is not None:
+            content = messages[system_index].get("content")
+            prefix_chars += len(content) if isinstance(content, str) else 0
+        if prefix_chars < CACHE_MIN_PREFIX_CHARS:
+            return messages
+
+        targets = [] if system_index is None else [system_index]
+        limit = min(MAX_CACHE_BREAKPOINTS, len(targets) + CACHE_HISTORY_BREAKPOINTS)
+        for i in range(len(messages) - 1, -1, -1):
+            if len(targets) >= limit:
+                break
+            if i != system_index and messages[i].get("role") != "system" and messages[i].get("content"):
+                targets.append(i)
+
+        result = list(messages)
+        for i in targets:
+            message = dict(messages[i])
+            content = message["content"]
+            if isinstance(content, str):
+                message["content"] = [
+                    {"type": "text", "text": content, "cache_control": {"type": "ephemeral"}}
+                ]
+            elif isinstance(content, list) and content and isinstance(content[-1], dict):
+                parts = list(content)
+                parts[-1] = {**parts[-1], "cache_control": {"type": "ephemeral"}}
+                message["content"] = parts
+            else:
+                continue
+            result[i] = message
+        return result
+
     def _handle_error_response(self, response):
         """Handle HTTP error responses."""
         status_code = response.status_code
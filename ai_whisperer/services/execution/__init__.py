@@ -6,4 +6,5 @@ This package contains the execution engine:
 - ai_config: AI configuration management
 - context: Context management
 - state: State management
+- usage_tracker: Token, cost and latency accounting
 """
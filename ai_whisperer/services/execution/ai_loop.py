@@ -29,12 +29,20 @@ import asyncio
 import json
 import logging
 import re
+import time
 from typing import Dict, List, Any, Optional, Callable, AsyncIterator
 from ai_whisperer.services.execution.ai_config import AIConfig
 from ai_whisperer.services.ai.base import AIService
 from ai_whisperer.context.provider import ContextProvider
 from ai_whisperer.tools.tool_registry import get_tool_registry
 from ai_whisperer.services.execution.tool_call_accumulator import ToolCallAccumulator
+from ai_whisperer.utils import json_codec
+from ai_whisperer.services.execution.usage_tracker import (
+    TurnUsage,
+    estimate_cost,
+    get_usage_tracker,
+    parse_usage,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -271,7 +279,7 @@ class StatelessAILoop:
                             
                             # Convert tool result to JSON string for the content field
                             try:
-                                content = json.dumps(tool_result)
+                                content = json_codec.dumps(tool_result)
                             except (TypeError, ValueError):
                                 content = str(tool_result)
                             
@@ -434,6 +442,9 @@ class StatelessAILoop:
         tool_accumulator = ToolCallAccumulator()
         finish_reason = None
         last_chunk = None
+        usage = None
+        stream_start = time.perf_counter()
+        first_token_at = None
         
         try:
             # Handle coroutine types (from mocks)
@@ -443,6 +454,16 @@ class StatelessAILoop:
             async for chunk in stream:
                 last_chunk = chunk
                 
+                if first_token_at is None and (
+                    chunk.delta_content or getattr(chunk, 'delta_reasoning', None) or chunk.delta_tool_call_part
+                ):
+                    first_token_at = time.perf_counter()
+                
+                # Provider accounting arrives with the final chunk
+                chunk_usage = getattr(chunk, 'usage', None)
+                if isinstance(chunk_usage, dict):
+                    usage = chunk_usage
+                
                 # Process content
                 if chunk.delta_content:
                     full_response += chunk.delta_content
@@ -469,7 +490,10 @@ class StatelessAILoop:
                 if chunk.finish_reason:
                     finish_reason = chunk.finish_reason
             
-            logger.info(f"🔄 STREAM FINISHED: finish_reason={finish_reason}, response_length={len(full_response)}, reasoning_length={len(full_reasoning)}")
+            # Generation runs from the first token, so waiting for it (TTFT) does not dilute tokens/sec
+            generation_time = time.perf_counter() - first_token_at if first_token_at is not None else 0.0
+            logger.debug("🔄 STREAM FINISHED: finish_reason=%s, response_length=%d, reasoning_length=%d",
+                         finish_reason, len(full_response), len(full_reasoning))
             
             # DEBUG: Log if we got an empty response but have reasoning
             if len(full_response) == 0 and len(full_reasoning) == 0:
@@ -480,7 +504,7 @@ class StatelessAILoop:
             # Send final chunk notification
             if on_stream_chunk:
                 final_content = last_chunk.delta_content if last_chunk and last_chunk.delta_content else ""
-                logger.info(f"🔄 SENDING FINAL CHUNK: length={len(final_content)}")
+                logger.debug("🔄 SENDING FINAL CHUNK: length=%d", len(final_content))
                 await on_stream_chunk(final_content)
             
             # Get tool calls if present
@@ -492,22 +516,26 @@ class StatelessAILoop:
             
             # Execute tool calls if present
             tool_results_list = None
+            tool_time = 0.0
             if tool_calls:
-                logger.info(f"🔧 EXECUTING TOOLS: Found {len(tool_calls)} tool calls")
-                for i, tool_call in enumerate(tool_calls):
-                    logger.info(f"   Tool {i+1}: {tool_call.get('function', {}).get('name', 'unknown')}")
-                
-                # Determine tool execution strategy
-                tool_strategy = self._determine_tool_strategy(tool_calls)
-                logger.info(f"🔧 TOOL STRATEGY: {tool_strategy}")
+                logger.info("🔧 EXECUTING TOOLS: Found %d tool calls", len(tool_calls))
+                if logger.isEnabledFor(logging.DEBUG):
+                    for i, tool_call in enumerate(tool_calls):
+                        logger.debug("   Tool %d: %s", i + 1, tool_call.get('function', {}).get('name', 'unknown'))
+                    
+                    # Determine tool execution strategy (only reported, so only worked out when debugging)
+                    logger.debug("🔧 TOOL STRATEGY: %s", self._determine_tool_strategy(tool_calls))
                 
+                tool_start = time.perf_counter()
                 tool_results_list = await self._execute_tool_calls(tool_calls)
-                logger.info(f"🔧 TOOL EXECUTION COMPLETE: {len(tool_results_list)} results")
+                tool_time = time.perf_counter() - tool_start
+                logger.debug("🔧 TOOL EXECUTION COMPLETE: %d results", len(tool_results_list))
                 
                 # Don't append tool results to the response - they'll be handled separately
                 # The AI will process them from the tool messages
                 
-            logger.info(f"🔄 RETURNING RESULT: response_length={len(full_response)}, reasoning_length={len(full_reasoning)}, tool_calls={len(tool_calls) if tool_calls else 0}")
+            logger.debug("🔄 RETURNING RESULT: response_length=%d, reasoning_length=%d, tool_calls=%d",
+                         len(full_response), len(full_reasoning), len(tool_calls) if tool_calls else 0)
             
             # Apply postprocessing if we have a JSON response that might be wrapped in markdown
             processed_response = full_response
@@ -516,6 +544,14 @@ class StatelessAILoop:
                 if processed_response != full_response:
                     logger.debug("Applied postprocessing to clean response")
             
+            turn_usage = self._record_usage(
+                usage,
+                ttft=first_token_at - stream_start if first_token_at is not None else None,
+                generation_time=generation_time,
+                tool_time=tool_time,
+                tool_calls=len(tool_calls) if tool_calls else 0
+            )
+            
             return {
                 'response': processed_response,
                 'reasoning': full_reasoning if full_reasoning else None,
@@ -523,7 +559,8 @@ class StatelessAILoop:
                 'tool_calls': tool_calls,
                 'tool_results': tool_results_list,  # Return the raw tool results
                 'error': None,
-                'used_structured_output': response_format is not None  # Track if structured output was used
+                'used_structured_output': response_format is not None,  # Track if structured output was used
+                'usage': turn_usage.to_dict()
             }
             
         except Exception as e:
@@ -536,6 +573,55 @@ class StatelessAILoop:
                 'error': e
             }
     
+    def _record_usage(
+        self,
+        usage: Optional[Dict[str, Any]],
+        ttft: Optional[float],
+        generation_time: float,
+        tool_time: float,
+        tool_calls: int
+    ) -> TurnUsage:
+        """
+        Record token, cost and latency accounting for one streamed round.
+        
+        Args:
+            usage: Provider ``usage`` block from the final chunk, if any
+            ttft: Seconds from request to first token, if any token arrived
+            generation_time: Seconds from the first token to the end of the stream
+            tool_time: Seconds spent executing tool calls
+            tool_calls: Number of tool calls executed
+            
+        Returns:
+            The recorded TurnUsage
+        """
+        parsed = parse_usage(usage)
+        model = getattr(self.config, 'model_id', None)
+        if not isinstance(model, str):
+            model = None
+        
+        cost = parsed.get('cost')
+        if cost is None:
+            cost = estimate_cost(model, parsed['prompt_tokens'], parsed['completion_tokens'], parsed['cached_tokens'])
+        
+        turn = TurnUsage(
+            model=model,
+            session_id=self.agent_context.get('session_id'),
+            agent_id=self.agent_context.get('agent_id'),
+            prompt_tokens=parsed['prompt_tokens'],
+            completion_tokens=parsed['completion_tokens'],
+            cached_tokens=parsed['cached_tokens'],
+            cost=cost,
+            ttft=ttft,
+            generation_time=generation_time,
+            tool_time=tool_time,
+            tool_calls=tool_calls
+        )
+        try:
+            get_usage_tracker().record(turn)
+        except Exception as e:
+            logger.warning(f"Failed to record usage: {e}")
+        return turn
+    
     async def _execute_tool_calls(self, tool_calls: List[Dict[str, Any]]) -> List[Any]:
         """
         Execute tool calls and return raw results.
@@ -566,7 +652,7 @@ class StatelessAILoop:
                 
                 # Parse arguments
                 try:
-                    tool_args = json.loads(tool_args_str) if tool_args_str else {}
+                    tool_args = json_codec.loads(tool_args_str) if tool_args_str else {}
                     logger.info(f"   Args: {tool_args}")
                 except json.JSONDecodeError as e:
                     logger.error(f"Failed to parse arguments for tool {tool_name}: {e}")
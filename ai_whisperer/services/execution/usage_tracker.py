@@ -0,0 +1,431 @@
+"""
+Token, cost and latency accounting for AI loop turns.
+
+Every streamed LLM round handled by ``StatelessAILoop`` produces one
+``TurnUsage`` record: prompt/completion tokens reported by the provider,
+cost (from the provider when it reports one, otherwise from cached catalog
+pricing), time to first token, generation time and tool execution time.
+Generation time starts at the first token, so tokens per second measures
+the model's output rate and time to first token is reported on its own.
+
+Key Components:
+- TurnUsage: Measurements for a single LLM round
+- UsageTotals: Running totals for a session, agent or model
+- UsageTracker: Bounded in-memory store with rollups and SQLite flushing
+- get_usage_tracker: Process-wide tracker instance
+- configure_usage_tracker: Enable persistence from the config file
+
+Recent turns are kept in a fixed-size deque and rollups are kept in
+LRU-bounded maps, so memory stays flat however long the server runs.
+Persistence is opt-in: when ``usage_tracking.db_path`` is set in the
+config file or AIWHISPERER_USAGE_DB names a file, completed turns are
+appended to that SQLite file in batches for after-the-fact analysis.
+``record()`` only appends to memory; full batches are written by a
+background thread, so the event loop never waits on SQLite.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Database location; overrides the config file, and an empty string disables persistence
+USAGE_DB_ENV = "AIWHISPERER_USAGE_DB"
+
+# Bounds for the in-memory store
+DEFAULT_MAX_RECENT_TURNS = 1000
+DEFAULT_MAX_ROLLUP_KEYS = 1000
+
+# Number of pending turns that triggers a flush to SQLite
+DEFAULT_FLUSH_BATCH_SIZE = 50
+
+ROLLUP_SCOPES = ("session", "agent", "model")
+
+_CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS turn_usage (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp REAL NOT NULL,
+    session_id TEXT,
+    agent_id TEXT,
+    model TEXT,
+    prompt_tokens INTEGER NOT NULL,
+    completion_tokens INTEGER NOT NULL,
+    cached_tokens INTEGER NOT NULL,
+    cost REAL NOT NULL,
+    ttft REAL,
+    generation_time REAL NOT NULL,
+    tool_time REAL NOT NULL,
+    tool_calls INTEGER NOT NULL
+)
+"""
+
+_INSERT_SQL = """
+INSERT INTO turn_usage (
+    timestamp, session_id, agent_id, model, prompt_tokens, completion_tokens,
+    cached_tokens, cost, ttft, generation_time, tool_time, tool_calls
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def get_default_usage_db_path(config: Optional[dict] = None) -> Optional[Path]:
+    """
+    Return the usage database path, or None to keep usage in memory only.
+
+    Args:
+        config: Application config; ``usage_tracking.db_path`` enables persistence
+
+    Returns:
+        AIWHISPERER_USAGE_DB when set, otherwise the configured path
+    """
+    override = os.getenv(USAGE_DB_ENV)
+    if override is not None:
+        return Path(override) if override else None
+    db_path = ((config or {}).get("usage_tracking") or {}).get("db_path")
+    return Path(db_path) if db_path else None
+
+
+@dataclass
+class TurnUsage:
+    """Measurements for a single streamed LLM round."""
+    model: Optional[str] = None
+    session_id: Optional[str] = None
+    agent_id: Optional[str] = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    cost: float = 0.0
+    ttft: Optional[float] = None
+    generation_time: float = 0.0
+    tool_time: float = 0.0
+    tool_calls: int = 0
+    timestamp: float = field(default_factory=time.time)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["total_tokens"] = self.total_tokens
+        return data
+
+
+@dataclass
+class UsageTotals:
+    """Running totals for one session, agent or model."""
+    turns: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    cost: float = 0.0
+    generation_time: float = 0.0
+    tool_time: float = 0.0
+    tool_calls: int = 0
+    ttft_total: float = 0.0
+    ttft_count: int = 0
+    last_seen: float = 0.0
+
+    def add(self, turn: TurnUsage) -> None:
+        self.turns += 1
+        self.prompt_tokens += turn.prompt_tokens
+        self.completion_tokens += turn.completion_tokens
+        self.cached_tokens += turn.cached_tokens
+        self.cost += turn.cost
+        self.generation_time += turn.generation_time
+        self.tool_time += turn.tool_time
+        self.tool_calls += turn.tool_calls
+        if turn.ttft is not None:
+            self.ttft_total += turn.ttft
+            self.ttft_count += 1
+        self.last_seen = turn.timestamp
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "turns": self.turns,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.prompt_tokens + self.completion_tokens,
+            "cached_tokens": self.cached_tokens,
+            "cache_hit_ratio": self.cached_tokens / self.prompt_tokens if self.prompt_tokens else None,
+            "cost": round(self.cost, 8),
+            "generation_time": self.generation_time,
+            "tool_time": self.tool_time,
+            "tool_calls": self.tool_calls,
+            "avg_ttft": self.ttft_total / self.ttft_count if self.ttft_count else None,
+            "tokens_per_second": (
+                self.completion_tokens / self.generation_time if self.generation_time > 0 else None
+            ),
+            "last_seen": self.last_seen,
+        }
+
+
+def parse_usage(usage: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Normalise a provider ``usage`` block.
+
+    Args:
+        usage: The ``usage`` object from a chat completion response
+
+    Returns:
+        Dict with integer ``prompt_tokens``, ``completion_tokens`` and
+        ``cached_tokens``, plus ``cost`` when the provider reported one
+    """
+    if not isinstance(usage, dict):
+        return {"prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+
+    details = usage.get("prompt_tokens_details") or {}
+    parsed = {
+        "prompt_tokens": int(usage.get("prompt_tokens") or 0),
+        "completion_tokens": int(usage.get("completion_tokens") or 0),
+        "cached_tokens": int(details.get("cached_tokens") or 0) if isinstance(details, dict) else 0,
+    }
+    if usage.get("cost") is not None:
+        try:
+            parsed["cost"] = float(usage["cost"])
+        except (TypeError, ValueError):
+            pass
+    return parsed
+
+
+def estimate_cost(model: Optional[str], prompt_tokens: int, completion_tokens: int,
+                  cached_tokens: int = 0) -> float:
+    """
+    Estimate the cost of a turn from the cached model catalog pricing.
+
+    Cached prompt tokens are charged at ``input_cache_read`` when the
+    catalog publishes it. Returns 0.0 for models without known pricing.
+    """
+    if not model:
+        return 0.0
+    from ai_whisperer.services.ai.model_registry import get_model_registry
+
+    pricing = get_model_registry().get_pricing(model)
+    if not pricing:
+        return 0.0
+
+    prompt_price = pricing.get("prompt", 0.0)
+    cache_price = pricing.get("input_cache_read", prompt_price)
+    cached = min(cached_tokens, prompt_tokens)
+    return (
+        (prompt_tokens - cached) * prompt_price
+        + cached * cache_price
+        + completion_tokens * pricing.get("completion", 0.0)
+    )
+
+
+class UsageTracker:
+    """
+    Bounded in-memory usage store with per-session, per-agent and per-model
+    rollups, flushed to SQLite in batches.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[Path] = None,
+        max_recent: int = DEFAULT_MAX_RECENT_TURNS,
+        max_rollup_keys: int = DEFAULT_MAX_ROLLUP_KEYS,
+        flush_batch_size: int = DEFAULT_FLUSH_BATCH_SIZE,
+    ):
+        """
+        Initialize the tracker.
+
+        Args:
+            db_path: SQLite file to flush turns to (None keeps usage in memory only)
+            max_recent: Number of recent turns kept in memory
+            max_rollup_keys: Number of sessions/agents/models kept per rollup
+            flush_batch_size: Pending turns that trigger an automatic flush
+        """
+        self.db_path = Path(db_path) if db_path else None
+        self.max_rollup_keys = max_rollup_keys
+        self.flush_batch_size = flush_batch_size
+        self._recent: Deque[TurnUsage] = deque(maxlen=max_recent)
+        self._rollups: Dict[str, "OrderedDict[str, UsageTotals]"] = {
+            scope: OrderedDict() for scope in ROLLUP_SCOPES
+        }
+        self._totals = UsageTotals()
+        self._pending: List[TurnUsage] = []
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()  # Serialises writes to the database
+        self._flush_threads: List[threading.Thread] = []
+        self._db_initialized = False
+
+    def record(self, turn: TurnUsage) -> None:
+        """Record a completed turn; a full batch is written by a background thread."""
+        with self._lock:
+            self._recent.append(turn)
+            self._totals.add(turn)
+            self._add_to_rollup("session", turn.session_id, turn)
+            self._add_to_rollup("agent", turn.agent_id, turn)
+            self._add_to_rollup("model", turn.model, turn)
+            if self.db_path:
+                self._pending.append(turn)
+                if len(self._pending) >= self.flush_batch_size:
+                    batch, self._pending = self._pending, []
+                    thread = threading.Thread(target=self._write, args=(batch,), name="usage-flush", daemon=True)
+                    self._flush_threads = [t for t in self._flush_threads if t.is_alive()] + [thread]
+                    thread.start()
+
+    def _add_to_rollup(self, scope: str, key: Optional[str], turn: TurnUsage) -> None:
+        if not key:
+            return
+        rollup = self._rollups[scope]
+        totals = rollup.get(key)
+        if totals is None:
+            totals = rollup[key] = UsageTotals()
+            if len(rollup) > self.max_rollup_keys:
+                rollup.popitem(last=False)
+        else:
+            rollup.move_to_end(key)
+        totals.add(turn)
+
+    def get_totals(self, scope: str, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get rollup totals for one session, agent or model.
+
+        Args:
+            scope: One of "session", "agent" or "model"
+            key: The session id, agent id or model id
+
+        Returns:
+            Totals dictionary, or None if nothing was recorded for the key
+        """
+        if scope not in self._rollups:
+            raise ValueError(f"Unknown usage scope: {scope}")
+        with self._lock:
+            totals = self._rollups[scope].get(key)
+            return totals.to_dict() if totals else None
+
+    def get_summary(self, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Summarise recorded usage.
+
+        Args:
+            session_id: Restrict the per-agent and per-model breakdown to
+                turns from this session's recent history
+
+        Returns:
+            Dict with overall totals and per-session, per-agent and
+            per-model breakdowns
+        """
+        with self._lock:
+            if session_id is None:
+                return {
+                    "totals": self._totals.to_dict(),
+                    "sessions": {k: v.to_dict() for k, v in self._rollups["session"].items()},
+                    "agents": {k: v.to_dict() for k, v in self._rollups["agent"].items()},
+                    "models": {k: v.to_dict() for k, v in self._rollups["model"].items()},
+                }
+
+            session_totals = self._rollups["session"].get(session_id)
+            agents: Dict[str, UsageTotals] = {}
+            models: Dict[str, UsageTotals] = {}
+            for turn in self._recent:
+                if turn.session_id != session_id:
+                    continue
+                if turn.agent_id:
+                    agents.setdefault(turn.agent_id, UsageTotals()).add(turn)
+                if turn.model:
+                    models.setdefault(turn.model, UsageTotals()).add(turn)
+            return {
+                "session_id": session_id,
+                "totals": (session_totals or UsageTotals()).to_dict(),
+                "agents": {k: v.to_dict() for k, v in agents.items()},
+                "models": {k: v.to_dict() for k, v in models.items()},
+            }
+
+    def get_recent(self, limit: int = 50, session_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get the most recent turns, newest last."""
+        with self._lock:
+            turns = [t for t in self._recent if session_id is None or t.session_id == session_id]
+        return [t.to_dict() for t in turns[-limit:]] if limit > 0 else []
+
+    def flush(self) -> int:
+        """
+        Write pending turns to SQLite, after any batch a background thread is writing.
+
+        Returns:
+            Number of turns written by this call
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+            threads, self._flush_threads = self._flush_threads, []
+        for thread in threads:
+            if thread is not threading.current_thread():
+                thread.join()
+        return self._write(pending)
+
+    def _write(self, pending: List[TurnUsage]) -> int:
+        """Append turns to the database; returns the number written."""
+        if not pending or not self.db_path:
+            return 0
+
+        rows = [
+            (t.timestamp, t.session_id, t.agent_id, t.model, t.prompt_tokens, t.completion_tokens,
+             t.cached_tokens, t.cost, t.ttft, t.generation_time, t.tool_time, t.tool_calls)
+            for t in pending
+        ]
+        try:
+            with self._db_lock:
+                if not self._db_initialized:
+                    self.db_path.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(str(self.db_path), timeout=5)
+                try:
+                    with conn:
+                        if not self._db_initialized:
+                            conn.execute(_CREATE_TABLE_SQL)
+                            self._db_initialized = True
+                        conn.executemany(_INSERT_SQL, rows)
+                finally:
+                    conn.close()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Failed to flush {len(rows)} usage records to {self.db_path}: {e}")
+            return 0
+        logger.debug(f"Flushed {len(rows)} usage records to {self.db_path}")
+        return len(rows)
+
+
+_tracker: Optional[UsageTracker] = None
+_tracker_lock = threading.Lock()
+
+
+def get_usage_tracker() -> UsageTracker:
+    """Get the process-wide usage tracker."""
+    global _tracker
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                _tracker = UsageTracker(db_path=get_default_usage_db_path())
+    return _tracker
+
+
+def configure_usage_tracker(config: Optional[dict]) -> UsageTracker:
+    """
+    Enable persistence on the process-wide tracker when the config asks for it.
+
+    Args:
+        config: Application config with an optional ``usage_tracking.db_path``
+
+    Returns:
+        The process-wide tracker
+    """
+    tracker = get_usage_tracker()
+    db_path = get_default_usage_db_path(config)
+    if db_path and tracker.db_path is None:
+        tracker.db_path = db_path
+    return tracker
+
+
+def reset_usage_tracker() -> None:
+    """Flush and drop the process-wide tracker (used by tests)."""
+    global _tracker
+    with _tracker_lock:
+        if _tracker is not None:
+            _tracker.flush()
+        _tracker = None
@@ -29,7 +29,8 @@ import json
 import logging
 from ai_whisperer.tools.base_tool import AITool
 from ..extensions.agents.task_decomposer import TaskDecomposer
-from ..extensions.agents.agent_e_exceptions import DependencyCycleError
+from ..extensions.agents.agent_e_exceptions import DependencyCycleError, TaskDecompositionError
+from ..extensions.agents.plan_executor import COMPLEXITY_WEIGHTS, critical_path
 
 logger = logging.getLogger(__name__)
 
@@ -81,6 +82,7 @@ A JSON object containing:
 - max_parallel_tasks: Maximum tasks that can run in parallel
 - execution_order: Ordered list of task IDs
 - phases: Detailed breakdown of tasks by phase
+- critical_path: Longest chain of dependent tasks (weighted by estimated_complexity if given)
 - recommendations: Suggestions for optimization
 """
     
@@ -166,6 +168,16 @@ A JSON object containing:
                 "execution_order": execution_order,
                 "phases": []
             }
+
+            # The chain that bounds how fast the plan can finish, however many agents run it
+            weights = {
+                task_id: COMPLEXITY_WEIGHTS.get(task.get("estimated_complexity"), 1.0)
+                for task_id, task in task_map.items()
+            }
+            try:
+                analysis["critical_path"] = critical_path(dependency_graph, weights)
+            except TaskDecompositionError:
+                analysis["critical_path"] = []
             
             # Format phases for output
             for i, phase_tasks in enumerate(phases):
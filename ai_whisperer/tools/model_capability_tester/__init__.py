@@ -11,6 +11,12 @@ Usage:
 See README.md for detailed documentation.
 """
 
-from .test_models import ModelCapabilityTester, main
+from .test_models import (
+    CapabilityResultCache,
+    ModelCapabilityTester,
+    ModelRateLimiter,
+    SUITE_VERSION,
+    main,
+)
 
-__all__ = ['ModelCapabilityTester', 'main']
\ No newline at end of file
+__all__ = ['CapabilityResultCache', 'ModelCapabilityTester', 'ModelRateLimiter', 'SUITE_VERSION', 'main']
\ No newline at end of file
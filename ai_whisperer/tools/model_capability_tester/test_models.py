@@ -5,23 +5,35 @@ Model Capability Tester for OpenRouter Models
 This script tests various model capabilities and quirks by running actual tests
 against the OpenRouter API. It outputs a JSON file with detected capabilities.
 
+Models are tested concurrently by a bounded worker pool, with a minimum
+interval between requests to the same model. Results are cached per
+(model, SUITE_VERSION), so already characterized models are not re-tested
+until the test suite changes. The capability file written at the end is
+loaded by ``ai_whisperer.model_capabilities`` at startup.
+
 Usage:
     python test_model_capabilities.py                    # Test top models from rankings
     python test_model_capabilities.py --model MODEL_ID  # Test specific model
     python test_model_capabilities.py --all             # Test ALL models (warning: expensive!)
     python test_model_capabilities.py --list            # List available models
+    python test_model_capabilities.py --refresh         # Ignore cached results
 """
 
 import os
 import json
 import argparse
 import requests
+import threading
 import time
 import sys
-from typing import Dict, Any, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from datetime import datetime
 from dotenv import load_dotenv
 
+from ai_whisperer.services.ai.model_registry import DEFAULT_TESTED_CAPABILITIES_PATH
+
 # Load environment variables
 load_dotenv()
 
@@ -30,6 +42,16 @@ API_URL = "https://openrouter.ai/api/v1/chat/completions"
 MODELS_API_URL = "https://openrouter.ai/api/v1/models"
 API_KEY = os.getenv('OPENROUTER_API_KEY')
 
+# Bump whenever a test is added or changed so cached results are re-tested
+SUITE_VERSION = "1"
+
+# Default cache of per-model results
+DEFAULT_RESULTS_CACHE_PATH = Path.home() / ".aiwhisperer" / "cache" / "capability_test_results.json"
+
+# Concurrency and rate limiting defaults
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_MIN_REQUEST_INTERVAL = 1.0  # seconds between requests to the same model
+
 # Top models from OpenRouter rankings (as of 2024)
 # These are commonly used models that we should test by default
 TOP_MODELS = [
@@ -53,8 +75,121 @@ TOP_MODELS = [
     "mistralai/mistral-7b-instruct",
 ]
 
+class ModelRateLimiter:
+    """Enforces a minimum interval between requests to the same model."""
+    
+    def __init__(
+        self,
+        min_interval: float = DEFAULT_MIN_REQUEST_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Args:
+            min_interval: Minimum seconds between requests to the same model
+            clock: Monotonic time source
+            sleep: Called with the seconds to wait before a request
+        """
+        self.min_interval = min_interval
+        self.clock = clock
+        self.sleep = sleep
+        self._next_allowed: Dict[str, float] = {}
+        self._lock = threading.Lock()
+    
+    def wait(self, model_id: str) -> float:
+        """Block until a request to model_id is allowed; returns the time slept"""
+        with self._lock:
+            now = self.clock()
+            start = max(now, self._next_allowed.get(model_id, now))
+            self._next_allowed[model_id] = start + self.min_interval
+        delay = start - now
+        if delay > 0:
+            self.sleep(delay)
+        return delay
+
+
+class CapabilityResultCache:
+    """
+    Per-model test results keyed by test-suite version.
+    
+    Only complete runs are cached; models that failed the basic test
+    (usually a transient network or provider error) are re-tested.
+    """
+    
+    def __init__(
+        self,
+        path: Optional[Path] = DEFAULT_RESULTS_CACHE_PATH,
+        suite_version: str = SUITE_VERSION,
+        refresh: bool = False,
+    ):
+        """
+        Args:
+            path: JSON file holding cached results; None keeps them in memory
+            suite_version: Results from other suite versions are ignored
+            refresh: Ignore existing results (new results are still stored)
+        """
+        self.path = Path(path) if path else None
+        self.suite_version = suite_version
+        self.refresh = refresh
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._load()
+    
+    def _load(self):
+        if not self.path or not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f).get("results", {})
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"Ignoring unreadable results cache {self.path}: {e}")
+            self._entries = {}
+    
+    def get(self, model_id: str) -> Optional[Dict[str, Any]]:
+        """Get the cached result for model_id if it was produced by this suite version"""
+        if self.refresh:
+            return None
+        with self._lock:
+            entry = self._entries.get(model_id)
+        if entry and entry.get("suite_version") == self.suite_version:
+            return entry.get("result")
+        return None
+    
+    def put(self, model_id: str, result: Dict[str, Any]):
+        """Cache a result and persist the cache"""
+        if "error" in result or not result.get("test_results", {}).get("basic", {}).get("success"):
+            return
+        with self._lock:
+            self._entries[model_id] = {"suite_version": self.suite_version, "result": result}
+            self._save()
+    
+    def _save(self):
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix('.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({"results": self._entries}, f, indent=2)
+        temp_path.replace(self.path)
+
+
 class ModelCapabilityTester:
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        min_request_interval: float = DEFAULT_MIN_REQUEST_INTERVAL,
+        cache: Optional[CapabilityResultCache] = None,
+    ):
+        """
+        Args:
+            api_key: OpenRouter API key
+            base_url: API base URL (e.g. a local mock endpoint); defaults to OpenRouter
+            max_workers: Number of models tested concurrently
+            min_request_interval: Minimum seconds between requests to the same model
+            cache: Result cache; None disables caching
+        """
         self.api_key = api_key
         self.headers = {
             "Authorization": f"Bearer {api_key}",
@@ -62,12 +197,28 @@ class ModelCapabilityTester:
             "HTTP-Referer": "http://AIWhisperer:8000",
             "X-Title": "AIWhisperer Model Tester"
         }
+        if base_url:
+            base_url = base_url.rstrip("/")
+            self.api_url = f"{base_url}/chat/completions"
+            self.models_api_url = f"{base_url}/models"
+        else:
+            self.api_url = API_URL
+            self.models_api_url = MODELS_API_URL
+        self.max_workers = max(1, max_workers)
+        self.rate_limiter = ModelRateLimiter(min_request_interval)
+        self.cache = cache
         self.results = {}
+        self._print_lock = threading.Lock()
+    
+    def _log(self, model_id: str, message: str):
+        """Print a progress line tagged with the model id (safe across workers)"""
+        with self._print_lock:
+            print(f"[{model_id}] {message}")
         
     def get_available_models(self) -> List[Dict[str, Any]]:
         """Fetch list of available models from OpenRouter"""
         try:
-            response = requests.get(MODELS_API_URL, headers=self.headers, timeout=30)
+            response = requests.get(self.models_api_url, headers=self.headers, timeout=30)
             response.raise_for_status()
             data = response.json()
             return data.get("data", [])
@@ -77,13 +228,12 @@ class ModelCapabilityTester:
     
     def test_model(self, model_id: str) -> Dict[str, Any]:
         """Run comprehensive tests on a single model"""
-        print(f"\n{'='*60}")
-        print(f"Testing model: {model_id}")
-        print(f"{'='*60}")
+        self._log(model_id, "Testing model")
         
         capabilities = {
             "model_id": model_id,
             "tested_at": datetime.now().isoformat(),
+            "suite_version": SUITE_VERSION,
             "multi_tool": False,
             "parallel_tools": False,
             "max_tools_per_turn": 0,
@@ -93,85 +243,86 @@ class ModelCapabilityTester:
         }
         
         # Test 1: Basic functionality
-        print("Test 1: Basic functionality...")
+        self._log(model_id, "Test 1: Basic functionality...")
         basic_result = self._test_basic_functionality(model_id)
         capabilities["test_results"]["basic"] = basic_result
         if not basic_result["success"]:
-            print(f"  ❌ Model failed basic test: {basic_result.get('error', 'Unknown error')}")
+            self._log(model_id, f"❌ Model failed basic test: {basic_result.get('error', 'Unknown error')}")
             return capabilities
-        print("  ✅ Basic functionality works")
+        self._log(model_id, "✅ Basic functionality works")
         
         # Test 2: Single tool calling
-        print("Test 2: Single tool calling...")
+        self._log(model_id, "Test 2: Single tool calling...")
         single_tool_result = self._test_single_tool(model_id)
         capabilities["test_results"]["single_tool"] = single_tool_result
         if single_tool_result["success"]:
             capabilities["max_tools_per_turn"] = 1
-            print("  ✅ Single tool calling works")
+            self._log(model_id, "✅ Single tool calling works")
         else:
-            print(f"  ❌ Single tool calling failed: {single_tool_result.get('error', 'Unknown error')}")
+            self._log(model_id, f"❌ Single tool calling failed: {single_tool_result.get('error', 'Unknown error')}")
         
         # Test 3: Multiple tool calling
         if single_tool_result["success"]:
-            print("Test 3: Multiple tool calling...")
+            self._log(model_id, "Test 3: Multiple tool calling...")
             multi_tool_result = self._test_multi_tool(model_id)
             capabilities["test_results"]["multi_tool"] = multi_tool_result
             if multi_tool_result["success"]:
                 capabilities["multi_tool"] = True
                 capabilities["parallel_tools"] = True
                 capabilities["max_tools_per_turn"] = multi_tool_result.get("tools_called", 2)
-                print(f"  ✅ Multiple tool calling works ({capabilities['max_tools_per_turn']} tools)")
+                self._log(model_id, f"✅ Multiple tool calling works ({capabilities['max_tools_per_turn']} tools)")
             else:
-                print("  ❌ Multiple tool calling not supported")
+                self._log(model_id, "❌ Multiple tool calling not supported")
         
         # Test 4: Structured output (JSON)
-        print("Test 4: Structured output...")
+        self._log(model_id, "Test 4: Structured output...")
         structured_result = self._test_structured_output(model_id)
         capabilities["test_results"]["structured_output"] = structured_result
         if structured_result["success"]:
             capabilities["structured_output"] = True
-            print("  ✅ Structured output works")
+            self._log(model_id, "✅ Structured output works")
         else:
-            print(f"  ❌ Structured output failed: {structured_result.get('error', 'Unknown error')}")
+            self._log(model_id, f"❌ Structured output failed: {structured_result.get('error', 'Unknown error')}")
         
         # Test 5: Tools with structured output (quirk test)
         if single_tool_result["success"] and structured_result["success"]:
-            print("Test 5: Tools + Structured output (quirk test)...")
+            self._log(model_id, "Test 5: Tools + Structured output (quirk test)...")
             quirk_result = self._test_tools_with_structured_output(model_id)
             capabilities["test_results"]["tools_with_structured"] = quirk_result
             if not quirk_result["success"]:
                 capabilities["quirks"]["no_tools_with_structured_output"] = True
-                print(f"  ⚠️  Quirk detected: {quirk_result.get('error', 'Cannot use tools with structured output')}")
+                self._log(model_id, f"⚠️  Quirk detected: {quirk_result.get('error', 'Cannot use tools with structured output')}")
             else:
-                print("  ✅ Tools work with structured output")
+                self._log(model_id, "✅ Tools work with structured output")
         
         # Test 6: Structured output hidden quirk (for Anthropic models)
         if "anthropic/claude" in model_id and not structured_result["success"]:
-            print("Test 6: Checking for hidden structured output support...")
+            self._log(model_id, "Test 6: Checking for hidden structured output support...")
             hidden_structured_result = self._test_hidden_structured_output(model_id)
             capabilities["test_results"]["hidden_structured_output"] = hidden_structured_result
             if hidden_structured_result["success"]:
                 capabilities["structured_output"] = True
                 capabilities["quirks"]["structured_output_hidden"] = True
-                print("  ⚠️  Quirk detected: Model supports structured output but reports it doesn't")
+                self._log(model_id, "⚠️  Quirk detected: Model supports structured output but reports it doesn't")
             else:
-                print("  ❌ No hidden structured output support")
+                self._log(model_id, "❌ No hidden structured output support")
         
         # Test 7: Reasoning tokens (for models that support it)
         if "thinking" in model_id or "reasoning" in model_id:
-            print("Test 7: Reasoning tokens...")
+            self._log(model_id, "Test 7: Reasoning tokens...")
             reasoning_result = self._test_reasoning_tokens(model_id)
             capabilities["test_results"]["reasoning"] = reasoning_result
             if reasoning_result["success"]:
                 capabilities["supports_reasoning"] = True
-                print("  ✅ Reasoning tokens supported")
+                self._log(model_id, "✅ Reasoning tokens supported")
         
         return capabilities
     
     def _make_request(self, payload: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]]:
         """Make a request to OpenRouter API and return success status and response"""
+        self.rate_limiter.wait(payload.get("model", ""))
         try:
-            response = requests.post(API_URL, headers=self.headers, json=payload, timeout=30)
+            response = requests.post(self.api_url, headers=self.headers, json=payload, timeout=30)
             
             if response.status_code == 200:
                 data = response.json()
@@ -463,46 +614,65 @@ class ModelCapabilityTester:
         else:
             return {"success": False, "error": response.get("error", "Unknown error")}
     
-    def test_models(self, model_ids: List[str]) -> Dict[str, Any]:
-        """Test multiple models and compile results"""
-        all_results = {}
+    def _test_model_cached(self, model_id: str) -> Dict[str, Any]:
+        """Test a model unless this suite version already characterized it"""
+        if self.cache:
+            cached = self.cache.get(model_id)
+            if cached is not None:
+                self._log(model_id, "Using cached result")
+                return cached
         
-        for i, model_id in enumerate(model_ids, 1):
-            print(f"\n[{i}/{len(model_ids)}] Testing {model_id}")
-            
-            # Rate limiting - be nice to the API
-            if i > 1:
-                time.sleep(2)  # 2 second delay between models
-            
-            try:
-                result = self.test_model(model_id)
+        try:
+            result = self.test_model(model_id)
+        except Exception as e:
+            self._log(model_id, f"❌ Error testing: {e}")
+            return {
+                "model_id": model_id,
+                "error": str(e),
+                "tested_at": datetime.now().isoformat()
+            }
+        
+        if self.cache:
+            self.cache.put(model_id, result)
+        return result
+    
+    def test_models(self, model_ids: List[str], partial_filename: Optional[str] = "model_capabilities_partial.json") -> Dict[str, Any]:
+        """Test multiple models concurrently and compile results (in input order)"""
+        model_ids = list(dict.fromkeys(model_ids))
+        all_results: Dict[str, Any] = {}
+        results_lock = threading.Lock()
+        
+        def run(model_id: str):
+            result = self._test_model_cached(model_id)
+            with results_lock:
                 all_results[model_id] = result
-                
+                done = len(all_results)
                 # Save intermediate results in case of crash
-                self._save_results(all_results, "model_capabilities_partial.json")
-                
-            except Exception as e:
-                print(f"  ❌ Error testing {model_id}: {e}")
-                all_results[model_id] = {
-                    "model_id": model_id,
-                    "error": str(e),
-                    "tested_at": datetime.now().isoformat()
-                }
+                if partial_filename:
+                    self._save_results(all_results, partial_filename, quiet=True)
+            self._log(model_id, f"Done ({done}/{len(model_ids)})")
+        
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, max(1, len(model_ids)))) as pool:
+            list(pool.map(run, model_ids))
         
-        return all_results
+        return {model_id: all_results[model_id] for model_id in model_ids}
     
-    def _save_results(self, results: Dict[str, Any], filename: str):
+    def _save_results(self, results: Dict[str, Any], filename: str, quiet: bool = False):
         """Save results to JSON file"""
         output = {
             "generated_at": datetime.now().isoformat(),
             "generator": "AIWhisperer Model Capability Tester",
+            "suite_version": SUITE_VERSION,
             "models": results
         }
         
-        with open(filename, 'w') as f:
+        temp_filename = f"{filename}.tmp"
+        with open(temp_filename, 'w') as f:
             json.dump(output, f, indent=2)
+        os.replace(temp_filename, filename)
         
-        print(f"\nResults saved to: {filename}")
+        if not quiet:
+            print(f"\nResults saved to: {filename}")
     
     def generate_capability_dict(self, results: Dict[str, Any]) -> Dict[str, Any]:
         """Generate a model_capabilities.py compatible dictionary from test results"""
@@ -523,6 +693,31 @@ class ModelCapabilityTester:
             capabilities[model_id] = cap
         
         return capabilities
+    
+    def write_capability_file(self, results: Dict[str, Any], path: Path) -> Dict[str, Any]:
+        """
+        Write the capability file loaded by model_capabilities at startup.
+        
+        Models already in the file but not in results are kept, so testing a
+        single model does not drop earlier discoveries.
+        """
+        from ai_whisperer.services.ai.model_registry import load_tested_capabilities
+        
+        path = Path(path)
+        capabilities = load_tested_capabilities(path)
+        capabilities.update(self.generate_capability_dict(results))
+        cap_output = {
+            "generated_at": datetime.now().isoformat(),
+            "suite_version": SUITE_VERSION,
+            "model_capabilities": dict(sorted(capabilities.items()))
+        }
+        
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix('.tmp')
+        with open(temp_path, 'w') as f:
+            json.dump(cap_output, f, indent=2)
+        temp_path.replace(path)
+        return cap_output
 
 
 def main():
@@ -531,15 +726,30 @@ def main():
     parser.add_argument("--all", action="store_true", help="Test ALL available models (expensive!)")
     parser.add_argument("--list", action="store_true", help="List available models")
     parser.add_argument("--output", default="model_capabilities_tested.json", help="Output filename")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS, help="Models tested concurrently")
+    parser.add_argument("--min-interval", type=float, default=DEFAULT_MIN_REQUEST_INTERVAL,
+                        help="Minimum seconds between requests to the same model")
+    parser.add_argument("--refresh", action="store_true", help="Re-test models even if cached results exist")
+    parser.add_argument("--cache-file", default=str(DEFAULT_RESULTS_CACHE_PATH), help="Per-model results cache")
+    parser.add_argument("--capabilities-file", default=str(DEFAULT_TESTED_CAPABILITIES_PATH),
+                        help="Capability file loaded by model_capabilities at startup")
+    parser.add_argument("--base-url", help="API base URL (e.g. a local mock endpoint)")
     
     args = parser.parse_args()
     
-    if not API_KEY:
+    if not API_KEY and not args.base_url:
         print("Error: OPENROUTER_API_KEY not found in environment")
         print("Please set your OpenRouter API key in .env file or environment")
         sys.exit(1)
     
-    tester = ModelCapabilityTester(API_KEY)
+    cache = CapabilityResultCache(args.cache_file, refresh=args.refresh)
+    tester = ModelCapabilityTester(
+        API_KEY or "",
+        base_url=args.base_url,
+        max_workers=args.workers,
+        min_request_interval=args.min_interval,
+        cache=cache
+    )
     
     if args.list:
         print("Fetching available models...")
@@ -584,6 +794,7 @@ def main():
     cap_dict = tester.generate_capability_dict(results)
     cap_output = {
         "generated_at": datetime.now().isoformat(),
+        "suite_version": SUITE_VERSION,
         "model_capabilities": cap_dict
     }
     
@@ -593,6 +804,10 @@ def main():
     
     print(f"Capability dictionary saved to: {cap_filename}")
     
+    # Update the capability file loaded at startup
+    tester.write_capability_file(results, Path(args.capabilities_file))
+    print(f"Startup capability file updated: {args.capabilities_file}")
+    
     # Print summary
     print("\n" + "="*60)
     print("SUMMARY")
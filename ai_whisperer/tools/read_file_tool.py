@@ -5,6 +5,7 @@ from pathlib import Path
 from typing import Dict, Any, List, Optional
 
 from ai_whisperer.tools.base_tool import AITool
+from ai_whisperer.utils.file_cache import get_file_cache
 from ai_whisperer.utils.path import PathManager
 from ai_whisperer.core.exceptions import FileRestrictionError
 
@@ -130,13 +131,9 @@ class ReadFileTool(AITool):
                     "lines": []
                 }
             
-            # Read the file
-            with open(abs_file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-
-            # Get file info
-            stat = abs_file_path.stat()
-            total_lines = len(lines)
+            # Read the file (shared cache, revalidated against the file's mtime and size)
+            cached = get_file_cache().get(abs_file_path)
+            total_lines = cached.line_count
             
             # Adjust for 0-based indexing
             start_index = start_line - 1 if start_line is not None and start_line > 0 else 0
@@ -148,11 +145,11 @@ class ReadFileTool(AITool):
 
             # Get the requested lines
             if start_line is not None or end_line is not None:
-                content_lines = lines[start_index:end_index]
+                content_lines = cached.lines(start_index + 1, end_index)
                 actual_start = start_index + 1
                 actual_end = end_index
             else:
-                content_lines = lines
+                content_lines = cached.lines()
                 actual_start = 1
                 actual_end = total_lines
 
@@ -166,13 +163,13 @@ class ReadFileTool(AITool):
                 })
 
             # Also provide raw content for convenience
-            raw_content = ''.join(content_lines)
+            raw_content = cached.slice(start_index + 1, end_index) if content_lines else ''
 
             return {
                 "path": file_path_str,
                 "absolute_path": str(abs_file_path),
                 "exists": True,
-                "size": stat.st_size,
+                "size": cached.size,
                 "total_lines": total_lines,
                 "range": {
                     "start": actual_start,
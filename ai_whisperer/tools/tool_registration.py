@@ -4,6 +4,8 @@ Purpose: Utility functions for tool registration
 
 Centralized tool registration for AIWhisperer.
 This module handles registering all available tools with the tool registry.
+Tools are registered lazily: each tool's module is imported when the tool
+is first used, so registering them does not slow down startup.
 
 Key Components:
 - register_all_tools(): 
@@ -76,195 +78,123 @@ def register_all_tools(path_manager: Optional[PathManager] = None) -> None:
     # Register Agent E task decomposition tools
     _register_agent_e_tools(tool_registry)
     
-    logger.info(f"Registered {len(tool_registry.get_all_tools())} tools")
+    logger.info(f"Registered {tool_registry.get_registered_tool_count()} tools")
+
+
+def _register_lazy(tool_registry, module_name: str, class_name: str, *args) -> None:
+    """Register a tool from this package by module; it is imported when first used."""
+    tool_registry.register_lazy_tool(
+        module_name[:-len("_tool")], f"{__package__}.{module_name}", class_name, *args
+    )
 
 
 def _register_file_tools(tool_registry) -> None:
     """Register basic file operation tools."""
-    from .read_file_tool import ReadFileTool
-    from .write_file_tool import WriteFileTool
-    from .execute_command_tool import ExecuteCommandTool
-    from .list_directory_tool import ListDirectoryTool
-    from .search_files_tool import SearchFilesTool
-    from .get_file_content_tool import GetFileContentTool
-    
-    tool_registry.register_tool(ReadFileTool())
-    tool_registry.register_tool(WriteFileTool())
-    tool_registry.register_tool(ExecuteCommandTool())
-    tool_registry.register_tool(ListDirectoryTool())
-    tool_registry.register_tool(SearchFilesTool())
-    tool_registry.register_tool(GetFileContentTool())
+    _register_lazy(tool_registry, "read_file_tool", "ReadFileTool")
+    _register_lazy(tool_registry, "write_file_tool", "WriteFileTool")
+    _register_lazy(tool_registry, "execute_command_tool", "ExecuteCommandTool")
+    _register_lazy(tool_registry, "list_directory_tool", "ListDirectoryTool")
+    _register_lazy(tool_registry, "search_files_tool", "SearchFilesTool")
+    _register_lazy(tool_registry, "get_file_content_tool", "GetFileContentTool")
     
     logger.debug("Registered file operation tools")
 
 
 def _register_analysis_tools(tool_registry, path_manager: PathManager) -> None:
     """Register advanced analysis tools."""
-    from .find_pattern_tool import FindPatternTool
-    from .workspace_stats_tool import WorkspaceStatsTool
-    
-    tool_registry.register_tool(FindPatternTool(path_manager))
-    tool_registry.register_tool(WorkspaceStatsTool(path_manager))
+    _register_lazy(tool_registry, "find_pattern_tool", "FindPatternTool", path_manager)
+    _register_lazy(tool_registry, "workspace_stats_tool", "WorkspaceStatsTool", path_manager)
     
     logger.debug("Registered analysis tools")
 
 
 def _register_rfc_tools(tool_registry) -> None:
     """Register RFC management tools."""
-    from .create_rfc_tool import CreateRFCTool
-    from .read_rfc_tool import ReadRFCTool
-    from .list_rfcs_tool import ListRFCsTool
-    from .update_rfc_tool import UpdateRFCTool
-    from .move_rfc_tool import MoveRFCTool
-    from .delete_rfc_tool import DeleteRFCTool
-    
-    tool_registry.register_tool(CreateRFCTool())
-    tool_registry.register_tool(ReadRFCTool())
-    tool_registry.register_tool(ListRFCsTool())
-    tool_registry.register_tool(UpdateRFCTool())
-    tool_registry.register_tool(MoveRFCTool())
-    tool_registry.register_tool(DeleteRFCTool())
+    _register_lazy(tool_registry, "create_rfc_tool", "CreateRFCTool")
+    _register_lazy(tool_registry, "read_rfc_tool", "ReadRFCTool")
+    _register_lazy(tool_registry, "list_rfcs_tool", "ListRFCsTool")
+    _register_lazy(tool_registry, "update_rfc_tool", "UpdateRFCTool")
+    _register_lazy(tool_registry, "move_rfc_tool", "MoveRFCTool")
+    _register_lazy(tool_registry, "delete_rfc_tool", "DeleteRFCTool")
     
     logger.debug("Registered RFC tools")
 
 
 def _register_plan_tools(tool_registry) -> None:
     """Register plan management tools."""
-    from .prepare_plan_from_rfc_tool import PreparePlanFromRFCTool
-    from .save_generated_plan_tool import SaveGeneratedPlanTool
-    from .list_plans_tool import ListPlansTool
-    from .read_plan_tool import ReadPlanTool
-    from .update_plan_from_rfc_tool import UpdatePlanFromRFCTool
-    from .move_plan_tool import MovePlanTool
-    from .delete_plan_tool import DeletePlanTool
-    
-    tool_registry.register_tool(PreparePlanFromRFCTool())
-    tool_registry.register_tool(SaveGeneratedPlanTool())
-    tool_registry.register_tool(ListPlansTool())
-    tool_registry.register_tool(ReadPlanTool())
-    tool_registry.register_tool(UpdatePlanFromRFCTool())
-    tool_registry.register_tool(MovePlanTool())
-    tool_registry.register_tool(DeletePlanTool())
+    _register_lazy(tool_registry, "prepare_plan_from_rfc_tool", "PreparePlanFromRFCTool")
+    _register_lazy(tool_registry, "save_generated_plan_tool", "SaveGeneratedPlanTool")
+    _register_lazy(tool_registry, "list_plans_tool", "ListPlansTool")
+    _register_lazy(tool_registry, "read_plan_tool", "ReadPlanTool")
+    _register_lazy(tool_registry, "update_plan_from_rfc_tool", "UpdatePlanFromRFCTool")
+    _register_lazy(tool_registry, "move_plan_tool", "MovePlanTool")
+    _register_lazy(tool_registry, "delete_plan_tool", "DeletePlanTool")
     
     logger.debug("Registered plan tools")
 
 
 def _register_codebase_tools(tool_registry) -> None:
     """Register codebase analysis tools."""
-    from .analyze_languages_tool import AnalyzeLanguagesTool
-    from .find_similar_code_tool import FindSimilarCodeTool
-    from .get_project_structure_tool import GetProjectStructureTool
-    
-    tool_registry.register_tool(AnalyzeLanguagesTool())
-    tool_registry.register_tool(FindSimilarCodeTool())
-    tool_registry.register_tool(GetProjectStructureTool())
+    _register_lazy(tool_registry, "analyze_languages_tool", "AnalyzeLanguagesTool")
+    _register_lazy(tool_registry, "find_similar_code_tool", "FindSimilarCodeTool")
+    _register_lazy(tool_registry, "get_project_structure_tool", "GetProjectStructureTool")
     
     logger.debug("Registered codebase tools")
 
 
 def _register_web_tools(tool_registry) -> None:
     """Register web research tools."""
-    from .web_search_tool import WebSearchTool
-    from .fetch_url_tool import FetchURLTool
-    
-    tool_registry.register_tool(WebSearchTool())
-    tool_registry.register_tool(FetchURLTool())
+    _register_lazy(tool_registry, "web_search_tool", "WebSearchTool")
+    _register_lazy(tool_registry, "fetch_url_tool", "FetchURLTool")
     
     logger.debug("Registered web tools")
 
 
 def _register_debugging_tools(tool_registry) -> None:
     """Register Debbie's debugging and monitoring tools."""
-    try:
-        from .session_health_tool import SessionHealthTool
-        from .session_analysis_tool import SessionAnalysisTool
-        from .monitoring_control_tool import MonitoringControlTool
-        from .session_inspector_tool import SessionInspectorTool
-        from .message_injector_tool import MessageInjectorTool
-        from .workspace_validator_tool import WorkspaceValidatorTool
-        from .python_executor_tool import PythonExecutorTool
-        from .script_parser_tool import ScriptParserTool
-        from .conversation_command_tool import ConversationCommandTool
-        from .system_health_check_tool import SystemHealthCheckTool
-        
-        tool_registry.register_tool(SessionHealthTool())
-        tool_registry.register_tool(SessionAnalysisTool())
-        tool_registry.register_tool(MonitoringControlTool())
-        tool_registry.register_tool(SessionInspectorTool())
-        tool_registry.register_tool(MessageInjectorTool())
-        tool_registry.register_tool(WorkspaceValidatorTool())
-        tool_registry.register_tool(PythonExecutorTool())
-        tool_registry.register_tool(ScriptParserTool())
-        tool_registry.register_tool(ConversationCommandTool(tool_registry))
-        tool_registry.register_tool(SystemHealthCheckTool())
-        
-        logger.debug("Registered debugging tools")
-    except ImportError as e:
-        logger.warning(f"Some debugging tools not available: {e}")
-    except Exception as e:
-        logger.error(f"Failed to register debugging tools: {e}")
+    _register_lazy(tool_registry, "session_health_tool", "SessionHealthTool")
+    _register_lazy(tool_registry, "session_analysis_tool", "SessionAnalysisTool")
+    _register_lazy(tool_registry, "monitoring_control_tool", "MonitoringControlTool")
+    _register_lazy(tool_registry, "session_inspector_tool", "SessionInspectorTool")
+    _register_lazy(tool_registry, "message_injector_tool", "MessageInjectorTool")
+    _register_lazy(tool_registry, "workspace_validator_tool", "WorkspaceValidatorTool")
+    _register_lazy(tool_registry, "python_executor_tool", "PythonExecutorTool")
+    _register_lazy(tool_registry, "script_parser_tool", "ScriptParserTool")
+    _register_lazy(tool_registry, "conversation_command_tool", "ConversationCommandTool", tool_registry)
+    _register_lazy(tool_registry, "system_health_check_tool", "SystemHealthCheckTool")
+    
+    logger.debug("Registered debugging tools")
 
 
 def _register_mailbox_tools(tool_registry) -> None:
     """Register mailbox communication tools."""
-    try:
-        from .send_mail_tool import SendMailTool
-        from .check_mail_tool import CheckMailTool
-        from .reply_mail_tool import ReplyMailTool
-        from .send_mail_with_switch_tool import SendMailWithSwitchTool
-        
-        tool_registry.register_tool(SendMailTool())
-        tool_registry.register_tool(CheckMailTool())
-        tool_registry.register_tool(ReplyMailTool())
-        tool_registry.register_tool(SendMailWithSwitchTool())
-        
-        logger.debug("Registered mailbox tools")
-    except ImportError as e:
-        logger.warning(f"Mailbox tools not available: {e}")
-    except Exception as e:
-        logger.error(f"Failed to register mailbox tools: {e}")
+    _register_lazy(tool_registry, "send_mail_tool", "SendMailTool")
+    _register_lazy(tool_registry, "check_mail_tool", "CheckMailTool")
+    _register_lazy(tool_registry, "reply_mail_tool", "ReplyMailTool")
+    _register_lazy(tool_registry, "send_mail_with_switch_tool", "SendMailWithSwitchTool")
+    
+    logger.debug("Registered mailbox tools")
 
 
 def _register_async_agent_tools(tool_registry) -> None:
     """Register async agent sleep/wake tools."""
-    try:
-        from .agent_sleep_tool import AgentSleepTool
-        from .agent_wake_tool import AgentWakeTool
-        
-        tool_registry.register_tool(AgentSleepTool())
-        tool_registry.register_tool(AgentWakeTool())
-        
-        logger.debug("Registered async agent tools")
-    except ImportError as e:
-        logger.warning(f"Async agent tools not available: {e}")
-    except Exception as e:
-        logger.error(f"Failed to register async agent tools: {e}")
+    _register_lazy(tool_registry, "agent_sleep_tool", "AgentSleepTool")
+    _register_lazy(tool_registry, "agent_wake_tool", "AgentWakeTool")
+    
+    logger.debug("Registered async agent tools")
 
 
 def _register_agent_e_tools(tool_registry) -> None:
     """Register Agent E task decomposition tools."""
-    try:
-        from .decompose_plan_tool import DecomposePlanTool
-        from .analyze_dependencies_tool import AnalyzeDependenciesTool
-        from .format_for_external_agent_tool import FormatForExternalAgentTool
-        from .update_task_status_tool import UpdateTaskStatusTool
-        from .validate_external_agent_tool import ValidateExternalAgentTool
-        from .recommend_external_agent_tool import RecommendExternalAgentTool
-        from .parse_external_result_tool import ParseExternalResultTool
-        
-        tool_registry.register_tool(DecomposePlanTool())
-        tool_registry.register_tool(AnalyzeDependenciesTool())
-        tool_registry.register_tool(FormatForExternalAgentTool())
-        tool_registry.register_tool(UpdateTaskStatusTool())
-        tool_registry.register_tool(ValidateExternalAgentTool())
-        tool_registry.register_tool(RecommendExternalAgentTool())
-        tool_registry.register_tool(ParseExternalResultTool())
-        
-        logger.debug("Registered Agent E tools")
-    except ImportError as e:
-        logger.warning(f"Agent E tools not available: {e}")
-    except Exception as e:
-        logger.error(f"Failed to register Agent E tools: {e}")
+    _register_lazy(tool_registry, "decompose_plan_tool", "DecomposePlanTool")
+    _register_lazy(tool_registry, "analyze_dependencies_tool", "AnalyzeDependenciesTool")
+    _register_lazy(tool_registry, "format_for_external_agent_tool", "FormatForExternalAgentTool")
+    _register_lazy(tool_registry, "update_task_status_tool", "UpdateTaskStatusTool")
+    _register_lazy(tool_registry, "validate_external_agent_tool", "ValidateExternalAgentTool")
+    _register_lazy(tool_registry, "recommend_external_agent_tool", "RecommendExternalAgentTool")
+    _register_lazy(tool_registry, "parse_external_result_tool", "ParseExternalResultTool")
+    
+    logger.debug("Registered Agent E tools")
 
 
 def register_tool_category(category: str, path_manager: Optional[PathManager] = None) -> None:
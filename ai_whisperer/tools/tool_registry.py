@@ -31,6 +31,8 @@ class LazyToolRegistry:
         self._registered_tools: Dict[str, AITool] = {}
         self._tool_specs: Dict[str, Dict[str, Any]] = {}
         self._loaded_tools: Set[str] = set()
+        # Tools registered with register_lazy_tool that have not been imported yet (ordered)
+        self._deferred_tools: Dict[str, None] = {}
         self._tool_set_manager = ToolSetManager()
         self._path_manager = None
         self._initialized = True
@@ -390,26 +392,58 @@ class LazyToolRegistry:
             tool_class = getattr(module, spec["class"])
             
             # Create instance
-            tool = tool_class()
+            tool = tool_class(*spec.get("args", ()))
             
             # Register it
             self._registered_tools[tool_name] = tool
             self._loaded_tools.add(tool_name)
+            self._deferred_tools.pop(tool_name, None)
             
             logger.debug(f"Lazy loaded tool '{tool_name}' from {spec['module']}")
             return tool
             
         except Exception as e:
+            self._deferred_tools.pop(tool_name, None)
             logger.error(f"Failed to load tool '{tool_name}': {str(e)}")
             return None
     
+    def _load_deferred_tools(self) -> None:
+        """Import every tool registered with register_lazy_tool that is not loaded yet."""
+        for tool_name in list(self._deferred_tools):
+            self._load_tool(tool_name)
+    
     def register_tool(self, tool: AITool) -> None:
         """Register a tool instance."""
         tool_name = tool.name
         self._registered_tools[tool_name] = tool
         self._loaded_tools.add(tool_name)
+        self._deferred_tools.pop(tool_name, None)
         logger.debug(f"Registered tool: {tool_name}")
     
+    def register_lazy_tool(self, name: str, module: str, class_name: str, *args: Any,
+                           category: Optional[str] = None) -> None:
+        """
+        Register a tool without importing its module.
+        
+        The tool counts as registered, so get_all_tools() includes it, but
+        its module is only imported and the tool instantiated when it is first
+        used. Registering a tool that is already loaded keeps the loaded instance.
+        
+        Args:
+            name: Tool name (must match the tool's ``name`` property)
+            module: Module that defines the tool class
+            class_name: Tool class name
+            *args: Constructor arguments
+            category: Optional category, as in the built-in specs
+        """
+        if name in self._loaded_tools:
+            return
+        spec = {**self._tool_specs.get(name, {}), "module": module, "class": class_name, "args": args}
+        if category:
+            spec["category"] = category
+        self._tool_specs[name] = spec
+        self._deferred_tools[name] = None
+    
     def get_tool(self, name: str) -> Optional[AITool]:
         """Get a tool by name, loading it if necessary."""
         # First check if already loaded
@@ -430,8 +464,10 @@ class LazyToolRegistry:
     
     def get_all_tools(self) -> Dict[str, AITool]:
         """Get all registered tools."""
-        # In lazy mode, we don't load all tools unless explicitly needed
-        # Return only loaded tools
+        # In lazy mode, we don't load all tools unless explicitly needed:
+        # return the loaded tools plus those registered with register_lazy_tool
+        if self._deferred_tools:
+            self._load_deferred_tools()
         return self._registered_tools.copy()
     
     def get_all_tool_names(self) -> List[str]:
@@ -451,6 +487,8 @@ class LazyToolRegistry:
     
     def get_all_ai_prompt_instructions(self) -> str:
         """Get AI prompt instructions for all loaded tools."""
+        if self._deferred_tools:
+            self._load_deferred_tools()
         instructions = []
         for tool in self._registered_tools.values():
             instructions.append(tool.get_ai_prompt_instructions())
@@ -460,6 +498,8 @@ class LazyToolRegistry:
         """Search for tools by name or description."""
         query_lower = query.lower()
         matching_tools = []
+        if self._deferred_tools:
+            self._load_deferred_tools()
         
         # Search in loaded tools
         for name, tool in self._registered_tools.items():
@@ -478,6 +518,10 @@ class LazyToolRegistry:
         
         return matching_tools
     
+    def get_registered_tool_count(self) -> int:
+        """Get the number of registered tools, including those not imported yet."""
+        return len(self._registered_tools) + len(self._deferred_tools)
+    
     def get_loaded_tool_count(self) -> int:
         """Get the number of currently loaded tools."""
         return len(self._loaded_tools)
@@ -512,7 +556,10 @@ class LazyToolRegistry:
     
     def unregister_tool(self, tool_name: str):
         """Unregisters a tool by name."""
-        if tool_name in self._registered_tools:
+        if tool_name in self._deferred_tools:
+            del self._deferred_tools[tool_name]
+            logger.info(f"Tool '{tool_name}' unregistered successfully.")
+        elif tool_name in self._registered_tools:
             del self._registered_tools[tool_name]
             self._loaded_tools.discard(tool_name)
             logger.info(f"Tool '{tool_name}' unregistered successfully.")
@@ -523,6 +570,7 @@ class LazyToolRegistry:
         """Clears all registered tools."""
         self._registered_tools.clear()
         self._loaded_tools.clear()
+        self._deferred_tools.clear()
         logger.info("All registered tools have been cleared.")
     
     def get_tool_by_name(self, name: str) -> Optional[AITool]:
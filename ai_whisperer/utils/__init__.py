@@ -6,4 +6,8 @@ This package contains utility modules:
 - workspace: Workspace detection
 - validation: JSON/YAML validation
 - helpers: General helper functions
+- json_codec: Pluggable fast JSON serialization
+- state_journal: Snapshot + append-only journal persistence for JSON state
+- file_cache: Process-wide cache of decoded text files
+- write_behind: Coalescing background writer for frequently saved state files
 """
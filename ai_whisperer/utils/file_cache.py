@@ -0,0 +1,216 @@
+"""
+Process-wide cache of decoded text files.
+
+``@file`` references and the read_file tool read whole files on every
+mention or call, in every session, even when nothing has changed. This
+cache keeps the decoded text of recently read files, keyed by path and
+validated against the file's (mtime, size) on every lookup. Each entry
+also has a line-offset table, so ranged reads slice the cached text
+instead of splitting it again. Entries are evicted least recently used
+first once the total size exceeds ``max_bytes``.
+
+Text is decoded as UTF-8 with universal newlines, the same as
+``open(path, 'r', encoding='utf-8')``, so cached lines match ``readlines()``.
+
+AIWHISPERER_FILE_CACHE_MB sets the size cap; an empty value or 0 disables
+caching (files are still read through the same API).
+
+Key Components:
+- CachedFile: Decoded text, line offsets and the (mtime, size) stamp
+- FileContentCache: Bounded LRU cache with async and fan-out reads
+- get_file_cache / reset_file_cache: Process-wide instance
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from itertools import accumulate
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+FILE_CACHE_ENV = "AIWHISPERER_FILE_CACHE_MB"
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+PathLike = Union[str, Path]
+
+
+@dataclass(frozen=True)
+class CachedFile:
+    """A decoded text file and the start offset of each of its lines."""
+    path: str
+    mtime_ns: int
+    mtime: float  # st_mtime, for comparisons with os.stat() elsewhere
+    size: int
+    text: str
+    offsets: array  # Start of each line, followed by len(text)
+
+    @property
+    def line_count(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def cost(self) -> int:
+        """Approximate memory held by this entry, in bytes."""
+        return self.size + self.offsets.itemsize * len(self.offsets)
+
+    def _bounds(self, start_line: int, end_line: Optional[int]) -> Tuple[int, int]:
+        start = min(max(start_line, 1), self.line_count + 1) - 1
+        end = self.line_count if end_line is None else min(max(end_line, start), self.line_count)
+        return start, end
+
+    def slice(self, start_line: int = 1, end_line: Optional[int] = None) -> str:
+        """Text of lines ``start_line`` to ``end_line`` (1-based, inclusive, clamped)."""
+        start, end = self._bounds(start_line, end_line)
+        return self.text[self.offsets[start]:self.offsets[end]]
+
+    def lines(self, start_line: int = 1, end_line: Optional[int] = None) -> List[str]:
+        """Lines ``start_line`` to ``end_line`` with their line endings, like ``readlines()``."""
+        start, end = self._bounds(start_line, end_line)
+        text, offsets = self.text, self.offsets
+        return [text[offsets[i]:offsets[i + 1]] for i in range(start, end)]
+
+
+def _line_offsets(text: str) -> array:
+    parts = text.split("\n")
+    offsets = array("q", [0])
+    offsets.extend(accumulate(len(part) + 1 for part in parts[:-1]))
+    if parts[-1]:
+        offsets.append(len(text))  # Last line has no trailing newline
+    return offsets
+
+
+def _decode(data: bytes) -> str:
+    text = data.decode("utf-8")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+class FileContentCache:
+    """
+    Bounded LRU cache of decoded text files, shared across sessions.
+
+    Args:
+        max_bytes: Total size of cached files before the least recently
+            used are evicted; 0 disables caching
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CachedFile]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, path: PathLike) -> CachedFile:
+        """
+        Read a text file through the cache.
+
+        Raises:
+            FileNotFoundError, PermissionError, IsADirectoryError: As open() would
+            UnicodeDecodeError: The file is not valid UTF-8
+        """
+        key = os.fspath(path)
+        stat = os.stat(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry
+
+        with open(key, "rb") as f:
+            data = f.read()
+        text = _decode(data)
+        # Stamp with the stat taken before reading: a write during the read makes the entry stale, not wrong
+        entry = CachedFile(key, stat.st_mtime_ns, stat.st_mtime, len(data), text, _line_offsets(text))
+        with self._lock:
+            self.stats["misses"] += 1
+            self._store(key, entry)
+        return entry
+
+    def _store(self, key: str, entry: CachedFile) -> None:
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old.cost
+        if entry.cost > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self._bytes += entry.cost
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.cost
+            self.stats["evictions"] += 1
+
+    async def aget(self, path: PathLike) -> CachedFile:
+        """Read a file through the cache without blocking the event loop on a miss."""
+        key = os.fspath(path)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            # Hits only cost a stat; skip the thread hop when the stamp still matches
+            stat = os.stat(key)
+            if entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                with self._lock:
+                    if key in self._entries:
+                        self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                return entry
+        return await asyncio.to_thread(self.get, key)
+
+    async def aget_many(self, paths: Sequence[PathLike]) -> List[Union[CachedFile, BaseException]]:
+        """Read several files concurrently; failures are returned in place of their entry."""
+        return await asyncio.gather(*(self.aget(path) for path in paths), return_exceptions=True)
+
+    def invalidate(self, path: Optional[PathLike] = None) -> None:
+        """Drop one file, or every file when ``path`` is None."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            entry = self._entries.pop(os.fspath(path), None)
+            if entry is not None:
+                self._bytes -= entry.cost
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.stats, "files": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+
+def _max_bytes_from_env() -> int:
+    value = os.environ.get(FILE_CACHE_ENV)
+    if value is None:
+        return DEFAULT_MAX_BYTES
+    try:
+        return max(0, int(float(value or 0) * 1024 * 1024))
+    except ValueError:
+        logger.warning(f"Ignoring invalid {FILE_CACHE_ENV}={value!r}")
+        return DEFAULT_MAX_BYTES
+
+
+_file_cache: Optional[FileContentCache] = None
+_file_cache_lock = threading.Lock()
+
+
+def get_file_cache() -> FileContentCache:
+    """Get the process-wide file cache (sized by AIWHISPERER_FILE_CACHE_MB)."""
+    global _file_cache
+    if _file_cache is None:
+        with _file_cache_lock:
+            if _file_cache is None:
+                _file_cache = FileContentCache(_max_bytes_from_env())
+    return _file_cache
+
+
+def reset_file_cache() -> None:
+    """Drop the process-wide file cache (for testing)."""
+    global _file_cache
+    _file_cache = None
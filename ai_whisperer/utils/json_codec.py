@@ -0,0 +1,218 @@
+"""
+Pluggable JSON codec for hot paths.
+
+WebSocket frames, tool results, session saves and agent state all go
+through this module instead of calling ``json`` directly. The fastest
+installed backend is used: ``orjson``, then ``msgspec``, then the stdlib.
+All backends produce compact output with non-ASCII text left as UTF-8,
+and anything a fast backend cannot encode (e.g. integers beyond 64 bits)
+falls back to the stdlib, so callers see the same behaviour whichever
+backend is active. Decode errors are always ``json.JSONDecodeError``.
+
+Set ``AIWHISPERER_JSON_BACKEND`` to ``stdlib``, ``orjson`` or ``msgspec``
+to force a backend.
+
+Key Components:
+- JSONCodec: Stdlib backend and the codec interface
+- OrjsonCodec / MsgspecCodec: Optional fast backends
+- get_codec / set_codec / reset_codec: Process-wide codec selection
+- dumps / dumpb / loads: Module-level shortcuts using the active codec
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Union
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    msgspec = None
+    MSGSPEC_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+JSON_BACKEND_ENV = "AIWHISPERER_JSON_BACKEND"
+
+Default = Optional[Callable[[Any], Any]]
+
+
+class JSONCodec:
+    """Stdlib JSON backend; also the interface every backend implements."""
+
+    name = "stdlib"
+
+    def dumps(self, obj: Any, pretty: bool = False, default: Default = None) -> str:
+        """
+        Serialize to a JSON string.
+
+        Args:
+            obj: Value to serialize
+            pretty: Indent with two spaces
+            default: Called for objects the codec cannot serialize natively
+
+        Returns:
+            JSON text
+        """
+        if pretty:
+            return json.dumps(obj, indent=2, ensure_ascii=False, default=default)
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=default)
+
+    def dumpb(self, obj: Any, pretty: bool = False, default: Default = None) -> bytes:
+        """Serialize to UTF-8 encoded JSON bytes."""
+        return self.dumps(obj, pretty=pretty, default=default).encode("utf-8")
+
+    def loads(self, data: Union[str, bytes, bytearray, memoryview]) -> Any:
+        """
+        Deserialize JSON text or bytes.
+
+        Raises:
+            json.JSONDecodeError: If the data is not valid JSON
+        """
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    """orjson backend."""
+
+    name = "orjson"
+
+    def dumpb(self, obj: Any, pretty: bool = False, default: Default = None) -> bytes:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        if default is not None:
+            # Let the caller's hook format datetimes, as the stdlib would
+            option |= orjson.OPT_PASSTHROUGH_DATETIME
+        try:
+            return orjson.dumps(obj, default=default, option=option)
+        except TypeError:
+            # orjson.JSONEncodeError is a TypeError (e.g. integers beyond 64 bits)
+            return JSONCodec.dumps(self, obj, pretty=pretty, default=default).encode("utf-8")
+
+    def dumps(self, obj: Any, pretty: bool = False, default: Default = None) -> str:
+        return self.dumpb(obj, pretty=pretty, default=default).decode("utf-8")
+
+    def loads(self, data: Union[str, bytes, bytearray, memoryview]) -> Any:
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError
+        return orjson.loads(data)
+
+
+class MsgspecCodec(JSONCodec):
+    """msgspec backend."""
+
+    name = "msgspec"
+
+    def __init__(self):
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+
+    def dumpb(self, obj: Any, pretty: bool = False, default: Default = None) -> bytes:
+        try:
+            if default is None:
+                data = self._encoder.encode(obj)
+            else:
+                data = msgspec.json.encode(obj, enc_hook=default)
+        except (TypeError, ValueError, OverflowError, msgspec.EncodeError):
+            return JSONCodec.dumps(self, obj, pretty=pretty, default=default).encode("utf-8")
+        return msgspec.json.format(data, indent=2) if pretty else data
+
+    def dumps(self, obj: Any, pretty: bool = False, default: Default = None) -> str:
+        return self.dumpb(obj, pretty=pretty, default=default).decode("utf-8")
+
+    def loads(self, data: Union[str, bytes, bytearray, memoryview]) -> Any:
+        try:
+            return self._decoder.decode(data)
+        except msgspec.DecodeError as e:
+            text = data if isinstance(data, str) else bytes(data).decode("utf-8", "replace")
+            raise json.JSONDecodeError(str(e), text, 0) from e
+
+
+_BACKENDS: Dict[str, Callable[[], JSONCodec]] = {"stdlib": JSONCodec}
+if ORJSON_AVAILABLE:
+    _BACKENDS["orjson"] = OrjsonCodec
+if MSGSPEC_AVAILABLE:
+    _BACKENDS["msgspec"] = MsgspecCodec
+
+# Preference order when no backend is requested
+_PREFERENCE = ("orjson", "msgspec", "stdlib")
+
+_codec: Optional[JSONCodec] = None
+_codec_lock = threading.Lock()
+
+
+def available_backends() -> list:
+    """Names of the backends that can be used in this environment."""
+    return [name for name in _PREFERENCE if name in _BACKENDS]
+
+
+def create_codec(backend: Optional[str] = None) -> JSONCodec:
+    """
+    Create a codec.
+
+    Args:
+        backend: Backend name, or None for the fastest available
+
+    Raises:
+        ValueError: If the backend is unknown or not installed
+    """
+    if not backend:
+        backend = available_backends()[0]
+    if backend not in _BACKENDS:
+        raise ValueError(f"JSON backend '{backend}' is not available (available: {available_backends()})")
+    return _BACKENDS[backend]()
+
+
+def get_codec() -> JSONCodec:
+    """Get the process-wide codec, honouring AIWHISPERER_JSON_BACKEND."""
+    global _codec
+    if _codec is None:
+        with _codec_lock:
+            if _codec is None:
+                requested = os.environ.get(JSON_BACKEND_ENV, "").strip().lower() or None
+                try:
+                    _codec = create_codec(requested)
+                except ValueError as e:
+                    logger.warning(f"{e}; using the default JSON backend")
+                    _codec = create_codec()
+                logger.debug(f"Using {_codec.name} JSON backend")
+    return _codec
+
+
+def set_codec(backend: Union[str, JSONCodec]) -> JSONCodec:
+    """Replace the process-wide codec."""
+    global _codec
+    with _codec_lock:
+        _codec = backend if isinstance(backend, JSONCodec) else create_codec(backend)
+    return _codec
+
+
+def reset_codec() -> None:
+    """Forget the process-wide codec (for testing)."""
+    global _codec
+    with _codec_lock:
+        _codec = None
+
+
+def dumps(obj: Any, pretty: bool = False, default: Default = None) -> str:
+    """Serialize to a JSON string with the active codec."""
+    return get_codec().dumps(obj, pretty=pretty, default=default)
+
+
+def dumpb(obj: Any, pretty: bool = False, default: Default = None) -> bytes:
+    """Serialize to JSON bytes with the active codec."""
+    return get_codec().dumpb(obj, pretty=pretty, default=default)
+
+
+def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+    """Deserialize JSON with the active codec."""
+    return get_codec().loads(data)
@@ -0,0 +1,451 @@
+"""
+Append-only journal for JSON state files.
+
+Saving a session, project list or agent state used to rewrite the whole
+file each time, so every save cost I/O proportional to the state's size
+(for sessions, the entire conversation history). StateJournal keeps the
+file as a snapshot plus a write-ahead journal beside it:
+
+    state.json           snapshot (plain JSON, or gzip/zstd compressed)
+    state.json.journal   one line per save: the changes since the last line
+
+Each save diffs the new state against the last saved one and appends the
+changes as a single compact record. Lists that only grew (message
+histories) are recorded as the appended items, so a save costs I/O
+proportional to what changed, not to the history length. When the journal
+outgrows the snapshot it is compacted into a new snapshot, which keeps the
+amortized cost constant.
+
+Crash recovery: loading reads the snapshot and replays the journal. A
+record torn by a crash mid-append is ignored. The journal's header holds
+a digest of the snapshot bytes it extends, so a journal left behind by an
+interrupted compaction, or beside a snapshot replaced by a copy or
+restore, is never replayed onto the wrong snapshot. Files written before
+journaling existed load as snapshots with no journal.
+
+The snapshot itself is the plain state, so while a journal is pending it
+is stale. Owners call close() when they shut down, which folds the
+journal into the snapshot and removes it; other programs reading the
+file directly then see the current state.
+
+Values that only encode to JSON (datetimes and the like, saved with
+``default=str``) are compared in their encoded form, so they are written
+once rather than on every save. A list whose
+existing items changed (rather than only growing) is recorded whole. The
+journal keeps its own decoded copy of the last saved state, so in-place
+edits to the caller's objects are always detected.
+
+Key Components:
+- StateJournal: Snapshot + journal persistence for one state file
+- diff_state / apply_changes: Compute and replay state changes
+"""
+
+import gzip
+import hashlib
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from ai_whisperer.utils import json_codec
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_SUFFIX = ".journal"
+
+# Snapshot key that held the snapshot's generation id in older versions
+GENERATION_KEY = "_journal_generation"
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Change record operations
+SET = "set"
+DELETE = "del"
+EXTEND = "ext"
+
+
+_JSON_TYPES = (str, int, float, bool, type(None), list, dict)
+
+
+def _encoded(value: Any) -> Any:
+    """A value as it reads back after saving (e.g. a datetime becomes a string)."""
+    return json_codec.loads(json_codec.dumpb(value, default=str))
+
+
+def _same(old: Any, new: Any) -> bool:
+    # Distinguish 1 from True and 1.0, which compare equal but encode differently
+    if type(old) is type(new) and old == new:
+        return True
+    # old was read back from JSON; new may hold values that only encode to JSON
+    return not isinstance(new, _JSON_TYPES) and _encoded(new) == old
+
+
+def diff_state(old: Any, new: Any, path: Tuple = ()) -> List[Dict[str, Any]]:
+    """
+    Compute the changes that turn old into new.
+
+    Args:
+        old: Previously saved state
+        new: Current state
+        path: Key path of old/new within the root state
+
+    Returns:
+        Change records for apply_changes
+    """
+    if isinstance(old, dict) and isinstance(new, dict) and all(isinstance(k, str) for k in new):
+        changes = []
+        for key, value in new.items():
+            if key not in old:
+                changes.append({"op": SET, "path": [*path, key], "value": value})
+            else:
+                changes.extend(diff_state(old[key], value, (*path, key)))
+        for key in old:
+            if key not in new:
+                changes.append({"op": DELETE, "path": [*path, key]})
+        return changes
+
+    if isinstance(old, list) and isinstance(new, list):
+        count = len(old)
+        if len(new) >= count and (new[:count] == old or _encoded(new[:count]) == old):
+            if len(new) > count:
+                return [{"op": EXTEND, "path": list(path), "values": new[count:]}]
+            return []
+        return [{"op": SET, "path": list(path), "value": new}]
+
+    if _same(old, new):
+        return []
+    return [{"op": SET, "path": list(path), "value": new}]
+
+
+def apply_changes(state: Any, changes: List[Dict[str, Any]]) -> Any:
+    """
+    Replay change records onto a state.
+
+    Returns:
+        The updated state (a new object if the root itself was replaced)
+    """
+    for change in changes:
+        path = change["path"]
+        op = change["op"]
+        if not path:
+            if op == SET:
+                state = change["value"]
+            elif op == EXTEND:
+                state.extend(change["values"])
+            continue
+        parent = state
+        for key in path[:-1]:
+            parent = parent[key]
+        key = path[-1]
+        if op == SET:
+            parent[key] = change["value"]
+        elif op == DELETE:
+            parent.pop(key, None)
+        elif op == EXTEND:
+            parent[key].extend(change["values"])
+        else:
+            raise ValueError(f"Unknown journal operation: {op}")
+    return state
+
+
+def _compress(data: bytes, compression: Optional[str]) -> bytes:
+    if compression == "gzip":
+        return gzip.compress(data, compresslevel=6)
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return data
+
+
+def _decompress(data: bytes) -> bytes:
+    if data[:2] == _GZIP_MAGIC:
+        return gzip.decompress(data)
+    if data[:4] == _ZSTD_MAGIC:
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("Snapshot is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _resolve_compression(compression: Optional[str]) -> Optional[str]:
+    if compression == "auto":
+        return "zstd" if ZSTD_AVAILABLE else "gzip"
+    if compression == "zstd" and not ZSTD_AVAILABLE:
+        logger.warning("zstandard is not installed; compressing snapshots with gzip")
+        return "gzip"
+    if compression not in (None, "gzip", "zstd"):
+        raise ValueError(f"Unknown compression: {compression}")
+    return compression
+
+
+class StateJournal:
+    """Snapshot + append-only journal persistence for one state file."""
+
+    def __init__(self, path: Union[str, Path], compression: Optional[str] = None,
+                 compact_ratio: float = 1.0, min_compact_bytes: int = 64 * 1024,
+                 pretty_snapshot: bool = False, fsync: bool = False):
+        """
+        Initialize the journal.
+
+        Args:
+            path: Snapshot file; the journal is written beside it
+            compression: None, "gzip", "zstd" or "auto" (zstd if installed)
+                for snapshots. Journal records are always plain JSON lines.
+            compact_ratio: Compact once the journal exceeds this fraction of
+                the snapshot's size
+            min_compact_bytes: Never compact a journal smaller than this
+            pretty_snapshot: Indent uncompressed snapshots for readability
+            fsync: fsync after every write, for durability across power loss
+        """
+        self.path = Path(path)
+        self.journal_path = self.path.with_name(self.path.name + JOURNAL_SUFFIX)
+        self.compression = _resolve_compression(compression)
+        self.compact_ratio = compact_ratio
+        self.min_compact_bytes = min_compact_bytes
+        self.pretty_snapshot = pretty_snapshot
+        self.fsync = fsync
+
+        self._lock = threading.Lock()
+        self._last: Optional[Dict[str, Any]] = None
+        self._digest: Optional[str] = None
+        self._generation: Optional[str] = None  # Snapshots written by older versions
+        # Cheap hint that the snapshot changed on disk; identity is the digest
+        self._snapshot_fingerprint: Optional[str] = None
+        self._snapshot_bytes = 0
+        self._journal_bytes = 0
+        self.records = 0
+        self.compactions = 0
+
+    # --- Loading ---
+
+    def _fingerprint(self) -> Optional[str]:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return f"{stat.st_ino}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """
+        Rebuild the state from the snapshot and journal on disk.
+
+        Returns:
+            The saved state, or None if nothing has been saved
+
+        Raises:
+            json.JSONDecodeError: If the snapshot is corrupted
+        """
+        with self._lock:
+            return self._load()
+
+    def _load(self) -> Optional[Dict[str, Any]]:
+        try:
+            raw = self.path.read_bytes()
+        except FileNotFoundError:
+            self._last = None
+            return None
+        state = json_codec.loads(_decompress(raw))
+        self._digest = _digest(raw)
+        self._generation = state.pop(GENERATION_KEY, None) if isinstance(state, dict) else None
+        self._snapshot_fingerprint = self._fingerprint()
+        self._snapshot_bytes = len(raw)
+        self._journal_bytes = 0
+        self.records = 0
+
+        try:
+            journal = self.journal_path.read_bytes()
+        except FileNotFoundError:
+            journal = b""
+        if journal:
+            state = self._replay(state, journal)
+
+        # Private copy: the caller's state shares no objects with it
+        self._last = json_codec.loads(json_codec.dumpb(state))
+        return state
+
+    def _replay(self, state: Dict[str, Any], journal: bytes) -> Dict[str, Any]:
+        # Only newline-terminated lines are complete; anything after the last newline is torn
+        lines = journal.split(b"\n")[:-1]
+        try:
+            header = json_codec.loads(lines[0]) if lines else None
+        except ValueError:
+            header = None
+        if not self._extends_snapshot(header):
+            # Left over from an interrupted compaction, or the snapshot was replaced
+            logger.info(f"Ignoring stale journal {self.journal_path}")
+            return state
+
+        valid_bytes = len(lines[0]) + 1
+        for line in lines[1:]:
+            if not line:
+                valid_bytes += 1
+                continue
+            try:
+                record = json_codec.loads(line)
+            except ValueError:
+                # Corrupted record; everything before it is intact
+                logger.warning(f"Discarding corrupted records at the end of {self.journal_path}")
+                break
+            state = apply_changes(state, record["changes"])
+            valid_bytes += len(line) + 1
+            self.records += 1
+        if valid_bytes < len(journal):
+            # Drop the torn tail so later appends are not stranded behind it
+            try:
+                with open(self.journal_path, "r+b") as f:
+                    f.truncate(valid_bytes)
+            except OSError as e:
+                logger.warning(f"Could not truncate {self.journal_path}: {e}")
+        self._journal_bytes = valid_bytes
+        return state
+
+    def _extends_snapshot(self, header: Any) -> bool:
+        if not isinstance(header, dict):
+            return False
+        if "digest" in header:
+            return header["digest"] == self._digest
+        if self._generation is not None:
+            return header.get("generation") == self._generation
+        # Snapshot and journal written before generations existed
+        return "generation" not in header and header.get("snapshot") == self._snapshot_fingerprint
+
+    # --- Saving ---
+
+    def save(self, state: Dict[str, Any]) -> int:
+        """
+        Persist a new version of the state.
+
+        Returns:
+            Bytes written
+        """
+        with self._lock:
+            if self._last is not None and self._fingerprint() != self._snapshot_fingerprint:
+                # Replaced or removed behind our back; start again from what is on disk
+                self._last = None
+            if self._last is None and self.path.exists():
+                try:
+                    self._load()
+                except ValueError:
+                    logger.warning(f"Replacing unreadable snapshot {self.path}")
+            if self._last is None or self._generation is not None:
+                # Nothing saved yet, or a snapshot from an older version: rewrite it
+                return self._compact(state)
+
+            changes = diff_state(self._last, state)
+            if not changes:
+                return 0
+            if self._should_compact():
+                return self._compact(state)
+            return self._append(changes)
+
+    def compact(self, state: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Write a fresh snapshot and discard the journal.
+
+        Args:
+            state: State to snapshot; defaults to the last saved state
+
+        Returns:
+            Bytes written
+        """
+        with self._lock:
+            if state is None:
+                state = self._last if self._last is not None else self._load()
+                if state is None:
+                    return 0
+            return self._compact(state)
+
+    def close(self) -> int:
+        """
+        Fold a pending journal into the snapshot, leaving a plain, current state file.
+
+        The journal can be used again afterwards; call this when the owner shuts down.
+
+        Returns:
+            Bytes written (0 if there was no journal)
+        """
+        with self._lock:
+            if not self._journal_bytes or self._last is None:
+                return 0
+            return self._compact(self._last)
+
+    def delete(self) -> None:
+        """Remove the snapshot and journal."""
+        with self._lock:
+            self.journal_path.unlink(missing_ok=True)
+            self.path.unlink(missing_ok=True)
+            self._last = self._digest = self._generation = self._snapshot_fingerprint = None
+            self._snapshot_bytes = self._journal_bytes = self.records = 0
+
+    def _should_compact(self) -> bool:
+        threshold = max(self.min_compact_bytes, self._snapshot_bytes * self.compact_ratio)
+        return self._journal_bytes > threshold
+
+    def _write(self, handle, data: bytes) -> None:
+        handle.write(data)
+        handle.flush()
+        if self.fsync:
+            os.fsync(handle.fileno())
+
+    def _append(self, changes: List[Dict[str, Any]]) -> int:
+        record = json_codec.dumpb({"changes": changes}, default=str) + b"\n"
+        written = 0
+        if self._journal_bytes == 0:
+            # Tie the journal to the snapshot it extends
+            header = json_codec.dumpb({"digest": self._digest}) + b"\n"
+            with open(self.journal_path, "wb") as f:
+                self._write(f, header + record)
+            written = len(header) + len(record)
+        else:
+            with open(self.journal_path, "ab") as f:
+                self._write(f, record)
+            written = len(record)
+        # Apply the decoded record so _last matches exactly what a replay would produce
+        self._last = apply_changes(self._last, json_codec.loads(record)["changes"])
+        self._journal_bytes += written
+        self.records += 1
+        return written
+
+    def _compact(self, state: Dict[str, Any]) -> int:
+        pretty = self.pretty_snapshot and self.compression is None
+        encoded = json_codec.dumpb(state, pretty=pretty, default=str)
+        data = _compress(encoded, self.compression)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(temp_path, "wb") as f:
+            self._write(f, data)
+        temp_path.replace(self.path)
+        self._digest = _digest(data)
+        self._generation = None
+        self._snapshot_fingerprint = self._fingerprint()
+        # A crash here leaves a journal whose header no longer matches; load() ignores it
+        self.journal_path.unlink(missing_ok=True)
+
+        self._last = json_codec.loads(encoded)
+        self._snapshot_bytes = len(data)
+        self._journal_bytes = 0
+        self.records = 0
+        self.compactions += 1
+        return len(data)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Sizes and record counts for the snapshot and journal."""
+        return {
+            "snapshot_bytes": self._snapshot_bytes,
+            "journal_bytes": self._journal_bytes,
+            "records": self.records,
+            "compactions": self.compactions,
+            "compression": self.compression,
+        }
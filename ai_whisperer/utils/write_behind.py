@@ -0,0 +1,199 @@
+"""
+Write-behind persistence for frequently saved state files.
+
+Agents save their state on every status change, so with many agents the
+same files are rewritten many times a second, each time blocking the
+caller (often the event loop) on file I/O. WriteBehindWriter takes those
+saves off the caller's path: ``submit()`` only records the latest payload
+for a file, and a background thread writes whatever is pending once per
+batch window. Saves of the same file within a window coalesce into one
+write of the newest payload. Each write goes through the ``write`` callable
+given to the writer, so it keeps that callable's atomicity (e.g. temp file
+and rename, or a StateJournal append).
+
+Payloads are encoded snapshots (e.g. a JSON string) made on the caller's
+thread when it submits, so the caller is free to keep mutating the state
+it saved. A payload that has been submitted but not written yet is visible
+through ``pending()``, so readers see their own writes.
+
+Failures are reported back two ways: ``submit()`` returns a future that
+resolves once the file has been written (or raises what the write raised),
+and ``flush()`` raises WriteBehindError for writes that failed since the
+last flush. ``flush()`` waits until everything submitted has been written,
+and should be called before shutdown.
+
+Key Components:
+- WriteBehindWriter: Coalescing, batching background writer
+- WriteBehindError: Raised by flush() when queued writes failed
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Writes one encoded payload to one file; raises (or returns False) on failure
+PayloadWriter = Callable[[Path, Any], Optional[bool]]
+
+
+class WriteBehindError(Exception):
+    """Raised by flush() when queued writes failed."""
+
+    def __init__(self, errors: Dict[Path, BaseException]):
+        self.errors = errors
+        details = "; ".join(f"{path}: {error}" for path, error in errors.items())
+        super().__init__(f"{len(errors)} write-behind save(s) failed: {details}")
+
+
+class WriteBehindWriter:
+    """
+    Writes submitted payloads from a background thread, newest per file, in batches.
+
+    Args:
+        write: Writes one payload to one file; called only from the writer thread
+        window: Seconds to collect saves for before writing a batch
+        name: Name of the writer thread
+    """
+
+    def __init__(self, write: PayloadWriter, window: float = 0.05, name: str = "state-writer"):
+        self.write = write
+        self.window = window
+        self.name = name
+        # path -> (payload, future resolved when that path is written)
+        self._pending: Dict[Path, Tuple[Any, Future]] = {}
+        self._writing: Dict[Path, Tuple[Any, Future]] = {}
+        self._errors: Dict[Path, BaseException] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._flushing = 0
+        self._closing = False
+        self.stats = {"submitted": 0, "coalesced": 0, "written": 0, "failed": 0, "batches": 0}
+
+    def submit(self, path: Path, payload: Any) -> Future:
+        """
+        Queue ``payload`` to be written to ``path``, replacing any payload still pending for it.
+
+        Returns:
+            Future resolved with True once ``path`` has been written; saves
+            coalesced into the same write share its future
+        """
+        with self._cond:
+            queued = self._pending.get(path)
+            if queued is not None:
+                self.stats["coalesced"] += 1
+                future = queued[1]
+            else:
+                future = Future()
+            self._pending[path] = (payload, future)
+            self.stats["submitted"] += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._closing = False
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+            return future
+
+    def pending(self, path: Path) -> Optional[Any]:
+        """The newest payload submitted for ``path`` that is not on disk yet, if any."""
+        with self._cond:
+            queued = self._pending.get(path) or self._writing.get(path)
+            return queued[0] if queued is not None else None
+
+    def pending_paths(self) -> List[Path]:
+        with self._cond:
+            return list({**self._writing, **self._pending})
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Write everything submitted so far without waiting for the batch window.
+
+        Returns:
+            True if everything was written within ``timeout``
+
+        Raises:
+            WriteBehindError: If writes failed since the last flush
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._flushing += 1
+            self._cond.notify_all()
+            try:
+                while self._pending or self._writing:
+                    if self._thread is None or not self._thread.is_alive():
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                if self._errors:
+                    errors, self._errors = self._errors, {}
+                    raise WriteBehindError(errors)
+                return not (self._pending or self._writing)
+            finally:
+                self._flushing -= 1
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """Flush and stop the writer thread; a later submit starts it again."""
+        try:
+            return self.flush(timeout)
+        finally:
+            with self._cond:
+                self._closing = True
+                self._cond.notify_all()
+                thread = self._thread
+            if thread is not None and thread is not threading.current_thread():
+                thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closing:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                # Collect more saves for the batch window, unless someone is waiting on a flush
+                deadline = time.monotonic() + self.window
+                while not self._flushing and not self._closing:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch, self._pending = self._pending, {}
+                self._writing = batch
+
+            results: Dict[Path, Optional[BaseException]] = {}
+            for path, (payload, _) in batch.items():
+                try:
+                    if self.write(path, payload) is False:
+                        raise OSError("write reported failure")
+                    results[path] = None
+                except Exception as e:
+                    logger.error(f"Write-behind save of {path} failed: {e}")
+                    results[path] = e
+
+            for path, error in results.items():
+                future = batch[path][1]
+                if error is None:
+                    future.set_result(True)
+                else:
+                    future.set_exception(error)
+
+            with self._cond:
+                self._writing = {}
+                for path, error in results.items():
+                    if error is None:
+                        self._errors.pop(path, None)
+                        self.stats["written"] += 1
+                    else:
+                        self._errors[path] = error
+                        self.stats["failed"] += 1
+                self.stats["batches"] += 1
+                self._cond.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {**self.stats, "pending": len(self._pending) + len(self._writing), "window": self.window}
@@ -1,2 +1,19 @@
-from .main import app
-from .stateless_session_manager import StatelessSessionManager
+"""
+AIWhisperer interactive server.
+
+``app`` and ``StatelessSessionManager`` are loaded on first access, so
+importing a submodule (the supervisor, session store, startup profiler)
+does not start the server's module-level initialization in main.
+"""
+
+__all__ = ["app", "StatelessSessionManager"]
+
+
+def __getattr__(name):
+    if name == "app":
+        from .main import app
+        return app
+    if name == "StatelessSessionManager":
+        from .stateless_session_manager import StatelessSessionManager
+        return StatelessSessionManager
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,238 @@
+"""
+Background prewarming of agents for switch_agent.
+
+Switching to an agent the session has not used yet builds it on the
+user's critical path: the system prompt is rendered by PromptSystem, an
+AgentContext is created and an AI loop is built by AILoopManager. The
+prewarmer does that work in the background for the agents the session is
+most likely to switch to next, after the session starts and after each
+turn, so switch_agent only has to adopt an agent that is already built.
+
+Likely-next agents are ranked by the handoffs seen so far (first from the
+active agent, then across all sessions), followed by the agent registry's
+order. Prompts are rendered in a worker thread, so the event loop never
+waits on PromptSystem; the agent and its AI loop are then built on the
+event loop, where the session's own agent builds run. At most ``budget`` agents are kept
+prewarmed per session; agents that fall out of the ranking are evicted
+along with their AI loops, and all of them are evicted once the session
+has had no message or switch for ``idle_ttl`` seconds. Agents evicted for
+idleness are only built again when the session is next used.
+
+AIWHISPERER_PREWARM_AGENTS sets the budget; an empty value or 0 disables
+prewarming.
+
+Key Components:
+- HandoffHistory: Agent-to-agent switch counts shared by all sessions
+- AgentPrewarmer: Per-session scheduler, budget and eviction
+- get_handoff_history / reset_handoff_history: Shared history accessors
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from ai_whisperer.services.agents.stateless import StatelessAgent
+
+logger = logging.getLogger(__name__)
+
+PREWARM_AGENTS_ENV = "AIWHISPERER_PREWARM_AGENTS"
+
+DEFAULT_BUDGET = 2
+DEFAULT_IDLE_TTL = 600.0
+
+
+def prewarm_budget() -> int:
+    """Agents to keep prewarmed per session (AIWHISPERER_PREWARM_AGENTS)."""
+    value = os.environ.get(PREWARM_AGENTS_ENV)
+    if value is None:
+        return DEFAULT_BUDGET
+    try:
+        return max(0, int(value or 0))
+    except ValueError:
+        logger.warning(f"Ignoring invalid {PREWARM_AGENTS_ENV}={value!r}")
+        return DEFAULT_BUDGET
+
+
+class HandoffHistory:
+    """Counts of switches between agents."""
+
+    def __init__(self):
+        self._from: Dict[str, Counter] = {}
+        self._targets: Counter = Counter()
+
+    def record(self, from_agent: Optional[str], to_agent: str) -> None:
+        to_agent = to_agent.lower()
+        self._targets[to_agent] += 1
+        if from_agent:
+            self._from.setdefault(from_agent.lower(), Counter())[to_agent] += 1
+
+    def ranked(self, from_agent: Optional[str] = None) -> List[str]:
+        """Agents by how often they were switched to, from ``from_agent`` first."""
+        ranking = []
+        if from_agent and from_agent.lower() in self._from:
+            ranking = [agent for agent, _ in self._from[from_agent.lower()].most_common()]
+        ranking.extend(agent for agent, _ in self._targets.most_common() if agent not in ranking)
+        return ranking
+
+
+_handoff_history: Optional[HandoffHistory] = None
+
+
+def get_handoff_history() -> HandoffHistory:
+    """Get the handoff history shared by all sessions."""
+    global _handoff_history
+    if _handoff_history is None:
+        _handoff_history = HandoffHistory()
+    return _handoff_history
+
+
+def reset_handoff_history() -> None:
+    """Reset the shared handoff history (for testing)."""
+    global _handoff_history
+    _handoff_history = None
+
+
+class AgentPrewarmer:
+    """
+    Builds a session's likely-next agents in the background.
+
+    Args:
+        session: The StatelessInteractiveSession to prewarm agents for
+        budget: Maximum number of prewarmed agents (defaults to AIWHISPERER_PREWARM_AGENTS)
+        idle_ttl: Seconds without a message or switch before prewarmed agents are evicted
+        history: Handoff history to rank agents by (defaults to the shared one)
+    """
+
+    def __init__(self, session, budget: Optional[int] = None, idle_ttl: float = DEFAULT_IDLE_TTL,
+                 history: Optional[HandoffHistory] = None):
+        self.session = session
+        self.budget = prewarm_budget() if budget is None else budget
+        self.idle_ttl = idle_ttl
+        self.history = history or get_handoff_history()
+        self._prewarmed: Dict[str, "StatelessAgent"] = {}
+        self._last_use = time.monotonic()
+        self._idle_timer: Optional[asyncio.TimerHandle] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopped = False
+        self.stats = {"built": 0, "hits": 0, "misses": 0, "evicted": 0, "failed": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget > 0 and self.session.agent_registry is not None and not self._stopped
+
+    def predict(self) -> List[str]:
+        """Agents the session is likely to switch to next, most likely first."""
+        try:
+            registry_ids = [agent.agent_id.lower() for agent in self.session.agent_registry.list_agents()]
+        except Exception:
+            return []
+        active = (self.session.active_agent or "").lower()
+        candidates = [agent for agent in self.history.ranked(active) if agent in registry_ids]
+        candidates.extend(agent for agent in registry_ids if agent not in candidates)
+        return [agent for agent in candidates if agent != active and agent not in self.session.agents]
+
+    def schedule(self) -> None:
+        """Prewarm in the background unless a prewarm is already running."""
+        if not self.enabled or (self._task and not self._task.done()):
+            return
+        try:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        except RuntimeError:
+            pass  # No event loop (synchronous callers)
+
+    async def _run(self) -> None:
+        # Let the turn that scheduled us finish sending first
+        await asyncio.sleep(0)
+        wanted = self.predict()[:self.budget]
+        self._evict(wanted)
+        for agent_id in wanted:
+            if agent_id in self._prewarmed or agent_id in self.session.agents:
+                continue
+            try:
+                prompt = await asyncio.to_thread(self.session._prewarm_prompt, agent_id)
+                if prompt is None or agent_id in self.session.agents or self._stopped:
+                    # Switched to while the prompt was rendered (the session built its own), or stopped
+                    continue
+                agent_info, system_prompt, agent_config = prompt
+                agent = self.session._build_agent(agent_id, system_prompt, config=agent_config,
+                                                  agent_registry_info=agent_info)
+            except Exception as e:
+                self.stats["failed"] += 1
+                logger.debug(f"Failed to prewarm agent {agent_id} in session {self.session.session_id}: {e}")
+                continue
+            self._prewarmed[agent_id] = agent
+            self.stats["built"] += 1
+            logger.debug(f"Prewarmed agent {agent_id} in session {self.session.session_id}")
+        self._arm_idle_timer()
+
+    def _evict(self, wanted: List[str]) -> None:
+        for agent_id in list(self._prewarmed):
+            if agent_id not in wanted:
+                self._discard(agent_id)
+                self.stats["evicted"] += 1
+
+    def _arm_idle_timer(self) -> None:
+        if self._idle_timer is not None or not self._prewarmed:
+            return
+        remaining = self.idle_ttl - (time.monotonic() - self._last_use)
+        self._idle_timer = asyncio.get_running_loop().call_later(max(0.0, remaining), self._expire)
+
+    def _expire(self) -> None:
+        """Evict every prewarmed agent once the session has been idle for ``idle_ttl``."""
+        self._idle_timer = None
+        if time.monotonic() - self._last_use < self.idle_ttl:
+            # Used since the timer was set
+            self._arm_idle_timer()
+            return
+        for agent_id in list(self._prewarmed):
+            self._discard(agent_id)
+            self.stats["evicted"] += 1
+        logger.debug(f"Evicted prewarmed agents of idle session {self.session.session_id}")
+
+    def _discard(self, agent_id: str) -> None:
+        self._prewarmed.pop(agent_id, None)
+        # The AI loop was created in the session's manager; drop it unless the agent was created since
+        if agent_id not in self.session.agents:
+            self.session.ai_loop_manager.remove_ai_loop(agent_id)
+
+    def take(self, agent_id: str) -> Optional["StatelessAgent"]:
+        """Hand over a prewarmed agent to switch_agent, or None if it was not prewarmed."""
+        agent = self._prewarmed.pop(agent_id, None)
+        if agent is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return agent
+
+    def record_use(self) -> None:
+        """Note a message or switch; prewarmed agents are kept while the session is in use."""
+        self._last_use = time.monotonic()
+
+    def record_switch(self, from_agent: Optional[str], to_agent: str) -> None:
+        self.history.record(from_agent, to_agent)
+
+    def prewarmed_agents(self) -> List[str]:
+        return list(self._prewarmed)
+
+    async def stop(self) -> None:
+        """Cancel a running prewarm, drop all prewarmed agents and prewarm no more."""
+        self._stopped = True
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._task = None
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+        for agent_id in list(self._prewarmed):
+            self._discard(agent_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "budget": self.budget, "prewarmed": self.prewarmed_agents()}
@@ -9,6 +9,7 @@ from typing import Dict, Any, Optional
 from fastapi import WebSocket
 
 from ai_whisperer.services.agents.async_session_manager import AsyncAgentSessionManager, AgentState
+from .send_queue import send_message
 # from .message_models import ErrorCode  # Not available yet
 
 logger = logging.getLogger(__name__)
@@ -58,7 +59,7 @@ class AsyncAgentEndpoints:
                 ws = websocket
                 if ws:
                     try:
-                        await ws.send_json({
+                        await send_message(ws, {
                             "jsonrpc": "2.0",
                             "method": method,
                             "params": {
@@ -1,6 +1,11 @@
 """
 Debbie Observer for Interactive Mode Monitoring.
 Provides non-intrusive observation of interactive sessions for debugging assistance.
+
+Given a SessionEventBus, the observer follows sessions through the events
+they publish: each event updates its session's monitor and re-checks that
+session's patterns, and stalls are caught by a per-session idle deadline,
+rather than every session being re-checked on a timer.
 """
 
 import asyncio
@@ -12,6 +17,14 @@ from dataclasses import dataclass, field
 from enum import Enum
 import json
 
+from .session_events import (
+    DeadlineTimers,
+    SessionEvent,
+    SessionEventBus,
+    SessionEventType,
+    get_session_event_bus,
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -148,8 +161,11 @@ class PatternDetector:
         for i in range(1, len(recent_messages)):
             time_diff = (recent_messages[i]['timestamp'] - recent_messages[i-1]['timestamp']).total_seconds()
             if time_diff < window:
-                # Simple similarity check - could be enhanced
-                if self._messages_similar(recent_messages[i]['content'], recent_messages[i-1]['content']):
+                # Monitors compare each message with the previous one as it arrives
+                similar = recent_messages[i].get('similar_to_previous')
+                if similar is None:
+                    similar = self._messages_similar(recent_messages[i]['content'], recent_messages[i-1]['content'])
+                if similar:
                     similar_count += 1
         
         return similar_count >= threshold
@@ -237,16 +253,19 @@ class InteractiveMonitor:
         self.metrics.last_activity = datetime.now()
         self.metrics.message_count += 1
         
-        # Record message in history
-        self.metrics.message_history.append({
+        # Record message in history, compared once with the one before it
+        history = self.metrics.message_history
+        history.append({
             'timestamp': datetime.now(),
             'content': message,
-            'type': 'user'
+            'type': 'user',
+            'similar_to_previous': bool(history) and self.pattern_detector._messages_similar(
+                message, history[-1]['content'])
         })
         
         # Keep history bounded
-        if len(self.metrics.message_history) > 100:
-            self.metrics.message_history = self.metrics.message_history[-100:]
+        if len(history) > 100:
+            del history[:-100]
     
     def on_message_complete(self, response: Any) -> None:
         """Called when message processing completes"""
@@ -257,7 +276,7 @@ class InteractiveMonitor:
             
             # Keep bounded
             if len(self.metrics.response_times) > 100:
-                self.metrics.response_times = self.metrics.response_times[-100:]
+                del self.metrics.response_times[:-100]
     
     def on_tool_start(self, tool_name: str) -> None:
         """Called when tool execution starts"""
@@ -288,7 +307,7 @@ class InteractiveMonitor:
         
         # Keep history bounded
         if len(self.metrics.error_history) > 50:
-            self.metrics.error_history = self.metrics.error_history[-50:]
+            del self.metrics.error_history[:-50]
     
     def on_agent_switch(self, from_agent: str, to_agent: str) -> None:
         """Called when agent switches"""
@@ -414,19 +433,30 @@ class DebbieObserver:
     """
     Main observer class for Debbie's interactive mode monitoring.
     Integrates with the session manager to provide non-intrusive observation.
+    
+    Args:
+        event_bus: Bus to follow sessions through; without one, sessions call
+            the hook methods and patterns are checked on a timer
+        queue_size: Events kept for the observer before the oldest are dropped
     """
     
-    def __init__(self):
+    def __init__(self, event_bus: Optional[SessionEventBus] = None, queue_size: int = 1000):
         self.monitors: Dict[str, InteractiveMonitor] = {}
         self.alert_callbacks: List[Callable[[str, Alert], None]] = []
         self._pattern_check_interval = 5.0  # seconds
         self._pattern_check_task: Optional[asyncio.Task] = None
         self._enabled = True
+        self.event_bus = event_bus
+        self.queue_size = queue_size
+        self._subscription = None
+        self._stall_timers: Optional[DeadlineTimers] = None
     
     def enable(self) -> None:
         """Enable monitoring"""
         self._enabled = True
-        if not self._pattern_check_task or self._pattern_check_task.done():
+        if self.event_bus is not None:
+            self._start_event_consumer()
+        elif not self._pattern_check_task or self._pattern_check_task.done():
             self._pattern_check_task = asyncio.create_task(self._pattern_check_loop())
     
     def disable(self) -> None:
@@ -434,6 +464,28 @@ class DebbieObserver:
         self._enabled = False
         if self._pattern_check_task and not self._pattern_check_task.done():
             self._pattern_check_task.cancel()
+        if self._subscription is not None:
+            self._subscription.close()
+            self._subscription = None
+        if self._stall_timers is not None:
+            self._stall_timers.clear()
+            self._stall_timers = None
+    
+    def _start_event_consumer(self) -> None:
+        """Subscribe to the event bus and consume it, once an event loop is running"""
+        if self._subscription is None:
+            self._subscription = self.event_bus.subscribe("debbie_observer", maxsize=self.queue_size)
+        if self._pattern_check_task and not self._pattern_check_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Enabled at import time: events queue up until a session starts the consumer
+            return
+        # Just past the threshold, so the stall check sees the full idle time
+        stall_after = PatternDetector.PATTERNS[PatternType.STALL]['threshold'] + 0.1
+        self._stall_timers = DeadlineTimers(stall_after, self._on_session_idle, loop)
+        self._pattern_check_task = loop.create_task(self._event_loop(self._subscription))
     
     def add_alert_callback(self, callback: Callable[[str, Alert], None]) -> None:
         """Add a callback for when alerts are generated"""
@@ -444,10 +496,14 @@ class DebbieObserver:
         if session_id not in self.monitors:
             self.monitors[session_id] = InteractiveMonitor(session_id)
             logger.info(f"Started observing session {session_id}")
+        if self._enabled and self.event_bus is not None:
+            self._start_event_consumer()
         return self.monitors[session_id]
     
     def stop_observing(self, session_id: str) -> None:
         """Stop observing a session"""
+        if self._stall_timers is not None:
+            self._stall_timers.remove(session_id)
         if session_id in self.monitors:
             del self.monitors[session_id]
             logger.info(f"Stopped observing session {session_id}")
@@ -508,6 +564,58 @@ class DebbieObserver:
         if monitor:
             monitor.on_agent_switch(from_agent, to_agent)
     
+    async def _event_loop(self, subscription) -> None:
+        """Background task following sessions through the event bus"""
+        async for event in subscription:
+            try:
+                await self._handle_event(event)
+            except Exception as e:
+                logger.error(f"Error handling {event.type.value} event for session {event.session_id}: {e}")
+    
+    async def _handle_event(self, event: SessionEvent) -> None:
+        """Apply one session event to its monitor and check that session's patterns"""
+        session_id, data = event.session_id, event.data
+        if event.type == SessionEventType.SESSION_STARTED:
+            self.observe_session(session_id)
+        elif event.type == SessionEventType.SESSION_ENDED:
+            self.stop_observing(session_id)
+            return
+        
+        monitor = self.monitors.get(session_id)
+        if not monitor or not self._enabled:
+            return
+        
+        if event.type == SessionEventType.MESSAGE_START:
+            monitor.on_message_start(data.get('message', ''))
+        elif event.type == SessionEventType.MESSAGE_COMPLETE:
+            monitor.on_message_complete(data.get('result'))
+        elif event.type == SessionEventType.TOOL_CALL:
+            # Published once the agent has run the tool
+            monitor.on_tool_start(data.get('tool_name'))
+            monitor.on_tool_complete(data.get('tool_name'), None)
+        elif event.type == SessionEventType.ERROR:
+            monitor.on_error(data.get('error'))
+        elif event.type == SessionEventType.AGENT_SWITCH:
+            monitor.on_agent_switch(data.get('from_agent'), data.get('to_agent'))
+        elif event.type == SessionEventType.STREAM_CHUNK:
+            monitor.metrics.last_activity = datetime.now()
+        
+        if self._stall_timers is not None:
+            self._stall_timers.touch(session_id)
+        if event.type != SessionEventType.STREAM_CHUNK:
+            await self._check_session(session_id, monitor)
+    
+    async def _on_session_idle(self, session_id: str, idle_seconds: float) -> None:
+        """Deadline callback: a session has been quiet long enough to have stalled"""
+        monitor = self.monitors.get(session_id)
+        if monitor and self._enabled:
+            await self._check_session(session_id, monitor)
+    
+    async def _check_session(self, session_id: str, monitor: InteractiveMonitor) -> None:
+        """Check one session's patterns and handle any new alerts"""
+        for alert in monitor.check_patterns():
+            await self._handle_alert(session_id, alert)
+    
     async def _pattern_check_loop(self) -> None:
         """Background task to check for patterns"""
         while self._enabled:
@@ -564,5 +672,5 @@ def get_observer() -> DebbieObserver:
     """Get the global Debbie observer instance"""
     global _observer_instance
     if _observer_instance is None:
-        _observer_instance = DebbieObserver()
+        _observer_instance = DebbieObserver(event_bus=get_session_event_bus())
     return _observer_instance
\ No newline at end of file
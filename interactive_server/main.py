@@ -28,10 +28,15 @@ parser.add_argument("--mcp_server_port", type=int, default=8002, help="Port for
 parser.add_argument("--mcp_server_transport", choices=["websocket", "sse"], default="sse",
                    help="MCP transport type (default: sse)")
 parser.add_argument("--mcp_server_tools", nargs="+", help="Tools to expose via MCP")
+parser.add_argument("--profile-startup", action="store_true",
+                   help="Report the slowest imports of a cold server start and exit")
 
 # Only parse args if running as main
 if __name__ == "__main__":
     early_args = parser.parse_args()
+    if early_args.profile_startup:
+        from interactive_server.startup_profiler import main as profile_startup_main
+        sys.exit(profile_startup_main([]))
     port_for_logging = early_args.port
 else:
     # When imported as module (e.g., via uvicorn), check sys.argv for port
@@ -84,11 +89,14 @@ from .message_models import (
 from ai_whisperer.services.agents.registry import AgentRegistry
 from ai_whisperer.prompt_system import PromptSystem, PromptConfiguration
 from ai_whisperer.utils.path import PathManager
+from ai_whisperer.utils import json_codec
 from pathlib import Path
 from .handlers.project_handlers import init_project_handlers, PROJECT_HANDLERS
 from .handlers.workspace_handler import WorkspaceHandler
 from .mcp_integration import MCP_HANDLERS
 from .async_agent_endpoints import AsyncAgentEndpoints
+from .request_multiplexer import RequestMultiplexer
+from .send_queue import get_send_queue_stats, register_send_queue, send_message, unregister_send_queue
 
 # Agent registry will be initialized later after PathManager
 agent_registry = None
@@ -423,13 +431,14 @@ async def start_session_handler(params, websocket=None):
     
     # Start the AI session with optional system prompt
     await session_manager.start_session(session_id, system_prompt)
+    await session_manager.persist_session(session_id)
     # Respond with real session ID and status
     response = StartSessionResponse(sessionId=session_id, status=SessionStatus.Active).model_dump()
     return response
 
 
 async def send_user_message_handler(params, websocket=None):
-    logging.error(f"[send_user_message_handler] ENTRY: params={params}")
+    logging.debug("[send_user_message_handler] ENTRY: params=%s", params)
     try:
         model = SendUserMessageRequest(**params)
     except Exception as validation_error:
@@ -438,15 +447,18 @@ async def send_user_message_handler(params, websocket=None):
 
     session = session_manager.get_session_by_websocket(websocket)
     if not session and hasattr(model, "sessionId"):
-        session = session_manager.get_session(model.sessionId)
-    logging.info(f"[send_user_message_handler] Found session: {session.session_id if session else 'None'}, active agent: {session.active_agent if session else 'None'}")
+        # Restores the session from the shared store if another worker owned it
+        session = await session_manager.resume_session(model.sessionId, websocket)
+    logging.debug("[send_user_message_handler] Found session: %s, active agent: %s",
+                  session.session_id if session else None, session.active_agent if session else None)
     if not session:
         raise ValueError(f"Invalid session: {getattr(model, 'sessionId', None)}")
 
     try:
-        logging.debug(f"[send_user_message_handler] Calling session.send_user_message: {model.message}")
+        logging.debug("[send_user_message_handler] Calling session.send_user_message: %s", model.message)
         # The session now has built-in streaming support
         result = await session.send_user_message(model.message)
+        await session_manager.persist_session(session.session_id)
         
         # Return the actual AI response along with the status
         response = SendUserMessageResponse(messageId=str(uuid.uuid4()), status=MessageStatus.OK).model_dump()
@@ -501,7 +513,7 @@ async def send_user_message_handler(params, websocket=None):
                         logging.warning(f"[send_user_message_handler] Failed to parse JSON, suppressing raw content")
             response['tool_calls'] = result.get('tool_calls', [])
         
-        logging.debug(f"[send_user_message_handler] Message sent successfully, returning response with AI result.")
+        logging.debug("[send_user_message_handler] Message sent successfully, returning response with AI result.")
         return response
     except Exception as e:
         logging.error(f"[send_user_message_handler] Exception: {e}")
@@ -538,7 +550,7 @@ async def stop_session_handler(params, websocket=None):
             if async_agent_endpoints:
                 await async_agent_endpoints.cleanup_session(model.sessionId)
             
-            await session_manager.cleanup_session(model.sessionId)
+            await session_manager.cleanup_session(model.sessionId, forget=True)
     except Exception:
         pass  # Ignore all errors for idempotency
     # Always return stopped for idempotency
@@ -614,7 +626,7 @@ async def debbie_send_alert_notification(websocket, alert_data):
     }
     
     try:
-        await websocket.send_text(json.dumps(notification))
+        await send_message(websocket, notification)
         logger.debug(f"Sent Debbie alert notification: {alert_data['pattern']}")
     except Exception as e:
         logger.error(f"Failed to send Debbie alert notification: {e}")
@@ -690,6 +702,45 @@ async def channel_get_stats_handler(params, websocket=None):
     return stats
 
 
+# Usage accounting handlers
+async def usage_get_stats_handler(params, websocket=None):
+    """Get token, cost and latency accounting, optionally for one session"""
+    from ai_whisperer.services.execution.usage_tracker import get_usage_tracker
+
+    session_id = params.get("sessionId")
+    if session_id and not session_manager.get_session(session_id):
+        raise ValueError(f"Session {session_id} not found")
+
+    tracker = get_usage_tracker()
+    stats = tracker.get_summary(session_id=session_id)
+    limit = params.get("recent", 0)
+    if limit:
+        stats["recent"] = tracker.get_recent(limit=int(limit), session_id=session_id)
+    return stats
+
+
+async def connection_stats_handler(params, websocket=None):
+    """Get outbound send queue depth and latency metrics"""
+    return get_send_queue_stats(websocket)
+
+
+async def session_resume_handler(params, websocket=None):
+    """Reattach to an existing session, restoring it from the shared store if needed"""
+    session_id = params.get("sessionId")
+    session = await session_manager.resume_session(session_id, websocket) if session_id else None
+    if not session:
+        return {
+            "jsonrpc": "2.0",
+            "id": None,
+            "error": {"code": -32001, "message": f"Session not found: {session_id}"}
+        }
+    return {
+        "sessionId": session.session_id,
+        "status": SessionStatus.Active if session.is_started else SessionStatus.Stopped,
+        "active_agent": session.active_agent,
+    }
+
+
 # Handler registry
 from ai_whisperer.interfaces.cli.commands.registry import CommandRegistry
 
@@ -734,6 +785,10 @@ HANDLERS = {
     "channel.history": channel_get_history_handler,
     "channel.updateVisibility": channel_update_visibility_handler,
     "channel.stats": channel_get_stats_handler,
+    # Usage accounting handlers
+    "usage.stats": usage_get_stats_handler,
+    "connection.stats": connection_stats_handler,
+    "session.resume": session_resume_handler,
     # Project management handlers
     **PROJECT_HANDLERS,
     # Plan management handlers
@@ -779,12 +834,16 @@ async def process_json_rpc_request(msg, websocket):
             "error": {"code": -32601, "message": "Method not found"}
         }
     
+    params = msg.get("params", {})
+    session_id = params.get("sessionId") if isinstance(params, dict) else None
     try:
-        # If handler is async, await it
-        if inspect.iscoroutinefunction(handler):
-            result = await handler(msg.get("params", {}), websocket=websocket)
-        else:
-            result = handler(msg.get("params", {}), websocket=websocket)
+        # Rehydrates the session if it was hibernated, and keeps it awake while the handler runs
+        async with session_manager.session_activity(websocket, session_id):
+            # If handler is async, await it
+            if inspect.iscoroutinefunction(handler):
+                result = await handler(params, websocket=websocket)
+            else:
+                result = handler(params, websocket=websocket)
         # If result is a dict and contains an "error" key, return it as is (it's already a JSON-RPC error object)
         if isinstance(result, dict) and "error" in result:
             # Ensure the ID is set correctly for the error response
@@ -813,10 +872,10 @@ async def process_json_rpc_request(msg, websocket):
 async def handle_websocket_message(websocket, data):
     """Handle incoming WebSocket message."""
     try:
-        msg = json.loads(data)
+        msg = json_codec.loads(data)
     except Exception:
         # Not valid JSON - return JSON-RPC parse error (-32700)
-        logging.debug(f"[handle_websocket_message] Not JSON, returning JSON-RPC parse error: {data}")
+        logger.debug("[handle_websocket_message] Not JSON, returning JSON-RPC parse error: %s", data)
         return {
             "jsonrpc": "2.0",
             "id": None,
@@ -920,38 +979,46 @@ def validate_ai_response(response_data):
     return response_data
 
 
+@app.get("/worker/metrics")
+async def worker_metrics():
+    """Per-process metrics, collected by the supervisor when running multiple workers"""
+    import resource
+    return {
+        "worker_id": session_manager.worker_id,
+        "pid": os.getpid(),
+        "sessions": len(session_manager.sessions),
+        "connections": len(session_manager.websocket_sessions),
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "send_queues": get_send_queue_stats()["totals"],
+        "hibernation": session_manager.hibernator.get_stats() if session_manager.hibernator else None,
+    }
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
     logging.debug("[websocket_endpoint] WebSocket accepted.")
     websocket_closed = False
+    # Responses share the connection's send queue so they stay ordered after their notifications
+    send_queue = register_send_queue(websocket)
+    
+    async def send_response(response):
+        # Validate the response before sending to ensure no raw JSON structures
+        validated_response = validate_ai_response(response)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[websocket_endpoint] Sending response: %s", validated_response)
+        await send_queue.send(validated_response)
+    
+    # Each request runs as its own task so long requests don't block the connection
+    multiplexer = RequestMultiplexer(websocket, handle_websocket_message, send_response)
     
     while True:
         try:
             logging.debug("[websocket_endpoint] Waiting for message...")
             data = await websocket.receive_text()
-            logging.error(f"[websocket_endpoint] CRITICAL: Received message: {data}")
-            
-            # Debug: Check if this is a notification
-            try:
-                parsed_data = json.loads(data)
-                if isinstance(parsed_data, dict) and "method" in parsed_data and "id" not in parsed_data:
-                    logging.warning(f"[websocket_endpoint] WARNING: Received notification for method: {parsed_data.get('method')}")
-            except:
-                pass
-            
-            response = await handle_websocket_message(websocket, data)
-            logging.error(f"[websocket_endpoint] CRITICAL: Generated response: {response}")
-            
-            if response:  # Only send response for requests (not notifications)
-                # Validate the response before sending to ensure no raw JSON structures
-                validated_response = validate_ai_response(response)
-                response_text = json.dumps(validated_response)
-                logging.debug(f"[websocket_endpoint] Sending response: {response_text}")
-                await websocket.send_text(response_text)
-                logging.debug("[websocket_endpoint] Response sent successfully")
-            else:
-                logging.debug("[websocket_endpoint] No response to send (notification)")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("[websocket_endpoint] Received message: %s", data)
+            await multiplexer.dispatch(data)
                 
         except Exception as e:
             # Not valid JSON or not JSON-RPC or handler error
@@ -959,6 +1026,9 @@ async def websocket_endpoint(websocket: WebSocket):
             websocket_closed = True
             break
     
+    # Cancel requests still running for this connection
+    await multiplexer.close()
+    
     # Cleanup session when WebSocket closes
     try:
         if websocket in session_manager.websocket_sessions:
@@ -977,6 +1047,8 @@ async def websocket_endpoint(websocket: WebSocket):
     except Exception as cleanup_error:
         logging.error(f"[websocket_endpoint] Error during session cleanup: {cleanup_error}")
     
+    await unregister_send_queue(websocket)
+    
     logging.debug("[websocket_endpoint] WebSocket endpoint exiting, closing websocket.")
     if not websocket_closed:
         try:
@@ -1020,6 +1092,14 @@ async def start_mcp_if_requested(cli_args):
 
 async def startup_event():
     """Handle startup tasks."""
+    # Start moving idle sessions to disk
+    if session_manager.hibernator:
+        session_manager.hibernator.start()
+    
+    # Apply mailbox retention now and then periodically
+    if session_manager.mailbox_retention:
+        session_manager.mailbox_retention.start()
+    
     # Start MCP server if requested
     if cli_args.mcp_server_enable:
         await start_mcp_if_requested(cli_args)
@@ -1031,6 +1111,14 @@ async def on_startup():
     await startup_event()
 
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    """FastAPI shutdown event: stop background work and leave state files as plain JSON."""
+    await session_manager.shutdown()
+    if project_manager:
+        project_manager.close()
+
+
 if __name__ == "__main__":
     import uvicorn
     # CLI args are already parsed in the initialization above
@@ -2,12 +2,15 @@
 
 import asyncio
 import logging
-from typing import Optional, Dict, Any
+from typing import TYPE_CHECKING, Optional, Dict, Any
 from pathlib import Path
 
-from ai_whisperer.mcp.server.fastmcp_runner import FastMCPServer
 from ai_whisperer.mcp.server.config import MCPServerConfig, TransportType
 
+if TYPE_CHECKING:
+    # The MCP SDK is a large import; load it only when the server is started
+    from ai_whisperer.mcp.server.fastmcp_runner import FastMCPServer
+
 logger = logging.getLogger(__name__)
 
 
@@ -15,7 +18,7 @@ class MCPServerManager:
     """Manages MCP server lifecycle within interactive server."""
     
     def __init__(self):
-        self.server: Optional[FastMCPServer] = None
+        self.server: Optional["FastMCPServer"] = None
         self.server_task: Optional[asyncio.Task] = None
         self.is_running = False
         
@@ -48,6 +51,7 @@ class MCPServerManager:
             mcp_config.server_name = "aiwhisperer-interactive"
             
             # Create FastMCP server
+            from ai_whisperer.mcp.server.fastmcp_runner import FastMCPServer
             self.server = FastMCPServer(mcp_config)
             
             # Initialize tools
@@ -0,0 +1,219 @@
+"""
+Concurrent JSON-RPC request dispatch for one WebSocket connection.
+
+The endpoint used to await each handler before reading the next frame, so
+a long ``sendUserMessage`` blocked every other request from that client.
+RequestMultiplexer runs each request as its own task, tracked by its
+JSON-RPC id, so the connection keeps reading while requests are in flight.
+
+- At most ``max_concurrent`` handlers run at once per connection; further
+  requests wait their turn, and beyond ``max_pending`` they are rejected.
+- ``$/cancelRequest`` (``{"id": <request id>}``) cancels an in-flight
+  request. Cancellation propagates into the handler, including the AI
+  loop's LLM stream and any awaiting tool call, and the request is
+  answered with error -32800.
+- Methods that change session state (see SESSION_ORDERED_METHODS) run one
+  at a time per session, in the order they arrived. Read-only requests
+  run alongside them.
+
+Key Components:
+- RequestMultiplexer: Per-connection task dispatcher with cancellation
+"""
+
+import asyncio
+import logging
+from contextlib import nullcontext
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from ai_whisperer.utils import json_codec
+
+logger = logging.getLogger(__name__)
+
+CANCEL_METHOD = "$/cancelRequest"
+
+# JSON-RPC error codes (the cancellation code follows LSP)
+REQUEST_CANCELLED = -32800
+SERVER_BUSY = -32000
+INVALID_REQUEST = -32600
+
+DEFAULT_MAX_CONCURRENT_REQUESTS = 8
+DEFAULT_MAX_PENDING_REQUESTS = 64
+
+# Methods that must not overlap or reorder within a session
+SESSION_ORDERED_METHODS = frozenset({
+    "startSession",
+    "stopSession",
+    "sendUserMessage",
+    "provideToolResult",
+    "dispatchCommand",
+    "session.switch_agent",
+    "session.handoff",
+    "session.resume",
+})
+
+MessageHandler = Callable[[Any, str], Awaitable[Optional[Dict[str, Any]]]]
+ResponseSender = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+def _error(request_id, code: int, message: str) -> Dict[str, Any]:
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+
+class RequestMultiplexer:
+    """Runs a connection's JSON-RPC requests as concurrent, cancellable tasks."""
+
+    def __init__(self, websocket, handle_message: MessageHandler, send_response: ResponseSender,
+                 max_concurrent: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+                 max_pending: int = DEFAULT_MAX_PENDING_REQUESTS):
+        """
+        Initialize the multiplexer.
+
+        Args:
+            websocket: The connection, passed through to handle_message
+            handle_message: Coroutine processing one raw frame and returning
+                the JSON-RPC response (or None for notifications)
+            send_response: Coroutine sending a response to the client
+            max_concurrent: Handlers allowed to run at once
+            max_pending: Requests allowed in flight (running or waiting)
+        """
+        self.websocket = websocket
+        self.handle_message = handle_message
+        self.send_response = send_response
+        self.max_pending = max(1, max_pending)
+
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrent))
+        self._requests: Dict[Any, asyncio.Task] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._order_locks: Dict[Any, asyncio.Lock] = {}
+        self._order_refs: Dict[Any, int] = {}
+
+    @property
+    def in_flight(self) -> int:
+        """Number of requests running or waiting to run."""
+        return len(self._tasks)
+
+    async def dispatch(self, data: str) -> None:
+        """
+        Start processing one incoming frame without waiting for its result.
+
+        Malformed frames are answered inline; requests become tasks.
+        """
+        try:
+            msg = json_codec.loads(data)
+        except (TypeError, ValueError):
+            msg = None
+        if not isinstance(msg, dict) or "method" not in msg:
+            # Let the regular handler produce the parse/invalid-request error
+            await self._send(await self.handle_message(self.websocket, data))
+            return
+
+        request_id = msg.get("id")
+        if msg["method"] == CANCEL_METHOD:
+            params = msg.get("params") or {}
+            cancelled = self.cancel(params.get("id")) if isinstance(params, dict) else False
+            if request_id is not None:
+                await self._send({"jsonrpc": "2.0", "id": request_id, "result": {"cancelled": cancelled}})
+            return
+
+        if request_id is not None and request_id in self._requests:
+            await self._send(_error(request_id, INVALID_REQUEST, f"Duplicate request id: {request_id}"))
+            return
+        if len(self._tasks) >= self.max_pending:
+            if request_id is not None:
+                await self._send(_error(request_id, SERVER_BUSY, "Too many concurrent requests"))
+            else:
+                logger.warning(f"Dropping notification {msg['method']}: too many requests in flight")
+            return
+
+        order_key = None
+        if msg["method"] in SESSION_ORDERED_METHODS:
+            params = msg.get("params")
+            order_key = params.get("sessionId", "") if isinstance(params, dict) else ""
+
+        task = asyncio.create_task(self._run(request_id, data, order_key))
+        self._tasks.add(task)
+        if request_id is not None:
+            self._requests[request_id] = task
+
+    def cancel(self, request_id) -> bool:
+        """
+        Cancel an in-flight request.
+
+        Returns:
+            True if a running or waiting request was cancelled
+        """
+        task = self._requests.get(request_id)
+        if task is None or task.done():
+            return False
+        logger.info(f"Cancelling request {request_id}")
+        task.cancel()
+        return True
+
+    async def close(self) -> None:
+        """Cancel every in-flight request, e.g. when the connection closes."""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, request_id, data: str, order_key) -> None:
+        response = None
+        try:
+            async with self._acquire_order(order_key):
+                async with self._semaphore:
+                    response = await self.handle_message(self.websocket, data)
+        except asyncio.CancelledError:
+            if request_id is not None:
+                response = _error(request_id, REQUEST_CANCELLED, "Request cancelled")
+        except Exception as e:
+            logger.error(f"Unhandled exception processing request {request_id}: {e}")
+            if request_id is not None:
+                response = _error(request_id, -32603, "Internal error")
+        finally:
+            self._tasks.discard(asyncio.current_task())
+            if self._requests.get(request_id) is asyncio.current_task():
+                del self._requests[request_id]
+        await self._send(response)
+
+    def _acquire_order(self, order_key):
+        if order_key is None:
+            return nullcontext()
+        return _OrderedSection(self, order_key)
+
+    async def _send(self, response: Optional[Dict[str, Any]]) -> None:
+        if not response:
+            return
+        try:
+            await self.send_response(response)
+        except Exception as e:
+            logger.debug(f"Could not send response {response.get('id')}: {e}")
+
+
+class _OrderedSection:
+    """Holds a session's ordering lock, dropping the lock once nobody needs it."""
+
+    def __init__(self, multiplexer: RequestMultiplexer, key):
+        self.multiplexer = multiplexer
+        self.key = key
+
+    async def __aenter__(self):
+        mux = self.multiplexer
+        self.lock = mux._order_locks.setdefault(self.key, asyncio.Lock())
+        mux._order_refs[self.key] = mux._order_refs.get(self.key, 0) + 1
+        try:
+            await self.lock.acquire()
+        except BaseException:
+            self._release_ref()
+            raise
+
+    async def __aexit__(self, *exc):
+        self.lock.release()
+        self._release_ref()
+
+    def _release_ref(self):
+        mux = self.multiplexer
+        mux._order_refs[self.key] -= 1
+        if mux._order_refs[self.key] == 0:
+            del mux._order_refs[self.key]
+            del mux._order_locks[self.key]
@@ -0,0 +1,371 @@
+"""
+Per-connection outbound message queue for the interactive server.
+
+Every WebSocket connection gets one writer task that drains a bounded
+queue, so a slow client no longer stalls the AI loop producing
+notifications for it. While messages wait in the queue:
+
+- Adjacent ``AIMessageChunkNotification`` chunks for the same session are
+  merged into a single frame.
+- Superseded ``StreamingUpdate`` (cumulative content) and continuation
+  progress updates are replaced by the newest one.
+
+When the queue stays full for longer than ``full_timeout`` the producer
+is released and the connection is closed, rather than buffering without
+bound. Queue depth and send latency are tracked per connection.
+
+Key Components:
+- SendQueue: Bounded queue with a writer task, coalescing and backpressure
+- register_send_queue / unregister_send_queue: Connection lifecycle
+- send_message: Send through the connection's queue, or directly if none
+- get_send_queue_stats: Metrics across all open connections
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from ai_whisperer.utils import json_codec
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_QUEUE_SIZE = 1000
+DEFAULT_FULL_TIMEOUT = 10.0
+DEFAULT_LATENCY_WINDOW = 1000
+
+# WebSocket close code 1013: "Try Again Later"
+CLOSE_CODE_OVERLOADED = 1013
+
+_REPLACE = "replace"
+_APPEND = "append"
+
+# Notifications whose newer version makes a pending older one redundant
+_PROGRESS_METHODS = {"continuation.progress", "ContinuationProgressNotification"}
+
+
+def _coalesce_key(message: Dict[str, Any]) -> Tuple[Optional[str], Optional[tuple]]:
+    """Return (mode, key) for messages that may be merged while queued."""
+    if "id" in message:
+        return None, None
+    params = message.get("params")
+    if not isinstance(params, dict):
+        return None, None
+    method = message.get("method")
+    if method == "StreamingUpdate" and params.get("isPartial"):
+        return _REPLACE, (method, params.get("sessionId"), params.get("agentId"))
+    if method in _PROGRESS_METHODS:
+        return _REPLACE, (method, params.get("sessionId"), params.get("agent_id"))
+    if method == "AIMessageChunkNotification":
+        return _APPEND, (method, params.get("sessionId"))
+    return None, None
+
+
+def _percentile(values, pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class _Entry:
+    __slots__ = ("message", "mode", "key", "enqueued_at", "dropped")
+
+    def __init__(self, message, mode, key):
+        self.message = message
+        self.mode = mode
+        self.key = key
+        self.enqueued_at = time.perf_counter()
+        self.dropped = False
+
+
+class SendQueueClosed(RuntimeError):
+    """Raised when sending through a queue whose connection has been closed."""
+
+
+class SendQueue:
+    """Bounded outbound queue drained by a single writer task."""
+
+    def __init__(self, websocket, max_size: int = DEFAULT_MAX_QUEUE_SIZE,
+                 full_timeout: float = DEFAULT_FULL_TIMEOUT,
+                 latency_window: int = DEFAULT_LATENCY_WINDOW):
+        """
+        Initialize the queue.
+
+        Args:
+            websocket: Connection with an async ``send_text`` (and ``close``)
+            max_size: Maximum number of pending messages
+            full_timeout: Seconds a producer may wait for space before the
+                connection is closed
+            latency_window: Number of recent sends kept for latency percentiles
+        """
+        self.websocket = websocket
+        self.max_size = max(1, max_size)
+        self.full_timeout = full_timeout
+
+        self._queue: Deque[_Entry] = deque()
+        self._pending: Dict[tuple, _Entry] = {}
+        self._depth = 0
+        self._has_items = asyncio.Event()
+        self._has_space = asyncio.Event()
+        self._has_space.set()
+        self._writer: Optional[asyncio.Task] = None
+        self._closed = False
+        self._draining = False
+
+        self._queue_latency: Deque[float] = deque(maxlen=latency_window)
+        self._send_latency: Deque[float] = deque(maxlen=latency_window)
+        self._counters = {
+            "enqueued": 0,
+            "sent": 0,
+            "coalesced": 0,
+            "superseded": 0,
+            "backpressure_waits": 0,
+            "send_errors": 0,
+        }
+        self._max_depth = 0
+        self.disconnect_reason: Optional[str] = None
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def depth(self) -> int:
+        """Number of messages waiting to be sent."""
+        return self._depth
+
+    def start(self) -> "SendQueue":
+        """Start the writer task."""
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._run_writer())
+        return self
+
+    async def send(self, message: Dict[str, Any]) -> None:
+        """
+        Queue a JSON-RPC message for sending.
+
+        Returns once the message is queued (or merged into a queued one). If
+        the queue is full, waits for space for up to ``full_timeout`` seconds
+        and then closes the connection.
+
+        Raises:
+            SendQueueClosed: If the connection has been closed
+        """
+        if self._closed or self._draining:
+            raise SendQueueClosed("WebSocket send queue closed")
+
+        mode, key = _coalesce_key(message)
+        self._counters["enqueued"] += 1
+        if mode and self._coalesce(message, mode, key):
+            return
+
+        while self._depth >= self.max_size:
+            self._counters["backpressure_waits"] += 1
+            self._has_space.clear()
+            try:
+                await asyncio.wait_for(self._has_space.wait(), timeout=self.full_timeout)
+            except asyncio.TimeoutError:
+                await self._disconnect(f"send queue full for {self.full_timeout}s")
+            if self._closed:
+                raise SendQueueClosed("WebSocket send queue closed")
+
+        if mode == _APPEND:
+            # Chunks are merged into the queued message later, so never mutate the caller's dicts
+            message = {**message, "params": dict(message["params"])}
+        entry = _Entry(message, mode, key)
+        self._queue.append(entry)
+        if mode == _REPLACE or (mode == _APPEND and not message["params"].get("isFinal")):
+            self._pending[key] = entry
+        self._depth += 1
+        self._max_depth = max(self._max_depth, self._depth)
+        self._has_items.set()
+
+    def _coalesce(self, message: Dict[str, Any], mode: str, key: tuple) -> bool:
+        """Merge a message into a queued one. Returns True if nothing new needs queueing."""
+        pending = self._pending.get(key)
+        if pending is None or pending.dropped:
+            return False
+
+        if mode == _APPEND:
+            # Only merge with the last queued message so ordering is preserved
+            if not self._queue or self._queue[-1] is not pending:
+                return False
+            params = message["params"]
+            pending.message["params"]["chunk"] += params.get("chunk", "")
+            if params.get("isFinal"):
+                pending.message["params"]["isFinal"] = True
+                del self._pending[key]
+            self._counters["coalesced"] += 1
+            return True
+
+        self._counters["superseded"] += 1
+        if self._queue and self._queue[-1] is pending:
+            pending.message = message
+            return True
+
+        # Drop the stale update and queue the new one at the back
+        pending.dropped = True
+        pending.message = None
+        del self._pending[key]
+        self._depth -= 1
+        if len(self._queue) > 2 * self.max_size:
+            self._queue = deque(e for e in self._queue if not e.dropped)
+        return False
+
+    async def _run_writer(self) -> None:
+        try:
+            while True:
+                if not self._queue:
+                    if self._closed or self._draining:
+                        return
+                    self._has_items.clear()
+                    await self._has_items.wait()
+                    continue
+
+                entry = self._queue.popleft()
+                if entry.dropped:
+                    continue
+                if self._pending.get(entry.key) is entry:
+                    del self._pending[entry.key]
+                self._depth -= 1
+                self._has_space.set()
+
+                text = json_codec.dumps(entry.message)
+                send_start = time.perf_counter()
+                await self.websocket.send_text(text)
+                sent_at = time.perf_counter()
+                self._send_latency.append(sent_at - send_start)
+                self._queue_latency.append(sent_at - entry.enqueued_at)
+                self._counters["sent"] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._counters["send_errors"] += 1
+            logger.warning(f"WebSocket writer stopped after send error: {e}")
+            self._mark_closed(f"send error: {e}")
+
+    def _mark_closed(self, reason: str) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self.disconnect_reason = reason
+        self._queue.clear()
+        self._pending.clear()
+        self._depth = 0
+        # Release producers waiting for space and an idle writer
+        self._has_space.set()
+        self._has_items.set()
+
+    async def _disconnect(self, reason: str) -> None:
+        logger.warning(f"Closing slow WebSocket connection: {reason}")
+        self._mark_closed(reason)
+        if self._writer is not None:
+            self._writer.cancel()
+        try:
+            await self.websocket.close(code=CLOSE_CODE_OVERLOADED)
+        except Exception as e:
+            logger.debug(f"Error closing WebSocket after backpressure timeout: {e}")
+
+    async def close(self, drain_timeout: float = 0.0) -> None:
+        """
+        Stop the writer task.
+
+        Args:
+            drain_timeout: Seconds to let queued messages go out first
+        """
+        if drain_timeout > 0 and self._writer is not None and not self._closed:
+            self._draining = True
+            self._has_items.set()
+            try:
+                await asyncio.wait_for(asyncio.shield(self._writer), timeout=drain_timeout)
+            except Exception:
+                pass
+        self._mark_closed(self.disconnect_reason or "closed")
+        if self._writer is not None:
+            self._writer.cancel()
+            try:
+                await self._writer
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._writer = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth, counters and send latency percentiles (seconds)."""
+        return {
+            "depth": self._depth,
+            "max_depth": self._max_depth,
+            "max_size": self.max_size,
+            "closed": self._closed,
+            **self._counters,
+            "queue_latency_p50": _percentile(self._queue_latency, 50),
+            "queue_latency_p95": _percentile(self._queue_latency, 95),
+            "send_latency_p50": _percentile(self._send_latency, 50),
+            "send_latency_p95": _percentile(self._send_latency, 95),
+        }
+
+
+# Open connections and their queues
+_queues: Dict[Any, SendQueue] = {}
+
+
+def register_send_queue(websocket, **kwargs) -> SendQueue:
+    """Create and start the send queue for a new connection."""
+    queue = SendQueue(websocket, **kwargs).start()
+    _queues[websocket] = queue
+    return queue
+
+
+def get_send_queue(websocket) -> Optional[SendQueue]:
+    """Get the send queue for a connection, if it has one."""
+    if websocket is None:
+        return None
+    return _queues.get(websocket)
+
+
+async def unregister_send_queue(websocket, drain_timeout: float = 0.0) -> None:
+    """Stop and forget the send queue for a closed connection."""
+    queue = _queues.pop(websocket, None)
+    if queue is not None:
+        await queue.close(drain_timeout=drain_timeout)
+
+
+async def send_message(websocket, message: Dict[str, Any]) -> None:
+    """
+    Send a JSON-RPC message to a connection.
+
+    Goes through the connection's send queue when it has one (connections
+    accepted by the server endpoint), otherwise sends directly.
+    """
+    queue = get_send_queue(websocket)
+    if queue is not None:
+        await queue.send(message)
+    else:
+        await websocket.send_json(message)
+
+
+def get_send_queue_stats(websocket=None) -> Dict[str, Any]:
+    """
+    Get send queue metrics.
+
+    Args:
+        websocket: Optional connection to include detailed stats for
+
+    Returns:
+        Totals across open connections, plus the given connection's stats
+    """
+    all_stats = [queue.get_stats() for queue in _queues.values()]
+    totals = {
+        "connections": len(all_stats),
+        "depth": sum(s["depth"] for s in all_stats),
+        "max_depth": max((s["max_depth"] for s in all_stats), default=0),
+    }
+    for counter in ("enqueued", "sent", "coalesced", "superseded", "backpressure_waits", "send_errors"):
+        totals[counter] = sum(s[counter] for s in all_stats)
+
+    result = {"totals": totals}
+    queue = get_send_queue(websocket)
+    if queue is not None:
+        result["connection"] = queue.get_stats()
+    return result
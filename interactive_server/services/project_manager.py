@@ -14,6 +14,7 @@ from ..models.project import (
     ProjectHistory, UISettings, ProjectSettings
 )
 from ai_whisperer.utils.path import PathManager
+from ai_whisperer.utils.state_journal import StateJournal
 
 
 logger = logging.getLogger(__name__)
@@ -29,6 +30,7 @@ class ProjectManager:
         self.history_file = self.data_dir / "project_history.json"
         self.ui_settings_file = self.data_dir / "ui_settings.json"
         self.active_project: Optional[Project] = None
+        self._projects_journal = StateJournal(self.projects_file, pretty_snapshot=True)
         
         # Ensure data directory exists
         self.data_dir.mkdir(parents=True, exist_ok=True)
@@ -45,25 +47,31 @@ class ProjectManager:
             return self.projects
             
         try:
-            with open(self.projects_file, 'r') as f:
-                data = json.load(f)
-                self.projects = {
-                    pid: Project(**pdata) for pid, pdata in data.items()
-                }
+            data = self._projects_journal.load()
+            self.projects = {
+                pid: Project(**pdata) for pid, pdata in data.items()
+            }
         except Exception as e:
             logger.error(f"Failed to load projects: {e}")
             self.projects = {}
         
         return self.projects
     
+    def close(self):
+        """Fold pending project changes into projects.json so it can be read directly."""
+        try:
+            self._projects_journal.close()
+        except Exception as e:
+            logger.error(f"Failed to compact projects: {e}")
+    
     def _save_projects(self):
         """Save projects to disk."""
         try:
             data = {
-                pid: proj.model_dump() for pid, proj in self.projects.items()
+                pid: proj.model_dump(mode="json") for pid, proj in self.projects.items()
             }
-            with open(self.projects_file, 'w') as f:
-                json.dump(data, f, indent=2, default=str)
+            # Appends only the projects that changed; compacted into projects.json periodically and on close()
+            self._projects_journal.save(data)
         except Exception as e:
             logger.error(f"Failed to save projects: {e}")
     
@@ -0,0 +1,281 @@
+"""
+Event bus for interactive session activity.
+
+Monitors used to find out what sessions were doing by polling them:
+DebbieMonitor re-inspected every monitored session every few seconds and
+DebbieObserver re-checked every session's patterns on a timer, so their
+cost grew with the number of sessions and a stall was only noticed on the
+next poll. Sessions now publish what happens to them - lifecycle, messages,
+streamed chunks, tool calls and errors - and monitors subscribe:
+
+- ``publish()`` is synchronous and cheap: with no subscribers it returns
+  at once, otherwise it appends the event to each matching subscription's
+  bounded queue (dropping that subscription's oldest event when it is
+  full, so a slow monitor never holds up a session) and wakes its consumer
+- a Subscription is consumed with ``await get()`` or ``async for``
+- DeadlineTimers calls back when a key (a session) has been idle for a
+  timeout; activity only records a time, and the one timer per key is
+  rescheduled when it fires, so an active session costs no timer churn
+
+The bus is meant to be used from the event loop thread; events published
+from another thread are handed to a waiting consumer with
+``call_soon_threadsafe``.
+
+Key Components:
+- SessionEventType: Kinds of session events
+- SessionEvent: One published event
+- SessionEventBus: Publishes events to subscriptions
+- Subscription: Bounded queue of events for one subscriber
+- DeadlineTimers: Per-key idle deadlines
+- get_session_event_bus(): Bus shared by the server's sessions
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Callable, Deque, Dict, Hashable, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SessionEventType(Enum):
+    """Kinds of events sessions publish"""
+    SESSION_STARTED = "session_started"
+    SESSION_ENDED = "session_ended"
+    MESSAGE_START = "message_start"
+    MESSAGE_COMPLETE = "message_complete"
+    STREAM_CHUNK = "stream_chunk"
+    TOOL_CALL = "tool_call"
+    AGENT_SWITCH = "agent_switch"
+    ERROR = "error"
+
+
+@dataclass
+class SessionEvent:
+    """An event published by a session"""
+    type: SessionEventType
+    session_id: str
+    data: Dict[str, Any] = field(default_factory=dict)
+    timestamp: float = field(default_factory=time.time)
+
+
+class Subscription:
+    """
+    Bounded queue of the events one subscriber has not consumed yet.
+
+    Args:
+        bus: The bus this subscription receives from
+        name: Subscriber name, for stats and logs
+        types: Event types delivered (all when None)
+        maxsize: Events kept before the oldest are dropped
+    """
+
+    def __init__(self, bus: 'SessionEventBus', name: str,
+                 types: Optional[Iterable[SessionEventType]] = None, maxsize: int = 1000):
+        self.bus = bus
+        self.name = name
+        self.types = frozenset(types) if types is not None else None
+        self.maxsize = maxsize
+        self._queue: Deque[SessionEvent] = deque(maxlen=maxsize)
+        self._waiter: Optional[asyncio.Future] = None
+        self.closed = False
+        self.stats = {"delivered": 0, "dropped": 0}
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def _deliver(self, event: SessionEvent) -> None:
+        if len(self._queue) >= self.maxsize:
+            self.stats["dropped"] += 1
+        self._queue.append(event)
+        self.stats["delivered"] += 1
+        self._wake()
+
+    def _wake(self) -> None:
+        waiter = self._waiter
+        if waiter is None or waiter.done():
+            return
+        loop = waiter.get_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            waiter.set_result(None)
+        else:
+            loop.call_soon_threadsafe(_resolve, waiter)
+
+    async def get(self) -> Optional[SessionEvent]:
+        """The next event, waiting for one if needed; None once the subscription is closed."""
+        while not self._queue:
+            if self.closed:
+                return None
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        return self._queue.popleft()
+
+    def get_nowait(self) -> Optional[SessionEvent]:
+        return self._queue.popleft() if self._queue else None
+
+    def drain(self) -> List[SessionEvent]:
+        """Every queued event, oldest first, leaving the queue empty."""
+        events = list(self._queue)
+        self._queue.clear()
+        return events
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> SessionEvent:
+        event = await self.get()
+        if event is None:
+            raise StopAsyncIteration
+        return event
+
+    def close(self) -> None:
+        """Stop receiving events; a consumer waiting in get() receives None."""
+        self.bus.unsubscribe(self)
+        self.closed = True
+        self._wake()
+
+
+def _resolve(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class SessionEventBus:
+    """Publishes session events to every matching subscription"""
+
+    def __init__(self):
+        self._subscriptions: List[Subscription] = []
+        self.stats = {"published": 0}
+
+    def subscribe(self, name: str, types: Optional[Iterable[SessionEventType]] = None,
+                  maxsize: int = 1000) -> Subscription:
+        """Subscribe to events of ``types`` (all when None), queued up to ``maxsize``."""
+        subscription = Subscription(self, name, types, maxsize)
+        # Copy on write: publish() iterates the list without a lock
+        self._subscriptions = self._subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscriptions = [s for s in self._subscriptions if s is not subscription]
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscriptions)
+
+    def publish(self, event_type: SessionEventType, session_id: str, **data: Any) -> None:
+        """Publish an event; returns at once, whether or not anyone consumes it."""
+        subscriptions = self._subscriptions
+        if not subscriptions:
+            return
+        event = SessionEvent(event_type, session_id, data)
+        self.stats["published"] += 1
+        for subscription in subscriptions:
+            if subscription.types is None or event_type in subscription.types:
+                subscription._deliver(event)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "subscriptions": {s.name: {**s.stats, "queued": len(s)} for s in self._subscriptions},
+        }
+
+
+class DeadlineTimers:
+    """
+    Calls back when a key has had no activity for ``timeout`` seconds.
+
+    ``touch()`` only records the time of the activity. Each key has at most
+    one pending timer; when it fires early (the key was touched since it was
+    set) it is set again for the remaining time, and when the deadline has
+    really passed ``callback(key, idle_seconds)`` is called. The deadline
+    is then re-armed only by the key's next activity.
+
+    Args:
+        timeout: Seconds without activity before the callback
+        callback: Called with the key and the seconds it has been idle
+        loop: Event loop to schedule timers on (the running loop when None)
+    """
+
+    def __init__(self, timeout: float, callback: Callable[[Hashable, float], Any],
+                 loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.timeout = timeout
+        self.callback = callback
+        self._loop = loop
+        self._last_activity: Dict[Hashable, float] = {}
+        self._timers: Dict[Hashable, asyncio.TimerHandle] = {}
+        self.stats = {"expired": 0, "rearmed": 0}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._last_activity
+
+    def touch(self, key: Hashable) -> None:
+        """Record activity for ``key``, arming its deadline if none is pending."""
+        loop = self._loop or asyncio.get_running_loop()
+        self._last_activity[key] = loop.time()
+        if key not in self._timers:
+            self._timers[key] = loop.call_later(self.timeout, self._check, key)
+
+    def idle_seconds(self, key: Hashable) -> Optional[float]:
+        last = self._last_activity.get(key)
+        if last is None:
+            return None
+        return (self._loop or asyncio.get_running_loop()).time() - last
+
+    def _check(self, key: Hashable) -> None:
+        self._timers.pop(key, None)
+        last = self._last_activity.get(key)
+        if last is None:
+            return
+        loop = self._loop or asyncio.get_running_loop()
+        idle = loop.time() - last
+        if idle < self.timeout:
+            self.stats["rearmed"] += 1
+            self._timers[key] = loop.call_later(self.timeout - idle, self._check, key)
+            return
+        self.stats["expired"] += 1
+        try:
+            result = self.callback(key, idle)
+            if asyncio.iscoroutine(result):
+                loop.create_task(result)
+        except Exception as e:
+            logger.error(f"Error in deadline callback for {key}: {e}")
+
+    def remove(self, key: Hashable) -> None:
+        """Forget ``key`` and cancel its deadline."""
+        self._last_activity.pop(key, None)
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+
+    def clear(self) -> None:
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        self._last_activity.clear()
+
+
+_session_event_bus: Optional[SessionEventBus] = None
+
+
+def get_session_event_bus() -> SessionEventBus:
+    """Get the event bus shared by the server's sessions."""
+    global _session_event_bus
+    if _session_event_bus is None:
+        _session_event_bus = SessionEventBus()
+    return _session_event_bus
+
+
+def reset_session_event_bus() -> None:
+    """Reset the shared event bus (for testing)."""
+    global _session_event_bus
+    _session_event_bus = None
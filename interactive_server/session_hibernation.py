@@ -0,0 +1,341 @@
+"""
+Idle-session hibernation.
+
+Every session keeps its agents, context histories and AI loops in memory
+for as long as it exists, even when nobody has used it for hours. The
+hibernator writes sessions that have been idle for ``idle_timeout``
+seconds to compressed files (``get_state()`` output, gzip-compressed JSON)
+and drops them from memory. The next request naming the session, by
+``sessionId`` or through its WebSocket, restores it with ``restore_state()``
+before the handler runs, so clients never see the difference. The state
+leaves out API settings; restored agents take them from the server config. Stopping
+a session, or closing its connection, deletes its hibernated state, and
+files older than ``max_age`` (sessions nobody came back to) are purged
+when the hibernator starts.
+
+Configuration (``session_hibernation`` in the config file):
+    enabled: true
+    idle_timeout: 1800      # seconds without requests before hibernating
+    check_interval: 60      # seconds between idle scans
+    max_age: 604800         # seconds a hibernated session is kept; 0 keeps them forever
+    storage_dir: .WHISPER/hibernated
+
+AIWHISPERER_HIBERNATE_AFTER overrides idle_timeout; an empty value or 0
+disables hibernation.
+
+Key Components:
+- HibernationStore: Compressed per-session state files
+- SessionHibernator: Idle tracking, hibernation and rehydration metrics
+- create_hibernator: Build a hibernator from configuration
+"""
+
+import asyncio
+import gzip
+import logging
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from ai_whisperer.utils import json_codec
+
+logger = logging.getLogger(__name__)
+
+HIBERNATE_AFTER_ENV = "AIWHISPERER_HIBERNATE_AFTER"
+
+DEFAULT_IDLE_TIMEOUT = 1800.0
+DEFAULT_CHECK_INTERVAL = 60.0
+DEFAULT_MAX_AGE = 7 * 24 * 3600.0
+DEFAULT_STORAGE_DIR = ".WHISPER/hibernated"
+
+
+class HibernationStore:
+    """Gzip-compressed session state files, one per session."""
+
+    def __init__(self, directory: Union[str, Path], compresslevel: int = 6):
+        self.directory = Path(directory)
+        self.compresslevel = compresslevel
+
+    def path(self, session_id: str) -> Path:
+        return self.directory / f"{session_id}.json.gz"
+
+    def save(self, session_id: str, state: Dict[str, Any]) -> int:
+        """
+        Write a session's state atomically.
+
+        Returns:
+            Compressed size in bytes
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        data = gzip.compress(json_codec.dumpb(state, default=str), compresslevel=self.compresslevel)
+        path = self.path(session_id)
+        temp_path = path.with_suffix(".tmp")
+        temp_path.write_bytes(data)
+        temp_path.replace(path)
+        return len(data)
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Read a session's state, or None if it is not hibernated."""
+        try:
+            data = self.path(session_id).read_bytes()
+        except FileNotFoundError:
+            return None
+        return json_codec.loads(gzip.decompress(data))
+
+    def contains(self, session_id: str) -> bool:
+        return self.path(session_id).exists()
+
+    def delete(self, session_id: str) -> None:
+        self.path(session_id).unlink(missing_ok=True)
+
+    def list_sessions(self) -> List[str]:
+        if not self.directory.exists():
+            return []
+        return [p.name[:-len(".json.gz")] for p in self.directory.glob("*.json.gz")]
+
+    def purge(self, max_age: float, now: Optional[float] = None) -> int:
+        """
+        Delete state files (and leftover temporary files) last written more than ``max_age`` seconds ago.
+
+        Returns:
+            Number of files deleted
+        """
+        if not self.directory.exists():
+            return 0
+        cutoff = (time.time() if now is None else now) - max_age
+        count = 0
+        for path in [*self.directory.glob("*.json.gz"), *self.directory.glob("*.tmp")]:
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    count += 1
+            except FileNotFoundError:
+                pass
+        return count
+
+    def size(self) -> int:
+        """Total bytes used by hibernated sessions."""
+        if not self.directory.exists():
+            return 0
+        return sum(p.stat().st_size for p in self.directory.glob("*.json.gz"))
+
+
+class SessionHibernator:
+    """Moves idle sessions of a StatelessSessionManager to disk and back."""
+
+    def __init__(self, manager, store: HibernationStore, idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+                 check_interval: float = DEFAULT_CHECK_INTERVAL, max_age: float = DEFAULT_MAX_AGE,
+                 latency_window: int = 200):
+        """
+        Initialize the hibernator.
+
+        Args:
+            manager: The StatelessSessionManager whose sessions are managed
+            store: Where hibernated state is written
+            idle_timeout: Seconds without activity before a session hibernates
+            check_interval: Seconds between idle scans
+            max_age: Seconds a hibernated session is kept before it is purged; 0 for no limit
+            latency_window: Number of recent rehydrations kept for latency stats
+        """
+        self.manager = manager
+        self.store = store
+        self.idle_timeout = idle_timeout
+        self.check_interval = check_interval
+        self.max_age = max_age
+
+        self._last_active: Dict[str, float] = {}
+        self._busy: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._rehydrate_latencies = deque(maxlen=latency_window)
+        self.hibernations = 0
+        self.rehydrations = 0
+        self.bytes_written = 0
+
+    def touch(self, session_id: str) -> None:
+        """Record activity on a session."""
+        self._last_active[session_id] = time.monotonic()
+
+    def forget(self, session_id: str, delete_state: bool = True) -> None:
+        """Stop tracking a session and, optionally, delete its hibernated state."""
+        self._last_active.pop(session_id, None)
+        self._busy.pop(session_id, None)
+        if delete_state:
+            self.store.delete(session_id)
+
+    def is_hibernated(self, session_id: str) -> bool:
+        return session_id not in self.manager.sessions and self.store.contains(session_id)
+
+    @asynccontextmanager
+    async def activity(self, session_id: str):
+        """Mark a session busy (never hibernated) for the duration of a request."""
+        self._busy[session_id] = self._busy.get(session_id, 0) + 1
+        self.touch(session_id)
+        try:
+            yield
+        finally:
+            self.touch(session_id)
+            remaining = self._busy.get(session_id, 1) - 1
+            if remaining > 0:
+                self._busy[session_id] = remaining
+            else:
+                self._busy.pop(session_id, None)
+
+    def idle_sessions(self, now: Optional[float] = None) -> List[str]:
+        """Sessions in memory that have had no activity for idle_timeout seconds."""
+        now = time.monotonic() if now is None else now
+        idle = []
+        for session_id in list(self.manager.sessions):
+            if self._busy.get(session_id):
+                continue
+            last_active = self._last_active.setdefault(session_id, now)
+            if now - last_active >= self.idle_timeout:
+                idle.append(session_id)
+        return idle
+
+    async def hibernate(self, session_id: str) -> bool:
+        """
+        Write a session to disk and drop it from memory.
+
+        Returns:
+            True if the session was hibernated; False if it is busy or unknown
+        """
+        async with self.manager._lock:
+            session = self.manager.sessions.get(session_id)
+            if session is None or self._busy.get(session_id):
+                return False
+            state = await session.get_state()
+            state["hibernated_at"] = time.time()
+            size = await asyncio.to_thread(self.store.save, session_id, state)
+            if self._busy.get(session_id):
+                # A request arrived while the state was being written
+                await asyncio.to_thread(self.store.delete, session_id)
+                return False
+            del self.manager.sessions[session_id]
+            await session.release_resources()
+            # The WebSocket mapping is kept so the next request on it rehydrates the session
+
+        self.hibernations += 1
+        self.bytes_written += size
+        logger.info(f"Hibernated idle session {session_id} ({size} bytes)")
+        return True
+
+    async def load_state(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Read a hibernated session's state, or None if it is not hibernated."""
+        return await asyncio.to_thread(self.store.load, session_id)
+
+    async def rehydrated(self, session_id: str, elapsed: float) -> None:
+        """Record that a session is back in memory and delete its hibernated state."""
+        await asyncio.to_thread(self.store.delete, session_id)
+        self.rehydrations += 1
+        self._rehydrate_latencies.append(elapsed)
+        self.touch(session_id)
+        logger.info(f"Rehydrated session {session_id} in {elapsed * 1000:.1f}ms")
+
+    async def hibernate_idle(self) -> int:
+        """
+        Hibernate every idle session.
+
+        Returns:
+            Number of sessions hibernated
+        """
+        count = 0
+        for session_id in self.idle_sessions():
+            try:
+                if await self.hibernate(session_id):
+                    count += 1
+            except Exception as e:
+                logger.error(f"Failed to hibernate session {session_id}: {e}")
+        return count
+
+    async def purge_expired(self) -> int:
+        """
+        Delete hibernated sessions older than max_age.
+
+        Returns:
+            Number of files deleted
+        """
+        if not self.max_age:
+            return 0
+        try:
+            count = await asyncio.to_thread(self.store.purge, self.max_age)
+        except OSError as e:
+            logger.error(f"Failed to purge expired hibernated sessions: {e}")
+            return 0
+        if count:
+            logger.info(f"Purged {count} expired hibernated session files")
+        return count
+
+    async def _run(self) -> None:
+        await self.purge_expired()
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.hibernate_idle()
+
+    def start(self) -> None:
+        """Purge expired hibernated sessions, then start the periodic idle scan on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic idle scan."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hibernation counters and rehydration latency percentiles (ms)."""
+        latencies = sorted(self._rehydrate_latencies)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+
+        return {
+            "idle_timeout": self.idle_timeout,
+            "active_sessions": len(self.manager.sessions),
+            "hibernated_sessions": len(self.store.list_sessions()),
+            "hibernations": self.hibernations,
+            "rehydrations": self.rehydrations,
+            "bytes_written": self.bytes_written,
+            "rehydrate_p50_ms": percentile(0.5),
+            "rehydrate_p95_ms": percentile(0.95),
+            "rehydrate_max_ms": latencies[-1] * 1000 if latencies else 0.0,
+        }
+
+
+def create_hibernator(manager, config: Optional[dict]) -> Optional[SessionHibernator]:
+    """
+    Build the hibernator for a session manager from configuration.
+
+    Returns:
+        The hibernator, or None if hibernation is disabled
+    """
+    settings = (config or {}).get("session_hibernation") or {}
+    if not settings.get("enabled", True):
+        return None
+
+    idle_timeout = float(settings.get("idle_timeout", DEFAULT_IDLE_TIMEOUT))
+    override = os.environ.get(HIBERNATE_AFTER_ENV)
+    if override is not None:
+        try:
+            idle_timeout = float(override) if override.strip() else 0.0
+        except ValueError:
+            logger.warning(f"Ignoring invalid {HIBERNATE_AFTER_ENV}={override!r}")
+    if idle_timeout <= 0:
+        return None
+
+    store = HibernationStore(settings.get("storage_dir", DEFAULT_STORAGE_DIR))
+    return SessionHibernator(
+        manager,
+        store,
+        idle_timeout=idle_timeout,
+        check_interval=float(settings.get("check_interval", min(DEFAULT_CHECK_INTERVAL, idle_timeout))),
+        max_age=float(settings.get("max_age", DEFAULT_MAX_AGE)),
+    )
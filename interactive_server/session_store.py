@@ -0,0 +1,193 @@
+"""
+Shared session store for multi-process deployments.
+
+When the server runs as several worker processes (see supervisor.py), each
+worker persists its sessions' state here so that a session can be resumed
+on another worker after its owner crashes. The store is a single SQLite
+database in WAL mode, which lets every worker read while one writes.
+
+Each row records the serialized session state (``get_state()`` output) and
+the worker currently owning the session. The supervisor uses the owner to
+route reconnecting clients back to the same worker, and releases a dead
+worker's sessions so any worker may claim them.
+
+The store is off unless AIWHISPERER_SESSION_STORE names a database file;
+a single-process server keeps sessions in memory only.
+
+Key Components:
+- SQLiteSessionStore: WAL-mode session state and ownership table
+- get_session_store / reset_session_store: Process-wide store from the environment
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from ai_whisperer.utils import json_codec
+
+logger = logging.getLogger(__name__)
+
+SESSION_STORE_ENV = "AIWHISPERER_SESSION_STORE"
+WORKER_ID_ENV = "AIWHISPERER_WORKER_ID"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    state BLOB NOT NULL,
+    worker_id TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_worker ON sessions(worker_id);
+CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions(updated_at);
+"""
+
+
+class SQLiteSessionStore:
+    """Session state and ownership shared between worker processes."""
+
+    def __init__(self, path: Union[str, Path], busy_timeout: float = 5.0):
+        """
+        Open (or create) the store.
+
+        Args:
+            path: Database file; shared by every worker
+            busy_timeout: Seconds to wait for another process's write lock
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=busy_timeout, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL makes NORMAL durable across application crashes, which is what resume needs
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def save(self, session_id: str, state: Dict[str, Any], worker_id: Optional[str] = None) -> None:
+        """Store a session's state and mark it as owned by worker_id."""
+        data = json_codec.dumpb(state, default=str)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sessions (session_id, state, worker_id, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET state = excluded.state, "
+                "worker_id = excluded.worker_id, updated_at = excluded.updated_at",
+                (session_id, data, worker_id, time.time()),
+            )
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get a session's last saved state, or None if it was never saved."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return json_codec.loads(row[0]) if row else None
+
+    def owner(self, session_id: str) -> Optional[str]:
+        """Get the worker owning a session, or None if unowned or unknown."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT worker_id FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def claim(self, session_id: str, worker_id: str) -> bool:
+        """
+        Take ownership of a session, e.g. when resuming it on a new worker.
+
+        Returns:
+            True if the session exists
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE sessions SET worker_id = ?, updated_at = ? WHERE session_id = ?",
+                (worker_id, time.time(), session_id),
+            )
+        return cursor.rowcount > 0
+
+    def release(self, session_id: str) -> None:
+        """Clear a session's owner so any worker may resume it."""
+        with self._lock:
+            self._conn.execute("UPDATE sessions SET worker_id = NULL WHERE session_id = ?", (session_id,))
+
+    def release_worker(self, worker_id: str) -> int:
+        """
+        Clear the owner of every session held by a worker that has exited.
+
+        Returns:
+            Number of sessions released
+        """
+        with self._lock:
+            cursor = self._conn.execute("UPDATE sessions SET worker_id = NULL WHERE worker_id = ?", (worker_id,))
+        return cursor.rowcount
+
+    def delete(self, session_id: str) -> None:
+        """Forget a session."""
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def prune(self, max_age: float) -> int:
+        """
+        Delete sessions not saved for max_age seconds.
+
+        Returns:
+            Number of sessions deleted
+        """
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM sessions WHERE updated_at < ?", (time.time() - max_age,))
+        return cursor.rowcount
+
+    def list_sessions(self) -> List[Dict[str, Any]]:
+        """Session ids with their owner and last save time, newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT session_id, worker_id, updated_at FROM sessions ORDER BY updated_at DESC"
+            ).fetchall()
+        return [{"session_id": r[0], "worker_id": r[1], "updated_at": r[2]} for r in rows]
+
+    def counts_by_worker(self) -> Dict[Optional[str], int]:
+        """Number of stored sessions per owning worker (None for unowned)."""
+        with self._lock:
+            rows = self._conn.execute("SELECT worker_id, COUNT(*) FROM sessions GROUP BY worker_id").fetchall()
+        return {worker_id: count for worker_id, count in rows}
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+_store: Optional[SQLiteSessionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> Optional[SQLiteSessionStore]:
+    """Get the process-wide store, or None if AIWHISPERER_SESSION_STORE is unset."""
+    global _store
+    if _store is None:
+        path = os.environ.get(SESSION_STORE_ENV, "")
+        if not path:
+            return None
+        with _store_lock:
+            if _store is None:
+                _store = SQLiteSessionStore(path)
+                logger.info(f"Using shared session store at {path}")
+    return _store
+
+
+def get_worker_id() -> Optional[str]:
+    """Id of this worker process when running under the supervisor."""
+    return os.environ.get(WORKER_ID_ENV) or None
+
+
+def reset_session_store() -> None:
+    """Close and forget the process-wide store (for testing)."""
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+        _store = None
@@ -0,0 +1,168 @@
+"""
+Startup-time profiler for the interactive server.
+
+Runs a fresh interpreter with ``python -X importtime``, parses the
+per-module timings it writes to stderr and reports the slowest imports,
+together with the chain of imports that pulled each one in, so the cause
+of a slow cold start can be found and made lazy.
+
+Usage:
+    python -m interactive_server.startup_profiler [--module interactive_server.main] [--top 25]
+    python -m interactive_server.main --profile-startup
+
+Key Components:
+- ImportTiming: One module's self and cumulative import time
+- parse_importtime: Parse ``-X importtime`` output
+- profile_startup: Import a module in a fresh interpreter and time it
+- format_report: Slowest imports by cumulative and self time
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DEFAULT_MODULE = "interactive_server.main"
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S.*)$")
+
+
+@dataclass
+class ImportTiming:
+    """Import time of one module, in microseconds."""
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+    parent: Optional["ImportTiming"] = field(default=None, repr=False, compare=False)
+
+
+@dataclass
+class StartupProfile:
+    """Result of profiling one cold import."""
+    module: str
+    wall_seconds: float
+    imports: List[ImportTiming]
+
+    def find(self, name: str) -> Optional[ImportTiming]:
+        """The timing for a module, or None if it was not imported."""
+        return next((timing for timing in self.imports if timing.name == name), None)
+
+    @staticmethod
+    def chain(timing: ImportTiming) -> List[str]:
+        """Import chain from the top-level module down to ``timing``."""
+        chain = []
+        while timing is not None:
+            chain.append(timing.name)
+            timing = timing.parent
+        return list(reversed(chain))
+
+
+def parse_importtime(output: str) -> List[ImportTiming]:
+    """
+    Parse the stderr of ``python -X importtime``.
+
+    Lines are written when a module finishes importing, so children come
+    before their parent; each line's parent is the next line one level up.
+
+    Returns:
+        Timings in the order they appear
+    """
+    timings = []
+    for line in output.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        timings.append(ImportTiming(name.strip(), int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+
+    pending: Dict[int, List[ImportTiming]] = {}
+    for timing in timings:
+        for child in pending.pop(timing.depth + 1, []):
+            child.parent = timing
+        pending.setdefault(timing.depth, []).append(timing)
+    return timings
+
+
+def profile_startup(module: str = DEFAULT_MODULE, python: Optional[str] = None,
+                    env: Optional[Dict[str, str]] = None, timeout: float = 120.0) -> StartupProfile:
+    """
+    Import a module in a fresh interpreter and time every import.
+
+    Args:
+        module: Module to import
+        python: Interpreter to run (defaults to the current one)
+        env: Extra environment variables
+        timeout: Seconds before giving up
+
+    Returns:
+        The wall-clock time of the import and per-module timings
+    """
+    project_root = Path(__file__).resolve().parent.parent
+    run_env = {**os.environ, **(env or {})}
+    run_env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(project_root), run_env.get("PYTHONPATH")]))
+    code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+
+    started = time.perf_counter()
+    result = subprocess.run(
+        [python or sys.executable, "-X", "importtime", "-c", code],
+        cwd=project_root, env=run_env, capture_output=True, text=True, timeout=timeout,
+    )
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    # The last stdout line is the import's own wall time; module-level prints may precede it
+    try:
+        wall_seconds = float(result.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        wall_seconds = elapsed
+    return StartupProfile(module, wall_seconds, parse_importtime(result.stderr))
+
+
+def format_report(profile: StartupProfile, top: int = 25) -> str:
+    """Human-readable report of the slowest imports."""
+    imports = profile.imports
+    lines = [f"Cold import of {profile.module}: {profile.wall_seconds * 1000:.0f}ms ({len(imports)} modules)", ""]
+
+    lines.append(f"Slowest by cumulative time (top {top}):")
+    # A package can appear more than once (its submodules are reported again); keep the slowest entry
+    slowest: Dict[str, ImportTiming] = {}
+    for timing in imports:
+        if timing.name != profile.module and timing.cumulative_us > getattr(slowest.get(timing.name), "cumulative_us", -1):
+            slowest[timing.name] = timing
+    for timing in sorted(slowest.values(), key=lambda t: t.cumulative_us, reverse=True)[:top]:
+        chain = profile.chain(timing)
+        via = " <- ".join(reversed(chain[:-1][-3:])) if len(chain) > 1 else ""
+        lines.append(f"  {timing.cumulative_us / 1000:8.1f}ms  {timing.name}" + (f"  (via {via})" if via else ""))
+
+    lines.append("")
+    lines.append(f"Slowest by self time (top {top}):")
+    for timing in sorted(imports, key=lambda t: t.self_us, reverse=True)[:top]:
+        lines.append(f"  {timing.self_us / 1000:8.1f}ms  {timing.name}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Report the slowest imports of an interactive server cold start")
+    parser.add_argument("--module", default=DEFAULT_MODULE, help="Module to import (default: %(default)s)")
+    parser.add_argument("--top", type=int, default=25, help="Number of imports to list")
+    parser.add_argument("--raw", action="store_true", help="Print the raw -X importtime output as well")
+    args = parser.parse_args(argv)
+
+    profile = profile_startup(args.module)
+    if args.raw:
+        for timing in profile.imports:
+            print(f"{timing.self_us:>10} | {timing.cumulative_us:>10} | {'  ' * timing.depth}{timing.name}")
+        print()
+    print(format_report(profile, top=args.top))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
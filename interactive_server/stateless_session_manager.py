@@ -8,7 +8,9 @@ import logging
 import uuid
 import json
 import re
-from typing import Dict, Optional, Any
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Any, Tuple
 from pathlib import Path
 from datetime import datetime
 
@@ -21,16 +23,28 @@ from ai_whisperer.services.execution.ai_loop import StatelessAILoop
 from ai_whisperer.services.execution.ai_config import AIConfig
 from ai_whisperer.services.ai.openrouter import OpenRouterAIService
 from ai_whisperer.services.agents.ai_loop_manager import AILoopManager
+from ai_whisperer.services.execution.usage_tracker import configure_usage_tracker, get_usage_tracker
 from ai_whisperer.services.execution.context import ContextManager
 from ai_whisperer.context.context_manager import AgentContextManager
 from ai_whisperer.utils.path import PathManager
+from ai_whisperer.utils import json_codec
+from ai_whisperer.utils.state_journal import StateJournal
 from .message_models import AIMessageChunkNotification, ContinuationProgressNotification
 from .debbie_observer import get_observer
+from .session_events import SessionEventType, get_session_event_bus
+from .send_queue import send_message
+from .session_store import get_session_store, get_worker_id
+from .session_hibernation import create_hibernator
 from .agent_switch_handler import AgentSwitchHandler
+from .agent_prewarm import AgentPrewarmer
 from ai_whisperer.channels.integration import get_channel_integration
+from ai_whisperer.extensions.mailbox.storage import create_retention_scheduler
 from ai_whisperer.core.agent_logger import get_agent_logger
+from ai_whisperer.core.log_pipeline import SampledLogger
 
 logger = logging.getLogger(__name__)
+# Per-chunk streaming messages, rate limited so token streams don't flood the logs
+chunk_logger = SampledLogger(logger)
 
 
 def clean_malformed_json(response: str) -> str:
@@ -168,13 +182,17 @@ class StatelessInteractiveSession:
         self.prompt_system = prompt_system
         self.project_path = project_path
         
+        # Activity is published to the event bus; observers subscribed to it follow it there
+        self.event_bus = get_session_event_bus()
+        self._observer_hooks = observer if getattr(observer, 'event_bus', None) is not self.event_bus else None
+        
         # Agent management
         self.agents: Dict[str, StatelessAgent] = {}
         self.active_agent: Optional[str] = None
         self.introduced_agents: set = set()  # Track which agents have introduced themselves
         
         # AI Loop management - each agent gets its own AI loop
-        self.ai_loop_manager = AILoopManager(default_config=config)
+        self.ai_loop_manager = AILoopManager(default_config=config, session_id=session_id)
         
         # Continuation tracking
         self._continuation_depth = 0  # Track continuation depth to prevent loops
@@ -183,6 +201,7 @@ class StatelessInteractiveSession:
         
         # Session state
         self.is_started = False
+        self._journal: Optional[StateJournal] = None  # Journal for save_session()
         
         # Lock for thread-safe operations
         self._lock = asyncio.Lock()
@@ -190,6 +209,9 @@ class StatelessInteractiveSession:
         # Initialize agent switch handler
         self.agent_switch_handler = AgentSwitchHandler(self)
         
+        # Builds likely-next agents in the background so switch_agent finds them ready
+        self.prewarmer = AgentPrewarmer(self)
+        
         # Initialize context tracking
         path_manager = PathManager()
         if project_path:
@@ -205,6 +227,7 @@ class StatelessInteractiveSession:
                 logger.error(f"Failed to initialize Debbie observer for session {session_id}: {e}")
         else:
             logger.debug(f"No observer provided for session {session_id}")
+        self.event_bus.publish(SessionEventType.SESSION_STARTED, session_id)
         
         # Initialize channel integration
         self.channel_integration = get_channel_integration()
@@ -228,23 +251,17 @@ class StatelessInteractiveSession:
         register_all_tools(path_manager)
         
         # Also register mailbox and async agent tools explicitly 
+        # (lazily, like register_all_tools: modules are imported on first use)
         from ai_whisperer.tools.tool_registry import get_tool_registry
-        from ai_whisperer.tools.send_mail_tool import SendMailTool
-        from ai_whisperer.tools.send_mail_with_switch_tool import SendMailWithSwitchTool
-        from ai_whisperer.tools.check_mail_tool import CheckMailTool
-        from ai_whisperer.tools.reply_mail_tool import ReplyMailTool
-        from ai_whisperer.tools.switch_agent_tool import SwitchAgentTool
-        from ai_whisperer.tools.agent_sleep_tool import AgentSleepTool
-        from ai_whisperer.tools.agent_wake_tool import AgentWakeTool
         
         tool_registry = get_tool_registry()
-        tool_registry.register_tool(SendMailTool())
-        tool_registry.register_tool(SendMailWithSwitchTool())
-        tool_registry.register_tool(CheckMailTool())
-        tool_registry.register_tool(ReplyMailTool())
-        tool_registry.register_tool(SwitchAgentTool())
-        tool_registry.register_tool(AgentSleepTool())
-        tool_registry.register_tool(AgentWakeTool())
+        tool_registry.register_lazy_tool("send_mail", "ai_whisperer.tools.send_mail_tool", "SendMailTool")
+        tool_registry.register_lazy_tool("send_mail_with_switch", "ai_whisperer.tools.send_mail_with_switch_tool", "SendMailWithSwitchTool")
+        tool_registry.register_lazy_tool("check_mail", "ai_whisperer.tools.check_mail_tool", "CheckMailTool")
+        tool_registry.register_lazy_tool("reply_mail", "ai_whisperer.tools.reply_mail_tool", "ReplyMailTool")
+        tool_registry.register_lazy_tool("switch_agent", "ai_whisperer.tools.switch_agent_tool", "SwitchAgentTool")
+        tool_registry.register_lazy_tool("agent_sleep", "ai_whisperer.tools.agent_sleep_tool", "AgentSleepTool")
+        tool_registry.register_lazy_tool("agent_wake", "ai_whisperer.tools.agent_wake_tool", "AgentWakeTool")
         
         logger.info("Registered all tools for interactive session including mailbox and agent switching tools")
     
@@ -264,11 +281,16 @@ class StatelessInteractiveSession:
         async with self._lock:
             return await self._create_agent_internal(agent_id, system_prompt, config)
     
-    async def _create_agent_internal(self, agent_id: str, system_prompt: str, config: Optional[AgentConfig] = None, agent_registry_info=None) -> StatelessAgent:
+    async def _create_agent_internal(self, agent_id: str, system_prompt: str, config: Optional[AgentConfig] = None, agent_registry_info=None, notify: bool = True) -> StatelessAgent:
         """Internal method to create agent - assumes lock is already held"""
         if agent_id in self.agents:
             raise ValueError(f"Agent '{agent_id}' already exists in session")
         
+        agent = self._build_agent(agent_id, system_prompt, config, agent_registry_info)
+        return await self._add_agent(agent_id, agent, system_prompt, notify=notify)
+    
+    def _build_agent(self, agent_id: str, system_prompt: str, config: Optional[AgentConfig] = None, agent_registry_info=None) -> StatelessAgent:
+        """Build an agent and its AI loop without adding it to the session."""
         # Create agent config if not provided
         if config is None:
             openrouter_config = self.config.get("openrouter", {})
@@ -299,6 +321,11 @@ class StatelessInteractiveSession:
         # Create stateless agent with registry info for tool filtering
         agent = StatelessAgent(config, context, ai_loop, agent_registry_info)
         logger.info(f"Created StatelessAgent for {agent_id}")
+        return agent
+    
+    async def _add_agent(self, agent_id: str, agent: StatelessAgent, system_prompt: str, notify: bool = True) -> StatelessAgent:
+        """Add a built agent to the session and, unless ``notify`` is False, notify the client."""
+        config = agent.config
         
         # Store agent
         self.agents[agent_id] = agent
@@ -322,10 +349,11 @@ class StatelessInteractiveSession:
             self.is_started = True
         
         # Notify client
-        await self.send_notification("agent.created", {
-            "agent_id": agent_id,
-            "active": self.active_agent == agent_id
-        })
+        if notify:
+            await self.send_notification("agent.created", {
+                "agent_id": agent_id,
+                "active": self.active_agent == agent_id
+            })
         
         return agent
     
@@ -388,6 +416,7 @@ class StatelessInteractiveSession:
         
         async with self._lock:
             logger.info(f"Acquired lock for switch_agent")
+            self.prewarmer.record_use()
             
             # If agent doesn't exist in session, try to create it from registry
             if agent_id not in self.agents and self.agent_registry:
@@ -398,135 +427,19 @@ class StatelessInteractiveSession:
                 
                 logger.info(f"Found agent info: {agent_info.name}")
                 
-                # Load the agent's prompt from the prompt system
-                system_prompt = f"You are {agent_info.name}, {agent_info.description}"  # Better fallback
-                prompt_source = "fallback"  # Track where the prompt came from
-                
-                if self.prompt_system and agent_info.prompt_file:
-                    logger.info(f"Attempting to load prompt file: {agent_info.prompt_file}")
-                    try:
-                        # Try with prompt system first to get proper tool instructions
-                        prompt_name = agent_info.prompt_file
-                        if prompt_name.endswith('.prompt.md'):
-                            prompt_name = prompt_name[:-10]  # Remove '.prompt.md'
-                        elif prompt_name.endswith('.md'):
-                            prompt_name = prompt_name[:-3]  # Remove '.md'
-                        
-                        logger.info(f"Trying to load prompt via PromptSystem with tools: agents/{prompt_name}")
-                        try:
-                            # Enable continuation feature for all agents
-                            self.prompt_system.enable_feature('continuation_protocol')
-                            
-                            # Enable mailbox debug mode for Debbie
-                            if agent_id.lower() in ['d', 'debbie']:
-                                logger.info(f"Enabling force_mailbox_tool debug mode for Debbie")
-                                # First enable the debug_options feature
-                                self.prompt_system.enable_feature('debug_options')
-                                # Then enable the specific debug option
-                                self.prompt_system.enable_debug_option('force_mailbox_tool')
-                            
-                            # Get model name for capability checking
-                            model_name = None
-                            if agent_info.ai_config and agent_info.ai_config.get("model"):
-                                model_name = agent_info.ai_config.get("model")
-                            else:
-                                model_name = self.config.get("openrouter", {}).get("model")
-                            
-                            # Include tools for debugging agents like Debbie
-                            include_tools = agent_id.lower() in ['d', 'debbie'] or 'debug' in agent_info.name.lower()
-                            
-                            # Get formatted prompt with model name for structured output support
-                            prompt = self.prompt_system.get_formatted_prompt(
-                                "agents", 
-                                prompt_name, 
-                                include_tools=include_tools,
-                                model_name=model_name
-                            )
-                            system_prompt = prompt
-                            prompt_source = f"prompt_system:agents/{prompt_name}" + (" (with_tools)" if include_tools else "")
-                            logger.info(f"✅ Successfully loaded prompt via PromptSystem for {agent_id} (tools included: {include_tools})")
-                            
-                            # Clear debug options after loading prompt to avoid affecting other agents
-                            if agent_id.lower() in ['d', 'debbie']:
-                                self.prompt_system.disable_debug_option('force_mailbox_tool')
-                                # Also disable the debug_options feature if no other debug options are active
-                                if not self.prompt_system.get_debug_options():
-                                    self.prompt_system.disable_feature('debug_options')
-                        except Exception as e1:
-                            logger.warning(f"⚠️ PromptSystem failed: {e1}, trying direct file read")
-                            # Try direct file read as fallback
-                            from pathlib import Path
-                            prompt_file = Path("prompts") / "agents" / agent_info.prompt_file
-                            if prompt_file.exists():
-                                with open(prompt_file, 'r', encoding='utf-8') as f:
-                                    base_prompt = f.read()
-                                
-                                # Add tool instructions manually for debugging agents
-                                if agent_id.lower() in ['d', 'debbie'] or 'debug' in agent_info.name.lower():
-                                    try:
-                                        from ai_whisperer.tools.tool_registry import get_tool_registry
-                                        tool_registry = get_tool_registry()
-                                        tool_instructions = tool_registry.get_all_ai_prompt_instructions()
-                                        if tool_instructions:
-                                            system_prompt = base_prompt + "\n\n## AVAILABLE TOOLS\n" + tool_instructions
-                                            prompt_source = f"direct_file:{prompt_file} (with_tools)"
-                                            logger.info(f"✅ Added tool instructions to direct file prompt for {agent_id}")
-                                        else:
-                                            system_prompt = base_prompt
-                                            prompt_source = f"direct_file:{prompt_file} (no_tools)"
-                                            logger.warning(f"⚠️ No tool instructions available for {agent_id}")
-                                    except Exception as e2:
-                                        logger.warning(f"⚠️ Failed to add tool instructions: {e2}")
-                                        system_prompt = base_prompt
-                                        prompt_source = f"direct_file:{prompt_file} (tools_failed)"
-                                else:
-                                    system_prompt = base_prompt
-                                    prompt_source = f"direct_file:{prompt_file}"
-                                
-                                logger.info(f"✅ Successfully loaded prompt via direct file read for {agent_id}: {prompt_file}")
-                            else:
-                                logger.warning(f"❌ Prompt file not found: {prompt_file}")
-                                logger.warning(f"❌ FALLBACK ACTIVATED: Using basic fallback prompt for {agent_info.name}")
-                                prompt_source = "basic_fallback"
-                                # Keep the fallback prompt
-                    except Exception as e:
-                        logger.error(f"❌ Failed to load prompt for agent {agent_id}: {e}")
-                        logger.error(f"❌ FALLBACK ACTIVATED: Using basic fallback prompt for {agent_info.name}")
-                        prompt_source = "error_fallback"
+                # Use the agent prewarmed in the background if there is one
+                agent = self.prewarmer.take(agent_id)
+                if agent is not None:
+                    logger.info(f"Using prewarmed agent '{agent_id}' ({agent_info.name})")
+                    await self._add_agent(agent_id, agent, agent.context.get_system_prompt())
                 else:
-                    logger.warning(f"⚠️ No prompt system or prompt file configured for {agent_id}, using basic fallback")
-                    prompt_source = "no_config_fallback"
-                
-                # Create agent config with AI settings if available
-                agent_config = None
-                if agent_info.ai_config:
-                    # Create AgentConfig with agent-specific AI settings
-                    openrouter_config = self.config.get("openrouter", {})
-                    agent_config = AgentConfig(
-                        name=agent_info.name,
-                        description=agent_info.description,
-                        system_prompt=system_prompt,
-                        model_name=agent_info.ai_config.get("model", openrouter_config.get("model", "openai/gpt-3.5-turbo")),
-                        provider=agent_info.ai_config.get("provider", "openrouter"),
-                        api_settings={
-                            "api_key": openrouter_config.get("api_key"),
-                            **agent_info.ai_config.get("api_settings", {})
-                        },
-                        generation_params={
-                            **openrouter_config.get("params", {}),
-                            **agent_info.ai_config.get("generation_params", {})
-                        },
-                        tool_permissions=[],
-                        tool_limits={},
-                        context_settings=agent_info.ai_config.get("context_settings", {"max_context_messages": 50})
-                    )
-                    logger.info(f"Created agent config with custom AI settings: model={agent_config.model_name}")
-                
-                # Create the agent with the loaded prompt and registry info
-                logger.info(f"📝 Agent {agent_id} ({agent_info.name}) prompt loaded from: {prompt_source}")
-                logger.info(f"About to create agent with prompt: {system_prompt[:200]}...")
-                await self._create_agent_internal(agent_id, system_prompt, config=agent_config, agent_registry_info=agent_info)
-                logger.info(f"Created agent '{agent_id}' from registry with system prompt")
+                    system_prompt, agent_config, prompt_source = self._load_agent_prompt(agent_id, agent_info)
+                    
+                    # Create the agent with the loaded prompt and registry info
+                    logger.info(f"📝 Agent {agent_id} ({agent_info.name}) prompt loaded from: {prompt_source}")
+                    logger.info(f"About to create agent with prompt: {system_prompt[:200]}...")
+                    await self._create_agent_internal(agent_id, system_prompt, config=agent_config, agent_registry_info=agent_info)
+                    logger.info(f"Created agent '{agent_id}' from registry with system prompt")
             
             # Verify agent exists now
             if agent_id not in self.agents:
@@ -547,16 +460,170 @@ class StatelessInteractiveSession:
             # Log the agent switch
             if old_agent:
                 self.agent_logger.log_agent_switch(old_agent, agent_id, "Agent switch requested")
+                if old_agent != agent_id:
+                    self.prewarmer.record_switch(old_agent, agent_id)
             
-            # Notify observer about agent switch
-            if old_agent and self.observer:
-                self.observer.on_agent_switch(self.session_id, old_agent, agent_id)
+            # Notify observers about agent switch
+            if old_agent:
+                self.event_bus.publish(SessionEventType.AGENT_SWITCH, self.session_id,
+                                       from_agent=old_agent, to_agent=agent_id)
+                if self._observer_hooks:
+                    self._observer_hooks.on_agent_switch(self.session_id, old_agent, agent_id)
             
             logger.info(f"Switched active agent from '{old_agent}' to '{agent_id}' in session {self.session_id}")
             
             # Have the agent introduce itself if not already introduced
             if self.active_agent and self.active_agent not in self.introduced_agents:
                 await self._agent_introduction()
+            
+            # Prewarm the agents most likely to be switched to from this one
+            self.prewarmer.schedule()
+    
+    def _load_agent_prompt(self, agent_id: str, agent_info) -> Tuple[str, Optional[AgentConfig], str]:
+        """
+        Build the system prompt and AgentConfig for a registry agent.
+        
+        Only reads the shared PromptSystem (features are passed per prompt),
+        so AgentPrewarmer can call it from a worker thread.
+        
+        Returns:
+            The system prompt, the agent config (None to use the session
+            defaults) and where the prompt came from
+        """
+        # Load the agent's prompt from the prompt system
+        system_prompt = f"You are {agent_info.name}, {agent_info.description}"  # Better fallback
+        prompt_source = "fallback"  # Track where the prompt came from
+        
+        if self.prompt_system and agent_info.prompt_file:
+            logger.info(f"Attempting to load prompt file: {agent_info.prompt_file}")
+            try:
+                # Try with prompt system first to get proper tool instructions
+                prompt_name = agent_info.prompt_file
+                if prompt_name.endswith('.prompt.md'):
+                    prompt_name = prompt_name[:-10]  # Remove '.prompt.md'
+                elif prompt_name.endswith('.md'):
+                    prompt_name = prompt_name[:-3]  # Remove '.md'
+                
+                logger.info(f"Trying to load prompt via PromptSystem with tools: agents/{prompt_name}")
+                try:
+                    # Continuation feature for all agents
+                    features = ['continuation_protocol']
+                    
+                    # Mailbox debug mode for Debbie
+                    debug_options = []
+                    if agent_id.lower() in ['d', 'debbie']:
+                        logger.info(f"Enabling force_mailbox_tool debug mode for Debbie")
+                        debug_options.append('force_mailbox_tool')
+                    
+                    # Get model name for capability checking
+                    model_name = None
+                    if agent_info.ai_config and agent_info.ai_config.get("model"):
+                        model_name = agent_info.ai_config.get("model")
+                    else:
+                        model_name = self.config.get("openrouter", {}).get("model")
+                    
+                    # Include tools for debugging agents like Debbie
+                    include_tools = agent_id.lower() in ['d', 'debbie'] or 'debug' in agent_info.name.lower()
+                    
+                    # Get formatted prompt with model name for structured output support
+                    prompt = self.prompt_system.get_formatted_prompt(
+                        "agents", 
+                        prompt_name, 
+                        include_tools=include_tools,
+                        model_name=model_name,
+                        features=features,
+                        debug_options=debug_options
+                    )
+                    system_prompt = prompt
+                    prompt_source = f"prompt_system:agents/{prompt_name}" + (" (with_tools)" if include_tools else "")
+                    logger.info(f"✅ Successfully loaded prompt via PromptSystem for {agent_id} (tools included: {include_tools})")
+                except Exception as e1:
+                    logger.warning(f"⚠️ PromptSystem failed: {e1}, trying direct file read")
+                    # Try direct file read as fallback
+                    from pathlib import Path
+                    prompt_file = Path("prompts") / "agents" / agent_info.prompt_file
+                    if prompt_file.exists():
+                        with open(prompt_file, 'r', encoding='utf-8') as f:
+                            base_prompt = f.read()
+                        
+                        # Add tool instructions manually for debugging agents
+                        if agent_id.lower() in ['d', 'debbie'] or 'debug' in agent_info.name.lower():
+                            try:
+                                from ai_whisperer.tools.tool_registry import get_tool_registry
+                                tool_registry = get_tool_registry()
+                                tool_instructions = tool_registry.get_all_ai_prompt_instructions()
+                                if tool_instructions:
+                                    system_prompt = base_prompt + "\n\n## AVAILABLE TOOLS\n" + tool_instructions
+                                    prompt_source = f"direct_file:{prompt_file} (with_tools)"
+                                    logger.info(f"✅ Added tool instructions to direct file prompt for {agent_id}")
+                                else:
+                                    system_prompt = base_prompt
+                                    prompt_source = f"direct_file:{prompt_file} (no_tools)"
+                                    logger.warning(f"⚠️ No tool instructions available for {agent_id}")
+                            except Exception as e2:
+                                logger.warning(f"⚠️ Failed to add tool instructions: {e2}")
+                                system_prompt = base_prompt
+                                prompt_source = f"direct_file:{prompt_file} (tools_failed)"
+                        else:
+                            system_prompt = base_prompt
+                            prompt_source = f"direct_file:{prompt_file}"
+                        
+                        logger.info(f"✅ Successfully loaded prompt via direct file read for {agent_id}: {prompt_file}")
+                    else:
+                        logger.warning(f"❌ Prompt file not found: {prompt_file}")
+                        logger.warning(f"❌ FALLBACK ACTIVATED: Using basic fallback prompt for {agent_info.name}")
+                        prompt_source = "basic_fallback"
+                        # Keep the fallback prompt
+            except Exception as e:
+                logger.error(f"❌ Failed to load prompt for agent {agent_id}: {e}")
+                logger.error(f"❌ FALLBACK ACTIVATED: Using basic fallback prompt for {agent_info.name}")
+                prompt_source = "error_fallback"
+        else:
+            logger.warning(f"⚠️ No prompt system or prompt file configured for {agent_id}, using basic fallback")
+            prompt_source = "no_config_fallback"
+        
+        # Create agent config with AI settings if available
+        agent_config = None
+        if agent_info.ai_config:
+            # Create AgentConfig with agent-specific AI settings
+            openrouter_config = self.config.get("openrouter", {})
+            agent_config = AgentConfig(
+                name=agent_info.name,
+                description=agent_info.description,
+                system_prompt=system_prompt,
+                model_name=agent_info.ai_config.get("model", openrouter_config.get("model", "openai/gpt-3.5-turbo")),
+                provider=agent_info.ai_config.get("provider", "openrouter"),
+                api_settings={
+                    "api_key": openrouter_config.get("api_key"),
+                    **agent_info.ai_config.get("api_settings", {})
+                },
+                generation_params={
+                    **openrouter_config.get("params", {}),
+                    **agent_info.ai_config.get("generation_params", {})
+                },
+                tool_permissions=[],
+                tool_limits={},
+                context_settings=agent_info.ai_config.get("context_settings", {"max_context_messages": 50})
+            )
+            logger.info(f"Created agent config with custom AI settings: model={agent_config.model_name}")
+        
+        return system_prompt, agent_config, prompt_source
+    
+    def _prewarm_prompt(self, agent_id: str) -> Optional[Tuple[Any, str, Optional[AgentConfig]]]:
+        """
+        Render a registry agent's prompt for AgentPrewarmer (runs in a worker thread).
+        
+        Returns:
+            The agent's registry info, system prompt and config, or None if
+            the agent is unknown or already in the session
+        """
+        if agent_id in self.agents or not self.agent_registry:
+            return None
+        agent_info = self.agent_registry.get_agent(agent_id.upper())
+        if not agent_info:
+            return None
+        system_prompt, agent_config, _ = self._load_agent_prompt(agent_id, agent_info)
+        return agent_info, system_prompt, agent_config
     
     async def send_user_message(self, message: str, is_continuation: bool = False):
         """
@@ -572,6 +639,7 @@ class StatelessInteractiveSession:
         
         if not self.is_started or not self.active_agent:
             raise RuntimeError(f"Session {self.session_id} is not started or no active agent")
+        self.prewarmer.record_use()
         
         try:
             if self.active_agent not in self.agents:
@@ -594,12 +662,13 @@ class StatelessInteractiveSession:
                     # Command was handled, return early
                     return
             
-            # Notify observer that message processing is starting
-            if self.observer:
-                self.observer.on_message_start(self.session_id, message)
+            # Notify observers that message processing is starting
+            self.event_bus.publish(SessionEventType.MESSAGE_START, self.session_id, message=message)
+            if self._observer_hooks:
+                self._observer_hooks.on_message_start(self.session_id, message)
             
             # Process @ references in the message
-            context_items = self.context_manager.process_message_references(
+            context_items = await self.context_manager.aprocess_message_references(
                 self.active_agent, 
                 message
             )
@@ -651,9 +720,11 @@ class StatelessInteractiveSession:
                 try:
                     # Check if WebSocket is still connected
                     if self.websocket is None:
-                        logger.warning(f"WebSocket disconnected for session {self.session_id}, skipping chunk")
+                        chunk_logger.warning("WebSocket disconnected for session %s, skipping chunk", self.session_id)
                         return
                     
+                    self.event_bus.publish(SessionEventType.STREAM_CHUNK, self.session_id, size=len(chunk))
+                    
                     # Accumulate chunks
                     chunk_buffer.append(chunk)
                     accumulated_content = ''.join(chunk_buffer)
@@ -670,7 +741,7 @@ class StatelessInteractiveSession:
                     
                     if contains_tool_calls:
                         # Tool calls are backend-only - don't stream to frontend
-                        logger.debug("Suppressing streaming for tool call response")
+                        chunk_logger.debug("Suppressing streaming for tool call response")
                         return
                     
                     # Parse structured content if it looks like JSON
@@ -686,7 +757,7 @@ class StatelessInteractiveSession:
                             # CRITICAL: If we have analysis/commentary but NO final field, this is likely
                             # a response that's building up to tool calls. Don't stream it.
                             if '"final"' not in content_stripped:
-                                logger.debug("Suppressing structured content without final field (likely tool call preparation)")
+                                chunk_logger.debug("Suppressing structured content without final field (likely tool call preparation)")
                                 return
                             
                             try:
@@ -708,7 +779,7 @@ class StatelessInteractiveSession:
                                     
                                     # Only send if we have new content to display
                                     if display_content and display_content != last_display_content:
-                                        await self.websocket.send_json({
+                                        await send_message(self.websocket, {
                                             "jsonrpc": "2.0",
                                             "method": "StreamingUpdate",
                                             "params": {
@@ -736,7 +807,7 @@ class StatelessInteractiveSession:
                                     # Unescape JSON string
                                     display_content = display_content.replace('\\n', '\n').replace('\\"', '"')
                                     if display_content and display_content != last_display_content:
-                                        await self.websocket.send_json({
+                                        await send_message(self.websocket, {
                                             "jsonrpc": "2.0",
                                             "method": "StreamingUpdate",
                                             "params": {
@@ -758,11 +829,11 @@ class StatelessInteractiveSession:
                     # IMPORTANT: If we detected JSON format but haven't processed it above,
                     # don't send raw JSON chunks to avoid exposing internal structure
                     if is_json_format:
-                        logger.debug("Suppressing raw JSON chunk to prevent wrapper exposure")
+                        chunk_logger.debug("Suppressing raw JSON chunk to prevent wrapper exposure")
                         return
                     
                     # For non-structured content, send as-is
-                    await self.websocket.send_json({
+                    await send_message(self.websocket, {
                         "jsonrpc": "2.0",
                         "method": "StreamingUpdate",
                         "params": {
@@ -778,7 +849,7 @@ class StatelessInteractiveSession:
                     
                     # Reduce debug spam - only log significant chunks
                     if len(accumulated_content) % 100 == 0:  # Log every 100 chars
-                        logger.debug(f"Sent streaming chunk: {len(chunk)} chars, total: {len(accumulated_content)}")
+                        chunk_logger.debug("Sent streaming chunk: %d chars, total: %d", len(chunk), len(accumulated_content))
                 except Exception as e:
                     logger.error(f"Error sending chunk: {e}")
                     # If we get a RuntimeError about closed connection, clear the WebSocket
@@ -925,7 +996,7 @@ class StatelessInteractiveSession:
                                 channel_msg['metadata']['responseFormat'] = 'json'
                                 channel_msg['metadata']['fullResponse'] = normalized_response
                             
-                            await self.websocket.send_json({
+                            await send_message(self.websocket, {
                                 "jsonrpc": "2.0",
                                 "method": "ChannelMessageNotification",
                                 "params": channel_msg
@@ -962,6 +1033,8 @@ class StatelessInteractiveSession:
                     self.agent_logger.log_agent_message(self.active_agent, "tool_call", 
                                                       f"{tool_name}({tool_args})", 
                                                       {"tool_id": tool_call.get('id')})
+                    self.event_bus.publish(SessionEventType.TOOL_CALL, self.session_id,
+                                           tool_name=tool_name, tool_id=tool_call.get('id'))
             
             # Reset continuation depth if this is not a continuation and we got a non-tool response
             if not is_continuation and (not result.get('tool_calls') or result.get('error')):
@@ -1051,7 +1124,7 @@ class StatelessInteractiveSession:
                                     channel_msg['metadata']['responseFormat'] = 'json'
                                     channel_msg['metadata']['fullResponse'] = normalized_tool_response
                                 
-                                await self.websocket.send_json({
+                                await send_message(self.websocket, {
                                     "jsonrpc": "2.0",
                                     "method": "ChannelMessageNotification",
                                     "params": channel_msg
@@ -1160,18 +1233,24 @@ class StatelessInteractiveSession:
             if not is_continuation:
                 self._continuation_depth = 0
             
-            # Notify observer that message processing completed
-            if self.observer:
-                self.observer.on_message_complete(self.session_id, result)
+            # Notify observers that message processing completed
+            self.event_bus.publish(SessionEventType.MESSAGE_COMPLETE, self.session_id, result=result)
+            if self._observer_hooks:
+                self._observer_hooks.on_message_complete(self.session_id, result)
+            
+            # Build likely-next agents while the user reads the reply
+            if not is_continuation:
+                self.prewarmer.schedule()
             
             return result
             
         except Exception as e:
             logger.error(f"Failed to send message to agent '{self.active_agent}' in session {self.session_id}: {e}", exc_info=True)
             
-            # Notify observer about the error
-            if self.observer:
-                self.observer.on_error(self.session_id, e)
+            # Notify observers about the error
+            self.event_bus.publish(SessionEventType.ERROR, self.session_id, error=e)
+            if self._observer_hooks:
+                self._observer_hooks.on_error(self.session_id, e)
             
             # Reset continuation depth on error
             if self._continuation_depth > 0:
@@ -1221,6 +1300,7 @@ class StatelessInteractiveSession:
             "is_started": self.is_started,
             "active_agent": self.active_agent,
             "introduced_agents": list(self.introduced_agents),
+            "project_path": self.project_path,
             "agents": {}
         }
         
@@ -1233,7 +1313,7 @@ class StatelessInteractiveSession:
                     "system_prompt": agent.config.system_prompt,
                     "model_name": agent.config.model_name,
                     "provider": agent.config.provider,
-                    "api_settings": agent.config.api_settings,
+                    # api_settings holds the API key; restore_state() takes it from the server config
                     "generation_params": agent.config.generation_params,
                     "tool_permissions": agent.config.tool_permissions,
                     "tool_limits": agent.config.tool_limits,
@@ -1248,34 +1328,58 @@ class StatelessInteractiveSession:
         
         return state
     
-    async def restore_state(self, state: Dict[str, Any]) -> None:
+    async def restore_state(self, state: Dict[str, Any], notify: bool = True) -> None:
         """
         Restore session state from a saved state dictionary.
+        
+        Agents known to the agent registry are rebuilt from it, so they get
+        their tool filtering and continuation strategy back; other agents are
+        rebuilt from their saved config. API settings are never saved and
+        come from the server config.
+        
+        Args:
+            state: State returned by get_state()
+            notify: Send agent.created for each restored agent; False when
+                the client already knows them (rehydration, resume)
         """
         self.is_started = state.get("is_started", False)
         self.introduced_agents = set(state.get("introduced_agents", []))
         
-        # Restore agents
-        for agent_id, agent_state in state.get("agents", {}).items():
-            # Reconstruct AgentConfig
-            config_data = agent_state["config"]
-            config = AgentConfig(**config_data)
-            
-            # Create agent with config
-            agent = await self.create_agent(
-                agent_id, 
-                config.system_prompt,
-                config
-            )
-            
-            # Restore context
-            context_data = agent_state.get("context", {})
-            for message in context_data.get("messages", []):
-                agent.context.store_message(message)
-            
-            # Restore metadata if supported
-            if hasattr(agent.context, '_metadata'):
-                agent.context._metadata = context_data.get("metadata", {})
+        async with self._lock:
+            for agent_id, agent_state in state.get("agents", {}).items():
+                config_data = dict(agent_state["config"])
+                saved_prompt = config_data.get("system_prompt")
+                
+                agent_info = self.agent_registry.get_agent(agent_id.upper()) if self.agent_registry else None
+                if agent_info:
+                    system_prompt, config, _ = self._load_agent_prompt(agent_id, agent_info)
+                else:
+                    config_data.pop("api_settings", None)  # Present in states saved by older versions
+                    config = AgentConfig(
+                        api_settings={"api_key": self.config.get("openrouter", {}).get("api_key")},
+                        **config_data
+                    )
+                    system_prompt = config.system_prompt
+                
+                agent = await self._create_agent_internal(
+                    agent_id,
+                    system_prompt,
+                    config,
+                    agent_registry_info=agent_info,
+                    notify=notify
+                )
+                
+                # Restore context
+                context_data = agent_state.get("context", {})
+                for message in context_data.get("messages", []):
+                    # retrieve_messages() includes the system prompt, which the new context already has
+                    if isinstance(message, dict) and message.get("role") == "system" and message.get("content") in (saved_prompt, system_prompt):
+                        continue
+                    agent.context.store_message(message)
+                
+                # Restore metadata if supported
+                if hasattr(agent.context, '_metadata'):
+                    agent.context._metadata = context_data.get("metadata", {})
         
         # Restore active agent
         if state.get("active_agent") and state["active_agent"] in self.agents:
@@ -1303,19 +1407,17 @@ class StatelessInteractiveSession:
         
         # Determine filepath
         if not filepath:
-            sessions_dir = Path(".WHISPER/sessions")
-            sessions_dir.mkdir(parents=True, exist_ok=True)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filepath = sessions_dir / f"{self.session_id}_{timestamp}.json"
+            filepath = Path(".WHISPER/sessions") / f"{self.session_id}.json"
         else:
             filepath = Path(filepath)
-            filepath.parent.mkdir(parents=True, exist_ok=True)
         
-        # Save to file
-        with open(filepath, 'w') as f:
-            json.dump(state, f, indent=2)
+        # Repeated saves to the same file append only what changed since the last save
+        if self._journal is None or self._journal.path != filepath:
+            await self._close_journal()
+            self._journal = StateJournal(filepath)
+        written = await asyncio.to_thread(self._journal.save, state)
         
-        logger.info(f"Saved session {self.session_id} to {filepath}")
+        logger.info(f"Saved session {self.session_id} to {filepath} ({written} bytes written)")
         
         # Send notification to client
         await self.send_notification("session.saved", {
@@ -1340,9 +1442,11 @@ class StatelessInteractiveSession:
         if not filepath.exists():
             raise FileNotFoundError(f"Session file not found: {filepath}")
         
-        # Load state from file
-        with open(filepath, 'r') as f:
-            state = json.load(f)
+        # Load state from the snapshot plus any journaled saves since
+        journal = StateJournal(filepath)
+        state = await asyncio.to_thread(journal.load)
+        await self._close_journal()
+        self._journal = journal
         
         # Restore the state
         await self.restore_state(state)
@@ -1358,6 +1462,15 @@ class StatelessInteractiveSession:
             "agent_count": len(self.agents)
         })
     
+    async def _close_journal(self) -> None:
+        """Fold the journal of the last saved session file into it, leaving plain JSON."""
+        if self._journal is None:
+            return
+        try:
+            await asyncio.to_thread(self._journal.close)
+        except OSError as e:
+            logger.error(f"Failed to compact session file {self._journal.path}: {e}")
+    
     async def _send_progress_notification(self, progress: dict, tool_names: list = None) -> None:
         """
         Send a progress notification via WebSocket.
@@ -1483,6 +1596,12 @@ class StatelessInteractiveSession:
         # Stop AI session
         await self.stop_ai_session()
         
+        # Drop prewarmed agents before their AI loops are cleaned up
+        await self.prewarmer.stop()
+        
+        # Leave a saved session file as plain JSON
+        await self._close_journal()
+        
         # Clear agents
         self.agents.clear()
         self.active_agent = None
@@ -1496,6 +1615,7 @@ class StatelessInteractiveSession:
             logger.info(f"Cleared channel data for session {self.session_id}")
         
         # Stop observing this session
+        self.event_bus.publish(SessionEventType.SESSION_ENDED, self.session_id)
         if self.observer:
             self.observer.stop_observing(self.session_id)
             logger.info(f"Stopped Debbie observer for session {self.session_id}")
@@ -1504,6 +1624,17 @@ class StatelessInteractiveSession:
         
         logger.info(f"Session {self.session_id} cleaned up")
     
+    async def release_resources(self) -> None:
+        """
+        Drop agents and AI loops after the session has been hibernated.
+        
+        Unlike cleanup(), channel history and observer state are kept, since
+        the session will be rehydrated under the same ID.
+        """
+        await self.prewarmer.stop()
+        self.agents.clear()
+        self.ai_loop_manager.cleanup()
+    
     async def send_notification(self, method: str, params: Any = None) -> None:
         """
         Send a JSON-RPC notification to the client.
@@ -1515,7 +1646,7 @@ class StatelessInteractiveSession:
                 "params": params
             }
             try:
-                await self.websocket.send_json(notification)
+                await send_message(self.websocket, notification)
             except Exception as e:
                 logger.error(f"Failed to send notification to client: {e}")
     
@@ -2046,135 +2177,52 @@ class StatelessSessionManager:
         self.websocket_sessions: Dict[WebSocket, str] = {}
         self._lock = asyncio.Lock()
         
+        # Shared store used to resume sessions across worker processes (None when single-process)
+        self.session_store = get_session_store()
+        self.worker_id = get_worker_id()
+        
+        # Moves idle sessions to disk (None when disabled)
+        self.hibernator = create_hibernator(self, config)
+        
+        # Archives and deletes old mail on a schedule (None when no retention is configured)
+        self.mailbox_retention = create_retention_scheduler(config)
+        
+        # Persist usage accounting only when the config asks for it
+        configure_usage_tracker(config)
+        
         # Register tools with the tool registry
         self._register_tools()
         
-        # Load persisted sessions
+        # Load persisted sessions (one file per worker: workers share the working directory)
+        self._sessions_journal = StateJournal(f"sessions.{self.worker_id}.json" if self.worker_id else "sessions.json")
         self._load_sessions()
     
     def _register_tools(self):
-        """Register tools with the ToolRegistry (copied from plan_runner.py)"""
+        """Register tools with the ToolRegistry.
+        
+        Tools are registered lazily so the server starts without importing
+        them; each tool's module is imported when the tool is first used.
+        """
         from ai_whisperer.tools.tool_registry import get_tool_registry
-        from ai_whisperer.tools.read_file_tool import ReadFileTool
-        from ai_whisperer.tools.write_file_tool import WriteFileTool
-        from ai_whisperer.tools.execute_command_tool import ExecuteCommandTool
-        from ai_whisperer.tools.list_directory_tool import ListDirectoryTool
-        from ai_whisperer.tools.search_files_tool import SearchFilesTool
-        from ai_whisperer.tools.get_file_content_tool import GetFileContentTool
+        from ai_whisperer.tools.tool_registration import register_all_tools
         from ai_whisperer.utils.path import PathManager
         
         tool_registry = get_tool_registry()
         
-        # Register file operation tools
-        tool_registry.register_tool(ReadFileTool())
-        tool_registry.register_tool(WriteFileTool())
-        tool_registry.register_tool(ExecuteCommandTool())
-        
-        # Register workspace browsing tools
-        tool_registry.register_tool(ListDirectoryTool())
-        tool_registry.register_tool(SearchFilesTool())
-        tool_registry.register_tool(GetFileContentTool())
-        
-        # Register advanced analysis tools
-        from ai_whisperer.tools.find_pattern_tool import FindPatternTool
-        from ai_whisperer.tools.workspace_stats_tool import WorkspaceStatsTool
+        # File, analysis, RFC, plan, codebase, web, debugging, mailbox and Agent E tools
+        register_all_tools(PathManager())
         
-        # These tools need PathManager instance
-        path_manager = PathManager()
-        tool_registry.register_tool(FindPatternTool(path_manager))
-        tool_registry.register_tool(WorkspaceStatsTool(path_manager))
-        
-        # Mailbox tools are already registered in __init__ method
-        # Skip duplicate registration here
-        
-        # Register RFC management tools
-        from ai_whisperer.tools.create_rfc_tool import CreateRFCTool
-        from ai_whisperer.tools.read_rfc_tool import ReadRFCTool
-        from ai_whisperer.tools.list_rfcs_tool import ListRFCsTool
-        from ai_whisperer.tools.update_rfc_tool import UpdateRFCTool
-        from ai_whisperer.tools.move_rfc_tool import MoveRFCTool
-        from ai_whisperer.tools.delete_rfc_tool import DeleteRFCTool
-        
-        tool_registry.register_tool(CreateRFCTool())
-        tool_registry.register_tool(ReadRFCTool())
-        tool_registry.register_tool(ListRFCsTool())
-        tool_registry.register_tool(UpdateRFCTool())
-        tool_registry.register_tool(MoveRFCTool())
-        tool_registry.register_tool(DeleteRFCTool())
-        
-        # Register codebase analysis tools
-        from ai_whisperer.tools.analyze_languages_tool import AnalyzeLanguagesTool
-        from ai_whisperer.tools.find_similar_code_tool import FindSimilarCodeTool
-        from ai_whisperer.tools.get_project_structure_tool import GetProjectStructureTool
-        
-        tool_registry.register_tool(AnalyzeLanguagesTool())
-        tool_registry.register_tool(FindSimilarCodeTool())
-        tool_registry.register_tool(GetProjectStructureTool())
-        
-        # Register web research tools
-        from ai_whisperer.tools.web_search_tool import WebSearchTool
-        from ai_whisperer.tools.fetch_url_tool import FetchURLTool
-        
-        tool_registry.register_tool(WebSearchTool())
-        tool_registry.register_tool(FetchURLTool())
-        
-        # Register plan management tools
-        from ai_whisperer.tools.prepare_plan_from_rfc_tool import PreparePlanFromRFCTool
-        from ai_whisperer.tools.save_generated_plan_tool import SaveGeneratedPlanTool
-        from ai_whisperer.tools.list_plans_tool import ListPlansTool
-        from ai_whisperer.tools.read_plan_tool import ReadPlanTool
-        from ai_whisperer.tools.update_plan_from_rfc_tool import UpdatePlanFromRFCTool
-        from ai_whisperer.tools.move_plan_tool import MovePlanTool
-        from ai_whisperer.tools.delete_plan_tool import DeletePlanTool
-        
-        tool_registry.register_tool(PreparePlanFromRFCTool())
-        tool_registry.register_tool(SaveGeneratedPlanTool())
-        tool_registry.register_tool(ListPlansTool())
-        tool_registry.register_tool(ReadPlanTool())
-        tool_registry.register_tool(UpdatePlanFromRFCTool())
-        tool_registry.register_tool(MovePlanTool())
-        tool_registry.register_tool(DeletePlanTool())
-        
-        # Register Debbie's debugging and monitoring tools
-        try:
-            from ai_whisperer.tools.session_health_tool import SessionHealthTool
-            from ai_whisperer.tools.session_analysis_tool import SessionAnalysisTool
-            from ai_whisperer.tools.monitoring_control_tool import MonitoringControlTool
-            from ai_whisperer.tools.session_inspector_tool import SessionInspectorTool
-            from ai_whisperer.tools.message_injector_tool import MessageInjectorTool
-            from ai_whisperer.tools.workspace_validator_tool import WorkspaceValidatorTool
-            from ai_whisperer.tools.python_executor_tool import PythonExecutorTool
-            from ai_whisperer.tools.script_parser_tool import ScriptParserTool
-            from ai_whisperer.tools.batch_command_tool import BatchCommandTool
-            from ai_whisperer.tools.ai_loop_inspector_tool import AILoopInspectorTool
-            
-            tool_registry.register_tool(SessionHealthTool())
-            tool_registry.register_tool(SessionAnalysisTool())
-            tool_registry.register_tool(MonitoringControlTool())
-            tool_registry.register_tool(SessionInspectorTool())
-            tool_registry.register_tool(MessageInjectorTool())
-            tool_registry.register_tool(WorkspaceValidatorTool())
-            tool_registry.register_tool(PythonExecutorTool())
-            tool_registry.register_tool(ScriptParserTool())
-            tool_registry.register_tool(BatchCommandTool(tool_registry))
-            tool_registry.register_tool(AILoopInspectorTool())
-            
-            logger.info("Successfully registered Debbie's debugging and batch processing tools")
-        except ImportError as e:
-            logger.warning(f"Some debugging/batch tools not available: {e}")
-        except Exception as e:
-            logger.error(f"Failed to register debugging/batch tools: {e}")
+        # Debbie's AI loop inspector is only used by the interactive server
+        tool_registry.register_lazy_tool("ai_loop_inspector", "ai_whisperer.tools.ai_loop_inspector_tool", "AILoopInspectorTool")
         
-        logger.info(f"Registered {len(tool_registry.get_all_tools())} tools with ToolRegistry")
+        logger.info(f"Registered {tool_registry.get_registered_tool_count()} tools with ToolRegistry")
         
     def _load_sessions(self):
         """Load persisted session IDs from file"""
         try:
-            session_file = Path("sessions.json")
-            if session_file.exists():
-                with open(session_file, 'r') as f:
-                    data = json.load(f)
-                    logger.info(f"Loaded {len(data.get('sessions', []))} persisted sessions")
+            data = self._sessions_journal.load()
+            if data is not None:
+                logger.info(f"Loaded {len(data.get('sessions', []))} persisted sessions")
         except Exception as e:
             logger.error(f"Failed to load sessions: {e}")
     
@@ -2185,9 +2233,8 @@ class StatelessSessionManager:
                 "sessions": list(self.sessions.keys()),
                 "timestamp": datetime.now().isoformat()
             }
-            with open("sessions.json", 'w') as f:
-                json.dump(data, f, indent=2)
-            logger.info(f"Saved {len(self.sessions)} sessions to sessions.json")
+            self._sessions_journal.save(data)
+            logger.info(f"Saved {len(self.sessions)} sessions to {self._sessions_journal.path}")
         except Exception as e:
             logger.error(f"Failed to save sessions: {e}")
     
@@ -2272,6 +2319,99 @@ class StatelessSessionManager:
         """Get a session by ID"""
         return self.sessions.get(session_id)
     
+    async def persist_session(self, session_id: str) -> None:
+        """
+        Save a session's state to the shared session store, if one is configured.
+        
+        Args:
+            session_id: The session ID
+        """
+        session = self.sessions.get(session_id)
+        if not self.session_store or not session:
+            return
+        try:
+            state = await session.get_state()
+            await asyncio.to_thread(self.session_store.save, session_id, state, self.worker_id)
+        except Exception as e:
+            logger.error(f"Failed to persist session {session_id}: {e}")
+    
+    async def resume_session(self, session_id: str, websocket: Optional[WebSocket] = None) -> Optional[StatelessInteractiveSession]:
+        """
+        Get a session, restoring it from the shared session store if this
+        process does not hold it (e.g. its worker crashed).
+        
+        Args:
+            session_id: The session ID
+            websocket: Connection to attach the session to
+            
+        Returns:
+            The session, or None if it is unknown
+        """
+        async with self._lock:
+            session = self.sessions.get(session_id)
+            if not session:
+                session = await self._rehydrate_session(session_id, websocket)
+            if session and websocket is not None:
+                session.websocket = websocket
+                self.websocket_sessions[websocket] = session_id
+            return session
+    
+    async def _rehydrate_session(self, session_id: str, websocket: Optional[WebSocket]) -> Optional[StatelessInteractiveSession]:
+        """Rebuild a session from hibernated state, or else from the shared session store."""
+        start = time.perf_counter()
+        hibernated = False
+        state = None
+        if self.hibernator:
+            state = await self.hibernator.load_state(session_id)
+            hibernated = state is not None
+        if state is None and self.session_store:
+            state = await asyncio.to_thread(self.session_store.load, session_id)
+        if state is None:
+            return None
+        
+        if websocket is None:
+            # Reattach the connection the session had before it hibernated
+            websocket = next((ws for ws, sid in self.websocket_sessions.items() if sid == session_id), None)
+        session = StatelessInteractiveSession(
+            session_id,
+            websocket,
+            self.config,
+            self.agent_registry,
+            self.prompt_system,
+            project_path=state.get("project_path"),
+            observer=self.observer
+        )
+        await session.restore_state(state, notify=False)
+        self.sessions[session_id] = session
+        
+        if self.session_store and self.worker_id:
+            await asyncio.to_thread(self.session_store.claim, session_id, self.worker_id)
+        if hibernated:
+            await self.hibernator.rehydrated(session_id, time.perf_counter() - start)
+        else:
+            logger.info(f"Resumed session {session_id} from the session store")
+        return session
+    
+    @asynccontextmanager
+    async def session_activity(self, websocket: Optional[WebSocket] = None, session_id: Optional[str] = None):
+        """
+        Wrap a request: rehydrate the session it refers to if it is hibernated,
+        and keep the session from hibernating while the request runs.
+        
+        Args:
+            websocket: Connection the request arrived on
+            session_id: Session named in the request, if any
+        """
+        session_id = session_id or self.websocket_sessions.get(websocket)
+        if not self.hibernator or not isinstance(session_id, str):
+            yield
+            return
+        async with self.hibernator.activity(session_id):
+            if session_id not in self.sessions and self.hibernator.store.contains(session_id):
+                owner_websocket = websocket if self.websocket_sessions.get(websocket) == session_id else None
+                await self.resume_session(session_id, owner_websocket)
+            yield
+    
     def get_session_by_websocket(self, websocket: WebSocket) -> Optional[StatelessInteractiveSession]:
         """Get a session by WebSocket connection"""
         session_id = self.websocket_sessions.get(websocket)
@@ -2279,15 +2419,30 @@ class StatelessSessionManager:
             return self.sessions.get(session_id)
         return None
     
-    async def cleanup_session(self, session_id: str) -> None:
+    async def cleanup_session(self, session_id: str, forget: bool = False) -> None:
         """
         Clean up a session and remove it from tracking.
         
+        A hibernated session is cleaned up too: its state file and idle
+        tracking are deleted.
+        
         Args:
             session_id: The session ID to clean up
+            forget: Also delete the session from the shared session store,
+                so it cannot be resumed
         """
         async with self._lock:
             session = self.sessions.get(session_id)
+            hibernated = session is None and self.hibernator is not None and self.hibernator.is_hibernated(session_id)
+            if forget and self.session_store:
+                # Also when another worker holds the session
+                try:
+                    await asyncio.to_thread(self.session_store.delete, session_id)
+                except Exception as e:
+                    logger.error(f"Failed to delete session {session_id} from the session store: {e}")
+            if not session and not hibernated:
+                return
+            
             if session:
                 try:
                     await session.cleanup()
@@ -2296,20 +2451,28 @@ class StatelessSessionManager:
                     # Continue with cleanup even if session cleanup fails
                 
                 del self.sessions[session_id]
-                
-                # Remove WebSocket mapping
-                ws_to_remove = None
-                for ws, sid in self.websocket_sessions.items():
-                    if sid == session_id:
-                        ws_to_remove = ws
-                        break
-                if ws_to_remove:
-                    del self.websocket_sessions[ws_to_remove]
-                
-                logger.info(f"Cleaned up session {session_id}")
-                
-                # Save sessions
-                self._save_sessions()
+            
+            # Remove WebSocket mapping
+            ws_to_remove = None
+            for ws, sid in self.websocket_sessions.items():
+                if sid == session_id:
+                    ws_to_remove = ws
+                    break
+            if ws_to_remove:
+                del self.websocket_sessions[ws_to_remove]
+            
+            logger.info(f"Cleaned up {'hibernated ' if hibernated else ''}session {session_id}")
+            
+            if self.hibernator:
+                self.hibernator.forget(session_id)
+            if self.session_store and not forget:
+                try:
+                    await asyncio.to_thread(self.session_store.release, session_id)
+                except Exception as e:
+                    logger.error(f"Failed to update session store for {session_id}: {e}")
+            
+            # Save sessions
+            self._save_sessions()
     
     async def cleanup_websocket(self, websocket: WebSocket) -> None:
         """
@@ -2327,6 +2490,29 @@ class StatelessSessionManager:
         session_ids = list(self.sessions.keys())
         for session_id in session_ids:
             await self.cleanup_session(session_id)
+        
+        # Persist any usage accounting still buffered in memory
+        await asyncio.to_thread(get_usage_tracker().flush)
+    
+    async def shutdown(self) -> None:
+        """
+        Stop background work when the server shuts down. Sessions are kept
+        (hibernated and stored sessions stay resumable); sessions.json and
+        saved session files are left as plain, current JSON.
+        """
+        if self.hibernator:
+            await self.hibernator.stop()
+        if self.mailbox_retention:
+            await self.mailbox_retention.stop()
+        for session in list(self.sessions.values()):
+            await session._close_journal()
+        try:
+            await asyncio.to_thread(self._sessions_journal.close)
+        except OSError as e:
+            logger.error(f"Failed to compact {self._sessions_journal.path}: {e}")
+        
+        # Persist any usage accounting still buffered in memory
+        await asyncio.to_thread(get_usage_tracker().flush)
     
     def get_active_sessions_count(self) -> int:
         """Get the count of active sessions"""
@@ -0,0 +1,381 @@
+"""
+Multi-process supervisor for the interactive server.
+
+A single server process holds every session and shares one GIL, so a
+session busy with CPU-bound tool work slows down everyone else. The
+supervisor runs N copies of ``interactive_server.main`` as worker
+processes on private ports and accepts client WebSockets on the public
+port, relaying each connection to one worker.
+
+- Routing: a connection naming a session (``/ws?sessionId=...`` or a
+  ``sessionId`` param in its first request) goes to the worker that owns
+  the session. New connections go to the worker with fewest connections.
+- Resume: workers save session state to a shared SQLiteSessionStore. When
+  a worker dies, the supervisor releases its sessions and restarts it;
+  clients reconnect with their session id and are routed to a live worker,
+  which restores the session from the store (``session.resume``).
+- Metrics: ``GET /metrics`` reports per-worker process, connection and
+  session counts alongside each worker's own ``/worker/metrics``.
+
+Usage:
+    python -m interactive_server.supervisor --workers 4 --port 8000 --config config/main.yaml
+
+Arguments the supervisor does not recognise are passed to every worker.
+
+Key Components:
+- WorkerProcess: One worker's process handle and counters
+- Supervisor: Spawns, monitors and routes to workers
+- create_app: FastAPI app exposing /ws and /metrics
+"""
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
+import websockets
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+
+from ai_whisperer.utils import json_codec
+from .session_store import SESSION_STORE_ENV, WORKER_ID_ENV, SQLiteSessionStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SESSION_STORE = ".WHISPER/sessions.db"
+
+# Close codes sent to the client when its worker is unavailable
+CLOSE_TRY_AGAIN_LATER = 1013
+CLOSE_SERVICE_RESTART = 1012
+
+
+@dataclass
+class WorkerProcess:
+    """A worker process and its routing counters."""
+
+    worker_id: str
+    port: int
+    process: Optional[subprocess.Popen] = None
+    started_at: float = 0.0
+    restarts: int = 0
+    last_exit_code: Optional[int] = None
+    active_connections: int = 0
+    total_connections: int = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    @property
+    def url(self) -> str:
+        return f"ws://127.0.0.1:{self.port}/ws"
+
+
+def _session_id_from_frame(data: str) -> Optional[str]:
+    """Extract params.sessionId from a JSON-RPC frame, if present."""
+    try:
+        msg = json_codec.loads(data)
+    except (TypeError, ValueError):
+        return None
+    params = msg.get("params") if isinstance(msg, dict) else None
+    session_id = params.get("sessionId") if isinstance(params, dict) else None
+    return session_id if isinstance(session_id, str) and session_id else None
+
+
+def _rendezvous_score(session_id: str, worker_id: str) -> int:
+    digest = hashlib.blake2b(f"{session_id}:{worker_id}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+class Supervisor:
+    """Runs worker processes and relays client connections to them."""
+
+    def __init__(self, num_workers: int, worker_base_port: int, store: SQLiteSessionStore,
+                 config_path: str, worker_args: Sequence[str] = (),
+                 connect_timeout: float = 30.0):
+        """
+        Initialize the supervisor.
+
+        Args:
+            num_workers: Number of worker processes
+            worker_base_port: Port of the first worker; others follow consecutively
+            store: Session store shared with the workers
+            config_path: Configuration file passed to each worker
+            worker_args: Extra command line arguments for each worker
+            connect_timeout: Seconds to wait for a (re)starting worker to accept
+        """
+        self.store = store
+        self.config_path = config_path
+        self.worker_args = list(worker_args)
+        self.connect_timeout = connect_timeout
+        self.workers: List[WorkerProcess] = [
+            WorkerProcess(worker_id=f"w{i}", port=worker_base_port + i) for i in range(max(1, num_workers))
+        ]
+        self._monitor_task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def worker_command(self, worker: WorkerProcess) -> List[str]:
+        """Command line that starts a worker."""
+        return [
+            sys.executable, "-m", "interactive_server.main",
+            "--host", "127.0.0.1", "--port", str(worker.port), "--config", self.config_path,
+            *self.worker_args,
+        ]
+
+    def spawn(self, worker: WorkerProcess) -> None:
+        """Start (or restart) a worker process."""
+        env = dict(os.environ)
+        env[SESSION_STORE_ENV] = str(self.store.path.resolve())
+        env[WORKER_ID_ENV] = worker.worker_id
+        worker.process = subprocess.Popen(self.worker_command(worker), env=env)
+        worker.started_at = time.time()
+        logger.info(f"Started worker {worker.worker_id} (pid {worker.process.pid}) on port {worker.port}")
+
+    def start(self) -> None:
+        """Start every worker."""
+        self._stopping = False
+        for worker in self.workers:
+            self.spawn(worker)
+
+    def check_workers(self) -> List[WorkerProcess]:
+        """
+        Restart workers that have exited, releasing their sessions first.
+
+        Returns:
+            The workers that were restarted
+        """
+        restarted = []
+        for worker in self.workers:
+            if self._stopping or worker.process is None or worker.alive:
+                continue
+            worker.last_exit_code = worker.process.poll()
+            released = self.store.release_worker(worker.worker_id)
+            logger.error(
+                f"Worker {worker.worker_id} exited with code {worker.last_exit_code}; "
+                f"released {released} sessions, restarting"
+            )
+            worker.restarts += 1
+            self.spawn(worker)
+            restarted.append(worker)
+        return restarted
+
+    async def monitor(self, interval: float = 1.0) -> None:
+        """Watch workers until stopped, restarting any that exit."""
+        while not self._stopping:
+            try:
+                await asyncio.to_thread(self.check_workers)
+            except Exception as e:
+                logger.error(f"Error checking workers: {e}")
+            await asyncio.sleep(interval)
+
+    def select_worker(self, session_id: Optional[str] = None, owner: Optional[str] = None) -> WorkerProcess:
+        """
+        Choose the worker for a connection.
+
+        Args:
+            session_id: Session the client wants, if any
+            owner: Worker owning that session according to the store
+
+        Returns:
+            The session's owner if alive; otherwise, for a known session id, a
+            worker chosen by rendezvous hashing (so every retry picks the same
+            one); for new connections, the least loaded worker
+
+        Raises:
+            RuntimeError: If no worker is running
+        """
+        alive = [w for w in self.workers if w.alive]
+        if not alive:
+            raise RuntimeError("No interactive server workers are running")
+        if owner:
+            for worker in alive:
+                if worker.worker_id == owner:
+                    return worker
+        if session_id:
+            return max(alive, key=lambda w: _rendezvous_score(session_id, w.worker_id))
+        return min(alive, key=lambda w: (w.active_connections, w.total_connections))
+
+    async def _connect(self, worker: WorkerProcess):
+        deadline = time.monotonic() + self.connect_timeout
+        while True:
+            try:
+                return await websockets.connect(worker.url, max_size=None)
+            except (OSError, websockets.exceptions.WebSocketException):
+                # The worker may still be starting up
+                if time.monotonic() >= deadline or not worker.alive:
+                    raise
+                await asyncio.sleep(0.25)
+
+    async def proxy(self, websocket: WebSocket) -> None:
+        """Relay a client connection to a worker until either side closes."""
+        await websocket.accept()
+        first_frame = None
+        session_id = websocket.query_params.get("sessionId")
+        if not session_id:
+            try:
+                first_frame = await websocket.receive_text()
+            except WebSocketDisconnect:
+                return
+            session_id = _session_id_from_frame(first_frame)
+
+        owner = await asyncio.to_thread(self.store.owner, session_id) if session_id else None
+        try:
+            worker = self.select_worker(session_id, owner)
+            upstream = await self._connect(worker)
+        except Exception as e:
+            logger.error(f"No worker available for connection (session {session_id}): {e}")
+            await websocket.close(code=CLOSE_TRY_AGAIN_LATER)
+            return
+
+        worker.active_connections += 1
+        worker.total_connections += 1
+        logger.debug(f"Routing connection for session {session_id} to worker {worker.worker_id}")
+
+        async def client_to_worker():
+            if first_frame is not None:
+                await upstream.send(first_frame)
+            while True:
+                await upstream.send(await websocket.receive_text())
+
+        async def worker_to_client():
+            async for message in upstream:
+                if isinstance(message, bytes):
+                    await websocket.send_bytes(message)
+                else:
+                    await websocket.send_text(message)
+
+        tasks = [asyncio.create_task(client_to_worker()), asyncio.create_task(worker_to_client())]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            try:
+                await upstream.close()
+                # Tell the client to reconnect if its worker went away
+                await websocket.close(code=CLOSE_SERVICE_RESTART if not worker.alive else 1000)
+            except Exception:
+                pass
+            finally:
+                worker.active_connections -= 1
+
+    async def collect_metrics(self) -> Dict[str, Any]:
+        """Per-worker metrics, including each live worker's own report."""
+        async def fetch(client: httpx.AsyncClient, worker: WorkerProcess):
+            if not worker.alive:
+                return None
+            try:
+                response = await client.get(f"http://127.0.0.1:{worker.port}/worker/metrics")
+                return response.json()
+            except Exception as e:
+                logger.debug(f"Could not fetch metrics from worker {worker.worker_id}: {e}")
+                return None
+
+        async with httpx.AsyncClient(timeout=1.0) as client:
+            reports = await asyncio.gather(*(fetch(client, w) for w in self.workers))
+        stored = await asyncio.to_thread(self.store.counts_by_worker)
+
+        now = time.time()
+        workers = []
+        for worker, report in zip(self.workers, reports):
+            workers.append({
+                "worker_id": worker.worker_id,
+                "port": worker.port,
+                "pid": worker.process.pid if worker.process else None,
+                "alive": worker.alive,
+                "uptime": now - worker.started_at if worker.alive else 0.0,
+                "restarts": worker.restarts,
+                "last_exit_code": worker.last_exit_code,
+                "active_connections": worker.active_connections,
+                "total_connections": worker.total_connections,
+                "stored_sessions": stored.get(worker.worker_id, 0),
+                "process": report,
+            })
+        return {"workers": workers, "unowned_sessions": stored.get(None, 0)}
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Terminate every worker."""
+        self._stopping = True
+        for worker in self.workers:
+            if worker.alive:
+                worker.process.terminate()
+        for worker in self.workers:
+            if worker.process is None:
+                continue
+            try:
+                worker.process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                worker.process.kill()
+
+
+def create_app(supervisor: Supervisor) -> FastAPI:
+    """Create the public-facing app for a supervisor."""
+    app = FastAPI()
+
+    @app.on_event("startup")
+    async def on_startup():
+        supervisor.start()
+        supervisor._monitor_task = asyncio.create_task(supervisor.monitor())
+
+    @app.on_event("shutdown")
+    async def on_shutdown():
+        supervisor.stop()
+        if supervisor._monitor_task:
+            supervisor._monitor_task.cancel()
+
+    @app.websocket("/ws")
+    async def websocket_endpoint(websocket: WebSocket):
+        await supervisor.proxy(websocket)
+
+    @app.get("/metrics")
+    async def metrics():
+        return await supervisor.collect_metrics()
+
+    return app
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="AIWhisperer multi-process interactive server")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes")
+    parser.add_argument("--host", default="127.0.0.1", help="Host to bind to")
+    parser.add_argument("--port", type=int, default=8000, help="Public port to bind to")
+    parser.add_argument("--worker-base-port", type=int, default=None,
+                        help="Port of the first worker (default: port + 1)")
+    parser.add_argument("--config", default=os.environ.get("AIWHISPERER_CONFIG", "config/main.yaml"),
+                        help="Configuration file path")
+    parser.add_argument("--session-store", default=os.environ.get(SESSION_STORE_ENV) or DEFAULT_SESSION_STORE,
+                        help="SQLite database shared by the workers")
+    parser.add_argument("--session-ttl", type=float, default=24.0,
+                        help="Prune sessions not saved for this many hours at startup")
+    args, worker_args = parser.parse_known_args(argv)
+
+    from ai_whisperer.core.logging import setup_logging
+    setup_logging(port=args.port)
+
+    store = SQLiteSessionStore(args.session_store)
+    pruned = store.prune(args.session_ttl * 3600)
+    if pruned:
+        logger.info(f"Pruned {pruned} expired sessions from {args.session_store}")
+
+    supervisor = Supervisor(
+        num_workers=args.workers,
+        worker_base_port=args.worker_base_port or args.port + 1,
+        store=store,
+        config_path=args.config,
+        worker_args=worker_args,
+    )
+
+    import uvicorn
+    logger.info(f"Starting supervisor on {args.host}:{args.port} with {len(supervisor.workers)} workers")
+    uvicorn.run(create_app(supervisor), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()